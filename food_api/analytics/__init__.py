@@ -0,0 +1,8 @@
+"""
+FoodieExpress Offline Analytics
+Columnar order snapshots for ad hoc analysis outside production MongoDB
+"""
+
+from .order_snapshot import OrderSnapshot, OrderSnapshotWriter
+
+__all__ = ['OrderSnapshot', 'OrderSnapshotWriter']
@@ -0,0 +1,312 @@
+"""
+Columnar Order Snapshot
+Memory-mapped NumPy arrays of Order/OrderItem data for offline analytics
+
+A snapshot is a directory of `.npy` column files plus two JSON files:
+
+    manifest.json            format version, row counts, export time
+    dictionaries.json        code -> value tables for users, restaurants, items, statuses
+    orders/order_date.npy    datetime64[s]   one row per order
+    orders/user.npy          int32           code into dictionaries["users"]
+    orders/restaurant.npy    int32           code into dictionaries["restaurants"]
+    orders/status.npy        int8            code into dictionaries["statuses"]
+    orders/total_price.npy   float64
+    orders/basket_size.npy   int32           total quantity of items in the order
+    items/order_row.npy      int64           row of the parent order in orders/*
+    items/item.npy           int32           code into dictionaries["items"]
+    items/quantity.npy       int32
+    items/price.npy          float64         unit price at the time of order
+
+Strings are dictionary-encoded so every column is a fixed-width array that
+`np.load(mmap_mode="r")` maps without reading it into memory. Group-bys are
+`np.bincount` over the codes, so questions over millions of orders run in
+seconds on a laptop without touching MongoDB.
+"""
+
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.models import item_key
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+ORDER_COLUMNS: Dict[str, np.dtype] = {
+    "order_date": np.dtype("datetime64[s]"),
+    "user": np.dtype(np.int32),
+    "restaurant": np.dtype(np.int32),
+    "status": np.dtype(np.int8),
+    "total_price": np.dtype(np.float64),
+    "basket_size": np.dtype(np.int32),
+}
+
+ITEM_COLUMNS: Dict[str, np.dtype] = {
+    "order_row": np.dtype(np.int64),
+    "item": np.dtype(np.int32),
+    "quantity": np.dtype(np.int32),
+    "price": np.dtype(np.float64),
+}
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+class _Dictionary:
+    """Assigns dense integer codes to distinct values in first-seen order."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class OrderSnapshotWriter:
+    """
+    Streams order documents into a snapshot directory.
+
+    Batches are appended to raw column files so memory use stays bounded by
+    the batch size; `close()` converts them into `.npy` files.
+
+    Usage:
+        writer = OrderSnapshotWriter("snapshots/orders-2025-10-16")
+        for batch in batches:
+            writer.add_orders(batch)
+        manifest = writer.close()
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if self.path.exists():
+            raise FileExistsError(f"Snapshot directory already exists: {self.path}")
+        (self.path / "orders").mkdir(parents=True)
+        (self.path / "items").mkdir(parents=True)
+
+        self.users = _Dictionary()
+        self.restaurants = _Dictionary()
+        self.items = _Dictionary()
+        self.statuses = _Dictionary()
+        self.order_count = 0
+        self.item_count = 0
+        self._raw = {
+            ("orders", name): open(self.path / "orders" / f"{name}.bin", "wb") for name in ORDER_COLUMNS
+        }
+        self._raw.update({
+            ("items", name): open(self.path / "items" / f"{name}.bin", "wb") for name in ITEM_COLUMNS
+        })
+
+    def add_orders(self, orders: Iterable[dict]) -> int:
+        """
+        Append a batch of raw order documents (as returned by Motor).
+
+        Returns:
+            Number of orders appended
+        """
+        order_cols = {name: [] for name in ORDER_COLUMNS}
+        item_cols = {name: [] for name in ITEM_COLUMNS}
+
+        for order in orders:
+            row = self.order_count + len(order_cols["user"])
+            restaurant_name = order["restaurant_name"]
+            basket_size = 0
+            for item in order.get("items", []):
+                item_cols["order_row"].append(row)
+                item_cols["item"].append(self.items.encode(item_key(restaurant_name, item["item_name"])))
+                item_cols["quantity"].append(item["quantity"])
+                item_cols["price"].append(item["price"])
+                basket_size += item["quantity"]
+
+            order_cols["order_date"].append(order["order_date"])
+            order_cols["user"].append(self.users.encode(str(order["user_id"])))
+            order_cols["restaurant"].append(self.restaurants.encode(restaurant_name))
+            order_cols["status"].append(self.statuses.encode(order.get("status", "placed")))
+            order_cols["total_price"].append(order["total_price"])
+            order_cols["basket_size"].append(basket_size)
+
+        for name, dtype in ORDER_COLUMNS.items():
+            np.asarray(order_cols[name], dtype=dtype).tofile(self._raw[("orders", name)])
+        for name, dtype in ITEM_COLUMNS.items():
+            np.asarray(item_cols[name], dtype=dtype).tofile(self._raw[("items", name)])
+
+        appended = len(order_cols["user"])
+        self.order_count += appended
+        self.item_count += len(item_cols["order_row"])
+        return appended
+
+    def close(self) -> dict:
+        """Convert the raw column files to `.npy` and write the manifest."""
+        for (table, name), raw in self._raw.items():
+            raw.close()
+            dtype = (ORDER_COLUMNS if table == "orders" else ITEM_COLUMNS)[name]
+            raw_path = self.path / table / f"{name}.bin"
+            rows = self.order_count if table == "orders" else self.item_count
+            column = np.lib.format.open_memmap(self.path / table / f"{name}.npy", mode="w+", dtype=dtype, shape=(rows,))
+            if rows:
+                column[:] = np.memmap(raw_path, dtype=dtype, mode="r", shape=(rows,))
+            column.flush()
+            del column
+            raw_path.unlink()
+
+        dictionaries = {
+            "users": self.users.values,
+            "restaurants": self.restaurants.values,
+            "items": self.items.values,
+            "statuses": self.statuses.values,
+        }
+        (self.path / "dictionaries.json").write_text(json.dumps(dictionaries), encoding="utf-8")
+
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "exported_at": datetime.utcnow().isoformat(),
+            "orders": self.order_count,
+            "items": self.item_count,
+        }
+        (self.path / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        return manifest
+
+    def abort(self) -> None:
+        """Close the raw files and remove the partial snapshot."""
+        for raw in self._raw.values():
+            raw.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class OrderSnapshot:
+    """
+    Read-only, memory-mapped view of a snapshot with vectorized queries.
+
+    Example:
+        snap = OrderSnapshot("snapshots/orders-2025-10-16")
+        counts, edges = snap.basket_size_histogram()
+        heatmap = snap.revenue_by_hour_of_week()   # 7 x 24, Monday first
+        snap.top_items(restaurant="Swati Snacks", limit=10)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / "manifest.json").read_text(encoding="utf-8"))
+        if self.manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format: {self.manifest.get('format_version')}")
+        self.dictionaries: Dict[str, List[str]] = json.loads(
+            (self.path / "dictionaries.json").read_text(encoding="utf-8")
+        )
+        self.orders = {name: np.load(self.path / "orders" / f"{name}.npy", mmap_mode="r") for name in ORDER_COLUMNS}
+        self.items = {name: np.load(self.path / "items" / f"{name}.npy", mmap_mode="r") for name in ITEM_COLUMNS}
+
+    def __len__(self) -> int:
+        return self.manifest["orders"]
+
+    # ---------- filtering ----------
+
+    def order_mask(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        restaurant: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> np.ndarray:
+        """Boolean mask over orders: start <= order_date < end, optional restaurant/status."""
+        mask = np.ones(len(self), dtype=bool)
+        if start is not None:
+            mask &= self.orders["order_date"] >= np.datetime64(start, "s")
+        if end is not None:
+            mask &= self.orders["order_date"] < np.datetime64(end, "s")
+        if restaurant is not None:
+            mask &= self.orders["restaurant"] == self._code("restaurants", restaurant)
+        if status is not None:
+            mask &= self.orders["status"] == self._code("statuses", status)
+        return mask
+
+    def _code(self, dictionary: str, value: str) -> int:
+        try:
+            return self.dictionaries[dictionary].index(value)
+        except ValueError:
+            return -1  # Matches nothing
+
+    # ---------- group-bys ----------
+
+    def group_sum(self, by: str, value: Optional[str] = None, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sum an order column (or count orders when value is None) per code of `by`.
+
+        Args:
+            by: "user", "restaurant" or "status"
+            value: Order column to sum, e.g. "total_price" or "basket_size"
+            mask: Optional order mask from `order_mask()`
+
+        Returns:
+            Array indexed by code (see `dictionaries`)
+        """
+        keys = np.asarray(self.orders[by])
+        weights = None if value is None else np.asarray(self.orders[value], dtype=np.float64)
+        if mask is not None:
+            keys = keys[mask]
+            weights = None if weights is None else weights[mask]
+        minlength = len(self.dictionaries[f"{by}s"])
+        return np.bincount(keys, weights=weights, minlength=minlength)
+
+    def revenue_by_restaurant(self, mask: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Total revenue per restaurant, highest first."""
+        revenue = self.group_sum("restaurant", "total_price", mask)
+        order = np.argsort(-revenue, kind="stable")
+        names = self.dictionaries["restaurants"]
+        return [(names[i], round(float(revenue[i]), 2)) for i in order if revenue[i] > 0]
+
+    def revenue_by_hour_of_week(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Revenue per (weekday, hour) in UTC as a 7 x 24 array, Monday first.
+        """
+        seconds = np.asarray(self.orders["order_date"]).astype(np.int64)
+        revenue = np.asarray(self.orders["total_price"])
+        if mask is not None:
+            seconds, revenue = seconds[mask], revenue[mask]
+        days = seconds // 86400
+        weekday = (days + 3) % 7  # 1970-01-01 was a Thursday
+        hour = (seconds // 3600) % 24
+        return np.bincount(weekday * 24 + hour, weights=revenue, minlength=7 * 24).reshape(7, 24)
+
+    def basket_size_histogram(self, bins=None, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Histogram of items per order.
+
+        Args:
+            bins: Passed to np.histogram; defaults to one bin per basket size
+
+        Returns:
+            (counts, bin_edges)
+        """
+        sizes = np.asarray(self.orders["basket_size"])
+        if mask is not None:
+            sizes = sizes[mask]
+        if bins is None:
+            top = int(sizes.max()) if sizes.size else 0
+            bins = np.arange(0.5, top + 1.5)
+        return np.histogram(sizes, bins=bins)
+
+    def item_mix(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Quantity sold per item code (see dictionaries["items"])."""
+        item_codes = np.asarray(self.items["item"])
+        quantities = np.asarray(self.items["quantity"], dtype=np.float64)
+        if mask is not None:
+            keep = mask[np.asarray(self.items["order_row"])]
+            item_codes, quantities = item_codes[keep], quantities[keep]
+        return np.bincount(item_codes, weights=quantities, minlength=len(self.dictionaries["items"]))
+
+    def top_items(self, limit: int = 10, restaurant: Optional[str] = None, mask: Optional[np.ndarray] = None) -> List[Tuple[str, int]]:
+        """Best-selling items by quantity, optionally for one restaurant."""
+        if restaurant is not None:
+            restaurant_mask = self.order_mask(restaurant=restaurant)
+            mask = restaurant_mask if mask is None else mask & restaurant_mask
+        quantities = self.item_mix(mask)
+        top = np.argsort(-quantities, kind="stable")[:limit]
+        names = self.dictionaries["items"]
+        return [(names[i], int(quantities[i])) for i in top if quantities[i] > 0]
@@ -0,0 +1,131 @@
+"""
+Order Archive Module
+Cold tier for finished orders
+
+Orders in a terminal status (delivered or cancelled) that are older than
+ORDER_ARCHIVE_AFTER_DAYS are moved from `orders` to `orders_archive` by a
+background job, in batches:
+
+1. read a batch of candidates through the (status, order_date) index,
+2. upsert them into the archive (idempotent if the job dies mid-batch),
+3. delete them from `orders`.
+
+`orders` and its indexes therefore only hold recent and open orders, which is
+what nearly all reads touch. Read endpoints include archived orders only when
+asked to (`include_archived=true`). Analytics that rebuild from history
+(rollup reconcile, time-series backfill, recommendations, user activity)
+read both collections.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from beanie import PydanticObjectId
+from bson import ObjectId
+from pymongo import ReplaceOne
+
+from .models import Order, ArchivedOrder
+from .order_status import ALLOWED_TRANSITIONS
+from . import structured_logging
+
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "30"))
+ORDER_ARCHIVE_INTERVAL_SECONDS = int(os.getenv("ORDER_ARCHIVE_INTERVAL_SECONDS", "3600"))
+ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "500"))
+# Pause between batches so archiving never saturates the database
+ORDER_ARCHIVE_BATCH_PAUSE_SECONDS = float(os.getenv("ORDER_ARCHIVE_BATCH_PAUSE_SECONDS", "0.2"))
+
+# Statuses an order can never leave
+ARCHIVE_STATUSES = [status for status, targets in ALLOWED_TRANSITIONS.items() if not targets]
+
+logger = structured_logging.get_logger("archive")
+
+
+async def archive_batch(cutoff: datetime, batch_size: int = ORDER_ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move one batch of finished orders placed before `cutoff` to the archive.
+
+    Returns:
+        Number of orders moved
+    """
+    query = {"status": {"$in": ARCHIVE_STATUSES}, "order_date": {"$lt": cutoff}}
+    documents = await Order.get_motor_collection().find(query).limit(batch_size).to_list(length=batch_size)
+    if not documents:
+        return 0
+
+    archived_at = datetime.utcnow()
+    await ArchivedOrder.get_motor_collection().bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, {**doc, "archived_at": archived_at}, upsert=True) for doc in documents],
+        ordered=False
+    )
+    await Order.get_motor_collection().delete_many({
+        "_id": {"$in": [doc["_id"] for doc in documents]},
+        "status": {"$in": ARCHIVE_STATUSES}
+    })
+    return len(documents)
+
+
+async def archive_cold_orders(
+    after_days: int = ORDER_ARCHIVE_AFTER_DAYS,
+    batch_size: int = ORDER_ARCHIVE_BATCH_SIZE,
+    pause_seconds: float = ORDER_ARCHIVE_BATCH_PAUSE_SECONDS
+) -> int:
+    """
+    Move every finished order older than `after_days` to the archive.
+
+    Returns:
+        Number of orders moved
+    """
+    cutoff = datetime.utcnow() - timedelta(days=after_days)
+    moved = 0
+    while True:
+        count = await archive_batch(cutoff, batch_size)
+        moved += count
+        if count < batch_size:
+            return moved
+        await asyncio.sleep(pause_seconds)
+
+
+async def run_periodic_archive(interval_seconds: int = ORDER_ARCHIVE_INTERVAL_SECONDS) -> None:
+    """Background task: archive cold orders at startup, then every `interval_seconds`."""
+    while True:
+        try:
+            moved = await archive_cold_orders()
+            if moved:
+                logger.info("orders_archived", extra={"fields": {
+                    "moved": moved, "older_than_days": ORDER_ARCHIVE_AFTER_DAYS
+                }})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("order_archive_failed", exc_info=True)
+        await asyncio.sleep(interval_seconds)
+
+
+# ==================== READS ====================
+
+async def find_orders(query: dict, include_archived: bool = False) -> List[Order]:
+    """Orders matching `query`, from the archive too when requested (newest first)."""
+    orders = await Order.find(query).to_list()
+    if include_archived:
+        orders += await ArchivedOrder.find(query).to_list()
+        orders.sort(key=lambda order: order.order_date, reverse=True)
+    return orders
+
+
+async def get_order(order_id: PydanticObjectId, include_archived: bool = False) -> Optional[Order]:
+    """One order by id, falling back to the archive when requested."""
+    order = await Order.get(order_id)
+    if order is None and include_archived:
+        order = await ArchivedOrder.get(order_id)
+    return order
+
+
+async def has_ordered(user_id: ObjectId, restaurant_name: str) -> bool:
+    """Whether the user has any order, hot or archived, from the restaurant."""
+    query = {"user_id": user_id, "restaurant_name": restaurant_name}
+    for collection in (Order.get_motor_collection(), ArchivedOrder.get_motor_collection()):
+        if await collection.find_one(query, projection={"_id": 1}) is not None:
+            return True
+    return False
@@ -0,0 +1,343 @@
+"""
+Autocomplete Module
+As-you-type suggestions for restaurant names, cuisines and dish names
+
+Each kind has a PrefixIndex: every searchable key in one sorted list (the
+whole name plus each later word, so "dosa" finds "Masala Dosa") and a sparse
+table of range-maximum positions over the keys' weights. A prefix is a
+contiguous range of the sorted list (two bisections); the best suggestions
+are taken from that range in weight order with a heap of sub-ranges, each
+maximum found in O(1) by the sparse table. A query costs
+O(log n + k log k) however many keys share the prefix.
+
+Weights are popularity from the catalog: a dish counts 1 + its rating count
+at every restaurant serving it (dishes are merged by name across
+restaurants), a restaurant 1 + the rating counts of its menu, a cuisine the
+number of its restaurants.
+
+Catalog writes are applied incrementally: the worker's own admin writes
+call `catch_up()`, and a background task polls the catalog change feed every
+AUTOCOMPLETE_POLL_SECONDS for writes made by other workers. A change updates
+the live entries in O(menu size) and marks them dirty; queries skip dirty
+keys in the index and look them up in a small sorted overlay instead. Once more than
+AUTOCOMPLETE_REBUILD_THRESHOLD entries are dirty the indexes are rebuilt in
+a worker thread and swapped in.
+
+benchmarks/bench_autocomplete.py measures build time, query latency and
+update cost at 10k restaurants and 500k dishes.
+"""
+
+import asyncio
+import heapq
+import os
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import Restaurant
+from . import catalog, structured_logging
+
+AUTOCOMPLETE_POLL_SECONDS = float(os.getenv("AUTOCOMPLETE_POLL_SECONDS", "5"))
+AUTOCOMPLETE_REBUILD_THRESHOLD = int(os.getenv("AUTOCOMPLETE_REBUILD_THRESHOLD", "500"))
+
+KINDS = ("restaurant", "cuisine", "item")
+
+# Sorts after every character a key can contain
+_PREFIX_END = "\U0010ffff"
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+logger = structured_logging.get_logger("autocomplete")
+
+
+def normalize(text: str) -> str:
+    """'  Dal-Baati  Churma ' -> 'dalbaati churma'"""
+    return " ".join(_PUNCTUATION.sub("", text.casefold()).split())
+
+
+def search_keys(key: str) -> List[str]:
+    """A normalized name and each of its word suffixes."""
+    keys = [key]
+    for position, char in enumerate(key):
+        if char == " ":
+            keys.append(key[position + 1:])
+    return keys
+
+
+# ==================== PREFIX INDEX ====================
+
+class PrefixIndex:
+    """
+    Immutable sorted keys with a sparse table for top-weight range queries.
+
+    Rows are (search key, entry id, weight); one entry may have several
+    search keys. Memory is O(n log n) 32-bit positions for n keys.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, int]]):
+        rows = sorted(rows)
+        self.keys = [row[0] for row in rows]
+        self.ids = [row[1] for row in rows]
+        self.weights = np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows))
+        # table[j][i]: position of the largest weight in keys[i:i + 2**j]
+        self._table = [np.arange(len(rows), dtype=np.int32)]
+        span = 1
+        while span * 2 <= len(rows):
+            previous = self._table[-1]
+            left, right = previous[:-span], previous[span:]
+            self._table.append(np.where(self.weights[left] >= self.weights[right], left, right).astype(np.int32))
+            span *= 2
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _argmax(self, lo: int, hi: int) -> int:
+        level = (hi - lo).bit_length() - 1
+        first = int(self._table[level][lo])
+        second = int(self._table[level][hi - (1 << level)])
+        # Ties go to the earlier (alphabetically first) key
+        return first if self.weights[first] >= self.weights[second] else second
+
+    def range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + _PREFIX_END)
+
+    def iter_top(self, prefix: str) -> Iterator[str]:
+        """Entry ids under `prefix`, highest weight first (ids may repeat)."""
+        lo, hi = self.range(prefix)
+        if lo >= hi:
+            return
+        best = self._argmax(lo, hi)
+        heap = [(-int(self.weights[best]), best, lo, hi)]
+        while heap:
+            _, position, lo, hi = heapq.heappop(heap)
+            yield self.ids[position]
+            for sub_lo, sub_hi in ((lo, position), (position + 1, hi)):
+                if sub_lo < sub_hi:
+                    best = self._argmax(sub_lo, sub_hi)
+                    heapq.heappush(heap, (-int(self.weights[best]), best, sub_lo, sub_hi))
+
+
+def build_index(entries: Iterable[Tuple[str, int]]) -> PrefixIndex:
+    """PrefixIndex over (entry key, weight) pairs."""
+    return PrefixIndex((search_key, key, weight) for key, weight in entries for search_key in search_keys(key))
+
+
+# ==================== SUGGESTER ====================
+
+class Entry:
+    """A suggestion and its aggregated popularity."""
+
+    __slots__ = ("text", "weight", "restaurants")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.weight = 0
+        self.restaurants = 0
+
+
+def contributions(restaurant: dict) -> List[Tuple[str, str, str, int]]:
+    """(kind, key, text, weight) entries one restaurant adds to the index."""
+    items = {}
+    menu_weight = 0
+    for item in restaurant.get("items") or []:
+        name = item.get("item_name") or ""
+        key = normalize(name)
+        weight = 1 + (item.get("total_ratings") or 0)
+        menu_weight += item.get("total_ratings") or 0
+        if key and key not in items:
+            items[key] = ("item", key, name.strip(), weight)
+
+    result = list(items.values())
+    for kind, text, weight in (("restaurant", restaurant["name"], 1 + menu_weight),
+                               ("cuisine", restaurant.get("cuisine") or "", 1)):
+        key = normalize(text)
+        if key:
+            result.append((kind, key, text.strip(), weight))
+    return result
+
+
+class Suggester:
+    """Live suggestion entries, their indexes and the dirty overlay."""
+
+    def __init__(self, rebuild_threshold: int = AUTOCOMPLETE_REBUILD_THRESHOLD,
+                 poll_interval: float = AUTOCOMPLETE_POLL_SECONDS):
+        self.rebuild_threshold = rebuild_threshold
+        self.poll_interval = poll_interval
+        self.version: Optional[int] = None
+        self._entries: Dict[str, Dict[str, Entry]] = {kind: {} for kind in KINDS}
+        self._indexes: Dict[str, PrefixIndex] = {kind: PrefixIndex([]) for kind in KINDS}
+        # Entry keys changed since their index was built
+        self._dirty: Dict[str, set] = {kind: set() for kind in KINDS}
+        # Sorted (search key, entry key) rows of the dirty entries, built on first query
+        self._overlay: Dict[str, Optional[List[Tuple[str, str]]]] = {kind: [] for kind in KINDS}
+        self._by_restaurant: Dict[str, List[Tuple[str, str, str, int]]] = {}
+        # Serializes catalog sync, reloads and rebuilds
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def dirty_count(self) -> int:
+        return sum(len(dirty) for dirty in self._dirty.values())
+
+    # ----- entries -----
+
+    def upsert(self, restaurant: dict) -> None:
+        self.remove(restaurant["name"])
+        added = contributions(restaurant)
+        self._by_restaurant[restaurant["name"]] = added
+        for kind, key, text, weight in added:
+            entry = self._entries[kind].get(key)
+            if entry is None:
+                entry = self._entries[kind][key] = Entry(text)
+            entry.weight += weight
+            entry.restaurants += 1
+            self._mark_dirty(kind, key)
+
+    def remove(self, restaurant_name: str) -> None:
+        removed = self._by_restaurant.pop(restaurant_name, [])
+        for kind, key, _, weight in removed:
+            entry = self._entries[kind][key]
+            entry.weight -= weight
+            entry.restaurants -= 1
+            if entry.restaurants == 0:
+                del self._entries[kind][key]
+            self._mark_dirty(kind, key)
+
+    def _mark_dirty(self, kind: str, key: str) -> None:
+        if key not in self._dirty[kind]:
+            self._dirty[kind].add(key)
+            self._overlay[kind] = None
+
+    def apply(self, change: dict) -> None:
+        """Apply one catalog change (see app/catalog.py)."""
+        if change["op"] == "delete":
+            self.remove(change["restaurant_name"])
+        else:
+            self.upsert(change["restaurant"])
+
+    @classmethod
+    def built(cls, restaurants: Iterable[dict]) -> "Suggester":
+        """A suggester holding `restaurants`, with its indexes built."""
+        fresh = cls()
+        for restaurant in restaurants:
+            fresh.upsert(restaurant)
+        fresh._indexes = {kind: build_index(fresh._weights(kind)) for kind in KINDS}
+        fresh._dirty = {kind: set() for kind in KINDS}
+        fresh._overlay = {kind: [] for kind in KINDS}
+        return fresh
+
+    def _adopt(self, fresh: "Suggester", version: int) -> None:
+        # No await in between: queries never see a half-replaced catalog
+        self._entries, self._by_restaurant = fresh._entries, fresh._by_restaurant
+        self._indexes, self._dirty, self._overlay = fresh._indexes, fresh._dirty, fresh._overlay
+        self.version = version
+
+    def load(self, restaurants: Iterable[dict], version: int) -> None:
+        """Replace everything with a full catalog at `version`."""
+        self._adopt(Suggester.built(restaurants), version)
+
+    def _weights(self, kind: str) -> List[Tuple[str, int]]:
+        return [(key, entry.weight) for key, entry in self._entries[kind].items()]
+
+    async def rebuild(self) -> None:
+        """Rebuild the indexes from the live entries in a worker thread (hold the lock)."""
+        snapshot = {kind: self._weights(kind) for kind in KINDS}
+        self._indexes = await asyncio.to_thread(lambda: {kind: build_index(snapshot[kind]) for kind in KINDS})
+        self._dirty = {kind: set() for kind in KINDS}
+        self._overlay = {kind: [] for kind in KINDS}
+
+    # ----- queries -----
+
+    def suggest(self, query: str, limit: int = 5, kinds: Sequence[str] = KINDS) -> Dict[str, List[dict]]:
+        """Top `limit` suggestions per kind for a typed prefix."""
+        prefix = normalize(query)
+        return {kind: self._suggest_kind(kind, prefix, limit) if prefix else [] for kind in kinds}
+
+    def _suggest_kind(self, kind: str, prefix: str, limit: int) -> List[dict]:
+        entries, dirty = self._entries[kind], self._dirty[kind]
+        found: Dict[str, Entry] = {}
+        for key in self._indexes[kind].iter_top(prefix):
+            # Dirty keys have stale index weights; they come from the overlay
+            if key in dirty or key in found:
+                continue
+            found[key] = entries[key]
+            if len(found) >= limit:
+                break
+        overlay = self._overlay[kind]
+        if overlay is None:
+            overlay = self._overlay[kind] = sorted(
+                (search_key, key) for key in dirty for search_key in search_keys(key)
+            )
+        position = bisect_left(overlay, (prefix,))
+        while position < len(overlay) and overlay[position][0].startswith(prefix):
+            key = overlay[position][1]
+            if key in entries:
+                found[key] = entries[key]
+            position += 1
+
+        ranked = sorted(found.items(), key=lambda pair: (-pair[1].weight, pair[0]))[:limit]
+        return [
+            {"text": entry.text, "score": entry.weight, "restaurants": entry.restaurants}
+            for _, entry in ranked
+        ]
+
+    # ----- catalog sync -----
+
+    async def _load_catalog(self) -> None:
+        # Version first: changes made during the read are replayed (upserts are idempotent)
+        version = await catalog.current_version()
+        restaurants = await Restaurant.get_motor_collection().find(
+            {}, projection={"_id": 0, "name": 1, "cuisine": 1, "items.item_name": 1, "items.total_ratings": 1}
+        ).to_list(length=None)
+        self._adopt(await asyncio.to_thread(Suggester.built, restaurants), version)
+        logger.info("autocomplete_loaded", extra={"fields": {
+            "version": version, "restaurants": len(restaurants), "items": len(self._entries["item"])
+        }})
+
+    async def sync(self) -> None:
+        """Apply catalog changes since the loaded version; reload if they expired."""
+        async with self._lock:
+            if self.version is None:
+                await self._load_catalog()
+            else:
+                has_more = True
+                while has_more:
+                    try:
+                        result = await catalog.changes_since(self.version, limit=500)
+                    except catalog.ChangesExpired:
+                        await self._load_catalog()
+                        break
+                    for change in result["changes"]:
+                        self.apply(change)
+                    self.version = result["version"]
+                    has_more = result["has_more"]
+            if self.dirty_count() > self.rebuild_threshold:
+                await self.rebuild()
+
+    async def catch_up(self) -> None:
+        """sync(), logging failures instead of raising; the poll task retries."""
+        try:
+            await self.sync()
+        except Exception:
+            logger.error("autocomplete_sync_failed", exc_info=True)
+
+    async def start(self) -> None:
+        await self.catch_up()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.catch_up()
+
+
+suggester = Suggester()
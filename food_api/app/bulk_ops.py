@@ -0,0 +1,219 @@
+"""
+Admin Bulk Operations Module
+Runs batches of typed moderation/operations changes in a few round trips
+
+A request mixes operations of several kinds. They are grouped per target
+collection and each group runs as:
+
+1. one read prefetching every targeted document (existence, current state
+   and the fields the rollups need),
+2. one unordered bulk_write,
+
+after which per-operation results are reported in request order. Derived
+data is kept consistent in the same pass: rollup deltas are merged into a
+single RollupBatch queued as one background job, caches are invalidated
+once, and order status events are published for every cancelled order.
+"""
+
+from collections import defaultdict
+from typing import Dict, List
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DeleteOne, UpdateOne
+
+from .models import Order, Review, User
+from .schemas import BulkOperationResult, BulkOperationsResponse
+from . import events, order_status, rollups, task_queue, user_activity
+
+CANCELLED_STATUS = rollups.CANCELLED_STATUS
+
+
+def _object_id(value: str):
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+class _Results:
+    """Per-operation results, filled in as each group completes."""
+
+    def __init__(self, operations: list):
+        self.items = [
+            BulkOperationResult(index=index, op=operation.op, ok=False)
+            for index, operation in enumerate(operations)
+        ]
+
+    def ok(self, index: int, affected: int = 1) -> None:
+        self.items[index].ok = True
+        self.items[index].affected = affected
+        self.items[index].detail = None
+
+    def fail(self, index: int, detail: str) -> None:
+        self.items[index].ok = False
+        self.items[index].detail = detail
+
+    def response(self) -> BulkOperationsResponse:
+        succeeded = sum(1 for item in self.items if item.ok)
+        return BulkOperationsResponse(results=self.items, succeeded=succeeded, failed=len(self.items) - succeeded)
+
+
+async def _cancel_orders(indexed_ops: list, results: _Results, batch: rollups.RollupBatch) -> list:
+    """cancel_order and cancel_restaurant_orders: one read, one bulk_write, one read-back."""
+    order_ops: Dict[int, ObjectId] = {}
+    restaurant_ops: Dict[int, str] = {}
+    for index, operation in indexed_ops:
+        if operation.op == "cancel_order":
+            object_id = _object_id(operation.order_id)
+            if object_id is None:
+                results.fail(index, "not_found")
+            else:
+                order_ops[index] = object_id
+        else:
+            restaurant_ops[index] = operation.restaurant_name
+
+    cancellable = order_status.previous_statuses(CANCELLED_STATUS)
+    conditions = []
+    if order_ops:
+        conditions.append({"_id": {"$in": list(order_ops.values())}})
+    if restaurant_ops:
+        conditions.append({
+            "restaurant_name": {"$in": list(set(restaurant_ops.values()))},
+            "status": {"$in": cancellable}
+        })
+    if not conditions:
+        return []
+
+    documents = {
+        doc["_id"]: doc
+        async for doc in Order.get_motor_collection().find({"$or": conditions})
+    }
+    updated, failures = await order_status.transition_documents(list(documents.values()), CANCELLED_STATUS, cancellable)
+    cancelled_ids = {order.id for order, _ in updated}
+    for order, previous_status in updated:
+        batch.status_change(order, previous_status, CANCELLED_STATUS)
+
+    for index, object_id in order_ops.items():
+        if object_id not in documents:
+            results.fail(index, "not_found")
+        elif object_id in cancelled_ids:
+            results.ok(index)
+        else:
+            results.fail(index, failures.get(object_id, "not_cancelled"))
+
+    cancelled_per_restaurant: Dict[str, int] = defaultdict(int)
+    for order, _ in updated:
+        cancelled_per_restaurant[order.restaurant_name] += 1
+    for index, restaurant_name in restaurant_ops.items():
+        # An order listed both by id and via its restaurant is counted under both
+        results.ok(index, affected=cancelled_per_restaurant.get(restaurant_name, 0))
+
+    return updated
+
+
+async def _delete_reviews(indexed_ops: list, results: _Results, batch: rollups.RollupBatch) -> None:
+    """delete_review: one read, one bulk_write."""
+    targets: Dict[int, ObjectId] = {}
+    for index, operation in indexed_ops:
+        object_id = _object_id(operation.review_id)
+        if object_id is None:
+            results.fail(index, "not_found")
+        else:
+            targets[index] = object_id
+    if not targets:
+        return
+
+    collection = Review.get_motor_collection()
+    reviews = {
+        doc["_id"]: doc
+        async for doc in collection.find(
+            {"_id": {"$in": list(targets.values())}},
+            {"restaurant_name": 1, "review_date": 1, "rating": 1}
+        )
+    }
+    if reviews:
+        await collection.bulk_write([DeleteOne({"_id": review_id}) for review_id in reviews], ordered=False)
+
+    counted = set()
+    for index, object_id in targets.items():
+        review = reviews.get(object_id)
+        if review is None:
+            results.fail(index, "not_found")
+            continue
+        results.ok(index)
+        if object_id not in counted:
+            counted.add(object_id)
+            batch.review_removed(review["restaurant_name"], review["review_date"], review["rating"])
+
+
+async def _set_user_roles(indexed_ops: list, results: _Results, current_admin_id) -> bool:
+    """set_user_role: one read, one bulk_write. Returns whether any role changed."""
+    targets: Dict[int, tuple] = {}
+    for index, operation in indexed_ops:
+        object_id = _object_id(operation.user_id)
+        if object_id is None:
+            results.fail(index, "not_found")
+        elif object_id == current_admin_id:
+            results.fail(index, "cannot_change_own_role")
+        else:
+            targets[index] = (object_id, operation.role)
+    if not targets:
+        return False
+
+    collection = User.get_motor_collection()
+    existing = {
+        doc["_id"]: doc["role"]
+        async for doc in collection.find({"_id": {"$in": [object_id for object_id, _ in targets.values()]}}, {"role": 1})
+    }
+    # The last operation for a user wins, as if they ran one after another
+    final_roles = {}
+    for object_id, role in targets.values():
+        if object_id in existing:
+            final_roles[object_id] = role
+    requests = [
+        UpdateOne({"_id": object_id}, {"$set": {"role": role}})
+        for object_id, role in final_roles.items()
+        if existing[object_id] != role
+    ]
+    if requests:
+        await collection.bulk_write(requests, ordered=False)
+
+    for index, (object_id, role) in targets.items():
+        if object_id not in existing:
+            results.fail(index, "not_found")
+        else:
+            results.ok(index, affected=int(existing[object_id] != role))
+    return bool(requests)
+
+
+async def run_bulk_operations(operations: list, current_admin_id) -> BulkOperationsResponse:
+    """
+    Execute a batch of admin operations.
+
+    Operations are independent: one failing (e.g. an unknown id) does not stop
+    the others. Results are returned in request order.
+    """
+    results = _Results(operations)
+    groups: Dict[str, list] = defaultdict(list)
+    for index, operation in enumerate(operations):
+        group = "orders" if operation.op in ("cancel_order", "cancel_restaurant_orders") else operation.op
+        groups[group].append((index, operation))
+
+    batch = rollups.RollupBatch()
+    cancelled = []
+    roles_changed = False
+    if groups["orders"]:
+        cancelled = await _cancel_orders(groups["orders"], results, batch)
+    if groups["delete_review"]:
+        await _delete_reviews(groups["delete_review"], results, batch)
+    if groups["set_user_role"]:
+        roles_changed = await _set_user_roles(groups["set_user_role"], results, current_admin_id)
+
+    await task_queue.enqueue_rollup_batch(batch)
+    if cancelled or roles_changed:
+        user_activity.activity_cache.clear()
+    for order, previous_status in cancelled:
+        await events.broker.publish(order, previous_status)
+
+    return results.response()
@@ -0,0 +1,64 @@
+"""
+In-Process Cache Module
+Small TTL + LRU cache for expensive, read-mostly query results
+
+Used for results that are costly to compute and can be slightly stale, such as
+the admin user-activity pages. Each worker process keeps its own cache.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after `ttl_seconds`.
+
+    Tracks hits and misses so callers can report a hit ratio.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl_seconds: Lifetime of an entry
+            max_entries: Maximum number of entries before the oldest is evicted
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full."""
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. after a write that affects cached results)."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
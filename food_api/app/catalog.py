@@ -0,0 +1,198 @@
+"""
+Catalog Module
+Catalog version, change feed and conditional reads of restaurant data
+
+Every admin write to a restaurant appends a CatalogChange carrying the next
+catalog version: an "upsert" with the full restaurant, or a "delete". A
+rename is a delete of the old name followed by an upsert of the new one.
+The version is allocated by inserting the change itself (unique index on
+version, retry on conflict), so versions are contiguous and a version only
+becomes visible together with its change.
+
+Downstream caches (agent replicas, frontends) fetch GET /restaurants/ once,
+keep its X-Catalog-Version, then poll GET /restaurants/changes?since=<version>
+and apply the changes in order. Catalog reads carry ETag W/"catalog-<version>",
+and a poll whose If-None-Match still matches is answered 304 without reading
+the restaurants collection. The version is cached per worker for
+CATALOG_VERSION_CACHE_SECONDS and advanced immediately by the worker's own
+writes.
+
+Serialized catalog reads are cached per (version, query) for
+CATALOG_RESPONSE_CACHE_SECONDS as EncodedBody entries, which keep each
+compressed variant next to the raw JSON. Since the version is part of the
+key, an entry can never be served after the catalog changed.
+
+The newest CATALOG_CHANGE_RETENTION changes are kept. A consumer older than
+that gets ChangesExpired (410) and re-downloads the catalog.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from .cache import TTLCache
+from .models import CatalogChange
+from . import metrics, structured_logging
+
+CATALOG_VERSION_CACHE_SECONDS = float(os.getenv("CATALOG_VERSION_CACHE_SECONDS", "1"))
+CATALOG_CHANGE_RETENTION = int(os.getenv("CATALOG_CHANGE_RETENTION", "10000"))
+CATALOG_RESPONSE_CACHE_SECONDS = float(os.getenv("CATALOG_RESPONSE_CACHE_SECONDS", "300"))
+
+# Concurrent writers racing for the same version retry with the next one
+MAX_VERSION_ATTEMPTS = 20
+# A failed append (e.g. a primary election) is retried before the write errors
+RECORD_CHANGE_ATTEMPTS = 3
+RECORD_CHANGE_RETRY_SECONDS = 0.1
+
+logger = structured_logging.get_logger("catalog")
+
+_version_cache = TTLCache(ttl_seconds=CATALOG_VERSION_CACHE_SECONDS, max_entries=1)
+metrics.register_cache("catalog_version", _version_cache)
+
+# (version, query) -> compression.EncodedBody of a catalog read
+response_cache = TTLCache(ttl_seconds=CATALOG_RESPONSE_CACHE_SECONDS, max_entries=64)
+metrics.register_cache("catalog_responses", response_cache)
+
+
+class ChangesExpired(Exception):
+    """The requested version is older than the retained change log."""
+
+    def __init__(self, since: int):
+        super().__init__(f"Changes since version {since} are no longer available; re-fetch /restaurants/")
+        self.since = since
+
+
+def _collection():
+    return CatalogChange.get_motor_collection()
+
+
+def snapshot(restaurant) -> dict:
+    """The public fields of a restaurant, as served by GET /restaurants/."""
+    return {
+        "name": restaurant.name,
+        "area": restaurant.area,
+        "cuisine": restaurant.cuisine,
+        "items": restaurant.items,
+        "location": restaurant.location.model_dump() if restaurant.location else None,
+    }
+
+
+async def _latest_version() -> int:
+    latest = await _collection().find_one({}, sort=[("version", -1)], projection={"version": 1})
+    return latest["version"] if latest else 0
+
+
+def _advance_cached_version(version: int) -> None:
+    cached = _version_cache.get("version")
+    _version_cache.set("version", max(version, cached or 0))
+
+
+async def current_version() -> int:
+    """Catalog version, at most CATALOG_VERSION_CACHE_SECONDS old."""
+    version = _version_cache.get("version")
+    if version is None:
+        version = await _latest_version()
+        _version_cache.set("version", version)
+    return version
+
+
+async def _append(op: str, restaurant_name: str, restaurant: Optional[dict]) -> int:
+    for _ in range(MAX_VERSION_ATTEMPTS):
+        version = await _latest_version() + 1
+        try:
+            await _collection().insert_one({
+                "version": version,
+                "op": op,
+                "restaurant_name": restaurant_name,
+                "restaurant": restaurant,
+                "changed_at": datetime.utcnow(),
+            })
+        except DuplicateKeyError:
+            continue
+        _advance_cached_version(version)
+        if version > CATALOG_CHANGE_RETENTION:
+            await _collection().delete_many({"version": {"$lte": version - CATALOG_CHANGE_RETENTION}})
+        return version
+    raise RuntimeError(f"No catalog version after {MAX_VERSION_ATTEMPTS} attempts")
+
+
+async def record_change(op: str, restaurant_name: str, restaurant: Optional[dict] = None) -> int:
+    """
+    Append a change after the restaurant write succeeded; returns its version.
+
+    Without the change the version stays put, so ETag revalidation, the
+    response cache and the change feed (and the autocomplete index fed by
+    it) would keep serving the catalog from before the write. A failed
+    append is therefore retried, and raised if it keeps failing so the admin
+    write answers 500 instead of reporting success.
+    """
+    for attempt in range(1, RECORD_CHANGE_ATTEMPTS + 1):
+        try:
+            return await _append(op, restaurant_name, restaurant)
+        except Exception:
+            if attempt == RECORD_CHANGE_ATTEMPTS:
+                logger.error("catalog_change_not_recorded", exc_info=True, extra={"fields": {
+                    "op": op, "restaurant_name": restaurant_name
+                }})
+                # At least this worker stops serving the stale catalog
+                response_cache.clear()
+                raise
+            await asyncio.sleep(RECORD_CHANGE_RETRY_SECONDS * attempt)
+
+
+async def changes_since(since: int, limit: int) -> dict:
+    """Changes after `since`, oldest first, at most `limit` of them."""
+    documents = await _collection().find(
+        {"version": {"$gt": since}}, sort=[("version", 1)], limit=limit + 1
+    ).to_list(length=limit + 1)
+    if documents and documents[0]["version"] != since + 1:
+        # Versions are contiguous, so a hole at the start means it was pruned
+        raise ChangesExpired(since)
+    if not documents and since > await _latest_version():
+        # The client is ahead of this database (e.g. restored from a backup)
+        raise ChangesExpired(since)
+
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    version = documents[-1]["version"] if documents else since
+    _advance_cached_version(version)
+    return {
+        "since": since,
+        "version": version,
+        "changes": [
+            {
+                "version": document["version"],
+                "op": document["op"],
+                "restaurant_name": document["restaurant_name"],
+                "restaurant": document.get("restaurant"),
+                "changed_at": document["changed_at"],
+            }
+            for document in documents
+        ],
+        "has_more": has_more,
+    }
+
+
+# ==================== CONDITIONAL READS ====================
+
+def etag(version: int) -> str:
+    # Weak: the same version may be served with different content encodings
+    return f'W/"catalog-{version}"'
+
+
+def headers(version: int) -> Dict[str, str]:
+    """Validator headers for a catalog response at `version`."""
+    return {"ETag": etag(version), "X-Catalog-Version": str(version), "Cache-Control": "no-cache"}
+
+
+def not_modified(if_none_match: Optional[str], version: int) -> bool:
+    """Whether an If-None-Match header already names `version` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag(version).removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == current for tag in if_none_match.split(","))
@@ -0,0 +1,228 @@
+"""
+Compression Module
+Negotiated response compression, with precompressed bodies for cached payloads
+
+CompressionMiddleware compresses JSON and text responses of at least
+COMPRESSION_MIN_BYTES (by Content-Length) with the best encoding the client accepts
+(Accept-Encoding, q-values honoured), preferring zstd, then brotli, then
+gzip. zstd and brotli are offered when the optional `zstandard` / `brotli`
+packages are installed; gzip is always available. Streamed responses
+(Server-Sent Events, anything without a Content-Length) and responses that
+already have a Content-Encoding pass through untouched. Bodies over
+COMPRESSION_OFFLOAD_BYTES are compressed in a worker thread so the event
+loop keeps serving.
+
+Payloads served many times (the restaurant catalog) are kept as an
+`EncodedBody`: the raw JSON plus each encoding, compressed the first time a
+client asks for it and stored next to the raw bytes. `encoded_response`
+serves the negotiated variant, so a cache hit spends no CPU on compression.
+
+benchmarks/bench_compression.py measures bytes on the wire and CPU per
+request for each encoding.
+"""
+
+import asyncio
+import gzip
+import os
+from typing import Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from . import server_timing
+
+try:
+    import brotli  # type: ignore[import]
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # type: ignore[import]
+except ImportError:
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_OFFLOAD_BYTES = int(os.getenv("COMPRESSION_OFFLOAD_BYTES", str(256 * 1024)))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+# Must reach the client event by event
+STREAMING_TYPES = ("text/event-stream",)
+
+
+def _gzip(data: bytes) -> bytes:
+    # Fixed mtime: the same payload always compresses to the same bytes
+    return gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=COMPRESSION_BROTLI_QUALITY)
+
+
+def _zstd(data: bytes) -> bytes:
+    # Compressor objects are not thread-safe; they are cheap to create
+    return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(data)
+
+
+# Available encodings, in server preference order
+CODECS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    CODECS["zstd"] = _zstd
+if brotli is not None:
+    CODECS["br"] = _brotli
+CODECS["gzip"] = _gzip
+
+
+def negotiate(accept_encoding: Optional[str], available=None) -> Optional[str]:
+    """Best available encoding for an Accept-Encoding header, or None for identity."""
+    available = CODECS if available is None else available
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in available:
+        weight = weights.get(encoding, wildcard)
+        # Ties go to the earlier (preferred) encoding
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith(STREAMING_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES) or "+json" in content_type
+
+
+async def compress(encoding: str, data: bytes) -> bytes:
+    codec = CODECS[encoding]
+    if len(data) >= COMPRESSION_OFFLOAD_BYTES:
+        # zlib, brotli and zstd release the GIL while compressing
+        return await asyncio.to_thread(codec, data)
+    return codec(data)
+
+
+# ==================== PRECOMPRESSED BODIES ====================
+
+class EncodedBody:
+    """Raw response bytes plus each encoding, compressed once on first use."""
+
+    __slots__ = ("raw", "encoded")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self.encoded: Dict[str, bytes] = {}
+
+    @classmethod
+    def from_json(cls, content) -> "EncodedBody":
+        """Render content exactly as a JSONResponse would."""
+        return cls(JSONResponse(jsonable_encoder(content)).body)
+
+    async def get(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.raw
+        body = self.encoded.get(encoding)
+        if body is None:
+            body = self.encoded[encoding] = await compress(encoding, self.raw)
+        return body
+
+
+async def encoded_response(body: EncodedBody, accept_encoding: Optional[str], status_code: int = 200,
+                           headers: Optional[Dict[str, str]] = None, media_type: str = "application/json") -> Response:
+    """Serve the variant of a cached body that the client accepts."""
+    encoding = None
+    if COMPRESSION_ENABLED and len(body.raw) >= COMPRESSION_MIN_BYTES:
+        encoding = negotiate(accept_encoding)
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(await body.get(encoding), status_code=status_code, headers=headers, media_type=media_type)
+
+
+# ==================== MIDDLEWARE ====================
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing JSON/text responses of known length.
+
+    The body may arrive in several chunks (BaseHTTPMiddleware re-streams
+    responses), so it is collected up to its Content-Length and compressed
+    once. Responses without a Content-Length are streams and pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES, enabled: bool = COMPRESSION_ENABLED):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.enabled = enabled
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if "content-encoding" in headers or not compressible(headers.get("content-type", "")):
+            return False
+        length = headers.get("content-length")
+        return length is not None and length.isdigit() and int(length) >= self.minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held_start = None
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal held_start
+            if message["type"] == "http.response.start":
+                if self._should_compress(Headers(raw=message.get("headers", []))):
+                    # Hold the headers until the whole body is here
+                    held_start = message
+                else:
+                    await send(message)
+                return
+            if held_start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            start, held_start = held_start, None
+            with server_timing.phase("compress"):
+                compressed = await compress(encoding, b"".join(chunks))
+            chunks.clear()
+
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # A strong validator must change with the bytes
+                headers["ETag"] = f"W/{etag}"
+            start["headers"] = headers.raw
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -14,6 +14,8 @@ from beanie import init_beanie
 import os
 from dotenv import load_dotenv
 
+from . import metrics, server_timing, tracing, query_profiler
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -40,7 +42,13 @@ try:
     client = motor.motor_asyncio.AsyncIOMotorClient(
         MONGO_DATABASE_URL, 
         uuidRepresentation="standard",
-        serverSelectionTimeoutMS=5000
+        serverSelectionTimeoutMS=5000,
+        # Command durations and pool checkout waits for /metrics,
+        # per-request database time for Server-Timing, query spans for tracing,
+        # slow query shapes for the profiler
+        event_listeners=metrics.mongo_listeners() + [
+            server_timing.CommandTimer(), tracing.CommandTracer(), query_profiler.profiler
+        ]
     )
     database = client.food_db
     print("✅ MongoDB client initialized successfully")
@@ -59,7 +67,14 @@ async def init_db():
                     "app.models.User",
                     "app.models.Restaurant",
                     "app.models.Order",
+                    "app.models.ArchivedOrder",
                     "app.models.Review",  # NEW: Add Review model
+                    "app.models.RestaurantDailyStats",
+                    "app.models.OrderTimeBucket",
+                    "app.models.ItemRecommendation",
+                    "app.models.UserRecommendation",
+                    "app.models.IdempotencyRecord",
+                    "app.models.CatalogChange",
                 ]
             )
             print("✅ Database connection established.")
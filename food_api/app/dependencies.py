@@ -5,6 +5,7 @@ from beanie import PydanticObjectId
 
 from .models import User
 from .security import SECRET_KEY, ALGORITHM
+from .server_timing import phase
 
 # This tells FastAPI where to look for the token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/users/login")
@@ -13,6 +14,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Dependency to get the current authenticated user from JWT token.
     """
+    with phase("auth"):
+        return await _authenticate(token)
+
+async def _authenticate(token: str) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
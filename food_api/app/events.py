@@ -0,0 +1,250 @@
+"""
+Order Events Module
+Live order status updates for Server-Sent Events subscribers
+
+Endpoints publish an event whenever an order is placed or changes status; the
+broker fans it out to the SSE connections of the order's owner.
+
+Each connection is one bounded asyncio.Queue registered under its user id, so
+an idle subscriber costs a few hundred bytes and no task or timer of its own.
+When a slow client lets its queue fill up the oldest event is dropped (status
+events supersede each other, and the client can re-fetch the order).
+
+Event sources (ORDER_EVENTS_SOURCE):
+- "local" (default):  events are dispatched inside the publishing worker
+- "redis":            events go through a Redis pub/sub channel, so every
+                      uvicorn worker and instance sees every event
+- "change_stream":    events come from a MongoDB change stream on `orders`
+                      (replica sets only) and catch writes from any process,
+                      including scripts; endpoint publishes are then ignored.
+                      `previous_status` is read from the change's pre-image,
+                      which needs MongoDB 6.0+ with pre-images enabled on the
+                      collection (collMod orders changeStreamPreAndPostImages);
+                      without them it is null
+
+Every connection starts with a snapshot of its open orders' current status;
+those events have `"snapshot": true`, live updates `"snapshot": false`.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+from typing import Dict, Optional, Set
+
+from pymongo.errors import OperationFailure
+
+from .models import Order
+from . import structured_logging
+
+ORDER_EVENTS_SOURCE = os.getenv("ORDER_EVENTS_SOURCE", "local")
+ORDER_EVENTS_REDIS_URL = os.getenv("ORDER_EVENTS_REDIS_URL", "redis://localhost:6379/0")
+ORDER_EVENTS_REDIS_CHANNEL = os.getenv("ORDER_EVENTS_REDIS_CHANNEL", "foodie:order-events")
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "32"))
+
+EVENT_TYPE = "order_status"
+
+logger = structured_logging.get_logger("events")
+
+
+def build_event(order: Order, previous_status: Optional[str] = None, snapshot: bool = False) -> dict:
+    """Event payload for an order's current status (snapshot=True for a connection's initial state)."""
+    return {
+        "order_id": str(order.id),
+        "user_id": str(order.user_id),
+        "restaurant_name": order.restaurant_name,
+        "status": order.status,
+        "previous_status": previous_status,
+        "updated_at": (order.status_updated_at or order.order_date).isoformat(),
+        "snapshot": snapshot,
+    }
+
+
+def format_sse(data: dict, event: str = EVENT_TYPE, event_id: Optional[int] = None) -> str:
+    """Serialize one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+HEARTBEAT = ": heartbeat\n\n"
+
+
+class Subscription:
+    """One SSE connection's bounded event queue."""
+
+    def __init__(self, user_id: str, order_id: Optional[str] = None, maxsize: int = SSE_QUEUE_SIZE):
+        self.user_id = user_id
+        self.order_id = order_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: dict) -> None:
+        """Queue an event without blocking, dropping the oldest one if full."""
+        if self.order_id is not None and event["order_id"] != self.order_id:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class OrderEventBroker:
+    """Fans order events out to the subscriptions of each user."""
+
+    def __init__(self, source: str = ORDER_EVENTS_SOURCE):
+        self.source = source
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._event_ids = itertools.count(1)
+        self._listener: Optional[asyncio.Task] = None
+        self._redis = None
+        self._pre_images = True
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscriptions.values())
+
+    def subscribe(self, user_id: str, order_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(user_id, order_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subs = self._subscriptions.get(subscription.user_id)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del self._subscriptions[subscription.user_id]
+
+    def dispatch(self, event: dict) -> None:
+        """Deliver an event to this worker's subscribers of its user."""
+        for subscription in self._subscriptions.get(event["user_id"], ()):
+            subscription.offer(event)
+
+    def next_event_id(self) -> int:
+        return next(self._event_ids)
+
+    async def publish(self, order: Order, previous_status: Optional[str] = None) -> None:
+        """Publish an order's new status. Never raises: live updates are best effort."""
+        if self.source == "change_stream":
+            return
+        event = build_event(order, previous_status)
+        if self._redis is not None:
+            try:
+                await self._redis.publish(ORDER_EVENTS_REDIS_CHANNEL, json.dumps(event))
+                return
+            except Exception:
+                logger.warning("order_event_publish_failed", exc_info=True, extra={"fields": {"backend": "redis"}})
+        self.dispatch(event)
+
+    # ==================== EVENT SOURCES ====================
+
+    async def start(self) -> None:
+        """Start the configured event source."""
+        if self.source == "redis":
+            try:
+                import redis.asyncio as aioredis
+
+                self._redis = aioredis.from_url(ORDER_EVENTS_REDIS_URL, decode_responses=True)
+                await self._redis.ping()
+                self._listener = asyncio.create_task(self._listen_redis())
+                logger.info("order_events_source", extra={"fields": {
+                    "source": "redis", "channel": ORDER_EVENTS_REDIS_CHANNEL
+                }})
+            except ImportError:
+                logger.warning("order_events_source", extra={"fields": {
+                    "source": "local", "reason": "redis not installed"
+                }})
+                self._redis = None
+            except Exception as e:
+                logger.warning("order_events_source", extra={"fields": {"source": "local", "reason": str(e)}})
+                self._redis = None
+        elif self.source == "change_stream":
+            self._listener = asyncio.create_task(self._watch_orders())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def _listen_redis(self) -> None:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(ORDER_EVENTS_REDIS_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    self.dispatch(json.loads(message["data"]))
+                except (ValueError, KeyError) as e:
+                    logger.warning("order_event_malformed", extra={"fields": {"error": str(e)}})
+        finally:
+            await pubsub.close()
+
+    async def _watch_orders(self) -> None:
+        pipeline = [{"$match": {"$or": [
+            {"operationType": "insert"},
+            {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+        ]}}]
+        while True:
+            options = {"full_document": "updateLookup"}
+            if self._pre_images:
+                options["full_document_before_change"] = "whenAvailable"
+            try:
+                async with Order.get_motor_collection().watch(pipeline, **options) as stream:
+                    logger.info("order_events_source", extra={"fields": {
+                        "source": "change_stream", "pre_images": self._pre_images
+                    }})
+                    async for change in stream:
+                        document = change.get("fullDocument")
+                        if document is not None:
+                            before = change.get("fullDocumentBeforeChange") or {}
+                            self.dispatch(build_event(Order.model_validate(document), before.get("status")))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._pre_images and isinstance(e, OperationFailure):
+                    # Servers before 6.0 reject the pre-image option; previous_status stays null
+                    logger.warning("change_stream_pre_images_unavailable", extra={"fields": {"error": str(e)}})
+                    self._pre_images = False
+                    continue
+                logger.warning("order_change_stream_failed", exc_info=True, extra={"fields": {"retry_seconds": 5}})
+                await asyncio.sleep(5)
+
+
+async def stream_events(broker: OrderEventBroker, subscription: Subscription, initial_events, is_disconnected):
+    """
+    Yield SSE messages for one connection until the client disconnects.
+
+    Args:
+        broker: Broker the subscription is registered with
+        subscription: This connection's queue
+        initial_events: Current status of the user's open orders, sent first
+        is_disconnected: Coroutine function reporting client disconnects
+    """
+    try:
+        yield "retry: 3000\n\n"
+        for event in initial_events:
+            yield format_sse(event, event_id=broker.next_event_id())
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield HEARTBEAT
+                continue
+            yield format_sse(event, event_id=broker.next_event_id())
+    finally:
+        broker.unsubscribe(subscription)
+
+
+broker = OrderEventBroker()
@@ -0,0 +1,171 @@
+"""
+Geo Module
+"Restaurants near me" search and coordinate backfill
+
+Restaurant.location is an optional GeoJSON point ([longitude, latitude])
+covered by the `location_2dsphere` index. `restaurants_near` runs a single
+$geoNear aggregation: MongoDB walks the index outward from the point, applies
+the cuisine/item filters inside the same stage and returns restaurants
+already sorted by distance, so nothing is filtered or sorted client-side.
+Restaurants without a location are not in the index and never match.
+
+Pages are skip/limit over the distance order, bounded by
+GEO_MAX_RADIUS_KM and the endpoint's skip limit so a deep page stays cheap.
+
+Existing restaurants only have a free-text `area` ("Ashram Road, Ahmedabad").
+`backfill_locations` geocodes them from a local lookup table
+(scripts/area_coordinates.csv, no external geocoding service) and records a
+catalog change for each restaurant it actually updates.
+"""
+
+import csv
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from .models import Restaurant
+from . import catalog
+
+GEO_DEFAULT_RADIUS_KM = float(os.getenv("GEO_DEFAULT_RADIUS_KM", "5"))
+GEO_MAX_RADIUS_KM = float(os.getenv("GEO_MAX_RADIUS_KM", "50"))
+
+DEFAULT_LOOKUP_PATH = Path(__file__).parent.parent / "scripts" / "area_coordinates.csv"
+
+
+def _collection():
+    return Restaurant.get_motor_collection()
+
+
+def point(longitude: float, latitude: float) -> dict:
+    """GeoJSON point; note the [longitude, latitude] order."""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+# ==================== NEAR-ME SEARCH ====================
+
+def near_pipeline(longitude: float, latitude: float, radius_km: float, cuisine: Optional[str] = None,
+                  item: Optional[str] = None, skip: int = 0, limit: int = 20) -> List[dict]:
+    """$geoNear pipeline for one page (limit + 1 documents, to detect a next page)."""
+    query: dict = {}
+    if cuisine:
+        query["cuisine"] = {"$regex": f"^{re.escape(cuisine)}$", "$options": "i"}
+    if item:
+        query["items"] = {"$elemMatch": {"item_name": {"$regex": f"^{re.escape(item)}$", "$options": "i"}}}
+
+    return [
+        {
+            # Must be the first stage; the filter is applied while scanning the index
+            "$geoNear": {
+                "near": point(longitude, latitude),
+                "key": "location",
+                "spherical": True,
+                "maxDistance": radius_km * 1000,
+                "distanceField": "distance_km",
+                "distanceMultiplier": 0.001,
+                "query": query,
+            }
+        },
+        {"$skip": skip},
+        {"$limit": limit + 1},
+        {"$project": {"_id": 0, "name": 1, "area": 1, "cuisine": 1, "items": 1, "location": 1, "distance_km": 1}},
+    ]
+
+
+async def restaurants_near(longitude: float, latitude: float, radius_km: float = GEO_DEFAULT_RADIUS_KM,
+                           cuisine: Optional[str] = None, item: Optional[str] = None,
+                           skip: int = 0, limit: int = 20) -> dict:
+    """One page of restaurants within radius_km, nearest first."""
+    pipeline = near_pipeline(longitude, latitude, radius_km, cuisine=cuisine, item=item, skip=skip, limit=limit)
+    documents = await _collection().aggregate(pipeline).to_list(length=limit + 1)
+    for document in documents:
+        document["distance_km"] = round(document["distance_km"], 3)
+    return {
+        "restaurants": documents[:limit],
+        "skip": skip,
+        "limit": limit,
+        "has_more": len(documents) > limit,
+    }
+
+
+# ==================== GEOCODING BACKFILL ====================
+
+def normalize_area(area: str) -> str:
+    """'C.G. Road,  Ahmedabad' -> 'cg road, ahmedabad'"""
+    area = area.lower().replace(".", "")
+    return ", ".join(" ".join(part.split()) for part in area.split(","))
+
+
+def load_lookup(path: Path = DEFAULT_LOOKUP_PATH) -> Dict[str, Tuple[float, float]]:
+    """Area -> (longitude, latitude) from a CSV with area, latitude, longitude columns."""
+    lookup = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            lookup[normalize_area(row["area"])] = (float(row["longitude"]), float(row["latitude"]))
+    return lookup
+
+
+def geocode(area: str, lookup: Dict[str, Tuple[float, float]]) -> Optional[dict]:
+    """
+    GeoJSON point for an area string, or None if the table does not know it.
+
+    Tries the whole string, then its first part ("Ashram Road" of "Ashram
+    Road, Ahmedabad"). A bare city name is never used: every restaurant in
+    it would be placed on the same point.
+    """
+    normalized = normalize_area(area)
+    coordinates = lookup.get(normalized) or lookup.get(normalized.split(",")[0])
+    return point(*coordinates) if coordinates else None
+
+
+async def backfill_locations(lookup: Dict[str, Tuple[float, float]], batch_size: int = 500,
+                             dry_run: bool = False) -> dict:
+    """
+    Set `location` on restaurants that have none, reading them in batches.
+
+    Each restaurant is updated only if its location is still unset (an admin
+    may have set it meanwhile); only those updates are counted and recorded
+    in the catalog.
+    """
+    counts = {"scanned": 0, "updated": 0, "unmatched": 0}
+    unmatched_areas = set()
+    last_id = None
+    while True:
+        query: dict = {"location": None}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await _collection().find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+        last_id = batch[-1]["_id"]
+        counts["scanned"] += len(batch)
+
+        for document in batch:
+            location = geocode(document.get("area", ""), lookup)
+            if location is None:
+                counts["unmatched"] += 1
+                unmatched_areas.add(document.get("area", ""))
+                continue
+            if dry_run:
+                counts["updated"] += 1
+                continue
+            updated = await _collection().find_one_and_update(
+                {"_id": document["_id"], "location": None},
+                {"$set": {"location": location}},
+                return_document=ReturnDocument.AFTER
+            )
+            if updated is None:
+                continue
+            counts["updated"] += 1
+            await catalog.record_change("upsert", updated["name"], {
+                "name": updated["name"],
+                "area": updated["area"],
+                "cuisine": updated["cuisine"],
+                "items": updated.get("items", []),
+                "location": location,
+            })
+
+    counts["unmatched_areas"] = sorted(unmatched_areas)
+    return counts
@@ -0,0 +1,181 @@
+"""
+Health Module
+Liveness and cached readiness for probes that must not load the database
+
+- /health/live answers from memory: the process is up and its event loop is
+  turning. It never touches MongoDB.
+- /health/ready returns the last result of a background probe that runs
+  every HEALTH_PROBE_INTERVAL_SECONDS, however often it is polled:
+
+  - mongo: `ping` round trip (no collection is read),
+  - indexes: every index declared on the models exists; checked every
+    HEALTH_INDEX_CHECK_INTERVAL_SECONDS since listIndexes rarely changes,
+  - pool: connections checked out over maxPoolSize, from the pool listener
+    in app/metrics.py,
+  - caches: entries and hit ratio of each registered cache.
+
+A failing ping or a saturated pool makes the worker not ready (503) so the
+load balancer stops sending it traffic; missing indexes and cold caches are
+reported as warnings. A result older than three intervals counts as not
+ready, since it means the probe task itself is stuck.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pymongo
+
+from . import metrics, structured_logging
+from .models import (
+    Restaurant, Order, ArchivedOrder, Review, RestaurantDailyStats, OrderTimeBucket,
+    ItemRecommendation, UserRecommendation, IdempotencyRecord, CatalogChange
+)
+
+HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "15"))
+HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "2"))
+HEALTH_INDEX_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_INDEX_CHECK_INTERVAL_SECONDS", "300"))
+HEALTH_POOL_SATURATION_THRESHOLD = float(os.getenv("HEALTH_POOL_SATURATION_THRESHOLD", "0.9"))
+
+# Models whose declared indexes the hot paths rely on
+INDEXED_MODELS = (
+    Restaurant, Order, ArchivedOrder, Review, RestaurantDailyStats, OrderTimeBucket,
+    ItemRecommendation, UserRecommendation, IdempotencyRecord, CatalogChange
+)
+
+logger = structured_logging.get_logger("health")
+
+OK, WARN, FAIL = "ok", "warn", "fail"
+
+
+class HealthMonitor:
+    """Runs the readiness checks in the background and keeps the last report."""
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL_SECONDS, timeout: float = HEALTH_PROBE_TIMEOUT_SECONDS,
+                 index_interval: float = HEALTH_INDEX_CHECK_INTERVAL_SECONDS,
+                 pool_threshold: float = HEALTH_POOL_SATURATION_THRESHOLD,
+                 clock: Callable[[], float] = time.monotonic):
+        self.interval = interval
+        self.timeout = timeout
+        self.index_interval = index_interval
+        self.pool_threshold = pool_threshold
+        self._clock = clock
+        self.report: Optional[dict] = None
+        self._checked_at: Optional[float] = None
+        self._index_check: Optional[dict] = None
+        self._index_checked_at: Optional[float] = None
+        self._client = None
+        self._models: Tuple = ()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, client, models=INDEXED_MODELS) -> None:
+        """Run the first probe, then refresh in the background."""
+        self._client = client
+        self._models = tuple(models)
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("readiness_probe_failed", exc_info=True)
+
+    # ----- checks -----
+
+    async def refresh(self) -> dict:
+        mongo = await self._check_mongo()
+        checks = {
+            "mongo": mongo,
+            "indexes": await self._check_indexes(mongo["status"] == OK),
+            "pool": self._check_pool(),
+            "caches": self._check_caches(),
+        }
+        statuses = {check["status"] for check in checks.values()}
+        self.report = {
+            "status": FAIL if FAIL in statuses else WARN if WARN in statuses else OK,
+            "checked_at": datetime.utcnow(),
+            "checks": checks,
+        }
+        self._checked_at = self._clock()
+        return self.report
+
+    async def _check_mongo(self) -> dict:
+        if self._client is None:
+            return {"status": FAIL, "error": "MongoDB client not configured"}
+        started = time.perf_counter()
+        try:
+            with pymongo.timeout(self.timeout):
+                await self._client.admin.command("ping")
+        except Exception as e:
+            return {"status": FAIL, "error": str(e)}
+        return {"status": OK, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    async def _check_indexes(self, reachable: bool) -> dict:
+        now = self._clock()
+        due = self._index_checked_at is None or now - self._index_checked_at >= self.index_interval
+        if not reachable or not due:
+            return self._index_check or {"status": WARN, "error": "Not checked yet"}
+        missing: Dict[str, List[str]] = {}
+        try:
+            with pymongo.timeout(self.timeout):
+                for model in self._models:
+                    expected = {index.name for index in model.get_settings().indexes}
+                    existing = await model.get_motor_collection().index_information()
+                    absent = sorted(expected - set(existing))
+                    if absent:
+                        missing[model.get_collection_name()] = absent
+        except Exception as e:
+            return self._index_check or {"status": WARN, "error": str(e)}
+        self._index_check = {"status": WARN if missing else OK, "missing": missing}
+        self._index_checked_at = now
+        return self._index_check
+
+    def _check_pool(self) -> dict:
+        checked_out = int(metrics.mongo_pool_checked_out.value())
+        if self._client is None:
+            return {"status": OK, "checked_out": checked_out}
+        max_size = self._client.options.pool_options.max_pool_size
+        utilisation = checked_out / max_size if max_size else 0.0
+        return {
+            "status": FAIL if utilisation >= self.pool_threshold else OK,
+            "checked_out": checked_out,
+            "max_pool_size": max_size,
+            "utilisation": round(utilisation, 3),
+        }
+
+    def _check_caches(self) -> dict:
+        caches = {}
+        for name, cache in metrics.registered_caches().items():
+            lookups = cache.hits + cache.misses
+            caches[name] = {
+                "entries": len(cache),
+                "hit_ratio": round(cache.hits / lookups, 3) if lookups else None,
+            }
+        # A cold cache is slower, not broken: informational only
+        return {"status": OK, "caches": caches}
+
+    # ----- report -----
+
+    def readiness(self) -> Tuple[bool, dict]:
+        """(ready, last report with its age); never runs a check itself."""
+        if self.report is None:
+            return False, {"ready": False, "status": "starting"}
+        age = self._clock() - self._checked_at
+        stale = age > 3 * self.interval
+        ready = self.report["status"] != FAIL and not stale
+        return ready, {**self.report, "ready": ready, "stale": stale, "age_seconds": round(age, 1)}
+
+
+monitor = HealthMonitor()
@@ -0,0 +1,238 @@
+"""
+Idempotency Module
+Idempotency-Key support for POST /orders/
+
+A client sends the same Idempotency-Key on every attempt of one logical
+request. The first attempt claims the key by inserting an "in_progress"
+record (unique on user + key); its response is stored on the record when it
+completes. Later attempts then:
+
+- replay the stored response if the first attempt completed,
+- wait for the in-flight attempt to finish if it is still running,
+- are rejected if the same key is reused with a different request body.
+
+The claiming attempt owns the record through a random owner token and holds
+a lock on it (`locked_until`) that it keeps extending while the request runs.
+`complete` and `release` only touch the record while the token still matches,
+so an attempt that lost the record cannot overwrite the response of the one
+that took it over. A record left "in_progress" by a crashed worker stops being
+extended and can be taken over IDEMPOTENCY_LOCK_SECONDS after its last
+extension.
+
+Records expire through a TTL index (IDEMPOTENCY_KEY_TTL_SECONDS).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from .models import IdempotencyRecord
+from . import query_budget, structured_logging
+
+# How long a duplicate request waits for the in-flight original
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+# An unfinished record not extended for this long is assumed abandoned and may
+# be reclaimed; the owner extends it every third of this while it runs
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+POLL_INITIAL_SECONDS = 0.05
+POLL_MAX_SECONDS = 0.5
+
+# Wakes duplicates waiting in this worker as soon as the original finishes
+_local_waiters: Dict[Tuple[str, str], asyncio.Event] = {}
+
+logger = structured_logging.get_logger("idempotency")
+
+
+class IdempotencyError(Exception):
+    """Raised when a request cannot proceed under its Idempotency-Key."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def request_fingerprint(body: dict) -> str:
+    """Stable hash of a request body, independent of key order."""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _collection():
+    return IdempotencyRecord.get_motor_collection()
+
+
+def _check_fingerprint(record: dict, fingerprint: str) -> None:
+    if record["request_hash"] != fingerprint:
+        raise IdempotencyError(422, "Idempotency-Key was already used with a different request")
+
+
+def _lock_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+
+
+async def _try_claim(user_id, key: str, fingerprint: str, owner: str) -> Optional[dict]:
+    """Claim the key; returns None on success or the existing record."""
+    try:
+        await _collection().insert_one({
+            "user_id": user_id,
+            "key": key,
+            "request_hash": fingerprint,
+            "status": "in_progress",
+            "response": None,
+            "owner": owner,
+            "locked_until": _lock_expiry(),
+            "created_at": datetime.utcnow()
+        })
+        return None
+    except DuplicateKeyError:
+        existing = await _collection().find_one({"user_id": user_id, "key": key})
+        if existing is None:
+            # Released between our insert and read; try once more
+            return await _try_claim(user_id, key, fingerprint, owner)
+        return existing
+
+
+async def _try_take_over(record: dict, owner: str) -> bool:
+    """Reclaim an in-progress record whose owner stopped extending its lock."""
+    now = datetime.utcnow()
+    # Records written before owner tokens only have their creation time
+    locked_until = record.get("locked_until") or record["created_at"] + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    if now < locked_until:
+        return False
+    result = await _collection().update_one(
+        {"_id": record["_id"], "status": "in_progress", "owner": record.get("owner"), "locked_until": record.get("locked_until")},
+        {"$set": {"owner": owner, "locked_until": _lock_expiry()}}
+    )
+    return result.modified_count == 1
+
+
+async def begin(user_id, key: str, fingerprint: str) -> Tuple[Optional[str], Optional[dict]]:
+    """
+    Start a request under an Idempotency-Key.
+
+    Returns:
+        (owner, None) if this attempt owns the key and must run the request
+        inside `hold` (and then call `complete` or `release` with `owner`),
+        otherwise (None, stored response to replay)
+
+    Raises:
+        IdempotencyError: 422 if the key was used for a different request,
+                          409 if the original attempt is still running after
+                          IDEMPOTENCY_WAIT_SECONDS
+    """
+    local_key = (str(user_id), key)
+    # Never wait past the request's own query budget
+    wait_seconds = IDEMPOTENCY_WAIT_SECONDS
+    budget_left = query_budget.remaining_seconds()
+    if budget_left is not None:
+        wait_seconds = min(wait_seconds, budget_left * 0.5)
+    deadline = asyncio.get_running_loop().time() + wait_seconds
+    delay = POLL_INITIAL_SECONDS
+    owner = uuid.uuid4().hex
+
+    while True:
+        record = await _try_claim(user_id, key, fingerprint, owner)
+        if record is None:
+            _local_waiters.setdefault(local_key, asyncio.Event())
+            return owner, None
+
+        _check_fingerprint(record, fingerprint)
+        if record["status"] == "completed":
+            return None, record["response"]
+        if await _try_take_over(record, owner):
+            logger.warning("idempotency_key_taken_over", extra={"fields": {"idempotency_key": key}})
+            _local_waiters.setdefault(local_key, asyncio.Event())
+            return owner, None
+
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0:
+            raise IdempotencyError(409, "A request with this Idempotency-Key is still being processed")
+
+        # Same-worker duplicates are woken directly; others poll with backoff
+        event = _local_waiters.get(local_key)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, POLL_MAX_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_SECONDS)
+
+
+def _wake_waiters(user_id, key: str) -> None:
+    event = _local_waiters.pop((str(user_id), key), None)
+    if event is not None:
+        event.set()
+
+
+async def _extend_lock(user_id, key: str, owner: str) -> bool:
+    result = await _collection().update_one(
+        {"user_id": user_id, "key": key, "owner": owner, "status": "in_progress"},
+        {"$set": {"locked_until": _lock_expiry()}}
+    )
+    return result.modified_count == 1
+
+
+async def _keep_locked(user_id, key: str, owner: str) -> None:
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_LOCK_SECONDS / 3)
+        try:
+            if not await _extend_lock(user_id, key, owner):
+                logger.warning("idempotency_lock_lost", extra={"fields": {"idempotency_key": key}})
+                return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Try again next period; the lock is still valid until it expires
+            logger.warning("idempotency_lock_extend_failed", exc_info=True, extra={"fields": {"idempotency_key": key}})
+
+
+@asynccontextmanager
+async def hold(user_id, key: str, owner: str):
+    """Keep the key locked by `owner` while the request runs."""
+    extender = asyncio.create_task(_keep_locked(user_id, key, owner))
+    try:
+        yield
+    finally:
+        extender.cancel()
+
+
+async def complete(user_id, key: str, owner: str, response: dict) -> bool:
+    """
+    Store the response of the attempt that owns the key.
+
+    Returns:
+        False if another attempt took the key over in the meantime; its
+        response is kept
+    """
+    try:
+        result = await _collection().update_one(
+            {"user_id": user_id, "key": key, "owner": owner, "status": "in_progress"},
+            {"$set": {"status": "completed", "response": response}, "$unset": {"locked_until": ""}}
+        )
+    finally:
+        _wake_waiters(user_id, key)
+    if result.modified_count != 1:
+        logger.error("idempotency_lock_lost", extra={"fields": {"idempotency_key": key}})
+        return False
+    return True
+
+
+async def release(user_id, key: str, owner: str) -> None:
+    """Give the key up after a failed attempt so that a retry can run it again."""
+    try:
+        await _collection().delete_one({"user_id": user_id, "key": key, "owner": owner, "status": "in_progress"})
+    except Exception:
+        logger.warning("idempotency_release_failed", exc_info=True, extra={"fields": {"idempotency_key": key}})
+    finally:
+        _wake_waiters(user_id, key)
@@ -0,0 +1,196 @@
+"""
+Load Shedding Module
+Per-route-class concurrency limits with queue-time-based shedding
+
+Requests are split into route classes, each with its own concurrency limit
+and wait queue:
+
+- "orders": order placement; a reserved lane that browse and admin traffic
+  can never occupy, so checkout latency holds during a promo spike
+- "admin":  dashboard scans, kept to a few at a time
+- "browse": everything else
+
+A request that finds its class at the limit waits in a FIFO queue. It is
+rejected straight away with 503 + Retry-After when the queue is full or when
+the oldest waiter has already been queued for more than half the class's
+maximum wait (the queue is not draining), and it is rejected after waiting
+if its own wait exceeds the maximum. Rejecting early and cheaply keeps the
+event loop and the Motor pool for requests that can still finish in time.
+
+Long-lived streams, health checks, metrics scrapes and profiling runs
+(which hold a request open for their whole window) are never limited.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+LOAD_SHEDDING_ENABLED = os.getenv("LOAD_SHEDDING_ENABLED", "true").lower() == "true"
+
+
+def _class_config(name: str, concurrency: int, queue: int, max_wait_ms: int, retry_after: int) -> dict:
+    prefix = f"LOAD_SHED_{name.upper()}"
+    return {
+        "concurrency": int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+        "queue": int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+        "max_wait_ms": int(os.getenv(f"{prefix}_MAX_WAIT_MS", str(max_wait_ms))),
+        "retry_after": int(os.getenv(f"{prefix}_RETRY_AFTER", str(retry_after))),
+    }
+
+
+ROUTE_CLASSES: Dict[str, dict] = {
+    "orders": _class_config("orders", concurrency=48, queue=200, max_wait_ms=2000, retry_after=1),
+    "admin": _class_config("admin", concurrency=4, queue=16, max_wait_ms=5000, retry_after=5),
+    "browse": _class_config("browse", concurrency=48, queue=100, max_wait_ms=500, retry_after=2),
+}
+
+# (route class or None for unlimited, HTTP method or None for any, path pattern); first match wins
+ROUTE_RULES: List[Tuple[Optional[str], Optional[str], "re.Pattern"]] = [
+    (None, None, re.compile(r"^/health")),
+    (None, "GET", re.compile(r"^/metrics$")),
+    (None, "GET", re.compile(r"^/orders/events$")),
+    (None, "GET", re.compile(r"^/admin/profile/")),
+    ("orders", "POST", re.compile(r"^/orders/?$")),
+    ("admin", None, re.compile(r"^/admin/")),
+]
+DEFAULT_CLASS = "browse"
+
+admitted: Counter = Counter()
+queued: Counter = Counter()
+shed: Counter = Counter()
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None if it is never limited."""
+    for name, rule_method, pattern in ROUTE_RULES:
+        if (rule_method is None or rule_method == method) and pattern.match(path):
+            return name
+    return DEFAULT_CLASS
+
+
+class ClassLimiter:
+    """Concurrency slots plus a bounded, time-limited FIFO wait queue."""
+
+    def __init__(self, name: str, concurrency: int, queue: int, max_wait_ms: int, retry_after: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = queue
+        self.max_wait = max_wait_ms / 1000
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _queue_is_stuck(self, now: float) -> bool:
+        return bool(self._waiters) and now - self._waiters[0][0] > self.max_wait / 2
+
+    async def acquire(self) -> bool:
+        """Take a slot; returns False if the request should be shed."""
+        if self.in_flight < self.concurrency and not self._waiters:
+            self.in_flight += 1
+            admitted[self.name] += 1
+            return True
+
+        now = time.monotonic()
+        if len(self._waiters) >= self.max_queue or self._queue_is_stuck(now):
+            shed[self.name] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (now, future)
+        self._waiters.append(entry)
+        queued[self.name] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as the wait expired: use it
+                admitted[self.name] += 1
+                return True
+            self._waiters.remove(entry)
+            future.cancel()
+            shed[self.name] += 1
+            return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._waiters.remove(entry)
+                future.cancel()
+            raise
+        admitted[self.name] += 1
+        return True
+
+    def release(self) -> None:
+        """Free a slot, handing it directly to the oldest live waiter."""
+        while self._waiters:
+            _, future = self._waiters.popleft()
+            if not future.done():
+                # in_flight stays the same: the slot changes owner
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+limiters: Dict[str, ClassLimiter] = {name: ClassLimiter(name, **config) for name, config in ROUTE_CLASSES.items()}
+
+
+def snapshot() -> dict:
+    """Counters and current load per route class, for monitoring."""
+    return {
+        name: {
+            "in_flight": limiter.in_flight,
+            "queue_depth": limiter.queue_depth,
+            "admitted": admitted[name],
+            "queued": queued[name],
+            "shed": shed[name],
+        }
+        for name, limiter in limiters.items()
+    }
+
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware enforcing the route-class limits."""
+
+    def __init__(self, app, limiters: Dict[str, ClassLimiter] = limiters, enabled: bool = LOAD_SHEDDING_ENABLED):
+        self.app = app
+        self.limiters = limiters
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters[name]
+        if not await limiter.acquire():
+            await self._reject(send, limiter)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    @staticmethod
+    async def _reject(send, limiter: ClassLimiter) -> None:
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", str(limiter.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -9,13 +9,18 @@ SECURITY ENHANCEMENTS:
 - Improved error handling and security headers
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status, Query, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Query, Request, Header, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from typing import List, Optional
 from datetime import timedelta
+import asyncio
+import math
 import os
+import secrets
+import time
 import uuid
 from dotenv import load_dotenv
 
@@ -28,15 +33,25 @@ from slowapi.errors import RateLimitExceeded
 load_dotenv()
 
 # Local Imports
-from .database import init_db
-from .models import Restaurant, User, Order, Review, OrderItem
+from .database import init_db, client as mongo_client
+from .models import Restaurant, GeoPoint, User, Order, ArchivedOrder, Review, OrderItem, ItemRecommendation, UserRecommendation
 from .schemas import (
     RestaurantCreate, UserCreate, UserOut, OrderCreate, OrderOut,
     ReviewCreate, ReviewUpdate, ReviewOut, RestaurantItem,
-    PlatformStatsOut, PopularRestaurantOut, UserActivityOut
+    PlatformStatsOut, PopularRestaurantOut, UserActivityOut, UserActivityPage,
+    TimeSeriesOut, RecommendedItemOut, TrendingOut,
+    OrderStatusUpdate, BulkOrderStatusUpdate, BulkOrderStatusResult,
+    BulkOperationsRequest, BulkOperationsResponse, SlowQueryReport, CatalogChangesOut, NearbyRestaurantsOut, AutocompleteOut
 )
 from .security import hash_password, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from .dependencies import get_current_user, get_current_admin_user
+from . import (
+    rollups, user_activity, recommendations, trending, order_status, events,
+    idempotency, bulk_ops, archive, query_budget, load_shedding, metrics, server_timing,
+    tracing, query_profiler, structured_logging, profiling, health, catalog, compression, geo, autocomplete, task_queue
+)
+
+logger = structured_logging.get_logger("api")
 
 # ==================== RATE LIMITING CONFIGURATION ====================
 # HIGH-002 FIX: Prevent brute force attacks and API abuse
@@ -46,38 +61,82 @@ limiter = Limiter(key_func=get_remote_address)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manages application startup and shutdown events"""
+    # JSON logs written from a background thread, off the event loop
+    structured_logging.setup_logging()
     await init_db()
     print("✅ Database connection established.")
+    # Keep the analytics rollup consistent with orders and reviews
+    reconcile_task = asyncio.create_task(rollups.run_periodic_reconcile())
+    # Move finished orders older than ORDER_ARCHIVE_AFTER_DAYS to the archive
+    archive_task = asyncio.create_task(archive.run_periodic_archive())
+    await events.broker.start()
+    # Post-commit work (rollups, verified-purchase checks) runs after the response
+    await task_queue.queue.start()
+    # explain() capture for newly seen slow query shapes
+    await query_profiler.profiler.start(mongo_client)
+    # Readiness is probed in the background; /health/ready only reads the result
+    await health.monitor.start(mongo_client)
+    # In-memory suggestion index, kept current from the catalog change feed
+    await autocomplete.suggester.start()
     yield
+    # Drain queued follow-up work while the database is still connected
+    await task_queue.queue.stop()
+    await autocomplete.suggester.stop()
+    await health.monitor.stop()
+    await query_profiler.profiler.stop()
+    await events.broker.stop()
+    archive_task.cancel()
+    reconcile_task.cancel()
+    tracing.shutdown()
     print("🔌 Closing database connection.")
+    structured_logging.shutdown_logging()
 
 # Create FastAPI App
 app = FastAPI(
     title="FoodieExpress API",
     description="AI-Powered Food Delivery Platform with Reviews, Admin Dashboard & Intelligence Features",
     version="4.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=server_timing.TimedJSONResponse
 )
+# Endpoints report handler/validate time for Server-Timing
+app.router.route_class = server_timing.TimedRoute
 
 # Add rate limiter to app state
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# ==================== CORS MIDDLEWARE ====================
-# MEDIUM-005 FIX: Load allowed origins from environment
-ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:5174,http://localhost:3000")
-allowed_origins_list = [origin.strip() for origin in ALLOWED_ORIGINS.split(",")]
+# ==================== COMPRESSION ====================
+# zstd/brotli/gzip by Accept-Encoding; inside Server-Timing so it shows as a phase
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins_list,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(compression.CompressionMiddleware)
+
+# ==================== SERVER-TIMING ====================
+# Phase breakdown (auth, db, handler, validate, encode) for sampled requests
+
+app.add_middleware(server_timing.ServerTimingMiddleware)
+
+# ==================== QUERY TIME BUDGETS ====================
+# Per-endpoint maxTimeMS budgets; handlers are cancelled when the client disconnects
+
+app.add_middleware(query_budget.QueryBudgetMiddleware)
+
+# ==================== LOAD SHEDDING ====================
+# Inside metrics, request id and tracing, outside the query budget and Server-Timing:
+# per-route-class concurrency limits, fast 503 when overloaded, and a
+# reserved lane for order placement
+
+app.add_middleware(load_shedding.LoadSheddingMiddleware)
+
+# ==================== METRICS ====================
+# Outside load shedding so latency includes queueing and shed requests are counted
+
+app.add_middleware(metrics.MetricsMiddleware, route_class=load_shedding.route_class)
 
 # ==================== REQUEST ID MIDDLEWARE (V3.0/V4.0) ====================
-# Distributed tracing middleware for observability
+# Distributed tracing middleware for observability. Outside load shedding and
+# the query budget so their 503s carry X-Request-ID and an access log line;
+# inside tracing so the server span gets the request id
 
 @app.middleware("http")
 async def add_request_id_middleware(request: Request, call_next):
@@ -93,18 +152,52 @@ async def add_request_id_middleware(request: Request, call_next):
     # Get Request ID from header or generate new one
     request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
     request.state.request_id = request_id
-    
-    # Log incoming request with ID
-    print(f"📥 [{request_id}] {request.method} {request.url.path}")
+    # Every log record of this request carries the ID
+    request_id_token = structured_logging.request_id_var.set(request_id)
+    server_span = tracing.current_span()
+    if server_span is not None:
+        server_span.set_attribute("request_id", request_id)
     
     # Process request
-    response = await call_next(request)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        structured_logging.request_id_var.reset(request_id_token)
+    
+    # One access log line per request (queued, sampled per LOG_SAMPLE_RATES)
+    logger.info("request", extra={"fields": {
+        "method": request.method,
+        "path": request.url.path,
+        "status": response.status_code,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+    }})
     
     # Add Request ID to response headers
     response.headers["X-Request-ID"] = request_id
     
     return response
 
+# ==================== TRACING ====================
+# Server span per request, continuing the agent's traceparent
+
+app.add_middleware(tracing.TracingMiddleware)
+
+# ==================== CORS MIDDLEWARE ====================
+# MEDIUM-005 FIX: Load allowed origins from environment
+# Outermost, so every response - including load shedding and query budget
+# 503s - carries the CORS headers a browser needs to read it
+ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:5174,http://localhost:3000")
+allowed_origins_list = [origin.strip() for origin in ALLOWED_ORIGINS.split(",")]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=allowed_origins_list,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 # ==================== PUBLIC ENDPOINTS ====================
 
 @app.get("/")
@@ -126,7 +219,10 @@ def read_root():
     }
 
 @app.get("/restaurants/", response_model=List[RestaurantCreate])
-async def get_all_restaurants(cuisine: Optional[str] = Query(None, description="Filter by cuisine type")):
+async def get_all_restaurants(
+    request: Request,
+    cuisine: Optional[str] = Query(None, description="Filter by cuisine type")
+):
     """
     Retrieve all restaurants with optional cuisine filtering.
     
@@ -138,39 +234,115 @@ async def get_all_restaurants(cuisine: Optional[str] = Query(None, description="
     - GET /restaurants/ - Returns all restaurants
     - GET /restaurants/?cuisine=Gujarati - Returns only Gujarati restaurants
     - GET /restaurants/?cuisine=gujarati - Same as above (case-insensitive)
+    
+    The response carries the catalog version (ETag, X-Catalog-Version);
+    a request whose If-None-Match still matches gets 304 with no body.
+    Responses are cached per catalog version with their compressed variants.
     """
     try:
-        if cuisine:
-            # Use MongoDB case-insensitive regex for efficient filtering
-            query = {"cuisine": {"$regex": f"^{cuisine}$", "$options": "i"}}
-            restaurants = await Restaurant.find(query).to_list()
-        else:
-            restaurants = await Restaurant.find_all().to_list()
+        # Read the version first: the ETag must never be newer than the data
+        version = await catalog.current_version()
+        if catalog.not_modified(request.headers.get("if-none-match"), version):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=catalog.headers(version))
         
-        return [
-            RestaurantCreate(
-                name=r.name,
-                area=r.area,
-                cuisine=r.cuisine,
-                items=r.items
-            ) for r in restaurants
-        ]
+        cache_key = (version, cuisine.lower() if cuisine else None)
+        body = catalog.response_cache.get(cache_key)
+        if body is None:
+            if cuisine:
+                # Use MongoDB case-insensitive regex for efficient filtering
+                query = {"cuisine": {"$regex": f"^{cuisine}$", "$options": "i"}}
+                restaurants = await Restaurant.find(query).to_list()
+            else:
+                restaurants = await Restaurant.find_all().to_list()
+            
+            body = compression.EncodedBody.from_json([
+                RestaurantCreate(**catalog.snapshot(r)) for r in restaurants
+            ])
+            catalog.response_cache.set(cache_key, body)
+        
+        return await compression.encoded_response(
+            body, request.headers.get("accept-encoding"), headers=catalog.headers(version)
+        )
     except Exception as e:
+        query_budget.raise_if_exceeded(e)
         raise HTTPException(status_code=500, detail=f"Error fetching restaurants: {str(e)}")
 
+@app.get("/restaurants/changes", response_model=CatalogChangesOut)
+async def get_catalog_changes(
+    request: Request,
+    response: Response,
+    since: int = Query(..., ge=0, description="Catalog version the client already has"),
+    limit: int = Query(500, ge=1, le=1000, description="Maximum number of changes to return")
+):
+    """
+    Catalog changes (upserts and deletes) after a version, oldest first.
+    
+    Clients start from the X-Catalog-Version of a full GET /restaurants/,
+    apply the changes in order and poll again from the returned version
+    (immediately if has_more). An up-to-date poll with a matching
+    If-None-Match gets 304. Returns 410 if the changes have been pruned;
+    the client then re-fetches /restaurants/.
+    """
+    try:
+        version = await catalog.current_version()
+        if since == version:
+            # Up to date as far as this worker knows: no database read
+            if catalog.not_modified(request.headers.get("if-none-match"), version):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=catalog.headers(version))
+            response.headers.update(catalog.headers(version))
+            return CatalogChangesOut(since=since, version=version, changes=[], has_more=False)
+        
+        result = await catalog.changes_since(since, limit)
+        response.headers.update(catalog.headers(result["version"]))
+        return result
+    except catalog.ChangesExpired as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error fetching catalog changes: {str(e)}")
+
+@app.get("/restaurants/near", response_model=NearbyRestaurantsOut)
+async def get_restaurants_near(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search point"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude of the search point"),
+    radius_km: float = Query(geo.GEO_DEFAULT_RADIUS_KM, gt=0, le=geo.GEO_MAX_RADIUS_KM, description="Search radius in km"),
+    cuisine: Optional[str] = Query(None, description="Filter by cuisine type (case-insensitive)"),
+    item: Optional[str] = Query(None, description="Only restaurants serving this menu item (case-insensitive)"),
+    skip: int = Query(0, ge=0, le=1000, description="Restaurants to skip (pagination)"),
+    limit: int = Query(20, ge=1, le=100, description="Restaurants per page")
+):
+    """
+    Restaurants within radius_km of a point, nearest first, with distance_km.
+    
+    Served by the 2dsphere index on restaurant location ($geoNear); cuisine
+    and item filters are applied in the same index scan. Restaurants without
+    coordinates are not included. Page with skip/limit while has_more is true.
+    
+    Examples:
+    - GET /restaurants/near?lat=23.03&lng=72.57
+    - GET /restaurants/near?lat=23.03&lng=72.57&radius_km=2&cuisine=Gujarati&item=Dhokla
+    """
+    try:
+        return await geo.restaurants_near(
+            lng, lat, radius_km=radius_km, cuisine=cuisine, item=item, skip=skip, limit=limit
+        )
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error searching nearby restaurants: {str(e)}")
+
 @app.get("/restaurants/{restaurant_name}", response_model=RestaurantCreate)
-async def get_restaurant_by_name(restaurant_name: str):
-    """Retrieve a specific restaurant by name"""
+async def get_restaurant_by_name(request: Request, response: Response, restaurant_name: str):
+    """Retrieve a specific restaurant by name (conditional on the catalog version, like /restaurants/)"""
+    version = await catalog.current_version()
+    if catalog.not_modified(request.headers.get("if-none-match"), version):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=catalog.headers(version))
+    response.headers.update(catalog.headers(version))
+    
     restaurant = await Restaurant.find_one(Restaurant.name == restaurant_name)
     if not restaurant:
         raise HTTPException(status_code=404, detail=f"Restaurant '{restaurant_name}' not found")
     
-    return RestaurantCreate(
-        name=restaurant.name,
-        area=restaurant.area,
-        cuisine=restaurant.cuisine,
-        items=restaurant.items
-    )
+    return RestaurantCreate(**catalog.snapshot(restaurant))
 
 @app.get("/search/items", response_model=List[RestaurantCreate])
 async def search_restaurants_by_item(item_name: str = Query(..., description="Name of the menu item to search for")):
@@ -204,16 +376,57 @@ async def search_restaurants_by_item(item_name: str = Query(..., description="Na
         restaurants = await Restaurant.find(query).to_list()
         
         return [
-            RestaurantCreate(
-                name=r.name,
-                area=r.area,
-                cuisine=r.cuisine,
-                items=r.items
-            ) for r in restaurants
+            RestaurantCreate(**catalog.snapshot(r)) for r in restaurants
         ]
     except Exception as e:
+        query_budget.raise_if_exceeded(e)
         raise HTTPException(status_code=500, detail=f"Error searching for item: {str(e)}")
 
+@app.get("/autocomplete", response_model=AutocompleteOut)
+async def get_autocomplete(
+    q: str = Query(..., min_length=1, max_length=100, description="What the user has typed so far"),
+    limit: int = Query(5, ge=1, le=20, description="Suggestions per kind"),
+    kinds: Optional[str] = Query(None, pattern="^(restaurant|cuisine|item)(,(restaurant|cuisine|item))*$",
+                                 description="Comma-separated kinds to suggest (default: all)")
+):
+    """
+    As-you-type suggestions for restaurant names, cuisines and dish names.
+    
+    Matches the start of the name or of any later word ("dos" finds "Masala
+    Dosa"), ignoring case and punctuation, most popular first. Served from an
+    in-memory index that follows catalog writes within a few seconds; never
+    queries the database.
+    
+    Examples:
+    - GET /autocomplete?q=pan
+    - GET /autocomplete?q=pizza%20p&kinds=restaurant&limit=10
+    """
+    if not autocomplete.suggester.ready:
+        raise HTTPException(status_code=503, detail="Autocomplete index is loading, try again shortly")
+    selected = kinds.split(",") if kinds else autocomplete.KINDS
+    result = autocomplete.suggester.suggest(q, limit=limit, kinds=selected)
+    return AutocompleteOut(
+        query=q,
+        restaurants=result.get("restaurant", []),
+        cuisines=result.get("cuisine", []),
+        items=result.get("item", [])
+    )
+
+@app.get("/trending", response_model=TrendingOut)
+async def get_trending(
+    window: str = Query("1h", pattern="^(1h|24h)$", description="Time window: last hour or last 24 hours"),
+    limit: int = Query(10, ge=1, le=50, description="Number of dishes and restaurants to return")
+):
+    """
+    Trending dishes and restaurants right now (public endpoint).
+    
+    Counts come from bounded, time-bucketed approximate counters fed by order
+    placement, so this endpoint never scans orders and answers in constant time.
+    Dish counts are quantities ordered; restaurant counts are orders placed.
+    """
+    result = trending.tracker.top(window=window, limit=limit)
+    return TrendingOut(window=window, items=result["items"], restaurants=result["restaurants"])
+
 # ==================== REVIEW ENDPOINTS ====================
 
 @app.post("/restaurants/{restaurant_name}/reviews", response_model=ReviewOut, status_code=status.HTTP_201_CREATED)
@@ -234,6 +447,8 @@ async def create_review(
     - Prevents duplicate reviews
     - Validates restaurant exists
     - Stores username for display
+    - Verified purchase is checked in the background: is_verified_purchase
+      becomes true shortly after if the user has ordered from the restaurant
     """
     # Verify restaurant exists
     restaurant = await Restaurant.find_one(Restaurant.name == restaurant_name)
@@ -258,13 +473,6 @@ async def create_review(
             detail="You have already reviewed this restaurant. Use PUT /reviews/{review_id} to update it."
         )
     
-    # Check if user has ordered from this restaurant (for verified purchase)
-    user_order = await Order.find_one(
-        Order.user_id == current_user.id,
-        Order.restaurant_name == restaurant_name
-    )
-    is_verified = user_order is not None
-    
     # Create review
     review = Review(
         user_id=current_user.id,
@@ -273,9 +481,14 @@ async def create_review(
         rating=review_data.rating,
         comment=review_data.comment,
         helpful_count=0,
-        is_verified_purchase=is_verified
+        is_verified_purchase=False
     )
     await review.insert()
+    await task_queue.queue.enqueue(
+        "verify_purchase",
+        review_id=str(review.id), user_id=str(current_user.id), restaurant_name=restaurant_name
+    )
+    await _enqueue_review_rollup(review, review.rating, 1)
     
     return ReviewOut(
         id=review.id,
@@ -389,12 +602,14 @@ async def update_review(
         )
     
     # Update fields if provided
+    previous_rating = review.rating
     if update_data.rating is not None:
         review.rating = update_data.rating
     if update_data.comment is not None:
         review.comment = update_data.comment
     
     await review.save()
+    await _enqueue_review_rollup(review, review.rating - previous_rating, 0)
     
     return ReviewOut(
         id=review.id,
@@ -437,8 +652,19 @@ async def delete_review(
         )
     
     await review.delete()
+    await _enqueue_review_rollup(review, -review.rating, -1)
     return None
 
+async def _enqueue_review_rollup(review: Review, rating_delta: int, count_delta: int) -> None:
+    """Apply a review change to the restaurant rollup in the background"""
+    if rating_delta == 0 and count_delta == 0:
+        return
+    await task_queue.queue.enqueue(
+        "record_review",
+        restaurant_name=review.restaurant_name, review_date=review.review_date.isoformat(),
+        rating_delta=rating_delta, count_delta=count_delta
+    )
+
 @app.get("/users/me/reviews", response_model=List[ReviewOut])
 async def get_my_reviews(current_user: User = Depends(get_current_user)):
     """
@@ -464,6 +690,37 @@ async def get_my_reviews(current_user: User = Depends(get_current_user)):
         ) for review in reviews
     ]
 
+# ==================== RECOMMENDATION ENDPOINTS ====================
+
+@app.get("/restaurants/{restaurant_name}/items/{item_name}/recommendations", response_model=List[RecommendedItemOut])
+async def get_item_recommendations(restaurant_name: str, item_name: str):
+    """
+    "People who ordered this also ordered" for a menu item (public endpoint).
+    
+    Served from precomputed top-K lists (see scripts/build_recommendations.py)
+    with a single indexed lookup. Returns an empty list for items without
+    enough order history.
+    """
+    entry = await ItemRecommendation.find_one(
+        ItemRecommendation.item_key == recommendations.item_key(restaurant_name, item_name)
+    )
+    if not entry:
+        return []
+    return [RecommendedItemOut(**item.model_dump()) for item in entry.recommendations]
+
+@app.get("/users/me/recommendations", response_model=List[RecommendedItemOut])
+async def get_my_recommendations(current_user: User = Depends(get_current_user)):
+    """
+    Personalized item suggestions for the current user (requires authentication).
+    
+    Items similar to what the user has ordered before, excluding items they
+    already ordered. Empty for users without order history.
+    """
+    entry = await UserRecommendation.find_one(UserRecommendation.user_id == current_user.id)
+    if not entry:
+        return []
+    return [RecommendedItemOut(**item.model_dump()) for item in entry.recommendations]
+
 # ==================== ADMIN-ONLY RESTAURANT MANAGEMENT ====================
 
 @app.post("/restaurants/", response_model=Restaurant, status_code=status.HTTP_201_CREATED)
@@ -472,7 +729,7 @@ async def create_restaurant(
     current_admin: User = Depends(get_current_admin_user)  # ADMIN ONLY
 ):
     """
-    Create a new restaurant (admin only).
+    Create a new restaurant (admin only). Bumps the catalog version.
     """
     # Check if restaurant already exists
     existing = await Restaurant.find_one(Restaurant.name == restaurant_data.name)
@@ -481,6 +738,8 @@ async def create_restaurant(
     
     restaurant = Restaurant(**restaurant_data.dict())
     await restaurant.insert()
+    await catalog.record_change("upsert", restaurant.name, catalog.snapshot(restaurant))
+    await autocomplete.suggester.catch_up()
     return restaurant
 
 @app.put("/restaurants/{restaurant_name}", response_model=Restaurant)
@@ -490,7 +749,8 @@ async def update_restaurant_by_name(
     current_admin: User = Depends(get_current_admin_user)  # ADMIN ONLY
 ):
     """
-    Update an existing restaurant (admin only).
+    Update an existing restaurant (admin only). Bumps the catalog version;
+    a rename is recorded as a delete of the old name and an upsert.
     """
     restaurant = await Restaurant.find_one(Restaurant.name == restaurant_name)
     if not restaurant:
@@ -500,7 +760,12 @@ async def update_restaurant_by_name(
     restaurant.area = update_data.area
     restaurant.cuisine = update_data.cuisine
     restaurant.items = update_data.items
+    restaurant.location = GeoPoint(**update_data.location.model_dump()) if update_data.location else None
     await restaurant.save()
+    if restaurant.name != restaurant_name:
+        await catalog.record_change("delete", restaurant_name)
+    await catalog.record_change("upsert", restaurant.name, catalog.snapshot(restaurant))
+    await autocomplete.suggester.catch_up()
     return restaurant
 
 @app.delete("/restaurants/{restaurant_name}")
@@ -509,13 +774,15 @@ async def delete_restaurant_by_name(
     current_admin: User = Depends(get_current_admin_user)  # ADMIN ONLY
 ):
     """
-    Delete a restaurant (admin only).
+    Delete a restaurant (admin only). Bumps the catalog version.
     """
     restaurant = await Restaurant.find_one(Restaurant.name == restaurant_name)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
     await restaurant.delete()
+    await catalog.record_change("delete", restaurant_name)
+    await autocomplete.suggester.catch_up()
     return {"message": f"Restaurant '{restaurant_name}' deleted successfully"}
 
 # ==================== USER AUTHENTICATION ====================
@@ -593,42 +860,76 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 # ==================== ORDER MANAGEMENT ====================
 
+def _order_out(order: Order) -> OrderOut:
+    """Convert an Order document to its API representation"""
+    return OrderOut(
+        id=order.id,
+        user_id=order.user_id,
+        restaurant_name=order.restaurant_name,
+        items=[
+            {"item_name": item.item_name, "quantity": item.quantity, "price": item.price}
+            for item in order.items
+        ],
+        total_price=order.total_price,
+        status=order.status,
+        order_date=order.order_date
+    )
+
 @app.post("/orders/", response_model=OrderOut, status_code=status.HTTP_201_CREATED)
 async def create_order(
     order_data: OrderCreate,
-    current_user: User = Depends(get_current_user)
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255)
 ):
     """
     Create a new multi-item order (requires authentication).
     
     PHASE 2: ORDER PLACEMENT DEBUG & FIX
     
-    Enhanced with detailed logging to debug order placement issues.
+    Each placement is logged as structured events (order_created,
+    order_restaurant_not_found, order_insert_failed) with the request id.
+    
+    Send an `Idempotency-Key` header to make retries safe: repeating the
+    request with the same key returns the original order (with
+    `Idempotent-Replayed: true`) instead of placing a second one, and a
+    duplicate arriving while the original is still running waits for it.
     """
-    # PHASE 2: Detailed logging
-    print("\n" + "="*60)
-    print("🎯 FASTAPI: ORDER CREATION REQUEST")
-    print("="*60)
-    print(f"👤 User ID: {current_user.id}")
-    print(f"👤 Username: {current_user.username}")
-    print(f"🏪 Restaurant: {order_data.restaurant_name}")
-    print(f"📦 Number of items: {len(order_data.items)}")
-    print(f"📋 Items:")
-    for idx, item in enumerate(order_data.items, 1):
-        print(f"   {idx}. {item.item_name} x {item.quantity} @ ₹{item.price}")
+    if idempotency_key is None:
+        return await _place_order(order_data, current_user)
     
+    fingerprint = idempotency.request_fingerprint(order_data.model_dump())
+    try:
+        owner, replay = await idempotency.begin(current_user.id, idempotency_key, fingerprint)
+    except idempotency.IdempotencyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if replay is not None:
+        logger.info("order_replayed", extra={"fields": {"idempotency_key": idempotency_key}})
+        response.headers["Idempotent-Replayed"] = "true"
+        return OrderOut(**replay)
+    
+    try:
+        async with idempotency.hold(current_user.id, idempotency_key, owner):
+            order_out = await _place_order(order_data, current_user)
+    except BaseException:
+        await idempotency.release(current_user.id, idempotency_key, owner)
+        raise
+    await idempotency.complete(current_user.id, idempotency_key, owner, order_out.model_dump())
+    return order_out
+
+async def _place_order(order_data: OrderCreate, current_user: User) -> OrderOut:
+    """Validate, store and announce a new order"""
     # Verify restaurant exists
     restaurant = await Restaurant.find_one(Restaurant.name == order_data.restaurant_name)
     if not restaurant:
-        print(f"❌ Restaurant '{order_data.restaurant_name}' not found in database")
-        print("="*60 + "\n")
+        logger.warning("order_restaurant_not_found", extra={"fields": {
+            "user_id": str(current_user.id),
+            "restaurant_name": order_data.restaurant_name
+        }})
         raise HTTPException(status_code=404, detail="Restaurant not found")
     
-    print(f"✅ Restaurant found: {restaurant.name}")
-    
     # Calculate total price
     total_price = sum(item.price * item.quantity for item in order_data.items)
-    print(f"💰 Calculated total: ₹{total_price:.2f}")
     
     # Create order items
     order_items = [
@@ -639,8 +940,6 @@ async def create_order(
         ) for item in order_data.items
     ]
     
-    print(f"✅ Order items created: {len(order_items)}")
-    
     # Create order
     order = Order(
         user_id=current_user.id,
@@ -650,17 +949,27 @@ async def create_order(
         status="placed"
     )
     
-    print(f"📝 Attempting to save order to database...")
-    
     try:
         await order.insert()
-        print(f"✅ Order saved successfully! Order ID: {order.id}")
-        print("="*60 + "\n")
     except Exception as e:
-        print(f"❌ Failed to save order to database: {str(e)}")
-        print("="*60 + "\n")
+        logger.error("order_insert_failed", exc_info=True, extra={"fields": {
+            "user_id": str(current_user.id),
+            "restaurant_name": order_data.restaurant_name
+        }})
+        query_budget.raise_if_exceeded(e)
         raise HTTPException(status_code=500, detail=f"Failed to create order: {str(e)}")
     
+    await task_queue.queue.enqueue("record_order", order=task_queue.order_payload(order))
+    trending.tracker.record_order(order.restaurant_name, [(item.item_name, item.quantity) for item in order.items])
+    await events.broker.publish(order)
+    logger.info("order_created", extra={"fields": {
+        "order_id": str(order.id),
+        "user_id": str(current_user.id),
+        "restaurant_name": order.restaurant_name,
+        "item_count": len(order_items),
+        "total_price": total_price
+    }})
+    
     return OrderOut(
         id=order.id,
         user_id=order.user_id,
@@ -672,9 +981,17 @@ async def create_order(
     )
 
 @app.get("/orders/", response_model=List[OrderOut])
-async def get_user_orders(current_user: User = Depends(get_current_user)):
-    """Get all orders for the current user"""
-    orders = await Order.find(Order.user_id == current_user.id).to_list()
+async def get_user_orders(
+    include_archived: bool = Query(False, description="Also return orders moved to the archive"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get all orders for the current user.
+    
+    Finished orders older than ORDER_ARCHIVE_AFTER_DAYS live in the archive
+    and are only included with `include_archived=true`.
+    """
+    orders = await archive.find_orders({"user_id": current_user.id}, include_archived=include_archived)
     
     return [
         OrderOut(
@@ -691,19 +1008,55 @@ async def get_user_orders(current_user: User = Depends(get_current_user)):
         ) for order in orders
     ]
 
+@app.get("/orders/events")
+async def stream_order_events(
+    request: Request,
+    order_id: Optional[str] = Query(None, description="Only stream updates for this order"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream live status updates for the current user's orders (Server-Sent Events).
+    
+    Replaces polling GET /orders/{order_id}. The stream starts with the current
+    status of the user's open orders (`"snapshot": true`), then sends an
+    `order_status` event whenever one of them is placed or changes status, and
+    a comment heartbeat while idle so proxies keep the connection open.
+    """
+    subscription = events.broker.subscribe(str(current_user.id), order_id)
+    try:
+        query = {"user_id": current_user.id, "status": {"$in": order_status.OPEN_STATUSES}}
+        open_orders = await Order.find(query).to_list()
+    except Exception:
+        events.broker.unsubscribe(subscription)
+        raise
+    initial_events = [
+        events.build_event(order, snapshot=True) for order in open_orders
+        if order_id is None or str(order.id) == order_id
+    ]
+    
+    return StreamingResponse(
+        events.stream_events(events.broker, subscription, initial_events, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/orders/{order_id}", response_model=OrderOut)
 async def get_order_by_id(
     order_id: str,
+    include_archived: bool = Query(False, description="Also look the order up in the archive"),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific order by ID"""
     from beanie import PydanticObjectId
     
     try:
-        order = await Order.get(PydanticObjectId(order_id))
+        order = await archive.get_order(PydanticObjectId(order_id), include_archived=include_archived)
     except:
         raise HTTPException(status_code=404, detail="Order not found")
     
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    
     # Verify order belongs to current user
     if order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="You don't have permission to view this order")
@@ -721,6 +1074,37 @@ async def get_order_by_id(
         order_date=order.order_date
     )
 
+@app.patch("/orders/{order_id}/status", response_model=OrderOut)
+async def update_order_status(
+    order_id: str,
+    update: OrderStatusUpdate,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Move an order to its next status (admin only).
+    
+    Allowed transitions:
+    - placed -> preparing | cancelled
+    - preparing -> out_for_delivery | cancelled
+    - out_for_delivery -> delivered
+    
+    The update is a single compare-and-set on the current status, so when two
+    dashboards race on the same order exactly one succeeds and the other gets
+    409 Conflict. Pass `expected_status` to require a specific current status.
+    """
+    try:
+        order, previous_status = await order_status.transition_order(
+            order_id, update.status, expected_status=update.expected_status
+        )
+    except order_status.TransitionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    await task_queue.queue.enqueue(
+        "record_status_change", order=task_queue.order_payload(order), previous_status=previous_status
+    )
+    await events.broker.publish(order, previous_status)
+    return _order_out(order)
+
 # ==================== ADMIN DASHBOARD ENDPOINTS ====================
 
 @app.get("/admin/stats", response_model=PlatformStatsOut)
@@ -747,6 +1131,14 @@ async def get_admin_stats(current_admin: User = Depends(get_current_admin_user))
         total_orders = len(all_orders)
         total_revenue = sum(order.total_price for order in all_orders)
         
+        # Archived (finished, older) orders still count towards the totals
+        archived_totals = await ArchivedOrder.get_motor_collection().aggregate([
+            {"$group": {"_id": None, "count": {"$sum": 1}, "revenue": {"$sum": "$total_price"}}}
+        ]).to_list(length=1)
+        if archived_totals:
+            total_orders += archived_totals[0]["count"]
+            total_revenue += archived_totals[0]["revenue"]
+        
         # Calculate today's stats
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
         orders_today = sum(1 for order in all_orders if order.order_date >= today_start)
@@ -773,19 +1165,77 @@ async def get_admin_stats(current_admin: User = Depends(get_current_admin_user))
             average_rating=round(average_rating, 2)
         )
     except Exception as e:
+        query_budget.raise_if_exceeded(e)
         raise HTTPException(status_code=500, detail=f"Error fetching admin stats: {str(e)}")
 
+@app.get("/admin/stats/timeseries", response_model=TimeSeriesOut)
+async def get_admin_stats_timeseries(
+    granularity: str = Query("day", pattern="^(hour|day)$", description="Bucket size"),
+    days: int = Query(30, ge=1, le=366, description="Range in days, ending now"),
+    restaurant_name: Optional[str] = Query(None, description="Restrict to one restaurant (omit for platform-wide)"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get order count, revenue and status mix per hour or day (admin only).
+    
+    Served from pre-aggregated `order_time_buckets`, updated on every order
+    insert and status change, so a 90-day daily series reads 90 documents.
+    
+    Query Parameters:
+    - granularity: "hour" (up to 14 days) or "day" (up to 366 days)
+    - days: Range length in days (default 30)
+    - restaurant_name: Optional restaurant filter
+    """
+    max_days = rollups.MAX_TIMESERIES_DAYS[granularity]
+    if days > max_days:
+        raise HTTPException(
+            status_code=400,
+            detail=f"'{granularity}' time series are limited to {max_days} days"
+        )
+    
+    try:
+        return await rollups.get_order_timeseries(granularity=granularity, days=days, restaurant_name=restaurant_name)
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error fetching time series: {str(e)}")
+
+@app.get("/admin/restaurants/popular", response_model=List[PopularRestaurantOut])
+async def get_popular_restaurants_admin(
+    days: Optional[int] = Query(None, ge=1, le=3650, description="Only count the last N days (omit for all time)"),
+    limit: int = Query(10, ge=1, le=100, description="Number of restaurants to return"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Rank restaurants by orders, revenue and rating (admin only).
+    
+    Served from the materialized `restaurant_daily_stats` rollup, which order
+    and review writes keep up to date, so no orders or reviews are scanned.
+    
+    Query Parameters:
+    - days: Time window in days, including today (default: all time)
+    - limit: Top-N restaurants to return (1-100, default 10)
+    """
+    try:
+        return await rollups.get_popular_restaurants(days=days, limit=limit)
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error fetching popular restaurants: {str(e)}")
+
 @app.get("/admin/orders", response_model=List[OrderOut])
-async def get_all_orders_admin(current_admin: User = Depends(get_current_admin_user)):
+async def get_all_orders_admin(
+    include_archived: bool = Query(False, description="Also return archived (finished, older) orders"),
+    current_admin: User = Depends(get_current_admin_user)
+):
     """
     Get all orders in the system (admin only).
     
-    Returns complete order history for business analysis.
+    Returns complete order history for business analysis when
+    `include_archived=true`; by default only the hot `orders` collection.
     
     V4.0 Feature: Admin Order Management
     """
     try:
-        orders = await Order.find_all().to_list()
+        orders = await archive.find_orders({}, include_archived=include_archived)
         
         return [
             OrderOut(
@@ -802,8 +1252,88 @@ async def get_all_orders_admin(current_admin: User = Depends(get_current_admin_u
             ) for order in orders
         ]
     except Exception as e:
+        query_budget.raise_if_exceeded(e)
         raise HTTPException(status_code=500, detail=f"Error fetching orders: {str(e)}")
 
+@app.get("/admin/orders/queue", response_model=List[OrderOut])
+async def get_order_queue_admin(
+    status_filter: str = Query("placed", alias="status", pattern="^(placed|preparing|out_for_delivery)$", description="Queue to read"),
+    restaurant_name: Optional[str] = Query(None, description="Restrict to one restaurant's kitchen"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum orders to return"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get open orders in a status, oldest first (admin only).
+    
+    Served by the (restaurant_name, status, order_date) and (status, order_date)
+    indexes, so reading a kitchen queue never scans delivered history.
+    """
+    try:
+        query = {"status": status_filter}
+        if restaurant_name:
+            query["restaurant_name"] = restaurant_name
+        orders = await Order.find(query).sort("+order_date").limit(limit).to_list()
+        return [_order_out(order) for order in orders]
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error fetching order queue: {str(e)}")
+
+@app.post("/admin/orders/status/bulk", response_model=BulkOrderStatusResult)
+async def bulk_update_order_status(
+    update: BulkOrderStatusUpdate,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Move a batch of orders to the same status (admin only).
+    
+    Applies the same transition rules as PATCH /orders/{order_id}/status with
+    one bulk write. Orders that do not exist, are in the wrong status, or were
+    changed concurrently are reported in `failed` with a reason; the rest are
+    updated.
+    """
+    try:
+        updated, failed = await order_status.transition_orders(
+            update.order_ids, update.status, expected_status=update.expected_status
+        )
+    except order_status.TransitionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    batch = rollups.RollupBatch()
+    for order, previous_status in updated:
+        batch.status_change(order, previous_status, order.status)
+    await task_queue.enqueue_rollup_batch(batch)
+    for order, previous_status in updated:
+        await events.broker.publish(order, previous_status)
+    return BulkOrderStatusResult(
+        updated=[str(order.id) for order, _ in updated],
+        failed=failed
+    )
+
+@app.post("/admin/bulk", response_model=BulkOperationsResponse)
+async def run_admin_bulk_operations(
+    request: BulkOperationsRequest,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Run a batch of moderation/operations changes in one request (admin only).
+    
+    Supported operations (field `op`):
+    - cancel_order: {"order_id"}
+    - cancel_restaurant_orders: {"restaurant_name"} - all placed/preparing orders
+    - delete_review: {"review_id"}
+    - set_user_role: {"user_id", "role": "user" | "admin"}
+    
+    Operations are grouped per collection and applied with unordered
+    bulk writes; analytics rollups, caches and live order events are updated
+    in the same pass. Each operation gets its own result, in request order,
+    and a failing operation does not stop the others.
+    """
+    try:
+        return await bulk_ops.run_bulk_operations(request.operations, current_admin.id)
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error running bulk operations: {str(e)}")
+
 @app.get("/admin/users")
 async def get_all_users_admin(current_admin: User = Depends(get_current_admin_user)):
     """
@@ -825,27 +1355,169 @@ async def get_all_users_admin(current_admin: User = Depends(get_current_admin_us
             } for user in users
         ]
     except Exception as e:
+        query_budget.raise_if_exceeded(e)
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
+@app.get("/admin/profiler/slow-queries", response_model=SlowQueryReport)
+async def get_slow_queries_admin(
+    limit: int = Query(20, ge=1, le=200, description="Number of shapes to return"),
+    sort_by: str = Query("total_ms", pattern="^(total_ms|max_ms|avg_ms|count)$", description="Ranking"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get the slowest query shapes seen by the profiler (admin only).
+    
+    Shapes are queries with their values redacted; with QUERY_PROFILER_EXPLAIN
+    enabled each one carries a summary of its winning plan, so collection
+    scans from missing indexes stand out.
+    """
+    profiler = query_profiler.profiler
+    return {
+        "threshold_ms": profiler.threshold_ms,
+        "explain_enabled": profiler.explain_enabled,
+        "untracked_shapes": profiler.untracked,
+        "shapes": profiler.top(limit=limit, sort_by=sort_by)
+    }
+
+@app.delete("/admin/profiler/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries_admin(current_admin: User = Depends(get_current_admin_user)):
+    """Clear the slow query report, e.g. before a load test run (admin only)."""
+    query_profiler.profiler.reset()
+
+@app.get("/admin/users/activity", response_model=UserActivityPage)
+async def get_user_activity_admin(
+    sort_by: str = Query("spend", pattern="^(spend|recency|orders)$", description="Sort by total spend, most recent order, or order count"),
+    page: int = Query(1, ge=1, description="Page number (1-based)"),
+    page_size: int = Query(20, ge=1, le=100, description="Users per page"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get paginated per-user order activity (admin only).
+    
+    Returns orders placed, total spent, last order date and registration date
+    for each user. Computed by a single aggregation that joins orders on the
+    indexed user_id; each page is cached for a short time.
+    
+    Query Parameters:
+    - sort_by: "spend" (default), "recency" or "orders"
+    - page: Page number (default 1)
+    - page_size: Users per page (1-100, default 20)
+    """
+    try:
+        return await user_activity.get_user_activity_page(sort_by=sort_by, page=page, page_size=page_size)
+    except Exception as e:
+        query_budget.raise_if_exceeded(e)
+        raise HTTPException(status_code=500, detail=f"Error fetching user activity: {str(e)}")
+
+# ==================== PROFILING ====================
+
+async def _run_profile(start) -> PlainTextResponse:
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+    try:
+        profile = await start()
+    except profiling.ProfilerBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    return PlainTextResponse(profile.collapsed(), headers={
+        "X-Profile-Kind": profile.kind,
+        "X-Profile-Seconds": str(profile.seconds),
+        "X-Profile-Samples": str(profile.samples)
+    })
+
+@app.get("/admin/profile/cpu", response_class=PlainTextResponse)
+async def profile_cpu_admin(
+    seconds: float = Query(10, gt=0, le=profiling.PROFILING_MAX_SECONDS, description="Profiling window in seconds"),
+    interval_ms: float = Query(profiling.PROFILING_INTERVAL_MS, ge=1, le=1000, description="Sampling interval"),
+    include_idle: bool = Query(False, description="Keep samples of threads waiting in select()/wait()"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Sample the worker's Python stacks while it serves traffic (admin only).
+    
+    Returns collapsed stacks ("frame;frame;frame count" per line) for
+    flamegraph.pl or speedscope; counts are samples. Disabled unless
+    PROFILING_ENABLED is set; one profile at a time, with a cooldown (429).
+    """
+    return await _run_profile(lambda: profiling.profile_cpu(seconds, interval_ms, include_idle))
+
+@app.get("/admin/profile/memory", response_class=PlainTextResponse)
+async def profile_memory_admin(
+    seconds: float = Query(10, gt=0, le=profiling.PROFILING_MAX_SECONDS, description="Profiling window in seconds"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Diff tracemalloc snapshots taken at the start and end of a window (admin only).
+    
+    Returns collapsed allocation stacks weighted by the bytes they grew by.
+    Disabled unless PROFILING_ENABLED is set; one profile at a time, with a
+    cooldown (429).
+    """
+    return await _run_profile(lambda: profiling.profile_memory(seconds))
+
+# ==================== METRICS ====================
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(default=None)):
+    """
+    Prometheus metrics in the text exposition format.
+    
+    Protected by a bearer token when METRICS_TOKEN is set.
+    """
+    if metrics.METRICS_TOKEN and not secrets.compare_digest(
+        authorization or "", f"Bearer {metrics.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # ==================== HEALTH CHECK ====================
 
+@app.get("/health/live")
+async def liveness_check():
+    """
+    Liveness probe: the process is up and serving. No I/O.
+    """
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe: the last result of the background health checks.
+    
+    Returns 503 while starting, when MongoDB is unreachable, when the
+    connection pool is saturated or when the checks have stopped refreshing.
+    Never queries the database itself.
+    """
+    ready, report = health.monitor.readiness()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
 @app.get("/health")
 async def health_check():
     """
-    V4.0: API health check endpoint with database connectivity test.
+    V4.0: API health summary.
     
-    Used by Docker HEALTHCHECK and monitoring systems.
+    Reports database connectivity from the cached readiness checks (see
+    /health/ready) and the load-shedding and query-budget counters; it does
+    not query the database. Docker HEALTHCHECK uses /health/live.
     """
-    try:
-        # Test database connection by counting users
-        user_count = await User.count()
+    ready, report = health.monitor.readiness()
+    mongo = report.get("checks", {}).get("mongo", {})
+    if mongo.get("status") == "ok":
         database_status = "connected"
-    except Exception as e:
-        database_status = f"error: {str(e)}"
+    else:
+        database_status = f"error: {mongo.get('error', report['status'])}"
     
     return {
         "status": "healthy",
         "version": "4.0.0",
         "database": database_status,
+        "ready": ready,
+        "query_budgets": query_budget.snapshot(),
+        "load_shedding": load_shedding.snapshot(),
         "features": ["reviews", "admin_dashboard", "ai_personalization", "docker"]
     }
@@ -0,0 +1,389 @@
+"""
+Metrics Module
+Prometheus-compatible metrics, aggregated in-process
+
+Exposed as text at GET /metrics:
+
+- HTTP: request counts by route/method/status, latency histograms by route,
+  in-flight requests by route class, unhandled exceptions
+- MongoDB (pymongo listeners wired into the Motor client in database.py):
+  command duration histograms and failures by collection/command, connection
+  pool checkout wait times, checked-out connections, checkout failures
+- Caches: hits, misses and hit ratio of every registered TTLCache
+- Query budgets and load shedding counters
+
+Recording is cheap and allocation-free in the steady state: each label
+combination owns a preallocated bucket array created on first use, routes
+are labelled with their path template (bounded cardinality), and an
+observation is one bisect plus a few integer increments under a lock. The
+text rendering cost is paid by the scraper, not by requests.
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from . import load_shedding, query_budget, structured_logging
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+logger = structured_logging.get_logger("metrics")
+
+# Seconds; HTTP handlers and database commands
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds; pool checkouts are fast unless the pool is exhausted
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Metrics plus callbacks producing scrape-time gauges."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception:
+                logger.warning("metrics_collector_failed", exc_info=True, extra={"fields": {
+                    "collector": getattr(collector, "__qualname__", repr(collector))
+                }})
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status", ("route", "method", "status")))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("route", "method")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled, by route class", ("route_class",)))
+http_exceptions = registry.register(Counter(
+    "http_unhandled_exceptions_total", "Requests that ended in an unhandled exception", ("route",)))
+
+mongo_command_latency = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command duration by collection and command", ("collection", "command")))
+mongo_command_failures = registry.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by collection and command", ("collection", "command")))
+mongo_pool_wait = registry.register(Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", (), POOL_WAIT_BUCKETS))
+mongo_pool_checked_out = registry.register(Gauge(
+    "mongodb_pool_connections_checked_out", "Connections currently checked out of the pool"))
+mongo_pool_checkout_failures = registry.register(Counter(
+    "mongodb_pool_checkout_failures_total", "Connection checkouts that failed (e.g. pool wait timeout)", ("reason",)))
+
+task_queue_jobs = registry.register(Counter(
+    "task_queue_jobs_total", "Background tasks by name and outcome (enqueued, succeeded, retried, failed)", ("task", "outcome")))
+task_queue_depth = registry.register(Gauge(
+    "task_queue_depth", "Background tasks waiting in this worker's queue"))
+task_queue_latency = registry.register(Histogram(
+    "task_queue_task_duration_seconds", "Run time of successful background tasks", ("task",)))
+
+
+# ==================== CACHES ====================
+
+_caches: Dict[str, object] = {}
+
+
+def register_cache(name: str, cache) -> None:
+    """Report a TTLCache's hits, misses and hit ratio."""
+    _caches[name] = cache
+
+
+def registered_caches() -> Dict[str, object]:
+    return dict(_caches)
+
+
+def _collect_caches() -> List[str]:
+    lines = [
+        "# HELP cache_hits_total Cache lookups answered from the cache",
+        "# TYPE cache_hits_total counter",
+    ]
+    lines += [f'cache_hits_total{{cache="{name}"}} {cache.hits}' for name, cache in _caches.items()]
+    lines += ["# HELP cache_misses_total Cache lookups that missed", "# TYPE cache_misses_total counter"]
+    lines += [f'cache_misses_total{{cache="{name}"}} {cache.misses}' for name, cache in _caches.items()]
+    lines += ["# HELP cache_hit_ratio Hits over lookups since start", "# TYPE cache_hit_ratio gauge"]
+    for name, cache in _caches.items():
+        lookups = cache.hits + cache.misses
+        ratio = cache.hits / lookups if lookups else 0.0
+        lines.append(f'cache_hit_ratio{{cache="{name}"}} {_format_value(round(ratio, 6))}')
+    return lines
+
+
+registry.add_collector(_collect_caches)
+
+
+# ==================== LOAD SHEDDING / QUERY BUDGETS ====================
+
+def _collect_limits() -> List[str]:
+    classes = load_shedding.snapshot()
+    lines = []
+    for metric, kind, help_text in (
+        ("in_flight", "gauge", "Requests holding a concurrency slot"),
+        ("queue_depth", "gauge", "Requests waiting for a concurrency slot"),
+        ("admitted", "counter", "Requests admitted"),
+        ("queued", "counter", "Requests that had to wait for a slot"),
+        ("shed", "counter", "Requests rejected with 503"),
+    ):
+        name = f"load_shedding_{metric}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help_text}, by route class", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{route_class="{cls}"}} {stats[metric]}' for cls, stats in classes.items()]
+
+    budgets = query_budget.snapshot()
+    for metric, help_text in (
+        ("budget_exceeded", "Requests that ran out of database time budget"),
+        ("cancelled_on_disconnect", "Requests cancelled because the client disconnected"),
+    ):
+        name = f"query_{metric}_total"
+        lines += [f"# HELP {name} {help_text}, by endpoint group", f"# TYPE {name} counter"]
+        lines += [f'{name}{{group="{group}"}} {count}' for group, count in budgets[metric].items()]
+    return lines
+
+
+registry.add_collector(_collect_limits)
+
+
+# ==================== HTTP MIDDLEWARE ====================
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts, latency and in-flight requests."""
+
+    def __init__(self, app, route_class: Callable[[str, str], Optional[str]] = lambda method, path: "all"):
+        self.app = app
+        self.route_class = route_class
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_flight_labels = (self.route_class(method, scope["path"]) or "unlimited",)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc(in_flight_labels)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            http_exceptions.inc((_route_label(scope),))
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            http_in_flight.dec(in_flight_labels)
+            route = _route_label(scope)
+            http_latency.observe(duration, (route, method))
+            http_requests.inc((route, method, str(status_code)))
+
+
+def _route_label(scope) -> str:
+    # The router stores the matched route in the scope; its path is a template
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+# ==================== MONGODB LISTENERS ====================
+
+def _collection_of(event) -> str:
+    command = event.command
+    if event.command_name == "getMore":
+        return str(command.get("collection", "-"))
+    target = command.get(event.command_name)
+    return target if isinstance(target, str) else "-"
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Per-collection command durations and failures."""
+
+    def __init__(self):
+        # (connection id, request id) -> collection, until the command finishes
+        self._pending: Dict[tuple, str] = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = _collection_of(event)
+
+    def _finish(self, event) -> Tuple[str, str]:
+        collection = self._pending.pop((event.connection_id, event.request_id), "-")
+        labels = (collection, event.command_name)
+        mongo_command_latency.observe(event.duration_micros / 1_000_000, labels)
+        return labels
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        mongo_command_failures.inc(self._finish(event))
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool checkout waits and utilisation."""
+
+    def connection_checked_out(self, event):
+        mongo_pool_checked_out.inc()
+        if event.duration is not None:
+            mongo_pool_wait.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec()
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc((str(event.reason),))
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+def mongo_listeners() -> list:
+    """Listeners to pass to the Motor client as `event_listeners`."""
+    return [CommandMetrics(), PoolMetrics()]
+
+
+def render() -> str:
+    return registry.render()
@@ -5,8 +5,15 @@ from pydantic import EmailStr
 # app/models.py
 from beanie import Document, PydanticObjectId
 from pydantic import EmailStr, BaseModel, Field
-from typing import Optional, List
+from pymongo import IndexModel
+from typing import Optional, List, Literal
 from datetime import datetime
+import os
+
+# GeoJSON point; coordinates are [longitude, latitude] (see app/geo.py)
+class GeoPoint(BaseModel):
+    type: Literal["Point"] = "Point"
+    coordinates: List[float]
 
 class Restaurant(Document):
     name: str
@@ -14,9 +21,14 @@ class Restaurant(Document):
     cuisine: str  # NEW: Cuisine type (e.g., "Gujarati", "Italian", "South Indian")
     items: list = []  # List of items (dicts) for this restaurant
     # Example item: {"item_name": str, "price": float, "rating": float, "total_ratings": int, "description": str, "image_url": str, "calories": int, "preparation_time": str}
+    location: Optional[GeoPoint] = None  # Set by admins or scripts/geocode_restaurants.py
     
     class Settings:
         name = "restaurants"
+        indexes = [
+            # Restaurants without a location are left out of the index
+            IndexModel([("location", "2dsphere")], name="location_2dsphere")
+        ]
 
 class User(Document):
     username: str
@@ -38,11 +50,28 @@ class Order(Document):
     restaurant_name: str
     items: List[OrderItem]  # NEW: Support multiple items
     total_price: float  # NEW: Total order price
-    status: str = "placed"  # "placed", "preparing", "out_for_delivery", "delivered"
+    status: str = "placed"  # "placed", "preparing", "out_for_delivery", "delivered", "cancelled"
     order_date: datetime = Field(default_factory=datetime.utcnow)  # NEW: Timestamp
+    status_updated_at: Optional[datetime] = None  # Last status transition (see app/order_status.py)
 
     class Settings:
         name = "orders"
+        indexes = [
+            "user_id",  # Per-user order history and the admin user-activity $lookup
+            [("status", 1), ("order_date", 1)],  # Platform-wide status queues
+            [("restaurant_name", 1), ("status", 1), ("order_date", 1)]  # Per-restaurant kitchen queue
+        ]
+
+# Cold tier: delivered/cancelled orders moved out of `orders` (see app/archive.py)
+class ArchivedOrder(Order):
+    archived_at: Optional[datetime] = None
+
+    class Settings:
+        name = "orders_archive"
+        indexes = [
+            "user_id",  # Order history including archived orders
+            "order_date"
+        ]
 
 # V4.0: Enhanced Review model for restaurant reviews
 class Review(Document):
@@ -61,4 +90,106 @@ class Review(Document):
             "user_id",
             "restaurant_name",
             [("restaurant_name", 1), ("review_date", -1)]  # For efficient queries
-        ]
\ No newline at end of file
+        ]
+
+# Analytics: materialized per-restaurant daily rollup (see app/rollups.py)
+class RestaurantDailyStats(Document):
+    restaurant_name: str
+    day: datetime  # UTC midnight that starts the bucket
+    total_orders: int = 0
+    total_revenue: float = 0.0
+    rating_sum: int = 0  # Sum of review ratings, for average_rating
+    review_count: int = 0
+
+    class Settings:
+        name = "restaurant_daily_stats"
+        indexes = [
+            IndexModel([("restaurant_name", 1), ("day", 1)], unique=True),
+            "day"  # Time-window scans for the popularity ranking
+        ]
+
+# Analytics: pre-aggregated order time series (see app/rollups.py)
+class OrderTimeBucket(Document):
+    granularity: str  # "hour" or "day"
+    bucket_start: datetime  # UTC start of the hour/day
+    restaurant_name: str  # "*" holds the platform-wide totals
+    order_count: int = 0
+    revenue: float = 0.0
+    status_counts: dict = {}  # e.g. {"placed": 3, "delivered": 10}
+
+    class Settings:
+        name = "order_time_buckets"
+        indexes = [
+            IndexModel([("granularity", 1), ("restaurant_name", 1), ("bucket_start", 1)], unique=True)
+        ]
+
+# Recommendations: precomputed top-K lists (see app/recommendations.py)
+class RecommendedItem(BaseModel):
+    restaurant_name: str
+    item_name: str
+    score: float
+
+# Menu items are identified per restaurant (recommendations, trending, analytics snapshots)
+ITEM_KEY_SEPARATOR = "::"
+
+def item_key(restaurant_name: str, item_name: str) -> str:
+    """Lookup key of a menu item ("Swati Snacks::Pani Puri")."""
+    return f"{restaurant_name}{ITEM_KEY_SEPARATOR}{item_name}"
+
+class ItemRecommendation(Document):
+    item_key: str  # item_key(restaurant_name, item_name)
+    restaurant_name: str
+    item_name: str
+    recommendations: List[RecommendedItem] = []
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "item_recommendations"
+        indexes = [
+            IndexModel([("item_key", 1)], unique=True)
+        ]
+
+class UserRecommendation(Document):
+    user_id: PydanticObjectId
+    recommendations: List[RecommendedItem] = []
+    computed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "user_recommendations"
+        indexes = [
+            IndexModel([("user_id", 1)], unique=True)
+        ]
+
+# Idempotency-Key records for POST /orders/ (see app/idempotency.py)
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", str(24 * 3600)))
+
+class IdempotencyRecord(Document):
+    user_id: PydanticObjectId
+    key: str  # Client-supplied Idempotency-Key header
+    request_hash: str  # Fingerprint of the request body the key was first used with
+    status: str = "in_progress"  # "in_progress" or "completed"
+    response: Optional[dict] = None  # Stored response body, replayed on retries
+    owner: Optional[str] = None  # Random token of the attempt running the request
+    locked_until: Optional[datetime] = None  # In-progress lock, extended by the owner while it runs
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "idempotency_keys"
+        indexes = [
+            IndexModel([("user_id", 1), ("key", 1)], unique=True),
+            IndexModel([("created_at", 1)], expireAfterSeconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+        ]
+
+# Catalog change feed: one record per admin write to a restaurant (see app/catalog.py)
+class CatalogChange(Document):
+    version: int  # Catalog version this change produced; contiguous, never reused
+    op: str  # "upsert" or "delete"
+    restaurant_name: str
+    restaurant: Optional[dict] = None  # Full restaurant after an upsert
+    changed_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "catalog_changes"
+        indexes = [
+            IndexModel([("version", 1)], unique=True)
+        ]
@@ -0,0 +1,193 @@
+"""
+Order Status Lifecycle Module
+Race-free order status transitions
+
+    placed -> preparing -> out_for_delivery -> delivered
+       \\__________\\______-> cancelled
+
+Every transition is a single compare-and-set: the update filter requires the
+order to still be in an allowed previous status, so two dashboards moving the
+same order can never both succeed and no read-modify-write round trip is
+needed. The pre-image returned by MongoDB gives the exact previous status for
+the analytics rollups.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+
+from .models import Order
+
+ORDER_STATUSES = ["placed", "preparing", "out_for_delivery", "delivered", "cancelled"]
+
+ALLOWED_TRANSITIONS: Dict[str, Set[str]] = {
+    "placed": {"preparing", "cancelled"},
+    "preparing": {"out_for_delivery", "cancelled"},
+    "out_for_delivery": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+
+# Statuses that still need kitchen or delivery work
+OPEN_STATUSES = ["placed", "preparing", "out_for_delivery"]
+
+
+class TransitionError(Exception):
+    """Raised when an order cannot be moved to the requested status."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def previous_statuses(new_status: str) -> List[str]:
+    """Statuses from which `new_status` can be reached."""
+    return [status for status, targets in ALLOWED_TRANSITIONS.items() if new_status in targets]
+
+
+def _allowed_current_statuses(new_status: str, expected_status: Optional[str]) -> List[str]:
+    """Statuses an order may currently have for the transition to apply."""
+    if new_status not in ALLOWED_TRANSITIONS:
+        raise TransitionError(400, f"Unknown order status '{new_status}'")
+    allowed = previous_statuses(new_status)
+    if expected_status is not None:
+        if expected_status not in allowed:
+            raise TransitionError(400, f"Cannot move an order from '{expected_status}' to '{new_status}'")
+        return [expected_status]
+    return allowed
+
+
+def _parse_object_id(order_id: str) -> ObjectId:
+    try:
+        return ObjectId(order_id)
+    except (InvalidId, TypeError):
+        raise TransitionError(404, "Order not found")
+
+
+async def transition_order(order_id: str, new_status: str, expected_status: Optional[str] = None) -> Tuple[Order, str]:
+    """
+    Atomically move one order to `new_status`.
+
+    Args:
+        order_id: Order to update
+        new_status: Target status
+        expected_status: Optional explicit current status to compare against;
+                         defaults to any status that may precede `new_status`
+
+    Returns:
+        (updated order, previous status)
+
+    Raises:
+        TransitionError: 404 if the order does not exist, 409 if its current
+                         status does not allow the transition
+    """
+    object_id = _parse_object_id(order_id)
+    allowed = _allowed_current_statuses(new_status, expected_status)
+
+    before = await Order.get_motor_collection().find_one_and_update(
+        {"_id": object_id, "status": {"$in": allowed}},
+        {"$set": {"status": new_status, "status_updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        # Only the failure path reads the order, to report why
+        current = await Order.get_motor_collection().find_one({"_id": object_id}, {"status": 1})
+        if current is None:
+            raise TransitionError(404, "Order not found")
+        raise TransitionError(409, f"Order is '{current['status']}' and cannot move to '{new_status}'")
+
+    previous_status = before["status"]
+    before["status"] = new_status
+    return Order.model_validate(before), previous_status
+
+
+async def transition_documents(documents: List[dict], new_status: str, allowed: List[str]) -> Tuple[List[Tuple[Order, str]], Dict[ObjectId, str]]:
+    """
+    Move already-fetched order documents to `new_status`.
+
+    Applies one unordered bulk_write of per-order compare-and-set updates,
+    conditioned on the status each document was read with, then reads back
+    which orders carry this call's batch id. The id is random per call, so
+    concurrent batches can never claim each other's updates, and it is pushed
+    onto `status_batch_ids` rather than overwritten, so a later transition of
+    the same order does not hide this one.
+
+    Returns:
+        (list of (updated order, previous status), {order _id: failure reason})
+    """
+    failures: Dict[ObjectId, str] = {}
+    batch_id = uuid.uuid4().hex
+    now = datetime.utcnow()
+    requests = []
+    candidates = []
+    for doc in documents:
+        if doc["status"] not in allowed:
+            failures[doc["_id"]] = f"invalid_transition_from_{doc['status']}"
+            continue
+        requests.append(UpdateOne(
+            {"_id": doc["_id"], "status": doc["status"]},
+            {"$set": {"status": new_status, "status_updated_at": now}, "$push": {"status_batch_ids": batch_id}}
+        ))
+        candidates.append(doc)
+
+    if not requests:
+        return [], failures
+
+    collection = Order.get_motor_collection()
+    await collection.bulk_write(requests, ordered=False)
+    # Orders that lost a race to another writer do not carry our batch id
+    applied = {
+        doc["_id"]
+        async for doc in collection.find(
+            {"_id": {"$in": [doc["_id"] for doc in candidates]}, "status_batch_ids": batch_id},
+            {"_id": 1}
+        )
+    }
+
+    updated = []
+    for doc in candidates:
+        if doc["_id"] not in applied:
+            failures[doc["_id"]] = "concurrent_update"
+            continue
+        previous_status = doc["status"]
+        updated.append((Order.model_validate({**doc, "status": new_status, "status_updated_at": now}), previous_status))
+    return updated, failures
+
+
+async def transition_orders(order_ids: List[str], new_status: str, expected_status: Optional[str] = None) -> Tuple[List[Tuple[Order, str]], Dict[str, str]]:
+    """
+    Move a batch of orders to `new_status` (e.g. a dispatch batch).
+
+    Uses three round trips regardless of batch size: read the current
+    statuses, then `transition_documents`.
+
+    Returns:
+        (list of (updated order, previous status), {order_id: failure reason})
+    """
+    failures: Dict[str, str] = {}
+    object_ids = {}
+    for order_id in order_ids:
+        try:
+            object_ids[order_id] = ObjectId(order_id)
+        except (InvalidId, TypeError):
+            failures[order_id] = "not_found"
+
+    allowed = _allowed_current_statuses(new_status, expected_status)
+    documents = [
+        doc async for doc in Order.get_motor_collection().find({"_id": {"$in": list(object_ids.values())}})
+    ]
+    found = {doc["_id"] for doc in documents}
+    for order_id, object_id in object_ids.items():
+        if object_id not in found:
+            failures[order_id] = "not_found"
+
+    updated, document_failures = await transition_documents(documents, new_status, allowed)
+    for order_id, object_id in object_ids.items():
+        if object_id in document_failures:
+            failures[order_id] = document_failures[object_id]
+    return updated, failures
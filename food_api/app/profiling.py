@@ -0,0 +1,194 @@
+"""
+Profiling Module
+On-demand CPU sampling and allocation diffs of the running worker
+
+Both profiles run for a few seconds against live traffic and return
+collapsed stacks ("frame;frame;frame count", one stack per line), the input
+format of flamegraph.pl, speedscope and inferno:
+
+- cpu: a background thread samples the Python stack of every thread each
+  interval via sys._current_frames(). The count of a stack is its number of
+  samples, so a frame's width is its share of wall time on that thread; an
+  event loop stuck in bcrypt or a long handler shows up as a wide tower.
+  Threads idle in select()/wait() are skipped unless include_idle is set.
+- memory: tracemalloc snapshots at the start and end of the window; each
+  stack is an allocation site weighted by the bytes it grew by.
+
+Disabled unless PROFILING_ENABLED=true. One profile runs at a time, and the
+next can start PROFILING_COOLDOWN_SECONDS after the previous one ended, so
+the worker is never kept under a profiler.
+
+food_chatbot_agent/profiling.py carries a copy of the sampler and collapser
+core: the two services are built from separate Docker contexts and cannot
+import a shared module. tests/test_profiling.py fails if the copies drift
+apart.
+"""
+
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "10"))
+PROFILING_COOLDOWN_SECONDS = float(os.getenv("PROFILING_COOLDOWN_SECONDS", "60"))
+PROFILING_TRACEMALLOC_FRAMES = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "32"))
+
+# Innermost frames of a thread that is waiting for work rather than running
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+
+class ProfilerBusy(Exception):
+    """A profile is running or the cooldown has not passed."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Profiler busy, retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class Profile:
+    """Collapsed stacks of one profiling run."""
+
+    __slots__ = ("kind", "seconds", "samples", "stacks")
+
+    def __init__(self, kind: str, seconds: float, samples: int, stacks: Counter):
+        self.kind = kind
+        self.seconds = seconds
+        self.samples = samples
+        self.stacks = stacks
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def frame_label(filename: str, name) -> str:
+    """module:function (or module:line) with the separator of the collapsed format removed."""
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{name}".replace(";", ",")
+
+
+# ==================== RUN GATE ====================
+
+_gate_lock = threading.Lock()
+_busy_until = 0.0
+
+
+@contextmanager
+def _exclusive(cooldown: Optional[float] = None):
+    global _busy_until
+    cooldown = PROFILING_COOLDOWN_SECONDS if cooldown is None else cooldown
+    with _gate_lock:
+        now = time.monotonic()
+        if now < _busy_until:
+            raise ProfilerBusy(_busy_until - now if math.isfinite(_busy_until) else cooldown)
+        _busy_until = math.inf
+    try:
+        yield
+    finally:
+        with _gate_lock:
+            _busy_until = time.monotonic() + cooldown
+
+
+# ==================== CPU ====================
+
+class CpuSampler:
+    """Samples every thread's stack from a background thread."""
+
+    def __init__(self, interval: float, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cpu-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample(skip=threading.get_ident())
+
+    def sample(self, skip=None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code.co_filename, frame.f_code.co_qualname))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+
+async def profile_cpu(seconds: float, interval_ms: float = PROFILING_INTERVAL_MS,
+                      include_idle: bool = False) -> Profile:
+    """Sample all threads for `seconds` while the event loop keeps serving."""
+    with _exclusive():
+        sampler = CpuSampler(interval_ms / 1000, include_idle)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+    return Profile("cpu", seconds, sampler.samples, sampler.stacks)
+
+
+# ==================== MEMORY ====================
+
+def allocation_stacks(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> Counter:
+    """Bytes grown per allocation traceback between two snapshots."""
+    stacks: Counter = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        # Traceback frames run from the oldest call to the allocation
+        stack = ";".join(frame_label(frame.filename, frame.lineno) for frame in stat.traceback)
+        stacks[stack] += stat.size_diff
+    return stacks
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+
+
+async def profile_memory(seconds: float) -> Profile:
+    """Diff of allocations still held after `seconds`, by allocation site."""
+    with _exclusive():
+        # Tracing slows every allocation; only keep it on for the window
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(PROFILING_TRACEMALLOC_FRAMES)
+        try:
+            before = _snapshot()
+            await asyncio.sleep(seconds)
+            after = _snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+    stacks = allocation_stacks(before, after)
+    return Profile("memory", seconds, len(stacks), stacks)
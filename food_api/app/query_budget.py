@@ -0,0 +1,176 @@
+"""
+Query Budget Module
+Per-endpoint database time budgets and cancellation on client disconnect
+
+Every HTTP request gets a time budget from QUERY_BUDGETS (first matching
+rule). The budget is applied with pymongo's client-side operation timeout
+(`pymongo.timeout`), which Motor carries into its worker threads: every
+query the request makes is sent with `maxTimeMS` set to the time left, and a
+query that would start after the deadline fails immediately. A slow regex
+search or admin scan is therefore stopped by MongoDB itself once the budget
+is spent.
+
+The middleware also watches the ASGI connection. When the client disconnects
+(e.g. the agent gave up after its own timeout) the handler task is cancelled,
+so no further queries are issued for an abandoned request; a query already
+in flight is bounded by its `maxTimeMS`.
+
+Budget overruns reach the client as 503 and are counted per endpoint group,
+as are cancelled requests (see `snapshot`).
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import re
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+from . import structured_logging
+
+QUERY_BUDGET_DEFAULT_MS = int(os.getenv("QUERY_BUDGET_DEFAULT_MS", "4000"))
+QUERY_BUDGET_SEARCH_MS = int(os.getenv("QUERY_BUDGET_SEARCH_MS", "2000"))
+QUERY_BUDGET_ORDER_MS = int(os.getenv("QUERY_BUDGET_ORDER_MS", "8000"))
+QUERY_BUDGET_ADMIN_MS = int(os.getenv("QUERY_BUDGET_ADMIN_MS", "15000"))
+
+# (group, HTTP method or None for any, path pattern, budget in ms); first match wins
+QUERY_BUDGETS: List[Tuple[str, Optional[str], "re.Pattern", int]] = [
+    ("admin", None, re.compile(r"^/admin/"), QUERY_BUDGET_ADMIN_MS),
+    ("search", "GET", re.compile(r"^/search/"), QUERY_BUDGET_SEARCH_MS),
+    ("search", "GET", re.compile(r"^/restaurants/?$"), QUERY_BUDGET_SEARCH_MS),
+    # Placing an order may wait for an in-flight duplicate (Idempotency-Key)
+    ("orders", "POST", re.compile(r"^/orders/?$"), QUERY_BUDGET_ORDER_MS),
+]
+DEFAULT_GROUP = "default"
+
+logger = structured_logging.get_logger("query_budget")
+
+# Monotonic deadline of the current request, if it has a budget
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("query_deadline", default=None)
+
+budget_exceeded: Counter = Counter()
+cancelled_on_disconnect: Counter = Counter()
+
+
+def budget_for(method: str, path: str) -> Tuple[str, int]:
+    """(endpoint group, budget in ms) for a request."""
+    for group, rule_method, pattern, budget_ms in QUERY_BUDGETS:
+        if (rule_method is None or rule_method == method) and pattern.match(path):
+            return group, budget_ms
+    return DEFAULT_GROUP, QUERY_BUDGET_DEFAULT_MS
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left in the current request's budget (None outside a request)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def is_budget_error(error: BaseException) -> bool:
+    """Whether an exception is a database time-budget overrun."""
+    return isinstance(error, PyMongoError) and error.timeout
+
+
+def raise_if_exceeded(error: Exception) -> None:
+    """
+    Re-raise budget overruns unchanged.
+
+    Handlers that turn any exception into a 500 call this first, so that the
+    middleware can answer 503 and count the overrun.
+    """
+    if is_budget_error(error):
+        raise error
+
+
+def snapshot() -> dict:
+    """Counters for monitoring."""
+    return {
+        "budget_exceeded": dict(budget_exceeded),
+        "cancelled_on_disconnect": dict(cancelled_on_disconnect),
+    }
+
+
+class QueryBudgetMiddleware:
+    """Pure ASGI middleware applying query budgets and disconnect cancellation."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group, budget_ms = budget_for(scope["method"], scope["path"])
+        messages: asyncio.Queue = asyncio.Queue()
+        disconnect_message = None
+        response_started = False
+
+        async def wrapped_receive():
+            # Once the client is gone, keep reporting it like a real server
+            if disconnect_message is not None and messages.empty():
+                return disconnect_message
+            return await messages.get()
+
+        async def wrapped_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        # The task copies the current context, including the pymongo timeout
+        deadline_token = _deadline.set(time.monotonic() + budget_ms / 1000)
+        try:
+            with pymongo.timeout(budget_ms / 1000):
+                handler = asyncio.create_task(self.app(scope, wrapped_receive, wrapped_send))
+        finally:
+            _deadline.reset(deadline_token)
+
+        async def watch_client():
+            nonlocal disconnect_message
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnect_message = message
+                    await messages.put(message)
+                    handler.cancel()
+                    return
+                await messages.put(message)
+
+        watcher = asyncio.create_task(watch_client())
+        try:
+            await asyncio.wait({handler})
+        except asyncio.CancelledError:
+            # The server itself cancelled us: stop the handler too
+            handler.cancel()
+            raise
+        finally:
+            watcher.cancel()
+
+        if handler.cancelled():
+            cancelled_on_disconnect[group] += 1
+            return
+        error = handler.exception()
+        if error is None:
+            return
+        if not is_budget_error(error) or response_started:
+            raise error
+
+        budget_exceeded[group] += 1
+        logger.warning("query_budget_exceeded", extra={"fields": {
+            "method": scope["method"], "path": scope["path"], "budget_ms": budget_ms
+        }})
+        body = json.dumps({"detail": "The request exceeded its database time budget, please retry"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,297 @@
+"""
+Query Profiler Module
+Slow-query log, filter shapes and explain() capture for Motor queries
+
+A pymongo command listener times every command. Commands slower than
+SLOW_QUERY_THRESHOLD_MS are:
+
+- reduced to a *shape*: the filter/pipeline/sort structure with every value
+  replaced by "?" (field names and operators kept, user data dropped), so
+  `{"username": "alice"}` and `{"username": "bob"}` aggregate together,
+- logged with their duration and shape,
+- aggregated per (collection, command, shape) for the admin report.
+
+With QUERY_PROFILER_EXPLAIN enabled, the first slow occurrence of each read
+shape is re-run as `explain` with `executionStats` by a background task, and
+the winning plan is summarised (COLLSCAN vs IXSCAN, index used, documents and
+keys examined). A missing index shows up as a slow shape with
+`collection_scan: true`.
+
+Only the slow path pays for shape computation; fast commands cost a dict
+insert and pop.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pymongo
+from pymongo import monitoring
+
+from . import structured_logging
+
+QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER_ENABLED", "true").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+QUERY_PROFILER_EXPLAIN = os.getenv("QUERY_PROFILER_EXPLAIN", "false").lower() == "true"
+QUERY_PROFILER_MAX_SHAPES = int(os.getenv("QUERY_PROFILER_MAX_SHAPES", "500"))
+QUERY_PROFILER_EXPLAIN_TIMEOUT_SECONDS = float(os.getenv("QUERY_PROFILER_EXPLAIN_TIMEOUT_SECONDS", "10"))
+
+# Parts of each command that determine how it is executed
+SHAPED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+# Commands that can be explained without side effects
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+
+# Keys whose values are collection/field names rather than user data
+STRUCTURAL_KEYS = {"from", "localField", "foreignField", "as", "coll", "connectFromField", "connectToField", "key"}
+
+REDACTED = "?"
+
+logger = structured_logging.get_logger("query_profiler")
+
+
+def shape_of(value, key: Optional[str] = None):
+    """
+    Structure of a query with the values redacted.
+
+    Operators and field names are kept, as are field paths ("$field"),
+    sort/projection flags (-1, 0, 1) and the collection/field names of
+    $lookup-style stages. Every other value becomes "?", and lists of values
+    (e.g. an $in) collapse to a single "?".
+    """
+    if isinstance(value, dict):
+        return {k: shape_of(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [shape_of(item) for item in value]
+        return [REDACTED] if value else []
+    if key in STRUCTURAL_KEYS and isinstance(value, str):
+        return value
+    if isinstance(value, str) and value.startswith("$"):
+        return value
+    if isinstance(value, bool):
+        return REDACTED
+    if isinstance(value, int) and value in (-1, 0, 1):
+        return value
+    return REDACTED
+
+
+def command_shape(command_name: str, command) -> dict:
+    """Shape of the parts of a command that affect its plan."""
+    shape = {}
+    for field in SHAPED_FIELDS.get(command_name, ()):
+        if field not in command:
+            continue
+        if field in ("updates", "deletes"):
+            # Only the selectors of each statement matter
+            shape[field] = [shape_of(statement.get("q", {})) for statement in command[field]]
+        else:
+            shape[field] = shape_of(command[field], field)
+    return shape
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Winning plan stages, index names and execution counters of an explain result."""
+    stages: List[str] = []
+    indexes: List[str] = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            if "indexName" in node:
+                indexes.append(node["indexName"])
+            for child in node.values():
+                walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Aggregations nest the planner under their first $cursor stage
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                explain = stage["$cursor"]
+                break
+    walk((planner or {}).get("winningPlan", {}))
+    stats = explain.get("executionStats", {})
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class ShapeStats:
+    """Aggregated timings of one slow query shape."""
+
+    __slots__ = ("database", "collection", "command", "shape", "count", "total_ms", "max_ms",
+                 "first_seen", "last_seen", "explain")
+
+    def __init__(self, database: str, collection: str, command: str, shape: dict):
+        self.database = database
+        self.collection = collection
+        self.command = command
+        self.shape = shape
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.first_seen = datetime.utcnow()
+        self.last_seen = self.first_seen
+        self.explain: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "collection": self.collection,
+            "command": self.command,
+            "shape": self.shape,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "explain": self.explain,
+        }
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """Command listener collecting slow query shapes."""
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_THRESHOLD_MS, explain: bool = QUERY_PROFILER_EXPLAIN,
+                 max_shapes: int = QUERY_PROFILER_MAX_SHAPES, enabled: bool = QUERY_PROFILER_ENABLED):
+        self.threshold_ms = threshold_ms
+        self.explain_enabled = explain
+        self.max_shapes = max_shapes
+        self.enabled = enabled
+        self.untracked = 0
+        self._lock = threading.Lock()
+        self._shapes: Dict[tuple, ShapeStats] = {}
+        # (connection id, request id) -> started command, until it finishes
+        self._pending: Dict[tuple, tuple] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explain_queue: Optional[asyncio.Queue] = None
+        self._explain_task: Optional[asyncio.Task] = None
+
+    # ----- listener -----
+
+    def started(self, event):
+        if self.enabled and event.command_name in SHAPED_FIELDS:
+            self._pending[(event.connection_id, event.request_id)] = (event.command, event.database_name)
+
+    def succeeded(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is not None:
+            self.record(event.command_name, pending[0], pending[1], event.duration_micros / 1000)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+    def record(self, command_name: str, command, database: str, duration_ms: float) -> Optional[ShapeStats]:
+        """Account one finished command; returns its shape stats if it was slow."""
+        if duration_ms < self.threshold_ms:
+            return None
+        collection = command.get(command_name)
+        collection = collection if isinstance(collection, str) else "-"
+        shape = command_shape(command_name, command)
+        key = (database, collection, command_name, json.dumps(shape, sort_keys=True, default=str))
+
+        with self._lock:
+            stats = self._shapes.get(key)
+            first = stats is None
+            if first:
+                if len(self._shapes) >= self.max_shapes:
+                    self.untracked += 1
+                    return None
+                stats = self._shapes[key] = ShapeStats(database, collection, command_name, shape)
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.last_seen = datetime.utcnow()
+
+        logger.warning("slow_query", extra={"fields": {
+            "collection": collection, "command": command_name, "duration_ms": round(duration_ms, 1), "shape": key[3]
+        }})
+        if first and self.explain_enabled and command_name in EXPLAINABLE:
+            self._schedule_explain(stats, command)
+        return stats
+
+    # ----- explain capture -----
+
+    def _schedule_explain(self, stats: ShapeStats, command) -> None:
+        if self._loop is None or self._explain_queue is None:
+            return
+        # Drop driver-added fields ($db, lsid, $clusterTime, ...) and limits of the original call
+        explainable = {k: v for k, v in command.items() if not k.startswith("$") and k not in ("lsid", "txnNumber", "maxTimeMS")}
+        try:
+            self._loop.call_soon_threadsafe(self._explain_queue.put_nowait, (stats, explainable))
+        except RuntimeError:
+            pass  # Loop closed during shutdown
+
+    async def start(self, client) -> None:
+        """Start the background task that runs explain() for new slow shapes."""
+        if not self.explain_enabled or client is None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._explain_queue = asyncio.Queue(maxsize=100)
+        self._explain_task = asyncio.create_task(self._run_explains(client))
+
+    async def stop(self) -> None:
+        if self._explain_task is not None:
+            self._explain_task.cancel()
+            self._explain_task = None
+        self._loop = None
+
+    async def _run_explains(self, client) -> None:
+        while True:
+            stats, command = await self._explain_queue.get()
+            try:
+                with pymongo.timeout(QUERY_PROFILER_EXPLAIN_TIMEOUT_SECONDS):
+                    result = await client[stats.database].command(
+                        {"explain": command, "verbosity": "executionStats"}
+                    )
+                stats.explain = summarize_explain(result)
+                if stats.explain["collection_scan"]:
+                    logger.warning("collection_scan", extra={"fields": {
+                        "collection": stats.collection, "command": stats.command,
+                        "shape": json.dumps(stats.shape, default=str)
+                    }})
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("explain_failed", exc_info=True, extra={"fields": {
+                    "collection": stats.collection, "command": stats.command
+                }})
+
+    # ----- report -----
+
+    def top(self, limit: int = 20, sort_by: str = "total_ms") -> List[dict]:
+        """Slowest shapes, by total, max or average time or by count."""
+        with self._lock:
+            shapes = [stats.to_dict() for stats in self._shapes.values()]
+        shapes.sort(key=lambda item: item[sort_by], reverse=True)
+        return shapes[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+            self.untracked = 0
+
+
+profiler = QueryProfiler()
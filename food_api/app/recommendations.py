@@ -0,0 +1,212 @@
+"""
+Recommendations Module
+"People who ordered X also ordered Y" from item co-occurrence in past orders
+
+A batch job (`rebuild_recommendations`, run by scripts/build_recommendations.py)
+builds sparse matrices from `Order.items`:
+
+- order x item (binary)   -> item-item co-occurrence, cosine-normalized
+- user x item (log qty)   -> user-item affinity, projected through the
+                             item similarities to score items a user has
+                             not ordered yet
+
+The top-K lists are stored per item and per user, so the API serves a
+recommendation with a single indexed key lookup and no query-time joins.
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from bson import ObjectId
+from scipy import sparse
+from pymongo import ReplaceOne
+
+from .models import Order, ArchivedOrder, ItemRecommendation, UserRecommendation, item_key
+
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "10"))
+
+WRITE_BATCH_SIZE = 1000
+
+# (restaurant_name, item_name)
+ItemKey = Tuple[str, str]
+# (restaurant_name, item_name, score)
+Recommendation = Tuple[str, str, float]
+
+
+def top_k_per_row(matrix: sparse.csr_matrix, k: int) -> List[List[Tuple[int, float]]]:
+    """
+    Return the k largest (column, value) pairs of every row, best first.
+
+    Only the stored non-zeros of each row are examined, so the cost is
+    proportional to the number of non-zeros rather than rows x columns.
+    """
+    matrix = matrix.tocsr()
+    results = []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        values = matrix.data[start:end]
+        columns = matrix.indices[start:end]
+        if len(values) > k:
+            keep = np.argpartition(-values, k - 1)[:k]
+            values, columns = values[keep], columns[keep]
+        # Highest score first; ties broken by column for deterministic output
+        order = np.lexsort((columns, -values))
+        results.append([(int(columns[i]), float(values[i])) for i in order if values[i] > 0])
+    return results
+
+
+def compute_recommendations(
+    orders: Iterable[dict],
+    top_k: int = RECOMMENDATIONS_TOP_K
+) -> Tuple[Dict[ItemKey, List[Recommendation]], Dict[str, List[Recommendation]]]:
+    """
+    Compute top-K item-to-item and user-to-item recommendations.
+
+    Args:
+        orders: Raw order documents with user_id, restaurant_name and items
+        top_k: Length of each recommendation list
+
+    Returns:
+        (recommendations per (restaurant_name, item_name),
+         recommendations per user id string)
+    """
+    item_codes: Dict[ItemKey, int] = {}
+    user_codes: Dict[str, int] = {}
+    order_rows: List[int] = []
+    user_rows: List[int] = []
+    columns: List[int] = []
+    quantities: List[int] = []
+
+    order_count = 0
+    for order in orders:
+        user = user_codes.setdefault(str(order["user_id"]), len(user_codes))
+        for item in order.get("items", []):
+            key = (order["restaurant_name"], item["item_name"])
+            order_rows.append(order_count)
+            user_rows.append(user)
+            columns.append(item_codes.setdefault(key, len(item_codes)))
+            quantities.append(item["quantity"])
+        order_count += 1
+
+    if not item_codes:
+        return {}, {}
+
+    item_count = len(item_codes)
+    columns_arr = np.asarray(columns, dtype=np.int64)
+
+    # Order x item incidence (duplicates summed, then binarized)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.float64), (np.asarray(order_rows), columns_arr)),
+        shape=(order_count, item_count)
+    )
+    incidence.data[:] = 1.0
+
+    # Item x item co-occurrence; the diagonal holds each item's order count
+    cooccurrence = (incidence.T @ incidence).tocsr()
+    item_orders = cooccurrence.diagonal()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+
+    # Cosine normalization so that popular items do not dominate every list
+    norm = sparse.diags(1.0 / np.sqrt(item_orders))
+    similarity = (norm @ cooccurrence @ norm).tocsr()
+
+    # User x item affinity with diminishing returns on repeat quantities
+    affinity = sparse.csr_matrix(
+        (np.asarray(quantities, dtype=np.float64), (np.asarray(user_rows), columns_arr)),
+        shape=(len(user_codes), item_count)
+    )
+    affinity.data = np.log1p(affinity.data)
+    user_scores = (affinity @ similarity).tocsr()
+    # Recommend items the user has not ordered yet
+    already_ordered = affinity.copy()
+    already_ordered.data[:] = 1.0
+    user_scores = (user_scores - user_scores.multiply(already_ordered)).tocsr()
+    user_scores.eliminate_zeros()
+
+    items_by_code = list(item_codes)
+
+    def to_recommendations(row: List[Tuple[int, float]]) -> List[Recommendation]:
+        return [(*items_by_code[code], round(score, 4)) for code, score in row]
+
+    item_recommendations = {
+        items_by_code[code]: to_recommendations(row)
+        for code, row in enumerate(top_k_per_row(similarity, top_k))
+    }
+    user_recommendations = {
+        user_id: to_recommendations(row)
+        for user_id, row in zip(user_codes, top_k_per_row(user_scores, top_k))
+    }
+    return item_recommendations, user_recommendations
+
+
+def _as_documents(recommendations: List[Recommendation]) -> List[dict]:
+    return [
+        {"restaurant_name": restaurant_name, "item_name": item_name, "score": score}
+        for restaurant_name, item_name, score in recommendations
+    ]
+
+
+async def _write_batches(collection, requests: List[ReplaceOne]) -> None:
+    for start in range(0, len(requests), WRITE_BATCH_SIZE):
+        await collection.bulk_write(requests[start:start + WRITE_BATCH_SIZE], ordered=False)
+
+
+async def rebuild_recommendations(top_k: int = RECOMMENDATIONS_TOP_K) -> Tuple[int, int]:
+    """
+    Recompute and store all recommendation lists from the orders collection.
+
+    Lists that were not refreshed by this run (items no longer ordered, users
+    without orders) are removed afterwards.
+
+    Returns:
+        (number of item lists, number of user lists) written
+    """
+    run_started = datetime.utcnow()
+    orders = []
+    # Archived orders are history too
+    for collection in (Order.get_motor_collection(), ArchivedOrder.get_motor_collection()):
+        cursor = collection.find(
+            {"status": {"$ne": "cancelled"}},
+            {"user_id": 1, "restaurant_name": 1, "items.item_name": 1, "items.quantity": 1}
+        )
+        orders += [order async for order in cursor]
+    item_recommendations, user_recommendations = compute_recommendations(orders, top_k)
+
+    item_requests = [
+        ReplaceOne(
+            {"item_key": item_key(restaurant_name, item_name)},
+            {
+                "item_key": item_key(restaurant_name, item_name),
+                "restaurant_name": restaurant_name,
+                "item_name": item_name,
+                "recommendations": _as_documents(recommendations),
+                "computed_at": run_started
+            },
+            upsert=True
+        )
+        for (restaurant_name, item_name), recommendations in item_recommendations.items()
+    ]
+    user_requests = [
+        ReplaceOne(
+            {"user_id": ObjectId(user_id)},
+            {
+                "user_id": ObjectId(user_id),
+                "recommendations": _as_documents(recommendations),
+                "computed_at": run_started
+            },
+            upsert=True
+        )
+        for user_id, recommendations in user_recommendations.items()
+    ]
+
+    item_collection = ItemRecommendation.get_motor_collection()
+    user_collection = UserRecommendation.get_motor_collection()
+    await _write_batches(item_collection, item_requests)
+    await _write_batches(user_collection, user_requests)
+    await item_collection.delete_many({"computed_at": {"$lt": run_started}})
+    await user_collection.delete_many({"computed_at": {"$lt": run_started}})
+
+    return len(item_requests), len(user_requests)
@@ -0,0 +1,599 @@
+"""
+Analytics Rollups Module
+Materialized per-restaurant statistics for the admin analytics endpoints
+
+Order and review writes update the `restaurant_daily_stats` collection
+incrementally with atomic `$inc` upserts, so the popular-restaurants ranking
+reads a handful of small bucket documents instead of joining every order and
+review. A periodic reconcile rebuilds the buckets from the source collections
+to repair any drift (e.g. a rollup write that failed after its order was saved).
+It only rewrites settled buckets, older than ROLLUP_RECONCILE_SETTLE_HOURS,
+so it never races the live increments of today's orders.
+
+Order writes also maintain `order_time_buckets`: hour and day buckets per
+restaurant plus platform-wide ("*") buckets, so dashboard time series read at
+most a few hundred small documents. `backfill_time_buckets` rebuilds them
+from existing orders; the periodic reconcile also repairs the settled
+buckets that the time-series endpoint can still read.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .models import Order, ArchivedOrder, Review, RestaurantDailyStats, OrderTimeBucket
+from .schemas import PopularRestaurantOut, TimeSeriesOut, TimeSeriesPointOut
+from . import structured_logging
+
+# How often the background task rebuilds the rollup from orders and reviews
+ROLLUP_RECONCILE_INTERVAL_SECONDS = int(os.getenv("ROLLUP_RECONCILE_INTERVAL_SECONDS", "3600"))
+# Buckets younger than this still receive live increments and are not rebuilt
+ROLLUP_RECONCILE_SETTLE_HOURS = int(os.getenv("ROLLUP_RECONCILE_SETTLE_HOURS", "24"))
+
+RECONCILE_BATCH_SIZE = 1000
+
+# Orders in this status are excluded from order counts and revenue
+CANCELLED_STATUS = "cancelled"
+
+# Time-series buckets
+ALL_RESTAURANTS = "*"
+GRANULARITIES: Dict[str, timedelta] = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Longest range per granularity, keeping a query to a few hundred documents
+MAX_TIMESERIES_DAYS: Dict[str, int] = {"hour": 14, "day": 366}
+
+logger = structured_logging.get_logger("rollups")
+
+
+def day_bucket(when: datetime) -> datetime:
+    """Truncate a timestamp to the UTC midnight that starts its daily bucket."""
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def time_bucket(when: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day bucket."""
+    if granularity == "hour":
+        return when.replace(minute=0, second=0, microsecond=0)
+    return day_bucket(when)
+
+
+def time_bucket_updates(restaurant_name: str, when: datetime, fields: dict) -> List[UpdateOne]:
+    """Build the `$inc` upserts for every bucket an order falls into."""
+    return [
+        UpdateOne(
+            {"granularity": granularity, "restaurant_name": name, "bucket_start": time_bucket(when, granularity)},
+            {"$inc": fields},
+            upsert=True
+        )
+        for granularity in GRANULARITIES
+        for name in (restaurant_name, ALL_RESTAURANTS)
+    ]
+
+
+def to_popular_restaurant(doc: dict) -> PopularRestaurantOut:
+    """Convert a grouped rollup document into the API schema."""
+    review_count = doc.get("review_count", 0)
+    average_rating = round(doc["rating_sum"] / review_count, 2) if review_count > 0 else None
+    return PopularRestaurantOut(
+        restaurant_name=doc["_id"],
+        total_orders=doc.get("total_orders", 0),
+        total_revenue=round(doc.get("total_revenue", 0.0), 2),
+        average_rating=average_rating,
+        total_reviews=review_count
+    )
+
+
+# ==================== INCREMENTAL UPDATES ====================
+
+# These run as task queue jobs after the primary write has been answered
+# (see app/task_queue.py), so a failed write raises and the job is retried.
+
+async def _increment(restaurant_name: str, when: datetime, fields: dict) -> None:
+    """Apply `$inc` deltas to one restaurant/day bucket, creating it if needed."""
+    await RestaurantDailyStats.get_motor_collection().update_one(
+        {"restaurant_name": restaurant_name, "day": day_bucket(when)},
+        {"$inc": fields},
+        upsert=True
+    )
+
+
+async def _increment_time_buckets(restaurant_name: str, when: datetime, fields: dict) -> None:
+    """Apply `$inc` deltas to the hour/day buckets of one order in a single round trip."""
+    await OrderTimeBucket.get_motor_collection().bulk_write(
+        time_bucket_updates(restaurant_name, when, fields),
+        ordered=False
+    )
+
+
+async def record_order(order: Order) -> None:
+    """Count a newly placed order in its restaurant's daily and time-series buckets."""
+    await asyncio.gather(
+        _increment(
+            order.restaurant_name,
+            order.order_date,
+            {"total_orders": 1, "total_revenue": order.total_price}
+        ),
+        _increment_time_buckets(
+            order.restaurant_name,
+            order.order_date,
+            {"order_count": 1, "revenue": order.total_price, f"status_counts.{order.status}": 1}
+        )
+    )
+
+
+def status_change_deltas(order: Order, old_status: str, new_status: str) -> Tuple[Optional[dict], dict]:
+    """
+    Rollup deltas for a status change: (daily stats fields or None, time bucket fields).
+
+    A cancelled order no longer counts towards orders and revenue.
+    """
+    bucket_fields = {f"status_counts.{old_status}": -1, f"status_counts.{new_status}": 1}
+    if new_status != CANCELLED_STATUS:
+        return None, bucket_fields
+    bucket_fields.update({"order_count": -1, "revenue": -order.total_price})
+    return {"total_orders": -1, "total_revenue": -order.total_price}, bucket_fields
+
+
+async def record_status_change(order: Order, old_status: str, new_status: str) -> None:
+    """Move an order between status counters in the buckets of its order date."""
+    if old_status == new_status:
+        return
+    daily_fields, bucket_fields = status_change_deltas(order, old_status, new_status)
+    updates = [_increment_time_buckets(order.restaurant_name, order.order_date, bucket_fields)]
+    if daily_fields is not None:
+        updates.append(_increment(order.restaurant_name, order.order_date, daily_fields))
+    await asyncio.gather(*updates)
+
+
+async def record_review(restaurant_name: str, review_date: datetime, rating_delta: int, count_delta: int) -> None:
+    """
+    Apply a review change to its restaurant's daily bucket.
+
+    - New review:      rating_delta=rating,            count_delta=1
+    - Rating changed:  rating_delta=new - old,         count_delta=0
+    - Review deleted:  rating_delta=-rating,           count_delta=-1
+    """
+    if rating_delta == 0 and count_delta == 0:
+        return
+    await _increment(
+        restaurant_name,
+        review_date,
+        {"rating_sum": rating_delta, "review_count": count_delta}
+    )
+
+
+def _merge_deltas(target: dict, fields: dict) -> None:
+    for field, delta in fields.items():
+        target[field] = target.get(field, 0) + delta
+
+
+class RollupBatch:
+    """
+    Accumulates rollup deltas from many changes and applies them in one pass.
+
+    Deltas for the same bucket are merged, so a bulk operation touching
+    thousands of orders writes each affected bucket once, with one
+    bulk_write per rollup collection.
+    """
+
+    def __init__(self):
+        self._daily: Dict[Tuple[str, datetime], dict] = {}
+        self._buckets: Dict[Tuple[str, str, datetime], dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._daily) + len(self._buckets)
+
+    def _add_daily(self, restaurant_name: str, when: datetime, fields: dict) -> None:
+        _merge_deltas(self._daily.setdefault((restaurant_name, day_bucket(when)), {}), fields)
+
+    def _add_buckets(self, restaurant_name: str, when: datetime, fields: dict) -> None:
+        for granularity in GRANULARITIES:
+            for name in (restaurant_name, ALL_RESTAURANTS):
+                key = (granularity, name, time_bucket(when, granularity))
+                _merge_deltas(self._buckets.setdefault(key, {}), fields)
+
+    def status_change(self, order: Order, old_status: str, new_status: str) -> None:
+        if old_status == new_status:
+            return
+        daily_fields, bucket_fields = status_change_deltas(order, old_status, new_status)
+        if daily_fields is not None:
+            self._add_daily(order.restaurant_name, order.order_date, daily_fields)
+        self._add_buckets(order.restaurant_name, order.order_date, bucket_fields)
+
+    def review_removed(self, restaurant_name: str, review_date: datetime, rating: int) -> None:
+        self._add_daily(restaurant_name, review_date, {"rating_sum": -rating, "review_count": -1})
+
+    def payload(self) -> dict:
+        """The merged deltas as JSON-serializable task arguments."""
+        return {
+            "daily": [[name, day.isoformat(), fields] for (name, day), fields in self._daily.items()],
+            "buckets": [
+                [granularity, name, start.isoformat(), fields]
+                for (granularity, name, start), fields in self._buckets.items()
+            ]
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "RollupBatch":
+        batch = cls()
+        for name, day, fields in payload["daily"]:
+            batch._daily[(name, datetime.fromisoformat(day))] = fields
+        for granularity, name, start, fields in payload["buckets"]:
+            batch._buckets[(granularity, name, datetime.fromisoformat(start))] = fields
+        return batch
+
+    async def flush(self) -> None:
+        """Write the merged deltas, with one bulk_write per rollup collection."""
+        daily = [
+            UpdateOne({"restaurant_name": name, "day": day}, {"$inc": fields}, upsert=True)
+            for (name, day), fields in self._daily.items()
+        ]
+        buckets = [
+            UpdateOne(
+                {"granularity": granularity, "restaurant_name": name, "bucket_start": start},
+                {"$inc": fields},
+                upsert=True
+            )
+            for (granularity, name, start), fields in self._buckets.items()
+        ]
+        writes = []
+        if daily:
+            writes.append(RestaurantDailyStats.get_motor_collection().bulk_write(daily, ordered=False))
+        if buckets:
+            writes.append(OrderTimeBucket.get_motor_collection().bulk_write(buckets, ordered=False))
+        await asyncio.gather(*writes)
+
+
+# ==================== QUERIES ====================
+
+async def get_popular_restaurants(days: Optional[int] = None, limit: int = 10) -> List[PopularRestaurantOut]:
+    """
+    Rank restaurants by order count (then revenue) from the daily rollup.
+
+    Args:
+        days: Only count the last N days (including today); None means all time
+        limit: Number of restaurants to return
+    """
+    match = {}
+    if days is not None:
+        window_start = day_bucket(datetime.utcnow()) - timedelta(days=days - 1)
+        match = {"day": {"$gte": window_start}}
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$restaurant_name",
+            "total_orders": {"$sum": "$total_orders"},
+            "total_revenue": {"$sum": "$total_revenue"},
+            "rating_sum": {"$sum": "$rating_sum"},
+            "review_count": {"$sum": "$review_count"}
+        }},
+        {"$sort": {"total_orders": -1, "total_revenue": -1, "_id": 1}},
+        {"$limit": limit}
+    ]
+    docs = await RestaurantDailyStats.get_motor_collection().aggregate(pipeline).to_list(length=limit)
+    return [to_popular_restaurant(doc) for doc in docs]
+
+
+async def get_order_timeseries(granularity: str = "day", days: int = 90, restaurant_name: Optional[str] = None) -> TimeSeriesOut:
+    """
+    Read an order/revenue time series ending with the current bucket.
+
+    Buckets without orders are filled with zeros so the series is continuous.
+
+    Args:
+        granularity: "hour" or "day"
+        days: Length of the range in days (at most MAX_TIMESERIES_DAYS[granularity])
+        restaurant_name: Restrict to one restaurant; None means platform-wide
+    """
+    step = GRANULARITIES[granularity]
+    bucket_count = days * 24 if granularity == "hour" else days
+    end = time_bucket(datetime.utcnow(), granularity)
+    start = end - step * (bucket_count - 1)
+
+    cursor = OrderTimeBucket.get_motor_collection().find(
+        {
+            "granularity": granularity,
+            "restaurant_name": restaurant_name or ALL_RESTAURANTS,
+            "bucket_start": {"$gte": start}
+        },
+        {"_id": 0, "bucket_start": 1, "order_count": 1, "revenue": 1, "status_counts": 1}
+    )
+    by_start = {doc["bucket_start"]: doc async for doc in cursor}
+
+    points = []
+    for i in range(bucket_count):
+        bucket_start = start + step * i
+        doc = by_start.get(bucket_start, {})
+        points.append(TimeSeriesPointOut(
+            bucket_start=bucket_start,
+            order_count=doc.get("order_count", 0),
+            revenue=round(doc.get("revenue", 0.0), 2),
+            status_counts={k: v for k, v in doc.get("status_counts", {}).items() if v}
+        ))
+
+    return TimeSeriesOut(granularity=granularity, restaurant_name=restaurant_name, points=points)
+
+
+# ==================== FULL RECONCILE ====================
+
+def settled_before(now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest daily bucket that may still receive live increments."""
+    now = now or datetime.utcnow()
+    return day_bucket(now - timedelta(hours=ROLLUP_RECONCILE_SETTLE_HOURS))
+
+
+async def reconcile_restaurant_stats(cutoff: Optional[datetime] = None) -> int:
+    """
+    Rebuild every settled restaurant/day bucket from the orders (hot and
+    archived) and reviews collections.
+
+    Buckets before `cutoff` (default: `settled_before()`) are overwritten with
+    absolute values and those that no longer have any orders or reviews are
+    removed. Newer buckets are left to the live `$inc` updates: rewriting them
+    could drop an increment landing between the aggregation and the write.
+    A late change to a settled bucket (a review edited months later) can
+    still race a run; the next run repairs it.
+
+    Returns:
+        Number of buckets written
+    """
+    cutoff = cutoff or settled_before()
+    buckets = {}
+
+    def bucket(key: dict) -> dict:
+        return buckets.setdefault(
+            (key["restaurant_name"], key["day"]),
+            {"total_orders": 0, "total_revenue": 0.0, "rating_sum": 0, "review_count": 0}
+        )
+
+    order_match = {"$match": {"order_date": {"$lt": cutoff}, "status": {"$ne": CANCELLED_STATUS}}}
+    order_pipeline = [
+        order_match,
+        {"$unionWith": {"coll": ArchivedOrder.Settings.name, "pipeline": [order_match]}},
+        {"$group": {
+            "_id": {
+                "restaurant_name": "$restaurant_name",
+                "day": {"$dateTrunc": {"date": "$order_date", "unit": "day"}}
+            },
+            "total_orders": {"$sum": 1},
+            "total_revenue": {"$sum": "$total_price"}
+        }}
+    ]
+    async for doc in Order.get_motor_collection().aggregate(order_pipeline):
+        values = bucket(doc["_id"])
+        values["total_orders"] = doc["total_orders"]
+        values["total_revenue"] = doc["total_revenue"]
+
+    review_pipeline = [
+        {"$match": {"review_date": {"$lt": cutoff}}},
+        {"$group": {
+            "_id": {
+                "restaurant_name": "$restaurant_name",
+                "day": {"$dateTrunc": {"date": "$review_date", "unit": "day"}}
+            },
+            "rating_sum": {"$sum": "$rating"},
+            "review_count": {"$sum": 1}
+        }}
+    ]
+    async for doc in Review.get_motor_collection().aggregate(review_pipeline):
+        values = bucket(doc["_id"])
+        values["rating_sum"] = doc["rating_sum"]
+        values["review_count"] = doc["review_count"]
+
+    collection = RestaurantDailyStats.get_motor_collection()
+    requests = [
+        UpdateOne({"restaurant_name": name, "day": day}, {"$set": values}, upsert=True)
+        for (name, day), values in buckets.items()
+    ]
+    for start in range(0, len(requests), RECONCILE_BATCH_SIZE):
+        await collection.bulk_write(requests[start:start + RECONCILE_BATCH_SIZE], ordered=False)
+
+    # Drop settled buckets whose orders and reviews have all been deleted
+    stale_ids = [
+        doc["_id"]
+        async for doc in collection.find({"day": {"$lt": cutoff}}, {"restaurant_name": 1, "day": 1})
+        if (doc["restaurant_name"], doc["day"]) not in buckets
+    ]
+    if stale_ids:
+        await collection.delete_many({"_id": {"$in": stale_ids}})
+
+    return len(requests)
+
+
+def _bucket_values(doc: dict) -> tuple:
+    """Comparable (order_count, revenue, status_counts) of a time bucket."""
+    status_counts = tuple(sorted((k, v) for k, v in doc.get("status_counts", {}).items() if v))
+    return doc.get("order_count", 0), round(doc.get("revenue", 0.0), 2), status_counts
+
+
+async def reconcile_time_buckets(cutoff: Optional[datetime] = None) -> int:
+    """
+    Rebuild the settled `order_time_buckets` from the orders (hot and archived).
+
+    Only buckets in the range `get_order_timeseries` can read
+    (MAX_TIMESERIES_DAYS per granularity) and before `cutoff` (default:
+    `settled_before()`) are checked. Buckets whose counts differ from the
+    orders are overwritten and buckets without orders are removed, so drift
+    from a retried `record_order` job lasts until the bucket settles.
+
+    Returns:
+        Number of buckets written
+    """
+    cutoff = cutoff or settled_before()
+    collection = OrderTimeBucket.get_motor_collection()
+    written = 0
+    for granularity in GRANULARITIES:
+        window_start = cutoff - timedelta(days=MAX_TIMESERIES_DAYS[granularity])
+        order_match = {"$match": {"order_date": {"$gte": window_start, "$lt": cutoff}}}
+        pipeline = [
+            order_match,
+            {"$unionWith": {"coll": ArchivedOrder.Settings.name, "pipeline": [order_match]}},
+            {"$group": {
+                "_id": {
+                    "restaurant_name": "$restaurant_name",
+                    "bucket_start": {"$dateTrunc": {"date": "$order_date", "unit": granularity}},
+                    "status": {"$ifNull": ["$status", "placed"]}
+                },
+                "count": {"$sum": 1},
+                "revenue": {"$sum": "$total_price"}
+            }}
+        ]
+        expected: Dict[Tuple[str, datetime], dict] = {}
+        async for doc in Order.get_motor_collection().aggregate(pipeline):
+            key = doc["_id"]
+            for name in (key["restaurant_name"], ALL_RESTAURANTS):
+                values = expected.setdefault(
+                    (name, key["bucket_start"]),
+                    {"order_count": 0, "revenue": 0.0, "status_counts": {}}
+                )
+                if key["status"] != CANCELLED_STATUS:
+                    values["order_count"] += doc["count"]
+                    values["revenue"] += doc["revenue"]
+                values["status_counts"][key["status"]] = values["status_counts"].get(key["status"], 0) + doc["count"]
+
+        # Write only the buckets that drifted
+        requests = []
+        stale_ids = []
+        seen = set()
+        async for doc in collection.find({
+            "granularity": granularity, "bucket_start": {"$gte": window_start, "$lt": cutoff}
+        }):
+            key = (doc["restaurant_name"], doc["bucket_start"])
+            seen.add(key)
+            if key not in expected:
+                stale_ids.append(doc["_id"])
+            elif _bucket_values(doc) != _bucket_values(expected[key]):
+                requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": expected[key]}))
+        requests.extend(
+            UpdateOne(
+                {"granularity": granularity, "restaurant_name": name, "bucket_start": bucket_start},
+                {"$set": values},
+                upsert=True
+            )
+            for (name, bucket_start), values in expected.items()
+            if (name, bucket_start) not in seen
+        )
+
+        for start in range(0, len(requests), RECONCILE_BATCH_SIZE):
+            await collection.bulk_write(requests[start:start + RECONCILE_BATCH_SIZE], ordered=False)
+        if stale_ids:
+            await collection.delete_many({"_id": {"$in": stale_ids}})
+        written += len(requests)
+
+    return written
+
+
+async def _backfill_from(source, target, after_id, up_to_id, batch_size: int) -> int:
+    """Add the orders of one collection with `after_id` < _id <= `up_to_id` to `target`."""
+    last_id = after_id
+    processed = 0
+    while True:
+        id_filter = {"$lte": up_to_id}
+        if last_id is not None:
+            id_filter["$gt"] = last_id
+        batch = await source.find(
+            {"_id": id_filter},
+            {"restaurant_name": 1, "order_date": 1, "total_price": 1, "status": 1}
+        ).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        # Pre-aggregate the batch so each bucket gets a single upsert
+        deltas: Dict[tuple, dict] = {}
+        for doc in batch:
+            for granularity in GRANULARITIES:
+                for name in (doc["restaurant_name"], ALL_RESTAURANTS):
+                    key = (granularity, name, time_bucket(doc["order_date"], granularity))
+                    fields = deltas.setdefault(key, {"order_count": 0, "revenue": 0.0})
+                    status = doc.get("status", "placed")
+                    if status != CANCELLED_STATUS:
+                        fields["order_count"] += 1
+                        fields["revenue"] += doc["total_price"]
+                    status_key = f"status_counts.{status}"
+                    fields[status_key] = fields.get(status_key, 0) + 1
+
+        await target.bulk_write(
+            [
+                UpdateOne(
+                    {"granularity": granularity, "restaurant_name": name, "bucket_start": bucket_start},
+                    {"$inc": fields},
+                    upsert=True
+                )
+                for (granularity, name, bucket_start), fields in deltas.items()
+            ],
+            ordered=False
+        )
+        processed += len(batch)
+        last_id = batch[-1]["_id"]
+
+    return processed
+
+
+async def _newest_ids(sources: list) -> list:
+    newest_ids = []
+    for source in sources:
+        newest = await source.find({}, {"_id": 1}).sort("_id", -1).limit(1).to_list(length=1)
+        newest_ids.append(newest[0]["_id"] if newest else None)
+    return newest_ids
+
+
+async def backfill_time_buckets(batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """
+    Rebuild `order_time_buckets` from the orders and archived orders in batches.
+
+    The buckets are built in a scratch collection that then replaces
+    `order_time_buckets` with one rename, so the time series keeps serving
+    the old buckets during the rebuild. Each collection is read in `_id`
+    order up to its newest order when the backfill started; just before the
+    rename a catch-up pass adds the orders placed meanwhile, whose live
+    increments went to the collection being replaced. An order whose queued
+    `record_order` job runs between the catch-up and the rename is missed,
+    and one whose job runs after the rename is counted twice; the periodic
+    reconcile repairs both once the bucket settles. Orders moved to the
+    archive while a backfill runs can be missed, so run it with the archiver
+    idle.
+
+    Returns:
+        Number of orders processed
+    """
+    sources = [Order.get_motor_collection(), ArchivedOrder.get_motor_collection()]
+    cutoffs = await _newest_ids(sources)
+    if all(cutoff is None for cutoff in cutoffs):
+        return 0
+
+    target = OrderTimeBucket.get_motor_collection()
+    scratch = target.database[f"{target.name}_rebuild"]
+    await scratch.drop()
+    await scratch.create_indexes(OrderTimeBucket.Settings.indexes)
+
+    processed = 0
+    for source, cutoff_id in zip(sources, cutoffs):
+        if cutoff_id is not None:
+            processed += await _backfill_from(source, scratch, None, cutoff_id, batch_size)
+
+    # Catch up with the orders placed during the rebuild, then swap
+    for source, cutoff_id, newest_id in zip(sources, cutoffs, await _newest_ids(sources)):
+        if newest_id is not None and newest_id != cutoff_id:
+            processed += await _backfill_from(source, scratch, cutoff_id, newest_id, batch_size)
+    await scratch.rename(target.name, dropTarget=True)
+    return processed
+
+
+async def run_periodic_reconcile(interval_seconds: int = ROLLUP_RECONCILE_INTERVAL_SECONDS) -> None:
+    """Background task: reconcile at startup, then every `interval_seconds`."""
+    while True:
+        try:
+            cutoff = settled_before()
+            written = await reconcile_restaurant_stats(cutoff)
+            repaired = await reconcile_time_buckets(cutoff)
+            logger.info("rollup_reconciled", extra={"fields": {
+                "daily_buckets": written, "time_buckets_repaired": repaired
+            }})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("rollup_reconcile_failed", exc_info=True)
+        await asyncio.sleep(interval_seconds)
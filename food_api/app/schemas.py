@@ -10,7 +10,7 @@ SECURITY FIXES:
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from beanie import PydanticObjectId
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Literal, Union, Annotated
 from datetime import datetime
 import re
 
@@ -61,6 +61,27 @@ class RestaurantItem(BaseModel):
         description="Estimated preparation time"
     )
 
+class GeoLocation(BaseModel):
+    """GeoJSON point; coordinates are [longitude, latitude]"""
+    type: Literal["Point"] = "Point"
+    coordinates: List[float] = Field(
+        ...,
+        min_length=2,
+        max_length=2,
+        description="[longitude, latitude]"
+    )
+
+    @field_validator('coordinates')
+    @classmethod
+    def validate_coordinates(cls, v: List[float]) -> List[float]:
+        """Ensure longitude and latitude are in range (GeoJSON order: lng first)"""
+        longitude, latitude = v
+        if not -180 <= longitude <= 180:
+            raise ValueError("Longitude must be between -180 and 180")
+        if not -90 <= latitude <= 90:
+            raise ValueError("Latitude must be between -90 and 90")
+        return v
+
 class RestaurantCreate(BaseModel):
     """Restaurant creation/update schema with validation"""
     name: str = Field(
@@ -86,6 +107,10 @@ class RestaurantCreate(BaseModel):
         max_length=200,
         description="Menu items (max 200)"
     )
+    location: Optional[GeoLocation] = Field(
+        None,
+        description="Coordinates for near-me search"
+    )
 
 # ==================== USER SCHEMAS ====================
 
@@ -210,6 +235,28 @@ class OrderOut(BaseModel):
     class Config:
         from_attributes = True
 
+ORDER_STATUS_PATTERN = "^(placed|preparing|out_for_delivery|delivered|cancelled)$"
+
+class OrderStatusUpdate(BaseModel):
+    """Move an order to its next status"""
+    status: str = Field(..., pattern=ORDER_STATUS_PATTERN)
+    expected_status: Optional[str] = Field(
+        None,
+        pattern=ORDER_STATUS_PATTERN,
+        description="Only apply if the order is currently in this status"
+    )
+
+class BulkOrderStatusUpdate(BaseModel):
+    """Move a batch of orders (e.g. one dispatch run) to the same status"""
+    order_ids: List[str] = Field(..., min_length=1, max_length=500)
+    status: str = Field(..., pattern=ORDER_STATUS_PATTERN)
+    expected_status: Optional[str] = Field(None, pattern=ORDER_STATUS_PATTERN)
+
+class BulkOrderStatusResult(BaseModel):
+    """Per-order outcome of a bulk status update"""
+    updated: List[str]
+    failed: dict
+
 # ==================== REVIEW SCHEMAS ====================
 
 class ReviewCreate(BaseModel):
@@ -351,3 +398,155 @@ class UserActivityOut(BaseModel):
     last_order_date: Optional[datetime]
     registration_date: Optional[datetime]
 
+class UserActivityPage(BaseModel):
+    """Paginated user activity for the admin dashboard"""
+    items: List[UserActivityOut]
+    total: int
+    page: int
+    page_size: int
+    sort_by: str
+
+class TimeSeriesPointOut(BaseModel):
+    """One hour or day of order activity"""
+    bucket_start: datetime
+    order_count: int
+    revenue: float
+    status_counts: dict
+
+class TimeSeriesOut(BaseModel):
+    """Order/revenue time series for the admin dashboard"""
+    granularity: str
+    restaurant_name: Optional[str]
+    points: List[TimeSeriesPointOut]
+
+# ==================== RECOMMENDATION SCHEMAS ====================
+
+class RecommendedItemOut(BaseModel):
+    """A recommended menu item with its similarity score"""
+    restaurant_name: str
+    item_name: str
+    score: float
+
+# ==================== TRENDING SCHEMAS ====================
+
+class TrendingItemOut(BaseModel):
+    """A dish ordered frequently in the selected window"""
+    restaurant_name: str
+    item_name: str
+    order_count: int
+
+class TrendingRestaurantOut(BaseModel):
+    """A restaurant ordered from frequently in the selected window"""
+    restaurant_name: str
+    order_count: int
+
+class TrendingOut(BaseModel):
+    """Trending dishes and restaurants (approximate counts)"""
+    window: str
+    items: List[TrendingItemOut]
+    restaurants: List[TrendingRestaurantOut]
+
+# ==================== ADMIN BULK OPERATION SCHEMAS ====================
+
+class CancelOrderOp(BaseModel):
+    """Cancel one order"""
+    op: Literal["cancel_order"]
+    order_id: str
+
+class CancelRestaurantOrdersOp(BaseModel):
+    """Cancel every open (placed or preparing) order of a restaurant"""
+    op: Literal["cancel_restaurant_orders"]
+    restaurant_name: str = Field(..., min_length=1, max_length=100)
+
+class DeleteReviewOp(BaseModel):
+    """Delete one review (moderation)"""
+    op: Literal["delete_review"]
+    review_id: str
+
+class SetUserRoleOp(BaseModel):
+    """Change a user's role"""
+    op: Literal["set_user_role"]
+    user_id: str
+    role: str = Field(..., pattern="^(user|admin)$")
+
+BulkOperation = Annotated[
+    Union[CancelOrderOp, CancelRestaurantOrdersOp, DeleteReviewOp, SetUserRoleOp],
+    Field(discriminator="op")
+]
+
+class BulkOperationsRequest(BaseModel):
+    """A batch of typed admin operations"""
+    operations: List[BulkOperation] = Field(..., min_length=1, max_length=1000)
+
+class BulkOperationResult(BaseModel):
+    """Outcome of one operation, in request order"""
+    index: int
+    op: str
+    ok: bool
+    affected: int = 0
+    detail: Optional[str] = None
+
+class BulkOperationsResponse(BaseModel):
+    """Per-operation results of a bulk request"""
+    results: List[BulkOperationResult]
+    succeeded: int
+    failed: int
+
+class SlowQueryShapeOut(BaseModel):
+    """Aggregated timings of one slow query shape (values redacted)"""
+    collection: str
+    command: str
+    shape: Dict[str, Any]
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    first_seen: datetime
+    last_seen: datetime
+    explain: Optional[Dict[str, Any]] = None
+
+class SlowQueryReport(BaseModel):
+    """Top slow query shapes since start or the last reset"""
+    threshold_ms: float
+    explain_enabled: bool
+    untracked_shapes: int
+    shapes: List[SlowQueryShapeOut]
+
+class SuggestionOut(BaseModel):
+    """One autocomplete suggestion; score is its popularity weight"""
+    text: str
+    score: int
+    restaurants: int  # Restaurants serving the dish / of the cuisine (1 for a restaurant)
+
+class AutocompleteOut(BaseModel):
+    """Suggestions per kind, best first"""
+    query: str
+    restaurants: List[SuggestionOut] = []
+    cuisines: List[SuggestionOut] = []
+    items: List[SuggestionOut] = []
+
+class NearbyRestaurantOut(RestaurantCreate):
+    """A restaurant with its distance from the searched point"""
+    distance_km: float
+
+class NearbyRestaurantsOut(BaseModel):
+    """One page of restaurants, nearest first"""
+    restaurants: List[NearbyRestaurantOut]
+    skip: int
+    limit: int
+    has_more: bool
+
+class CatalogChangeOut(BaseModel):
+    """One catalog change; `restaurant` is the full restaurant after an upsert"""
+    version: int
+    op: Literal["upsert", "delete"]
+    restaurant_name: str
+    restaurant: Optional[RestaurantCreate] = None
+    changed_at: datetime
+
+class CatalogChangesOut(BaseModel):
+    """Changes after `since`, oldest first; sync again from `version`"""
+    since: int
+    version: int
+    changes: List[CatalogChangeOut]
+    has_more: bool
@@ -0,0 +1,246 @@
+"""
+Server-Timing Module
+Per-request breakdown of where backend time goes
+
+For sampled requests the response carries a `Server-Timing` header (and a
+debug log line) splitting the request's wall time into:
+
+- auth:     JWT decoding and the user lookup in get_current_user
+- db:       MongoDB command time (from a pymongo command listener)
+- handler:  the endpoint function itself, excluding its queries
+- validate: response_model validation/serialisation
+- encode:   JSON encoding of the response body
+- compress: response compression (see app/compression.py)
+- other:    everything else (routing, middleware, request parsing)
+
+The phases partition the request: each one is measured as its own time
+minus the time of phases nested in it, and queries are charged to `db`
+instead of the phase that awaited them, so the phases add up to `total`.
+
+A request is timed when SERVER_TIMING_SAMPLE_RATE selects it, or when it
+sends `X-Server-Timing: <SERVER_TIMING_TOKEN>`. Untimed requests pay one
+context variable lookup per hook.
+"""
+
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+from . import structured_logging
+
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0"))
+SERVER_TIMING_TOKEN = os.getenv("SERVER_TIMING_TOKEN")
+SERVER_TIMING_HEADER = b"x-server-timing"
+
+PHASES = ("auth", "db", "handler", "validate", "encode", "compress", "other")
+
+logger = structured_logging.get_logger("server_timing")
+
+_current: ContextVar[Optional["Timings"]] = ContextVar("server_timing", default=None)
+
+
+class Timings:
+    """Nested phase timer for one request; the root frame is `other`."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.started = clock()
+        self.total: Optional[float] = None
+        self.durations: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        # [name, started, seconds spent in nested phases, db seconds]
+        self._stack: List[list] = [["other", self.started, 0.0, 0.0]]
+
+    @property
+    def current(self) -> Optional[str]:
+        return self._stack[-1][0] if self._stack else None
+
+    def begin(self, name: str) -> None:
+        with self._lock:
+            if self._stack:
+                self._stack.append([name, self._clock(), 0.0, 0.0])
+
+    def end(self, name: str) -> None:
+        """Close the innermost open `name` phase and any phase opened inside it."""
+        with self._lock:
+            if not any(frame[0] == name for frame in self._stack[1:]):
+                return
+            while self._stack[-1][0] != name:
+                self._close_top(self._clock())
+            self._close_top(self._clock())
+
+    def add_db(self, seconds: float) -> None:
+        with self._lock:
+            if self._stack:
+                self._stack[-1][3] += seconds
+
+    def finish(self) -> float:
+        """Close every open phase; returns the total in seconds."""
+        with self._lock:
+            if self.total is None:
+                now = self._clock()
+                while self._stack:
+                    self._close_top(now)
+                self.total = now - self.started
+            return self.total
+
+    def _close_top(self, now: float) -> None:
+        name, started, nested, db = self._stack.pop()
+        elapsed = now - started
+        # Concurrent queries can add up to more than the wall time they cover
+        db = min(db, max(0.0, elapsed - nested))
+        self.durations["db"] += db
+        self.durations[name] += max(0.0, elapsed - nested - db)
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def header_value(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.durations.items() if seconds]
+        parts.append(f"total;dur={(self.total or 0.0) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def current() -> Optional[Timings]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str):
+    """Time a block as `name` when the current request is being timed."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.begin(name)
+    try:
+        yield
+    finally:
+        timings.end(name)
+
+
+# ==================== ROUTES AND RESPONSES ====================
+
+def _timed_endpoint(endpoint):
+    """Wrap an endpoint so its run counts as `handler`, then open `validate`."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return await endpoint(*args, **kwargs)
+            timings.begin("handler")
+            try:
+                result = await endpoint(*args, **kwargs)
+            finally:
+                timings.end("handler")
+            timings.begin("validate")
+            return result
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return endpoint(*args, **kwargs)
+            timings.begin("handler")
+            try:
+                result = endpoint(*args, **kwargs)
+            finally:
+                timings.end("handler")
+            timings.begin("validate")
+            return result
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute whose endpoint reports the handler and validate phases."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that closes `validate` and times body encoding."""
+
+    def render(self, content) -> bytes:
+        timings = _current.get()
+        if timings is None:
+            return super().render(content)
+        timings.end("validate")
+        timings.begin("encode")
+        try:
+            return super().render(content)
+        finally:
+            timings.end("encode")
+
+
+# ==================== DATABASE TIME ====================
+
+class CommandTimer(monitoring.CommandListener):
+    """Charges MongoDB command time to the request that issued it."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        timings = _current.get()
+        if timings is not None:
+            timings.add_db(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+# ==================== MIDDLEWARE ====================
+
+def _requested(scope, token: Optional[str]) -> bool:
+    if not token:
+        return False
+    for name, value in scope["headers"]:
+        if name == SERVER_TIMING_HEADER:
+            return value.decode("latin-1") == token
+    return False
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware timing sampled requests and adding the header."""
+
+    def __init__(self, app, sample_rate: float = SERVER_TIMING_SAMPLE_RATE, token: Optional[str] = SERVER_TIMING_TOKEN):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (
+            (self.sample_rate and random.random() < self.sample_rate) or _requested(scope, self.token)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        timings = Timings()
+        context_token = _current.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings.finish()
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timings.header_value().encode())
+                ]
+                logger.debug("server_timing", extra={"fields": {
+                    "method": scope["method"], "path": scope["path"], "server_timing": timings.header_value()
+                }})
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(context_token)
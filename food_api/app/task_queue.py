@@ -0,0 +1,335 @@
+"""
+Task Queue Module
+Post-commit work run in the background, after the response is sent
+
+Write endpoints do their primary insert/update, enqueue the follow-up work
+that the response does not depend on (rollup updates, the verified-purchase
+check) and return. TASK_QUEUE_WORKERS worker tasks per process run the
+queued jobs:
+
+- Capacity is bounded (TASK_QUEUE_SIZE). When the queue is full, enqueue
+  waits for space: overload slows writes down instead of losing work.
+- A job that raises is retried up to TASK_QUEUE_MAX_ATTEMPTS times with
+  exponential backoff and jitter, then logged as failed.
+- On shutdown the queue stops accepting work and drains for up to
+  TASK_QUEUE_DRAIN_SECONDS. Jobs enqueued while it is not running (scripts,
+  tests, shutdown) run inline instead.
+
+Jobs are a registered task name plus JSON-serializable arguments, so they can
+be stored outside the process. With TASK_QUEUE_BACKEND=redis they are appended
+to a Redis Stream and read through a consumer group by every worker process;
+a job is acknowledged only once it has finished, and jobs left pending by a
+crashed process are claimed by another one after TASK_QUEUE_CLAIM_IDLE_MS.
+Without the `redis` package or a reachable server the queue stays in-process.
+
+Handlers may run more than once (retries, reclaimed stream entries). Rollup
+increments are not idempotent: a job that fails after part of its writes
+landed counts them twice when retried. The periodic reconcile rewrites the
+daily stats and the readable time buckets once they settle (see
+app/rollups.py), so the double count is temporary.
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from bson import ObjectId
+
+from .models import Order, Review
+from . import archive, metrics, rollups, structured_logging
+
+TASK_QUEUE_BACKEND = os.getenv("TASK_QUEUE_BACKEND", "local")
+TASK_QUEUE_SIZE = int(os.getenv("TASK_QUEUE_SIZE", "10000"))
+TASK_QUEUE_WORKERS = int(os.getenv("TASK_QUEUE_WORKERS", "4"))
+TASK_QUEUE_MAX_ATTEMPTS = int(os.getenv("TASK_QUEUE_MAX_ATTEMPTS", "5"))
+TASK_QUEUE_RETRY_BASE_SECONDS = float(os.getenv("TASK_QUEUE_RETRY_BASE_SECONDS", "0.5"))
+TASK_QUEUE_DRAIN_SECONDS = float(os.getenv("TASK_QUEUE_DRAIN_SECONDS", "10"))
+TASK_QUEUE_REDIS_URL = os.getenv("TASK_QUEUE_REDIS_URL", "redis://localhost:6379/0")
+TASK_QUEUE_REDIS_STREAM = os.getenv("TASK_QUEUE_REDIS_STREAM", "foodie:tasks")
+TASK_QUEUE_CLAIM_IDLE_MS = int(os.getenv("TASK_QUEUE_CLAIM_IDLE_MS", "60000"))
+
+REDIS_GROUP = "food_api"
+
+logger = structured_logging.get_logger("task_queue")
+
+
+class Job:
+    """One queued call of a registered task."""
+
+    __slots__ = ("name", "kwargs", "attempts", "request_id", "message_id")
+
+    def __init__(self, name: str, kwargs: dict, attempts: int = 0, request_id: Optional[str] = None,
+                 message_id: Optional[str] = None):
+        self.name = name
+        self.kwargs = kwargs
+        self.attempts = attempts
+        self.request_id = request_id
+        # Redis Stream entry id, acknowledged when the job is finished
+        self.message_id = message_id
+
+    def dumps(self) -> str:
+        return json.dumps({
+            "name": self.name, "kwargs": self.kwargs, "attempts": self.attempts, "request_id": self.request_id
+        }, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, data: str, message_id: Optional[str] = None) -> "Job":
+        fields = json.loads(data)
+        return cls(fields["name"], fields["kwargs"], fields.get("attempts", 0), fields.get("request_id"), message_id)
+
+
+class TaskQueue:
+    """Bounded in-process job queue with retries, optionally fed by a Redis Stream."""
+
+    def __init__(self, backend: str = TASK_QUEUE_BACKEND, maxsize: int = TASK_QUEUE_SIZE,
+                 workers: int = TASK_QUEUE_WORKERS, max_attempts: int = TASK_QUEUE_MAX_ATTEMPTS,
+                 retry_base_seconds: float = TASK_QUEUE_RETRY_BASE_SECONDS):
+        self.backend = backend
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self._handlers: Dict[str, Callable[..., Awaitable]] = {}
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._worker_tasks: List[asyncio.Task] = []
+        self._retry_tasks: Set[asyncio.Task] = set()
+        self._reader: Optional[asyncio.Task] = None
+        self._redis = None
+        self._accepting = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def task(self, name: str):
+        """Register a coroutine function as the handler of task `name`."""
+        def register(handler):
+            self._handlers[name] = handler
+            return handler
+        return register
+
+    # ----- enqueue -----
+
+    async def enqueue(self, name: str, **kwargs) -> None:
+        """Queue a job; kwargs must be JSON-serializable. Never raises because the job fails."""
+        if name not in self._handlers:
+            raise KeyError(f"Unknown task '{name}'")
+        job = Job(name, kwargs, request_id=structured_logging.request_id_var.get())
+        metrics.task_queue_jobs.inc((name, "enqueued"))
+        if not self._accepting:
+            # Not running (script, test) or shutting down: do the work now
+            await self._finish(job, await self._execute(job))
+            return
+        if self._redis is not None:
+            try:
+                await self._redis.xadd(TASK_QUEUE_REDIS_STREAM, {"job": job.dumps()})
+                return
+            except Exception:
+                logger.warning("task_stream_add_failed", exc_info=True, extra={"fields": {"task": name}})
+        await self._put(job)
+
+    async def _put(self, job: Job) -> None:
+        await self._queue.put(job)
+        metrics.task_queue_depth.set((), self._queue.qsize())
+
+    # ----- workers -----
+
+    async def _execute(self, job: Job) -> bool:
+        job.attempts += 1
+        token = structured_logging.request_id_var.set(job.request_id)
+        started = time.perf_counter()
+        try:
+            await self._handlers[job.name](**job.kwargs)
+            metrics.task_queue_latency.observe(time.perf_counter() - started, (job.name,))
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("task_attempt_failed", exc_info=True, extra={"fields": {
+                "task": job.name, "attempt": job.attempts
+            }})
+            return False
+        finally:
+            structured_logging.request_id_var.reset(token)
+
+    async def _finish(self, job: Job, succeeded: bool) -> None:
+        if succeeded:
+            metrics.task_queue_jobs.inc((job.name, "succeeded"))
+        else:
+            metrics.task_queue_jobs.inc((job.name, "failed"))
+            logger.error("task_failed", extra={"fields": {"task": job.name, "attempts": job.attempts}})
+        if self._redis is not None and job.message_id is not None:
+            try:
+                await self._redis.xack(TASK_QUEUE_REDIS_STREAM, REDIS_GROUP, job.message_id)
+                await self._redis.xdel(TASK_QUEUE_REDIS_STREAM, job.message_id)
+            except Exception:
+                logger.warning("task_stream_ack_failed", exc_info=True, extra={"fields": {
+                    "task": job.name, "message_id": job.message_id
+                }})
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, self.retry_base_seconds * 2 ** (attempts - 1))
+
+    async def _retry_later(self, job: Job, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._put(job)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            metrics.task_queue_depth.set((), self._queue.qsize())
+            try:
+                succeeded = await self._execute(job)
+                if not succeeded and job.attempts < self.max_attempts:
+                    metrics.task_queue_jobs.inc((job.name, "retried"))
+                    retry = asyncio.create_task(self._retry_later(job, self.retry_delay(job.attempts)))
+                    self._retry_tasks.add(retry)
+                    retry.add_done_callback(self._retry_tasks.discard)
+                else:
+                    await self._finish(job, succeeded)
+            finally:
+                self._queue.task_done()
+
+    # ----- lifecycle -----
+
+    async def start(self) -> None:
+        """Start the workers (and the Redis Stream reader if configured)."""
+        # Bound to the running event loop
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self.backend == "redis":
+            await self._connect_redis()
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._accepting = True
+
+    async def _connect_redis(self) -> None:
+        try:
+            import redis.asyncio as aioredis
+            from redis.exceptions import ResponseError
+
+            self._redis = aioredis.from_url(TASK_QUEUE_REDIS_URL, decode_responses=True)
+            try:
+                await self._redis.xgroup_create(TASK_QUEUE_REDIS_STREAM, REDIS_GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._reader = asyncio.create_task(self._read_stream())
+            logger.info("task_queue_backend", extra={"fields": {"backend": "redis", "stream": TASK_QUEUE_REDIS_STREAM}})
+        except ImportError:
+            logger.warning("task_queue_backend", extra={"fields": {"backend": "local", "reason": "redis not installed"}})
+            self._redis = None
+        except Exception as e:
+            logger.warning("task_queue_backend", extra={"fields": {"backend": "local", "reason": str(e)}})
+            self._redis = None
+
+    async def _read_stream(self) -> None:
+        consumer = f"{socket.gethostname()}-{os.getpid()}"
+        next_claim = 0.0
+        while True:
+            try:
+                messages = []
+                if time.monotonic() >= next_claim:
+                    # Entries read by a process that died before finishing them
+                    _, claimed, *_ = await self._redis.xautoclaim(
+                        TASK_QUEUE_REDIS_STREAM, REDIS_GROUP, consumer,
+                        min_idle_time=TASK_QUEUE_CLAIM_IDLE_MS, start_id="0-0", count=self.workers
+                    )
+                    messages.extend(claimed)
+                    next_claim = time.monotonic() + TASK_QUEUE_CLAIM_IDLE_MS / 1000
+                response = await self._redis.xreadgroup(
+                    REDIS_GROUP, consumer, {TASK_QUEUE_REDIS_STREAM: ">"}, count=self.workers, block=1000
+                )
+                for _, stream_messages in response or []:
+                    messages.extend(stream_messages)
+                for message_id, fields in messages:
+                    try:
+                        job = Job.loads(fields["job"], message_id)
+                    except (ValueError, KeyError, TypeError):
+                        logger.error("task_malformed", exc_info=True, extra={"fields": {"message_id": message_id}})
+                        await self._redis.xack(TASK_QUEUE_REDIS_STREAM, REDIS_GROUP, message_id)
+                        continue
+                    # Waits while the in-process buffer is full
+                    await self._put(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("task_stream_read_failed", exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _drain(self) -> None:
+        while True:
+            await self._queue.join()
+            if not self._retry_tasks:
+                return
+            await asyncio.gather(*list(self._retry_tasks), return_exceptions=True)
+
+    async def stop(self, timeout: float = TASK_QUEUE_DRAIN_SECONDS) -> None:
+        """Stop accepting jobs, finish queued ones within `timeout`, then stop the workers."""
+        self._accepting = False
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            # With Redis, unacknowledged jobs are claimed again after a restart
+            logger.error("task_queue_drain_timeout", extra={"fields": {
+                "queued": self._queue.qsize(), "retrying": len(self._retry_tasks)
+            }})
+        for task in self._worker_tasks + list(self._retry_tasks):
+            task.cancel()
+        self._worker_tasks = []
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+
+queue = TaskQueue()
+
+
+# ==================== POST-COMMIT TASKS ====================
+
+def order_payload(order: Order) -> dict:
+    """An order as task arguments."""
+    return order.model_dump(mode="json")
+
+
+@queue.task("record_order")
+async def record_order(order: dict) -> None:
+    await rollups.record_order(Order.model_validate(order))
+
+
+@queue.task("record_status_change")
+async def record_status_change(order: dict, previous_status: str) -> None:
+    order = Order.model_validate(order)
+    await rollups.record_status_change(order, previous_status, order.status)
+
+
+@queue.task("record_review")
+async def record_review(restaurant_name: str, review_date: str, rating_delta: int, count_delta: int) -> None:
+    await rollups.record_review(restaurant_name, datetime.fromisoformat(review_date), rating_delta, count_delta)
+
+
+@queue.task("apply_rollup_batch")
+async def apply_rollup_batch(batch: dict) -> None:
+    await rollups.RollupBatch.from_payload(batch).flush()
+
+
+async def enqueue_rollup_batch(batch: rollups.RollupBatch) -> None:
+    """Queue the merged deltas of a bulk operation, if it has any."""
+    if len(batch):
+        await queue.enqueue("apply_rollup_batch", batch=batch.payload())
+
+
+@queue.task("verify_purchase")
+async def verify_purchase(review_id: str, user_id: str, restaurant_name: str) -> None:
+    """Mark a review as a verified purchase if its author has ordered from the restaurant."""
+    if await archive.has_ordered(ObjectId(user_id), restaurant_name):
+        await Review.get_motor_collection().update_one(
+            {"_id": ObjectId(review_id)}, {"$set": {"is_verified_purchase": True}}
+        )
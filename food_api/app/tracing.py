@@ -0,0 +1,363 @@
+"""
+Tracing Module
+Span-based distributed tracing with W3C Trace Context propagation
+
+A chat turn in the agent starts a trace and sends it along with every
+backend call in the `traceparent` header. This module continues that trace
+in the API:
+
+- one server span per HTTP request (named after the route template),
+- one client span per MongoDB command (from a pymongo command listener),
+
+so a turn's waterfall runs from the agent's /chat stages down to individual
+queries. Spans are batched in memory and written by a background thread to
+a JSONL file (TRACING_EXPORTER=file) or an OTLP/HTTP collector
+(TRACING_EXPORTER=otlp); scripts/trace_waterfall.py renders the slowest
+traces from the files of both services.
+
+Sampling is parent-based: a request carrying a traceparent follows the
+caller's decision, others are sampled at TRACING_SAMPLE_RATE. Unsampled
+requests still propagate ids but record nothing.
+
+food_chatbot_agent/tracing.py carries a copy of the span core (traceparent
+parsing, spans, exporters, batch processor): the two services are built from
+separate Docker contexts and cannot import a shared module.
+tests/test_tracing.py fails if the copies drift apart.
+"""
+
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()  # none, file, otlp
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "0.1"))
+TRACING_FILE = os.getenv("TRACING_FILE", "logs/traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "food-api")
+
+TRACING_ENABLED = TRACING_EXPORTER != "none"
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a traceparent header, if valid."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    """One timed operation; exported when it ends if its trace is sampled."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 kind: str = "internal", start_ns: Optional[int] = None, attributes: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns or time.time_ns()
+        if self.sampled and processor is not None:
+            processor.submit(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "service": TRACING_SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_unix_nano": self.start_ns,
+            "end_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, kind: str = "internal", parent: Optional[Span] = None,
+               remote_parent: Optional[Tuple[str, str, bool]] = None, **attributes) -> Span:
+    """
+    Start a span under `parent` (default: the current span), under a remote
+    parent from a traceparent header, or as the root of a new trace.
+    """
+    parent = parent or _current.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes=attributes)
+    if remote_parent is not None:
+        trace_id, parent_id, sampled = remote_parent
+        return Span(name, trace_id, parent_id, sampled, kind, attributes=attributes)
+    sampled = random.random() < TRACING_SAMPLE_RATE
+    return Span(name, os.urandom(16).hex(), None, sampled, kind, attributes=attributes)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Run a block inside a child span of the current span."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    current = start_span(name, kind, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+# ==================== EXPORT ====================
+
+class FileExporter:
+    """Appends spans to a JSONL file."""
+
+    def __init__(self, path: str = TRACING_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for item in spans:
+                f.write(json.dumps(item.to_dict(), default=str) + "\n")
+
+
+class OtlpHttpExporter:
+    """Posts spans to an OpenTelemetry collector (OTLP/HTTP, JSON encoding)."""
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str = TRACING_OTLP_ENDPOINT, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def _span(self, item: Span) -> dict:
+        return {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "parentSpanId": item.parent_id or "",
+            "name": item.name,
+            "kind": self.KINDS.get(item.kind, 1),
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [{"key": key, "value": {"stringValue": str(value)}} for key, value in item.attributes.items()],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACING_SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "food_api.tracing"}, "spans": [self._span(item) for item in spans]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        urllib.request.urlopen(request, timeout=self.timeout).close()
+
+
+def _export_failed(error: Exception) -> None:
+    # Imported here: structured_logging imports this module
+    from . import structured_logging
+
+    structured_logging.get_logger("tracing").warning("span_export_failed", exc_info=error)
+
+
+class BatchProcessor:
+    """
+    Buffers finished spans and exports them from a background thread, so
+    request handling never waits on disk or network. Spans are dropped (and
+    counted) when the buffer is full.
+    """
+
+    def __init__(self, exporter, max_queue: int = 4096, batch_size: int = 256, interval_seconds: float = 1.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Span) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Span] = []
+            stopping = False
+            deadline = time.monotonic() + self.interval_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    _export_failed(e)
+            if stopping:
+                return
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush buffered spans and stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+def _make_processor() -> Optional[BatchProcessor]:
+    if TRACING_EXPORTER == "file":
+        return BatchProcessor(FileExporter())
+    if TRACING_EXPORTER == "otlp":
+        return BatchProcessor(OtlpHttpExporter())
+    return None
+
+
+processor: Optional[BatchProcessor] = _make_processor()
+
+
+def shutdown() -> None:
+    if processor is not None:
+        processor.shutdown()
+
+
+# ==================== HTTP SERVER SPANS ====================
+
+class TracingMiddleware:
+    """Pure ASGI middleware: one server span per request, continuing the caller's trace."""
+
+    def __init__(self, app, enabled: bool = TRACING_ENABLED):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        remote_parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                remote_parent = parse_traceparent(value.decode("latin-1"))
+                break
+        server_span = start_span(
+            f"{scope['method']} {scope['path']}", "server", remote_parent=remote_parent,
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        )
+        token = _current.set(server_span)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                server_span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    server_span.error = f"HTTP {message['status']}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            server_span.error = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if getattr(route, "path", None):
+                server_span.name = f"{scope['method']} {route.path}"
+                server_span.set_attribute("http.route", route.path)
+            server_span.end()
+
+
+# ==================== MONGODB CLIENT SPANS ====================
+
+class CommandTracer(monitoring.CommandListener):
+    """Records each MongoDB command as a client span of the request that issued it."""
+
+    def __init__(self):
+        # (connection id, request id) -> (parent span, started at, collection)
+        self._pending: Dict[tuple, tuple] = {}
+
+    def started(self, event):
+        parent = _current.get()
+        if parent is None or not parent.sampled:
+            return
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else None
+        self._pending[(event.connection_id, event.request_id)] = (parent, time.time_ns(), collection)
+
+    def _finish(self, event, error: Optional[str] = None) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        parent, started_ns, collection = pending
+        attributes = {"db.system": "mongodb", "db.operation": event.command_name, "db.name": event.database_name}
+        if collection:
+            attributes["db.mongodb.collection"] = collection
+        command_span = Span(
+            f"mongodb.{event.command_name}", parent.trace_id, parent.span_id, True, "client",
+            start_ns=started_ns, attributes=attributes
+        )
+        command_span.error = error
+        command_span.end(started_ns + event.duration_micros * 1000)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, error=str(event.failure.get("codeName") or event.failure.get("errmsg") or "failed"))
@@ -0,0 +1,188 @@
+"""
+Trending Module
+Sliding-window "trending right now" dishes and restaurants
+
+`create_order` feeds every order into in-process, time-bucketed approximate
+counters:
+
+- Each bucket (1 minute for the 1h window, 1 hour for the 24h window) holds a
+  count-min sketch plus a small bounded set of heavy-hitter candidates.
+- A window query sums the sketches of its live buckets, re-estimates the
+  union of candidates and returns the top-K.
+
+Memory is fixed by the sketch size, bucket count and candidate capacity, no
+matter how many orders arrive, and a query costs the same at any traffic
+level. Results are additionally cached for a few seconds.
+
+Counters live in the worker process: with several uvicorn workers, each one
+reports the trend of the orders it handled (a uniform sample of the traffic).
+"""
+
+import hashlib
+import os
+import time
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+from .cache import TTLCache
+from .models import ITEM_KEY_SEPARATOR, item_key
+from . import metrics
+
+TRENDING_CACHE_TTL_SECONDS = float(os.getenv("TRENDING_CACHE_TTL_SECONDS", "5"))
+
+SKETCH_WIDTH = 1024
+SKETCH_DEPTH = 4
+CANDIDATES_PER_BUCKET = 64
+
+
+class CountMinSketch:
+    """
+    Approximate frequency counter in fixed memory.
+
+    Estimates never undercount; they overcount by at most
+    e/width * total with probability 1 - exp(-depth).
+    """
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add `count` occurrences of `key` and return its new estimate."""
+        columns = self._columns(key)
+        self.table[self._rows, columns] += count
+        return int(self.table[self._rows, columns].min())
+
+    def estimate(self, key: str) -> int:
+        """Estimated number of occurrences of `key`."""
+        return int(self.table[self._rows, self._columns(key)].min())
+
+    def clear(self) -> None:
+        self.table.fill(0)
+
+
+class _Bucket:
+    """One time slice: a sketch plus the heaviest keys seen in it."""
+
+    def __init__(self, width: int, depth: int):
+        self.bucket_id = -1
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+
+    def reset(self, bucket_id: int) -> None:
+        self.bucket_id = bucket_id
+        self.sketch.clear()
+        self.candidates.clear()
+
+
+class SlidingWindowTopK:
+    """
+    Approximate top-K over the last `bucket_count` x `bucket_seconds` seconds.
+
+    Buckets form a ring that is reused as time advances, so memory never grows.
+    """
+
+    def __init__(
+        self,
+        bucket_seconds: int,
+        bucket_count: int,
+        capacity: int = CANDIDATES_PER_BUCKET,
+        width: int = SKETCH_WIDTH,
+        depth: int = SKETCH_DEPTH,
+        clock: Callable[[], float] = time.time
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self._clock = clock
+        self._buckets = [_Bucket(width, depth) for _ in range(bucket_count)]
+
+    def _current_bucket_id(self) -> int:
+        return int(self._clock() // self.bucket_seconds)
+
+    def add(self, key: str, count: int = 1) -> None:
+        """Count `count` occurrences of `key` in the current bucket."""
+        bucket_id = self._current_bucket_id()
+        bucket = self._buckets[bucket_id % len(self._buckets)]
+        if bucket.bucket_id != bucket_id:
+            bucket.reset(bucket_id)
+
+        estimate = bucket.sketch.add(key, count)
+        candidates = bucket.candidates
+        if key in candidates or len(candidates) < self.capacity:
+            candidates[key] = estimate
+            return
+        # Keep only the heaviest keys of this bucket
+        lightest = min(candidates, key=candidates.get)
+        if estimate > candidates[lightest]:
+            del candidates[lightest]
+            candidates[key] = estimate
+
+    def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Return up to `limit` (key, estimated count) pairs, highest first."""
+        oldest = self._current_bucket_id() - len(self._buckets) + 1
+        live = [b for b in self._buckets if b.bucket_id >= oldest]
+        if not live:
+            return []
+
+        merged = CountMinSketch(live[0].sketch.width, live[0].sketch.depth)
+        candidates = set()
+        for bucket in live:
+            merged.table += bucket.sketch.table
+            candidates.update(bucket.candidates)
+
+        ranked = sorted(((key, merged.estimate(key)) for key in candidates), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:limit]
+
+
+# ==================== TRENDING TRACKER ====================
+
+WINDOWS = {
+    "1h": {"bucket_seconds": 60, "bucket_count": 60},
+    "24h": {"bucket_seconds": 3600, "bucket_count": 24},
+}
+
+class TrendingTracker:
+    """Trending items and restaurants over every window in WINDOWS."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.items = {window: SlidingWindowTopK(clock=clock, **spec) for window, spec in WINDOWS.items()}
+        self.restaurants = {window: SlidingWindowTopK(clock=clock, **spec) for window, spec in WINDOWS.items()}
+        self._cache = TTLCache(ttl_seconds=TRENDING_CACHE_TTL_SECONDS, max_entries=64, clock=clock)
+
+    def record_order(self, restaurant_name: str, items: List[Tuple[str, int]]) -> None:
+        """Count an order: once for its restaurant, by quantity for each item."""
+        for window in WINDOWS:
+            self.restaurants[window].add(restaurant_name)
+            for item_name, quantity in items:
+                self.items[window].add(item_key(restaurant_name, item_name), quantity)
+
+    def top(self, window: str = "1h", limit: int = 10) -> Dict[str, list]:
+        """Top items and restaurants for a window, cached for a few seconds."""
+        cache_key: Hashable = (window, limit)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        items = []
+        for key, count in self.items[window].top(limit):
+            restaurant_name, item_name = key.split(ITEM_KEY_SEPARATOR, 1)
+            items.append({"restaurant_name": restaurant_name, "item_name": item_name, "order_count": count})
+        restaurants = [
+            {"restaurant_name": name, "order_count": count}
+            for name, count in self.restaurants[window].top(limit)
+        ]
+
+        result = {"items": items, "restaurants": restaurants}
+        self._cache.set(cache_key, result)
+        return result
+
+
+tracker = TrendingTracker()
+metrics.register_cache("trending", tracker._cache)
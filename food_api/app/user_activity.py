@@ -0,0 +1,112 @@
+"""
+User Activity Module
+Per-user order statistics for the admin dashboard
+
+One aggregation on the users collection joins each user's orders (hot and
+archived) through the indexed `user_id` fields, groups them server-side and
+paginates with `$facet`. This avoids the N+1 pattern of listing users and then
+querying the orders of each one. Pages are cached briefly because the admin dashboard
+re-requests the same page on every refresh.
+"""
+
+import os
+from typing import Dict
+
+from .cache import TTLCache
+from . import metrics
+from .models import Order, ArchivedOrder, User
+from .schemas import UserActivityOut, UserActivityPage
+
+USER_ACTIVITY_CACHE_TTL_SECONDS = float(os.getenv("USER_ACTIVITY_CACHE_TTL_SECONDS", "60"))
+
+# Sort options exposed by the endpoint -> MongoDB sort specification
+SORT_OPTIONS: Dict[str, dict] = {
+    "spend": {"total_spent": -1, "_id": 1},
+    "recency": {"last_order_date": -1, "_id": 1},
+    "orders": {"total_orders": -1, "_id": 1},
+}
+
+activity_cache = TTLCache(ttl_seconds=USER_ACTIVITY_CACHE_TTL_SECONDS)
+metrics.register_cache("user_activity", activity_cache)
+
+
+def build_user_activity_pipeline(sort_by: str, page: int, page_size: int) -> list:
+    """
+    Build the aggregation pipeline for one page of user activity.
+
+    Args:
+        sort_by: One of SORT_OPTIONS
+        page: 1-based page number
+        page_size: Users per page
+    """
+    def order_lookup(collection_name: str, output: str) -> dict:
+        return {"$lookup": {
+            "from": collection_name,
+            "localField": "_id",
+            "foreignField": "user_id",
+            "pipeline": [
+                {"$group": {
+                    "_id": None,
+                    "total_orders": {"$sum": 1},
+                    "total_spent": {"$sum": "$total_price"},
+                    "last_order_date": {"$max": "$order_date"}
+                }}
+            ],
+            "as": output
+        }}
+
+    return [
+        # Never let password hashes leave the database
+        {"$project": {"username": 1, "email": 1, "role": 1}},
+        # Hot and archived orders, each through its user_id index
+        order_lookup(Order.Settings.name, "activity"),
+        order_lookup(ArchivedOrder.Settings.name, "archived_activity"),
+        # Each lookup yields at most one group document; sum them
+        {"$set": {"activity": {"$concatArrays": ["$activity", "$archived_activity"]}}},
+        {"$set": {
+            "total_orders": {"$sum": "$activity.total_orders"},
+            "total_spent": {"$sum": "$activity.total_spent"},
+            "last_order_date": {"$ifNull": [{"$max": "$activity.last_order_date"}, None]},
+            # Users have no created_at field; the ObjectId embeds the insert time
+            "registration_date": {"$toDate": "$_id"}
+        }},
+        {"$unset": ["activity", "archived_activity"]},
+        {"$sort": SORT_OPTIONS[sort_by]},
+        {"$facet": {
+            "items": [{"$skip": (page - 1) * page_size}, {"$limit": page_size}],
+            "total": [{"$count": "count"}]
+        }}
+    ]
+
+
+async def get_user_activity_page(sort_by: str = "spend", page: int = 1, page_size: int = 20) -> UserActivityPage:
+    """Return one page of user activity, served from the cache when fresh."""
+    cache_key = (sort_by, page, page_size)
+    cached = activity_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    pipeline = build_user_activity_pipeline(sort_by, page, page_size)
+    result = await User.get_motor_collection().aggregate(pipeline).to_list(length=1)
+    facet = result[0] if result else {"items": [], "total": []}
+
+    activity_page = UserActivityPage(
+        items=[
+            UserActivityOut(
+                user_id=doc["_id"],
+                username=doc["username"],
+                email=doc["email"],
+                role=doc.get("role", "user"),
+                total_orders=doc["total_orders"],
+                total_spent=round(doc["total_spent"], 2),
+                last_order_date=doc["last_order_date"],
+                registration_date=doc["registration_date"]
+            ) for doc in facet["items"]
+        ],
+        total=facet["total"][0]["count"] if facet["total"] else 0,
+        page=page,
+        page_size=page_size,
+        sort_by=sort_by
+    )
+    activity_cache.set(cache_key, activity_page)
+    return activity_page
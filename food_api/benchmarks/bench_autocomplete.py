@@ -0,0 +1,137 @@
+"""
+Autocomplete build time, query latency and update cost on a large synthetic catalog
+Usage: python benchmarks/bench_autocomplete.py
+       python benchmarks/bench_autocomplete.py --restaurants 10000 --items-per-restaurant 50 --queries 5000
+
+Builds the suggestion index for --restaurants restaurants with
+--items-per-restaurant dishes each (defaults: 10k restaurants, 500k dishes),
+then reports:
+
+- build time and index size (search keys per kind),
+- suggest() latency (p50/p99) for typed prefixes of 1 to 6 characters,
+  compared with a linear scan over every dish for the same prefixes,
+- the cost of applying one catalog change, and query latency while
+  AUTOCOMPLETE_REBUILD_THRESHOLD entries are waiting in the dirty overlay,
+- the rebuild that folds the overlay back into the index.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import autocomplete
+from app.autocomplete import Suggester, normalize, search_keys
+
+ADJECTIVES = ["Masala", "Paneer", "Butter", "Tandoori", "Cheese", "Spicy", "Crispy", "Kesar", "Jain", "Mysore",
+              "Schezwan", "Garlic", "Malai", "Kadai", "Hyderabadi", "Amritsari", "Lucknowi", "Classic", "Special", "Mini"]
+DISHES = ["Dosa", "Pizza", "Biryani", "Pav Bhaji", "Dhokla", "Thali", "Paratha", "Noodles", "Sandwich", "Kulfi",
+          "Idli", "Tikka", "Burger", "Pasta", "Khichdi", "Samosa", "Vada Pav", "Chole Bhature", "Manchurian", "Lassi"]
+CUISINES = ["Gujarati", "Punjabi", "South Indian", "Italian", "Chinese", "Street Food", "Rajasthani", "Cafe",
+            "Mughlai", "Continental", "Desserts", "Beverages"]
+WORDS = ["Swati", "Sankalp", "Honest", "Agashiye", "Gordhan", "Thal", "Manek", "Rajwadu", "Kathiyawadi", "Shree",
+         "Krishna", "Jalaram", "Royal", "Green", "House", "Kitchen", "Corner", "Palace", "Dhaba", "Express"]
+
+
+def synthetic_catalog(restaurants: int, items_per_restaurant: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    catalog = []
+    for index in range(restaurants):
+        items = []
+        for number in range(items_per_restaurant):
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}"
+            if rng.random() < 0.3:
+                # House specials: names only this restaurant uses
+                name = f"{name} {rng.choice(WORDS)} {index}-{number}"
+            items.append({"item_name": name, "total_ratings": int(rng.paretovariate(1.2))})
+        catalog.append({
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {index}",
+            "cuisine": rng.choice(CUISINES),
+            "items": items,
+        })
+    return catalog
+
+
+def typed_prefixes(catalog: list, queries: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    prefixes = []
+    for _ in range(queries):
+        restaurant = rng.choice(catalog)
+        text = rng.choice([restaurant["name"], rng.choice(restaurant["items"])["item_name"]])
+        prefixes.append(text[:rng.randint(1, 6)])
+    return prefixes
+
+
+def percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    return f"p50 {p50 * 1e6:>8.1f} µs   p99 {p99 * 1e6:>8.1f} µs"
+
+
+def time_queries(suggester: Suggester, prefixes: list, limit: int) -> list:
+    samples = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        suggester.suggest(prefix, limit=limit)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(restaurants: int, items_per_restaurant: int, queries: int, limit: int):
+    catalog = synthetic_catalog(restaurants, items_per_restaurant)
+    prefixes = typed_prefixes(catalog, queries)
+    print(f"⏳ {restaurants} restaurants, {restaurants * items_per_restaurant} dishes, {queries} queries (limit {limit})\n")
+
+    started = time.perf_counter()
+    suggester = Suggester.built(catalog)
+    suggester.version = 0
+    build_seconds = time.perf_counter() - started
+    sizes = ", ".join(f"{kind} {len(suggester._entries[kind])} entries / {len(suggester._indexes[kind])} keys"
+                      for kind in autocomplete.KINDS)
+    print(f"  build                     {build_seconds:>8.2f} s   ({sizes})")
+
+    print(f"  suggest(), all kinds      {percentiles(time_queries(suggester, prefixes, limit))}")
+
+    # Baseline: what an index-free implementation has to do per keystroke
+    items = [(key, entry) for key, entry in suggester._entries["item"].items()]
+    scan_samples = []
+    for prefix in prefixes[: max(1, queries // 50)]:
+        started = time.perf_counter()
+        normalized = normalize(prefix)
+        matches = [(entry.weight, key) for key, entry in items
+                   if any(search_key.startswith(normalized) for search_key in search_keys(key))]
+        sorted(matches, reverse=True)[:limit]
+        scan_samples.append(time.perf_counter() - started)
+    print(f"  linear scan, dishes only  {percentiles(scan_samples)}")
+
+    rng = random.Random(5)
+    update_samples = []
+    for _ in range(autocomplete.AUTOCOMPLETE_REBUILD_THRESHOLD // items_per_restaurant + 1):
+        restaurant = dict(rng.choice(catalog))
+        restaurant["items"] = [{**item, "total_ratings": item["total_ratings"] + 1} for item in restaurant["items"]]
+        started = time.perf_counter()
+        suggester.apply({"op": "upsert", "restaurant_name": restaurant["name"], "restaurant": restaurant})
+        update_samples.append(time.perf_counter() - started)
+    print(f"  apply one change          {percentiles(update_samples)}")
+    print(f"  suggest(), {suggester.dirty_count():>4} dirty      {percentiles(time_queries(suggester, prefixes, limit))}")
+
+    started = time.perf_counter()
+    asyncio.run(suggester.rebuild())
+    print(f"  rebuild                   {time.perf_counter() - started:>8.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the autocomplete index")
+    parser.add_argument("--restaurants", type=int, default=10000, help="Restaurants in the catalog (default: 10000)")
+    parser.add_argument("--items-per-restaurant", type=int, default=50, help="Dishes per restaurant (default: 50)")
+    parser.add_argument("--queries", type=int, default=5000, help="Prefix queries to time (default: 5000)")
+    parser.add_argument("--limit", type=int, default=5, help="Suggestions per kind (default: 5)")
+
+    args = parser.parse_args()
+    main(args.restaurants, args.items_per_restaurant, args.queries, args.limit)
@@ -0,0 +1,95 @@
+"""
+Catalog response size and compression CPU per request, by encoding
+Usage: python benchmarks/bench_compression.py
+       python benchmarks/bench_compression.py --restaurants 500 --requests 2000
+
+Builds a synthetic catalog shaped like GET /restaurants/ and reports, for
+each available encoding (zstd and brotli only if their packages are
+installed):
+
+- bytes on the wire,
+- CPU per request when the body is compressed on every request (what the
+  middleware does for uncached responses),
+- CPU per request when serving a precompressed EncodedBody hit (what the
+  catalog read does once its cache is warm).
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import compression
+
+AREAS = ["Navrangpura", "Satellite", "Bopal", "Maninagar", "Vastrapur", "Paldi"]
+CUISINES = ["Gujarati", "Italian", "South Indian", "Chinese", "Punjabi", "Cafe"]
+DISHES = ["Thali", "Pizza", "Dosa", "Noodles", "Paneer Tikka", "Sandwich", "Biryani", "Pasta", "Idli", "Burger"]
+
+
+def synthetic_catalog(restaurants: int, items: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Restaurant {index}",
+            "area": rng.choice(AREAS),
+            "cuisine": rng.choice(CUISINES),
+            "items": [
+                {
+                    "item_name": f"{rng.choice(DISHES)} {number}",
+                    "price": rng.randrange(80, 600),
+                    "description": f"House special {rng.choice(DISHES).lower()} served fresh",
+                    "is_vegetarian": rng.random() < 0.6,
+                    "spice_level": rng.choice(["mild", "medium", "hot"]),
+                }
+                for number in range(items)
+            ],
+        }
+        for index in range(restaurants)
+    ]
+
+
+def cpu_per_request(requests: int, serve) -> float:
+    started = time.process_time()
+    for _ in range(requests):
+        serve()
+    return (time.process_time() - started) / requests
+
+
+def main(restaurants: int, items: int, requests: int):
+    raw = compression.EncodedBody.from_json(synthetic_catalog(restaurants, items)).raw
+    print(f"⏳ {restaurants} restaurants x {items} items = {len(raw) / 1024:.1f} KB of JSON, {requests} requests\n")
+    print(f"  {'encoding':<10} {'bytes':>10} {'ratio':>7} {'compress each hit':>20} {'precompressed hit':>20}")
+    print(f"  {'identity':<10} {len(raw):>10} {1:>7.2f}")
+
+    for encoding, codec in compression.CODECS.items():
+        size = len(codec(raw))
+        per_hit = cpu_per_request(requests, lambda: codec(raw))
+
+        body = compression.EncodedBody(raw)
+        asyncio.run(body.get(encoding))
+
+        def cached_hit():
+            # The coroutine never awaits once the variant is stored
+            coroutine = body.get(encoding)
+            try:
+                coroutine.send(None)
+            except StopIteration:
+                pass
+        cached = cpu_per_request(requests, cached_hit)
+
+        print(f"  {encoding:<10} {size:>10} {len(raw) / size:>7.2f} "
+              f"{per_hit * 1e6:>15.1f} µs {cached * 1e6:>15.2f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark catalog response compression")
+    parser.add_argument("--restaurants", type=int, default=200, help="Restaurants in the catalog (default: 200)")
+    parser.add_argument("--items", type=int, default=15, help="Menu items per restaurant (default: 15)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests to time per mode (default: 500)")
+
+    args = parser.parse_args()
+    main(args.restaurants, args.items, args.requests)
@@ -0,0 +1,123 @@
+"""
+Logging cost per request on the event loop: print() vs structured queue logging
+Usage: python benchmarks/bench_logging.py
+       python benchmarks/bench_logging.py --requests 20000 --write-latency-us 50
+
+Simulates peak load: many concurrent request coroutines each emitting the
+log lines of one order placement. The old code printed 15 lines per order
+plus one per request; the new code logs two queued JSON records.
+
+Output goes to a sink that takes --write-latency-us per write, standing in
+for a terminal or a log pipe that is not keeping up. The figure that
+matters is the time the event loop spends per request (lower is better):
+with print() every slow write stalls every request.
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import structured_logging
+
+
+class SlowSink(io.TextIOBase):
+    """Text stream whose writes block for a fixed time, like a congested pipe"""
+
+    def __init__(self, write_latency_us: float):
+        self.delay = write_latency_us / 1_000_000
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        if self.delay:
+            # A blocked write() syscall; releases the GIL like the real thing
+            time.sleep(self.delay)
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+async def request_with_prints(sink, index: int):
+    print(f"📥 [req-{index}] POST /orders/", file=sink)
+    print("\n" + "=" * 60, file=sink)
+    print("🎯 FASTAPI: ORDER CREATION REQUEST", file=sink)
+    print("=" * 60, file=sink)
+    print(f"👤 User ID: {index}", file=sink)
+    print("👤 Username: bench", file=sink)
+    print("🏪 Restaurant: Pizza Palace", file=sink)
+    print("📦 Number of items: 2", file=sink)
+    print("📋 Items:", file=sink)
+    print("   1. Margherita x 1 @ ₹250", file=sink)
+    print("   2. Garlic Bread x 2 @ ₹120", file=sink)
+    print("✅ Restaurant found: Pizza Palace", file=sink)
+    print("💰 Calculated total: ₹490.00", file=sink)
+    print("✅ Order items created: 2", file=sink)
+    print("📝 Attempting to save order to database...", file=sink)
+    print(f"✅ Order saved successfully! Order ID: {index}", file=sink)
+    await asyncio.sleep(0)
+
+
+async def request_with_logger(logger, index: int):
+    token = structured_logging.request_id_var.set(f"req-{index}")
+    try:
+        logger.info("order_created", extra={"fields": {
+            "order_id": str(index), "user_id": str(index), "restaurant_name": "Pizza Palace",
+            "item_count": 2, "total_price": 490.0
+        }})
+        logger.info("request", extra={"fields": {
+            "method": "POST", "path": "/orders/", "status": 201, "duration_ms": 3.2
+        }})
+    finally:
+        structured_logging.request_id_var.reset(token)
+    await asyncio.sleep(0)
+
+
+async def run(requests: int, concurrency: int, make_request) -> float:
+    """Event-loop seconds spent per request"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with semaphore:
+            await make_request(index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return (time.perf_counter() - started) / requests
+
+
+def main(requests: int, concurrency: int, write_latency_us: float):
+    print(f"⏳ {requests} requests, concurrency {concurrency}, {write_latency_us}µs per write\n")
+    results = {}
+
+    sink = SlowSink(write_latency_us)
+    results["print() x16"] = asyncio.run(run(requests, concurrency, lambda i: request_with_prints(sink, i)))
+
+    for label, rates in (("queued JSON x2", "INFO=1"), ("queued JSON x2, INFO sampled 10%", "INFO=0.1")):
+        sink = SlowSink(write_latency_us)
+        # Large queue: measure the loop-side cost, not drops
+        structured_logging.setup_logging(stream=sink, sample_rates=rates, queue_size=requests * 2 + 10)
+        request_logger = structured_logging.get_logger("bench")
+        results[label] = asyncio.run(run(requests, concurrency, lambda i: request_with_logger(request_logger, i)))
+        structured_logging.shutdown_logging()
+        written = sink.writes
+        results[label + f" ({written} writes)"] = results.pop(label)
+
+    baseline = results["print() x16"]
+    for label, seconds in results.items():
+        print(f"  {label:<48} {seconds * 1e6:>9.1f} µs/request   {baseline / seconds:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-request logging cost on the event loop")
+    parser.add_argument("--requests", type=int, default=20000, help="Requests to simulate (default: 20000)")
+    parser.add_argument("--concurrency", type=int, default=200, help="Concurrent requests (default: 200)")
+    parser.add_argument("--write-latency-us", type=float, default=20, help="Blocking time per stdout write (default: 20)")
+
+    args = parser.parse_args()
+    main(args.requests, args.concurrency, args.write_latency_us)
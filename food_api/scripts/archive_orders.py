@@ -0,0 +1,36 @@
+"""
+Move finished (delivered/cancelled) orders older than N days to orders_archive
+Usage: python scripts/archive_orders.py
+       python scripts/archive_orders.py --days 90 --batch-size 1000
+"""
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import init_db
+from app.archive import archive_cold_orders, ORDER_ARCHIVE_AFTER_DAYS, ORDER_ARCHIVE_BATCH_SIZE
+
+async def archive(days: int, batch_size: int):
+    """Run the order archiver once"""
+    await init_db()
+    
+    print(f"⏳ Archiving finished orders older than {days} days in batches of {batch_size}...")
+    moved = await archive_cold_orders(after_days=days, batch_size=batch_size)
+    print(f"✅ Moved {moved} orders to the archive")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old finished orders to the orders_archive collection")
+    parser.add_argument("--days", type=int, default=ORDER_ARCHIVE_AFTER_DAYS, help=f"Minimum order age in days (default: {ORDER_ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=ORDER_ARCHIVE_BATCH_SIZE, help=f"Orders moved per batch (default: {ORDER_ARCHIVE_BATCH_SIZE})")
+    
+    args = parser.parse_args()
+    
+    if args.days < 1 or args.batch_size < 1:
+        print("❌ Error: --days and --batch-size must be at least 1")
+        sys.exit(1)
+    
+    asyncio.run(archive(days=args.days, batch_size=args.batch_size))
@@ -0,0 +1,35 @@
+"""
+Rebuild the order time-series rollup (order_time_buckets) from existing orders
+Usage: python scripts/backfill_timeseries.py
+       python scripts/backfill_timeseries.py --batch-size 5000
+"""
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import init_db
+from app.rollups import backfill_time_buckets
+
+async def backfill(batch_size: int):
+    """Rebuild all hour/day order buckets and swap them in (pause order archiving while this runs)"""
+    await init_db()
+    
+    print(f"⏳ Rebuilding order time series in batches of {batch_size}...")
+    processed = await backfill_time_buckets(batch_size=batch_size)
+    print(f"✅ Time series rebuilt from {processed} orders")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild order time-series buckets from the orders and archived orders")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Orders read per batch (default: 1000)")
+    
+    args = parser.parse_args()
+    
+    if args.batch_size < 1:
+        print("❌ Error: --batch-size must be at least 1")
+        sys.exit(1)
+    
+    asyncio.run(backfill(batch_size=args.batch_size))
@@ -0,0 +1,37 @@
+"""
+Rebuild the precomputed item and user recommendation lists from all orders
+Usage: python scripts/build_recommendations.py
+       python scripts/build_recommendations.py --top-k 20
+
+Schedule it (e.g. nightly cron) to keep recommendations fresh.
+"""
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import init_db
+from app.recommendations import rebuild_recommendations, RECOMMENDATIONS_TOP_K
+
+async def build(top_k: int):
+    """Recompute co-occurrence and affinity top-K lists"""
+    await init_db()
+    
+    print(f"⏳ Computing top-{top_k} recommendations from order history...")
+    item_lists, user_lists = await rebuild_recommendations(top_k=top_k)
+    print(f"✅ Stored recommendations for {item_lists} items and {user_lists} users")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild item and user recommendations")
+    parser.add_argument("--top-k", type=int, default=RECOMMENDATIONS_TOP_K, help=f"List length (default: {RECOMMENDATIONS_TOP_K})")
+    
+    args = parser.parse_args()
+    
+    if args.top_k < 1:
+        print("❌ Error: --top-k must be at least 1")
+        sys.exit(1)
+    
+    asyncio.run(build(top_k=args.top_k))
@@ -0,0 +1,70 @@
+"""
+Export orders into a columnar, memory-mapped snapshot for offline analytics
+Usage: python scripts/export_order_snapshot.py --out snapshots/orders-2025-10-16
+       python scripts/export_order_snapshot.py --out snapshots/latest --batch-size 20000
+
+Then, on any machine with the snapshot directory:
+    from analytics import OrderSnapshot
+    snap = OrderSnapshot("snapshots/orders-2025-10-16")
+    snap.revenue_by_hour_of_week()
+"""
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from pymongo import ReadPreference
+from app.database import init_db
+from app.models import Order, ArchivedOrder
+from analytics import OrderSnapshotWriter
+
+async def export_snapshot(out: str, batch_size: int):
+    """
+    Stream all orders, hot and archived, into a snapshot directory in _id order
+    
+    An order moved to the archive while the export runs can be exported
+    twice, so run it with the archiver idle for an exact snapshot.
+    """
+    await init_db()
+    
+    projection = {"user_id": 1, "restaurant_name": 1, "items": 1, "total_price": 1, "status": 1, "order_date": 1}
+    
+    writer = OrderSnapshotWriter(out)
+    try:
+        for collection in (Order.get_motor_collection(), ArchivedOrder.get_motor_collection()):
+            # Prefer a secondary so the export does not compete with live traffic
+            orders = collection.with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+            last_id = None
+            while True:
+                query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+                batch = await orders.find(query, projection).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+                if not batch:
+                    break
+                writer.add_orders(batch)
+                last_id = batch[-1]["_id"]
+                print(f"   ... {writer.order_count} orders exported ({collection.name})")
+    except BaseException:
+        writer.abort()
+        raise
+    
+    manifest = writer.close()
+    print(f"✅ Snapshot written to {out}: {manifest['orders']} orders, {manifest['items']} order items")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export orders to a columnar NumPy snapshot")
+    parser.add_argument("--out", type=str, required=True, help="Snapshot directory to create")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Orders read per batch (default: 10000)")
+    
+    args = parser.parse_args()
+    
+    if args.batch_size < 1:
+        print("❌ Error: --batch-size must be at least 1")
+        sys.exit(1)
+    if Path(args.out).exists():
+        print(f"❌ Error: {args.out} already exists")
+        sys.exit(1)
+    
+    asyncio.run(export_snapshot(out=args.out, batch_size=args.batch_size))
@@ -0,0 +1,51 @@
+"""
+Set GeoJSON coordinates on restaurants that have none, from a local lookup table
+Usage: python scripts/geocode_restaurants.py
+       python scripts/geocode_restaurants.py --lookup my_areas.csv --batch-size 200 --dry-run
+
+The lookup table is a CSV with area, latitude, longitude columns (default:
+scripts/area_coordinates.csv). A restaurant's area matches either as a whole
+("Ashram Road, Ahmedabad") or by its first part ("Ashram Road"). Restaurants
+whose area is not in the table are listed so the table can be extended.
+"""
+import asyncio
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import init_db
+from app.geo import backfill_locations, load_lookup, DEFAULT_LOOKUP_PATH
+
+async def geocode_restaurants(lookup_path: Path, batch_size: int, dry_run: bool):
+    """Backfill Restaurant.location so the restaurant shows up in near-me search"""
+    lookup = load_lookup(lookup_path)
+    await init_db()
+    
+    mode = " (dry run)" if dry_run else ""
+    print(f"⏳ Geocoding restaurants from {len(lookup)} known areas in batches of {batch_size}{mode}...")
+    counts = await backfill_locations(lookup, batch_size=batch_size, dry_run=dry_run)
+    print(f"✅ {counts['updated']} of {counts['scanned']} restaurants without coordinates geocoded{mode}")
+    if counts["unmatched"]:
+        print(f"⚠️  {counts['unmatched']} restaurants left without coordinates; areas not in the lookup table:")
+        for area in counts["unmatched_areas"]:
+            print(f"   - {area}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill restaurant coordinates from a local area lookup table")
+    parser.add_argument("--lookup", type=Path, default=DEFAULT_LOOKUP_PATH, help="CSV with area, latitude, longitude columns")
+    parser.add_argument("--batch-size", type=int, default=500, help="Restaurants read per batch (default: 500)")
+    parser.add_argument("--dry-run", action="store_true", help="Report matches without writing")
+    
+    args = parser.parse_args()
+    
+    if args.batch_size < 1:
+        print("❌ Error: --batch-size must be at least 1")
+        sys.exit(1)
+    if not args.lookup.exists():
+        print(f"❌ Error: lookup table not found: {args.lookup}")
+        sys.exit(1)
+    
+    asyncio.run(geocode_restaurants(args.lookup, batch_size=args.batch_size, dry_run=args.dry_run))
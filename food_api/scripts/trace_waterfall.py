@@ -0,0 +1,81 @@
+"""
+Print waterfalls of the slowest traces from exported span files
+Usage: python scripts/trace_waterfall.py logs/traces.jsonl ../food_chatbot_agent/logs/traces.jsonl
+       python scripts/trace_waterfall.py logs/traces.jsonl --top 5 --name "POST /chat"
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+BAR_WIDTH = 40
+
+
+def load_traces(paths):
+    """Spans grouped by trace id, from every file (agent and API spans merge)"""
+    traces = defaultdict(list)
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        span = json.loads(line)
+                        traces[span["trace_id"]].append(span)
+        except FileNotFoundError:
+            print(f"⚠️  WARNING: {path} not found, skipping")
+    return traces
+
+
+def print_waterfall(spans):
+    """Print one trace as an indented tree with a timeline bar per span"""
+    ids = {span["span_id"] for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span["parent_span_id"] in ids:
+            children[span["parent_span_id"]].append(span)
+        else:
+            roots.append(span)
+
+    start = min(span["start_unix_nano"] for span in spans)
+    end = max(span["end_unix_nano"] for span in spans)
+    total = max(end - start, 1)
+    print(f"\n🧭 Trace {spans[0]['trace_id']} — {total / 1e6:.1f}ms, {len(spans)} spans")
+
+    def walk(span, depth):
+        offset = int((span["start_unix_nano"] - start) / total * BAR_WIDTH)
+        width = max(1, int((span["end_unix_nano"] - span["start_unix_nano"]) / total * BAR_WIDTH))
+        bar = " " * offset + "█" * min(width, BAR_WIDTH - offset)
+        label = f"{'  ' * depth}{span['name']} [{span['service']}]"
+        error = f" ❌ {span['error']}" if span.get("error") else ""
+        print(f"  {label[:60]:<60} {bar:<{BAR_WIDTH}} {span['duration_ms']:>9.1f}ms{error}")
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start_unix_nano"]):
+            walk(child, depth + 1)
+
+    for root in sorted(roots, key=lambda s: s["start_unix_nano"]):
+        walk(root, 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the slowest traces as waterfalls")
+    parser.add_argument("files", nargs="+", help="Span files written by TRACING_EXPORTER=file")
+    parser.add_argument("--top", type=int, default=10, help="Number of traces to show (default: 10)")
+    parser.add_argument("--name", help="Only traces whose root span has this name (e.g. 'POST /chat')")
+
+    args = parser.parse_args()
+
+    traces = load_traces(args.files)
+    if not traces:
+        print("❌ Error: no spans found")
+        sys.exit(1)
+
+    def duration(spans):
+        return max(s["end_unix_nano"] for s in spans) - min(s["start_unix_nano"] for s in spans)
+
+    def root_names(spans):
+        ids = {s["span_id"] for s in spans}
+        return {s["name"] for s in spans if s["parent_span_id"] not in ids}
+
+    selected = [spans for spans in traces.values() if not args.name or args.name in root_names(spans)]
+    for spans in sorted(selected, key=duration, reverse=True)[:args.top]:
+        print_waterfall(spans)
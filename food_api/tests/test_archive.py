@@ -0,0 +1,242 @@
+"""
+Unit Tests for Order Archiving
+Tests which orders are eligible for the archive, moving them, and reading
+across the hot and archived collections
+"""
+
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.archive import ARCHIVE_STATUSES, archive_batch, find_orders, get_order, has_ordered
+from app.models import ArchivedOrder, Order, OrderItem
+from app.order_status import OPEN_STATUSES
+
+CUTOFF = datetime(2025, 9, 16)
+
+
+def matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$lt" in condition and not value < condition["$lt"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def limit(self, count):
+        return FakeCursor(self.docs[:count])
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class FakeCollection:
+    """Just enough of a motor collection for archive_batch"""
+
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.fail_deletes = False
+
+    def find(self, query):
+        return FakeCursor([dict(doc) for doc in self.docs.values() if matches(doc, query)])
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs.values() if matches(doc, query)), None)
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            # ReplaceOne with upsert: a re-run overwrites instead of raising a duplicate key error
+            assert request._upsert
+            self.docs[request._filter["_id"]] = dict(request._doc)
+
+    async def delete_many(self, query):
+        if self.fail_deletes:
+            raise ConnectionError("connection reset")
+        for doc_id in [doc_id for doc_id, doc in self.docs.items() if matches(doc, query)]:
+            del self.docs[doc_id]
+
+
+def order_doc(status="delivered", order_date=datetime(2025, 9, 1), **fields):
+    return {
+        "_id": ObjectId(), "user_id": ObjectId(), "restaurant_name": "Swati Snacks",
+        "items": [], "total_price": 250.0, "status": status, "order_date": order_date, **fields
+    }
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    hot, cold = FakeCollection(), FakeCollection()
+    monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: hot))
+    monkeypatch.setattr(ArchivedOrder, "get_motor_collection", classmethod(lambda cls: cold))
+    return hot, cold
+
+
+@pytest.mark.unit
+class TestArchiveStatuses:
+    """Test archive eligibility"""
+
+    def test_only_finished_orders_are_archived(self):
+        """Test that delivered and cancelled orders are archived"""
+        assert sorted(ARCHIVE_STATUSES) == ["cancelled", "delivered"]
+
+    def test_open_orders_are_never_archived(self):
+        """Test that orders still being prepared or delivered stay hot"""
+        assert not set(ARCHIVE_STATUSES) & set(OPEN_STATUSES)
+
+
+@pytest.mark.unit
+class TestArchiveBatch:
+    """Test moving finished orders to the archive"""
+
+    async def test_moves_only_old_finished_orders(self, collections):
+        """Test that old delivered/cancelled orders move and everything else stays"""
+        hot, cold = collections
+        old_delivered = order_doc("delivered")
+        old_cancelled = order_doc("cancelled")
+        old_open = order_doc("preparing")
+        recent = order_doc("delivered", order_date=datetime(2025, 10, 1))
+        hot.docs = {doc["_id"]: doc for doc in (old_delivered, old_cancelled, old_open, recent)}
+
+        assert await archive_batch(CUTOFF) == 2
+
+        assert set(hot.docs) == {old_open["_id"], recent["_id"]}
+        assert set(cold.docs) == {old_delivered["_id"], old_cancelled["_id"]}
+        assert all(isinstance(doc["archived_at"], datetime) for doc in cold.docs.values())
+
+    async def test_batch_size_limits_one_pass(self, collections):
+        """Test that one call moves at most batch_size orders"""
+        hot, cold = collections
+        hot.docs = {doc["_id"]: doc for doc in (order_doc() for _ in range(5))}
+
+        assert await archive_batch(CUTOFF, batch_size=2) == 2
+        assert (len(hot.docs), len(cold.docs)) == (3, 2)
+
+    async def test_crash_between_copy_and_delete_is_recovered(self, collections):
+        """Test that a re-run after a failed delete finishes the move without duplicates"""
+        hot, cold = collections
+        orders = [order_doc() for _ in range(3)]
+        hot.docs = {doc["_id"]: doc for doc in orders}
+
+        hot.fail_deletes = True
+        with pytest.raises(ConnectionError):
+            await archive_batch(CUTOFF)
+        # Copied but not yet deleted: the order is in both collections
+        assert len(hot.docs) == 3 and len(cold.docs) == 3
+
+        hot.fail_deletes = False
+        assert await archive_batch(CUTOFF) == 3
+
+        assert hot.docs == {}
+        assert set(cold.docs) == {doc["_id"] for doc in orders}
+
+    async def test_nothing_to_move(self, collections):
+        """Test that an empty batch writes nothing"""
+        hot, cold = collections
+        hot.docs = {doc["_id"]: doc for doc in [order_doc("placed")]}
+
+        assert await archive_batch(CUTOFF) == 0
+        assert cold.docs == {}
+
+
+def make_order(order_date, restaurant_name="Swati Snacks"):
+    return Order.model_construct(
+        id=ObjectId(),
+        user_id=ObjectId(),
+        restaurant_name=restaurant_name,
+        items=[OrderItem(item_name="Thali", quantity=1, price=250.0)],
+        total_price=250.0,
+        status="delivered",
+        order_date=order_date
+    )
+
+
+class FakeFind:
+    def __init__(self, orders):
+        self.orders = orders
+
+    async def to_list(self):
+        return list(self.orders)
+
+
+@pytest.fixture
+def documents(monkeypatch):
+    """Hot and archived orders behind Order.find/get and ArchivedOrder.find/get"""
+    stores = {Order: [], ArchivedOrder: []}
+
+    def install(model):
+        monkeypatch.setattr(model, "find", classmethod(lambda cls, query: FakeFind(stores[model])))
+
+        async def get(cls, order_id):
+            return next((order for order in stores[model] if order.id == order_id), None)
+
+        monkeypatch.setattr(model, "get", classmethod(get))
+
+    install(Order)
+    install(ArchivedOrder)
+    return stores
+
+
+@pytest.mark.unit
+class TestArchivedReads:
+    """Test reads that span the hot and archived collections"""
+
+    async def test_find_orders_hot_only_by_default(self, documents):
+        """Test that archived orders are left out unless requested"""
+        hot = make_order(datetime(2025, 10, 10))
+        documents[Order].append(hot)
+        documents[ArchivedOrder].append(make_order(datetime(2025, 8, 1)))
+
+        assert await find_orders({}) == [hot]
+
+    async def test_find_orders_merges_newest_first(self, documents):
+        """Test that hot and archived orders come back as one history, newest first"""
+        dates = [datetime(2025, 10, 10), datetime(2025, 8, 1), datetime(2025, 10, 12), datetime(2025, 7, 20)]
+        documents[Order] += [make_order(dates[0]), make_order(dates[2])]
+        documents[ArchivedOrder] += [make_order(dates[1]), make_order(dates[3])]
+
+        orders = await find_orders({}, include_archived=True)
+
+        assert [order.order_date for order in orders] == sorted(dates, reverse=True)
+
+    async def test_get_order_falls_back_to_archive(self, documents):
+        """Test that an archived order is found by id only when requested"""
+        archived = make_order(datetime(2025, 8, 1))
+        documents[ArchivedOrder].append(archived)
+
+        assert await get_order(archived.id) is None
+        assert await get_order(archived.id, include_archived=True) is archived
+
+    async def test_get_order_prefers_hot_copy(self, documents):
+        """Test that an order caught mid-move is read from the hot collection"""
+        hot = make_order(datetime(2025, 8, 1))
+        documents[Order].append(hot)
+        documents[ArchivedOrder].append(hot.model_copy())
+
+        assert await get_order(hot.id, include_archived=True) is hot
+
+    @pytest.mark.parametrize("in_hot, in_archive, expected", [
+        (True, False, True),
+        (False, True, True),
+        (False, False, False),
+    ])
+    async def test_has_ordered(self, collections, in_hot, in_archive, expected):
+        """Test that purchase history covers archived orders"""
+        hot, cold = collections
+        user_id = ObjectId()
+        if in_hot:
+            hot.docs = {doc["_id"]: doc for doc in [order_doc(user_id=user_id)]}
+        if in_archive:
+            cold.docs = {doc["_id"]: doc for doc in [order_doc(user_id=user_id)]}
+
+        assert await has_ordered(user_id, "Swati Snacks") is expected
+        assert await has_ordered(user_id, "Sankalp") is False
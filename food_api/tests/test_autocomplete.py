@@ -0,0 +1,248 @@
+"""
+Unit Tests for Autocomplete
+Tests the prefix index, popularity ranking and incremental catalog updates
+"""
+
+import random
+
+import pytest
+
+from app import catalog
+from app.autocomplete import PrefixIndex, Suggester, normalize, search_keys
+
+
+def restaurant(name, cuisine="Gujarati", items=()):
+    return {
+        "name": name,
+        "cuisine": cuisine,
+        "items": [{"item_name": item, "total_ratings": ratings} for item, ratings in items],
+    }
+
+
+CATALOG = [
+    restaurant("Swati Snacks", "Gujarati", [("Panki", 40), ("Masala Dosa", 5)]),
+    restaurant("Sankalp", "South Indian", [("Masala Dosa", 90), ("Rava Dosa", 20)]),
+    restaurant("Pizza Palace", "Italian", [("Paneer Pizza", 10)]),
+    restaurant("Honest", "Street Food", [("Pav Bhaji", 200), ("Paneer Pav Bhaji", 3)]),
+]
+
+
+def texts(suggestions):
+    return [suggestion["text"] for suggestion in suggestions]
+
+
+def brute_force(suggester, kind, query, limit):
+    """Reference answer: scan every live entry"""
+    prefix = normalize(query)
+    matches = [
+        (key, entry) for key, entry in suggester._entries[kind].items()
+        if any(search_key.startswith(prefix) for search_key in search_keys(key))
+    ]
+    matches.sort(key=lambda pair: (-pair[1].weight, pair[0]))
+    return [entry.text for _, entry in matches[:limit]]
+
+
+@pytest.mark.unit
+class TestPrefixIndex:
+    """Test the sorted keys and sparse table"""
+
+    def test_top_in_weight_order(self):
+        """Test that keys under a prefix come out highest weight first"""
+        index = PrefixIndex([("pav bhaji", "a", 5), ("paneer", "b", 9), ("panki", "c", 7), ("dosa", "d", 100)])
+
+        assert list(index.iter_top("pa")) == ["b", "c", "a"]
+        assert list(index.iter_top("pan")) == ["b", "c"]
+        assert list(index.iter_top("x")) == []
+
+    def test_ties_are_alphabetical(self):
+        """Test that equal weights keep key order"""
+        index = PrefixIndex([("b", "b", 1), ("a", "a", 1), ("c", "c", 1)])
+
+        assert list(index.iter_top("")) == ["a", "b", "c"]
+
+    def test_empty(self):
+        """Test that an empty index returns nothing"""
+        assert list(PrefixIndex([]).iter_top("a")) == []
+
+    def test_matches_sorting_on_random_data(self):
+        """Test range maxima against a full sort for many prefixes"""
+        rng = random.Random(3)
+        rows = [("".join(rng.choice("abc") for _ in range(rng.randint(1, 5))), str(i), rng.randint(0, 50))
+                for i in range(300)]
+        index = PrefixIndex(rows)
+        weights = {row[1]: row[2] for row in rows}
+
+        for prefix in ("", "a", "ab", "cab", "bb"):
+            expected = [row for row in rows if row[0].startswith(prefix)]
+            got = list(index.iter_top(prefix))
+            assert sorted(got) == sorted(row[1] for row in expected)
+            assert [weights[i] for i in got] == sorted((row[2] for row in expected), reverse=True)
+
+
+@pytest.mark.unit
+class TestNormalize:
+    """Test key normalization"""
+
+    def test_normalize(self):
+        """Test that case, punctuation and spacing are ignored"""
+        assert normalize("  Dal-Baati  Churma ") == "dalbaati churma"
+        assert normalize("C.G. Road Café") == "cg road café"
+
+    def test_search_keys(self):
+        """Test that every word start is searchable"""
+        assert search_keys("paneer pav bhaji") == ["paneer pav bhaji", "pav bhaji", "bhaji"]
+
+
+@pytest.mark.unit
+class TestSuggest:
+    """Test suggestions from a loaded catalog"""
+
+    def test_items_merged_and_ranked_by_popularity(self):
+        """Test that dishes are merged across restaurants and ranked by rating counts"""
+        suggester = Suggester.built(CATALOG)
+
+        items = suggester.suggest("pa", kinds=["item"])["item"]
+
+        assert texts(items) == ["Pav Bhaji", "Panki", "Paneer Pizza", "Paneer Pav Bhaji"]
+        dosa = suggester.suggest("masala", kinds=["item"])["item"][0]
+        assert dosa == {"text": "Masala Dosa", "score": 97, "restaurants": 2}
+
+    def test_word_starts_match_once(self):
+        """Test that a later word matches and an entry is suggested only once"""
+        suggester = Suggester.built(CATALOG)
+
+        assert texts(suggester.suggest("dosa", kinds=["item"])["item"]) == ["Masala Dosa", "Rava Dosa"]
+        assert texts(suggester.suggest("p", limit=10, kinds=["item"])["item"]).count("Paneer Pav Bhaji") == 1
+
+    def test_all_kinds(self):
+        """Test restaurant, cuisine and dish suggestions side by side"""
+        suggester = Suggester.built(CATALOG)
+
+        result = suggester.suggest("S")
+
+        assert texts(result["restaurant"]) == ["Sankalp", "Swati Snacks"]
+        assert texts(result["cuisine"]) == ["South Indian", "Street Food"]
+        assert result["item"] == []
+
+    def test_limit_and_empty_query(self):
+        """Test that limit applies per kind and blank input suggests nothing"""
+        suggester = Suggester.built(CATALOG)
+
+        assert len(suggester.suggest("p", limit=2)["item"]) == 2
+        assert suggester.suggest(" - ") == {"restaurant": [], "cuisine": [], "item": []}
+
+
+@pytest.mark.unit
+class TestIncrementalUpdates:
+    """Test catalog writes applied without a rebuild"""
+
+    def test_upsert_changes_ranking(self):
+        """Test that an updated menu is reflected immediately"""
+        suggester = Suggester.built(CATALOG)
+
+        suggester.apply({"op": "upsert", "restaurant_name": "Pizza Palace",
+                         "restaurant": restaurant("Pizza Palace", "Italian", [("Paneer Pizza", 500)])})
+
+        assert texts(suggester.suggest("pa", limit=1, kinds=["item"])["item"]) == ["Paneer Pizza"]
+        assert suggester.dirty_count() > 0
+
+    def test_delete_removes_only_its_share(self):
+        """Test that a deleted restaurant's dishes disappear unless served elsewhere"""
+        suggester = Suggester.built(CATALOG)
+
+        suggester.apply({"op": "delete", "restaurant_name": "Sankalp"})
+
+        assert texts(suggester.suggest("dosa", kinds=["item"])["item"]) == ["Masala Dosa"]
+        assert suggester.suggest("masala", kinds=["item"])["item"][0]["restaurants"] == 1
+        assert suggester.suggest("sank", kinds=["restaurant"])["restaurant"] == []
+        assert suggester.suggest("south", kinds=["cuisine"])["cuisine"] == []
+
+    def test_overlay_matches_rebuild_under_random_writes(self):
+        """Test that overlay answers equal a brute-force scan after many writes"""
+        rng = random.Random(11)
+        dishes = ["Pav Bhaji", "Panki", "Paneer Tikka", "Pani Puri", "Masala Dosa", "Dhokla", "Dal Baati"]
+        names = [f"Restaurant {i}" for i in range(30)]
+        suggester = Suggester.built([
+            restaurant(name, items=[(rng.choice(dishes), rng.randint(0, 50)) for _ in range(3)]) for name in names[:20]
+        ])
+
+        for _ in range(200):
+            name = rng.choice(names)
+            if rng.random() < 0.2:
+                suggester.apply({"op": "delete", "restaurant_name": name})
+            else:
+                menu = [(rng.choice(dishes), rng.randint(0, 50)) for _ in range(rng.randint(0, 4))]
+                suggester.apply({"op": "upsert", "restaurant_name": name, "restaurant": restaurant(name, items=menu)})
+            query = rng.choice(["p", "pa", "pan", "d", "dosa", "b", "r", "restaurant 1"])
+            for kind in ("item", "restaurant"):
+                assert texts(suggester.suggest(query, limit=4, kinds=[kind])[kind]) == brute_force(suggester, kind, query, 4)
+
+    async def test_rebuild_clears_overlay(self):
+        """Test that a rebuild folds dirty entries back into the index"""
+        suggester = Suggester.built(CATALOG)
+        suggester.apply({"op": "delete", "restaurant_name": "Honest"})
+
+        await suggester.rebuild()
+
+        assert suggester.dirty_count() == 0
+        assert texts(suggester.suggest("pa", kinds=["item"])["item"]) == ["Panki", "Paneer Pizza"]
+
+
+@pytest.mark.unit
+class TestCatalogSync:
+    """Test following the catalog change feed"""
+
+    async def test_sync_applies_changes_in_pages(self, monkeypatch):
+        """Test that changes are read until has_more is false and then rebuilt when large"""
+        pages = [
+            {"version": 6, "has_more": True, "changes": [{"op": "delete", "restaurant_name": "Honest"}]},
+            {"version": 7, "has_more": False, "changes": [
+                {"op": "upsert", "restaurant_name": "Thali House",
+                 "restaurant": restaurant("Thali House", "Gujarati", [("Gujarati Thali", 30)])}
+            ]},
+        ]
+        calls = []
+
+        async def changes_since(since, limit):
+            calls.append(since)
+            return pages.pop(0)
+        monkeypatch.setattr(catalog, "changes_since", changes_since)
+        suggester = Suggester(rebuild_threshold=0)
+        suggester.load(CATALOG, version=5)
+
+        await suggester.sync()
+
+        assert calls == [5, 6]
+        assert suggester.version == 7
+        assert suggester.dirty_count() == 0
+        assert texts(suggester.suggest("thali", kinds=["item"])["item"]) == ["Gujarati Thali"]
+
+    async def test_expired_changes_reload(self, monkeypatch):
+        """Test that a pruned change log triggers a full reload"""
+        async def changes_since(since, limit):
+            raise catalog.ChangesExpired(since)
+
+        async def load_catalog(self):
+            self.load([restaurant("Fresh Start")], version=42)
+        monkeypatch.setattr(catalog, "changes_since", changes_since)
+        monkeypatch.setattr(Suggester, "_load_catalog", load_catalog)
+        suggester = Suggester()
+        suggester.load(CATALOG, version=1)
+
+        await suggester.sync()
+
+        assert suggester.version == 42
+        assert texts(suggester.suggest("s", kinds=["restaurant"])["restaurant"]) == ["Fresh Start"]
+
+    async def test_catch_up_does_not_raise(self, monkeypatch):
+        """Test that a failed sync leaves the old index serving"""
+        async def changes_since(since, limit):
+            raise ConnectionError("down")
+        monkeypatch.setattr(catalog, "changes_since", changes_since)
+        suggester = Suggester()
+        suggester.load(CATALOG, version=1)
+
+        await suggester.catch_up()
+
+        assert suggester.ready
+        assert suggester.version == 1
@@ -0,0 +1,260 @@
+"""
+Unit Tests for Admin Bulk Operations
+Tests parsing of typed operations in a bulk request and running a mixed batch
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import DeleteOne
+
+from app import events, rollups, task_queue, user_activity
+from app.bulk_ops import run_bulk_operations
+from app.models import Order, Review, User
+from app.schemas import BulkOperationsRequest, CancelRestaurantOrdersOp, SetUserRoleOp
+
+
+@pytest.mark.unit
+class TestBulkOperationsRequest:
+    """Test the discriminated union of bulk operations"""
+
+    def test_operations_parsed_by_type(self):
+        """Test that each operation is parsed into its own schema"""
+        request = BulkOperationsRequest(operations=[
+            {"op": "cancel_restaurant_orders", "restaurant_name": "Swati Snacks"},
+            {"op": "set_user_role", "user_id": "652f1c2e8a1b2c3d4e5f6a7b", "role": "admin"}
+        ])
+
+        assert isinstance(request.operations[0], CancelRestaurantOrdersOp)
+        assert isinstance(request.operations[1], SetUserRoleOp)
+
+    def test_unknown_operation_rejected(self):
+        """Test that an unsupported op is a validation error"""
+        with pytest.raises(ValidationError):
+            BulkOperationsRequest(operations=[{"op": "drop_database"}])
+
+    def test_invalid_role_rejected(self):
+        """Test that only known roles can be assigned"""
+        with pytest.raises(ValidationError):
+            BulkOperationsRequest(operations=[
+                {"op": "set_user_role", "user_id": "652f1c2e8a1b2c3d4e5f6a7b", "role": "superuser"}
+            ])
+
+    def test_empty_batch_rejected(self):
+        """Test that a bulk request needs at least one operation"""
+        with pytest.raises(ValidationError):
+            BulkOperationsRequest(operations=[])
+
+
+def matches(doc, query):
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif isinstance(value, list):
+            if condition not in value:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    """Applies UpdateOne/DeleteOne bulk writes the way MongoDB does"""
+
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+        self.bulk_writes = []
+
+    def find(self, query, projection=None):
+        return FakeCursor([dict(doc) for doc in self.docs.values() if matches(doc, query)])
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_writes.append(requests)
+        for request in requests:
+            doc = next((doc for doc in self.docs.values() if matches(doc, request._filter)), None)
+            if doc is None:
+                continue
+            if isinstance(request, DeleteOne):
+                del self.docs[doc["_id"]]
+                continue
+            doc.update(request._doc.get("$set", {}))
+            for field, value in request._doc.get("$push", {}).items():
+                doc.setdefault(field, []).append(value)
+
+
+ORDER_DATE = datetime(2025, 10, 16, 12, 30)
+
+
+def order_doc(status="placed", restaurant_name="Swati Snacks", total_price=250.0):
+    return {
+        "_id": ObjectId(), "user_id": ObjectId(), "restaurant_name": restaurant_name, "items": [],
+        "total_price": total_price, "status": status, "order_date": ORDER_DATE, "status_updated_at": None
+    }
+
+
+def review_doc(rating=4, restaurant_name="Swati Snacks"):
+    return {"_id": ObjectId(), "restaurant_name": restaurant_name, "review_date": ORDER_DATE, "rating": rating}
+
+
+def user_doc(role="user"):
+    return {"_id": ObjectId(), "username": "someone", "role": role}
+
+
+def operations(*ops):
+    return BulkOperationsRequest(operations=list(ops)).operations
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Fake orders/reviews/users plus recorders for the derived-data side effects"""
+    state = SimpleNamespace(
+        orders=FakeCollection(), reviews=FakeCollection(), users=FakeCollection(),
+        enqueued=[], cache_clears=0, published=[]
+    )
+    monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: state.orders))
+    monkeypatch.setattr(Review, "get_motor_collection", classmethod(lambda cls: state.reviews))
+    monkeypatch.setattr(User, "get_motor_collection", classmethod(lambda cls: state.users))
+    monkeypatch.setattr(Order, "model_validate", classmethod(lambda cls, doc: cls.model_construct(**doc)))
+
+    async def enqueue(name, **kwargs):
+        state.enqueued.append((name, kwargs))
+
+    def clear():
+        state.cache_clears += 1
+
+    async def publish(order, previous_status=None):
+        state.published.append((order.id, previous_status))
+
+    monkeypatch.setattr(task_queue.queue, "enqueue", enqueue)
+    monkeypatch.setattr(user_activity.activity_cache, "clear", clear)
+    monkeypatch.setattr(events.broker, "publish", publish)
+    return state
+
+
+def add(collection, *docs):
+    for doc in docs:
+        collection.docs[doc["_id"]] = dict(doc)
+    return docs
+
+
+@pytest.mark.unit
+class TestRunBulkOperations:
+    """Test running a mixed batch of admin operations"""
+
+    async def test_results_in_request_order(self, store):
+        """Test that results follow the request order across operation groups"""
+        order, = add(store.orders, order_doc())
+        review, = add(store.reviews, review_doc())
+        user, = add(store.users, user_doc())
+
+        response = await run_bulk_operations(operations(
+            {"op": "set_user_role", "user_id": str(user["_id"]), "role": "admin"},
+            {"op": "cancel_order", "order_id": "not-an-id"},
+            {"op": "delete_review", "review_id": str(review["_id"])},
+            {"op": "cancel_order", "order_id": str(order["_id"])},
+            {"op": "delete_review", "review_id": str(ObjectId())},
+        ), current_admin_id=ObjectId())
+
+        assert [(r.index, r.op, r.ok, r.detail) for r in response.results] == [
+            (0, "set_user_role", True, None),
+            (1, "cancel_order", False, "not_found"),
+            (2, "delete_review", True, None),
+            (3, "cancel_order", True, None),
+            (4, "delete_review", False, "not_found"),
+        ]
+        assert (response.succeeded, response.failed) == (3, 2)
+        assert store.orders.docs[order["_id"]]["status"] == "cancelled"
+        assert review["_id"] not in store.reviews.docs
+        assert store.users.docs[user["_id"]]["role"] == "admin"
+
+    async def test_unknown_and_finished_orders(self, store):
+        """Test not_found for unknown ids and a failed transition for finished orders"""
+        cancelled, delivered = add(store.orders, order_doc("cancelled"), order_doc("delivered"))
+
+        response = await run_bulk_operations(operations(
+            {"op": "cancel_order", "order_id": str(ObjectId())},
+            {"op": "cancel_order", "order_id": str(cancelled["_id"])},
+            {"op": "cancel_order", "order_id": str(delivered["_id"])},
+        ), current_admin_id=ObjectId())
+
+        assert [r.detail for r in response.results] == [
+            "not_found", "invalid_transition_from_cancelled", "invalid_transition_from_delivered"
+        ]
+        assert store.orders.bulk_writes == []
+        assert store.enqueued == [] and store.published == []
+
+    async def test_cannot_change_own_role(self, store):
+        """Test that an admin cannot demote themselves in a bulk request"""
+        admin, = add(store.users, user_doc("admin"))
+
+        response = await run_bulk_operations(operations(
+            {"op": "set_user_role", "user_id": str(admin["_id"]), "role": "user"},
+        ), current_admin_id=admin["_id"])
+
+        assert response.results[0].detail == "cannot_change_own_role"
+        assert store.users.docs[admin["_id"]]["role"] == "admin"
+        assert store.users.bulk_writes == []
+
+    async def test_last_role_change_wins(self, store):
+        """Test that several role changes for one user apply as one write of the last role"""
+        user, = add(store.users, user_doc("user"))
+        user_id = str(user["_id"])
+
+        response = await run_bulk_operations(operations(
+            {"op": "set_user_role", "user_id": user_id, "role": "admin"},
+            {"op": "set_user_role", "user_id": user_id, "role": "user"},
+            {"op": "set_user_role", "user_id": user_id, "role": "admin"},
+        ), current_admin_id=ObjectId())
+
+        assert all(r.ok for r in response.results)
+        assert store.users.docs[user["_id"]]["role"] == "admin"
+        assert [len(requests) for requests in store.users.bulk_writes] == [1]
+
+    async def test_derived_data_updated_once_per_batch(self, store):
+        """Test that rollups are queued once, caches cleared once and each cancelled order published once"""
+        orders = add(store.orders, *(order_doc(total_price=100.0) for _ in range(3)))
+        add(store.orders, order_doc(restaurant_name="Sankalp"))
+        reviews = add(store.reviews, review_doc(rating=4), review_doc(rating=2))
+
+        response = await run_bulk_operations(operations(
+            {"op": "cancel_restaurant_orders", "restaurant_name": "Swati Snacks"},
+            # Also listed by id: cancelled once, published once
+            {"op": "cancel_order", "order_id": str(orders[0]["_id"])},
+            *({"op": "delete_review", "review_id": str(review["_id"])} for review in reviews),
+        ), current_admin_id=ObjectId())
+
+        assert response.results[0].affected == 3
+        assert response.failed == 0
+        assert len(store.orders.bulk_writes) == 1 and len(store.reviews.bulk_writes) == 1
+
+        assert [name for name, _ in store.enqueued] == ["apply_rollup_batch"]
+        batch = rollups.RollupBatch.from_payload(store.enqueued[0][1]["batch"])
+        day = rollups.day_bucket(ORDER_DATE)
+        assert batch._daily == {("Swati Snacks", day): {
+            "total_orders": -3, "total_revenue": -300.0, "rating_sum": -6, "review_count": -2
+        }}
+
+        assert store.cache_clears == 1
+        assert sorted(order_id for order_id, _ in store.published) == sorted(order["_id"] for order in orders)
+        assert {previous for _, previous in store.published} == {"placed"}
@@ -0,0 +1,74 @@
+"""
+Unit Tests for the In-Process TTL Cache
+Tests expiry, LRU eviction and hit/miss accounting
+"""
+
+import pytest
+from app.cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+class TestTTLCache:
+    """Test suite for TTLCache"""
+
+    def test_returns_value_before_expiry(self):
+        """Test that a stored value is returned while fresh"""
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=10, clock=clock)
+        cache.set("page-1", [1, 2, 3])
+
+        clock.now = 9.9
+        assert cache.get("page-1") == [1, 2, 3]
+
+    def test_expires_after_ttl(self):
+        """Test that entries disappear once the TTL has elapsed"""
+        clock = FakeClock()
+        cache = TTLCache(ttl_seconds=10, clock=clock)
+        cache.set("page-1", "value")
+
+        clock.now = 10.0
+        assert cache.get("page-1") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_counts_hits_and_misses(self):
+        """Test hit/miss accounting"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("missing")
+
+        assert cache.hits == 2
+        assert cache.misses == 1
+
+    def test_clear_drops_everything(self):
+        """Test that clear() empties the cache"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.clear()
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
@@ -0,0 +1,200 @@
+"""
+Unit Tests for the Catalog Change Feed
+Tests version allocation, delta sync, pruning and conditional reads
+"""
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app import catalog
+from app.catalog import ChangesExpired
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return self.documents[:length]
+
+
+class FakeChanges:
+    """catalog_changes stand-in with the unique index on version"""
+
+    def __init__(self):
+        self.documents = []
+        self.conflicts = 0
+
+    def _sorted(self, sort):
+        key, direction = sort[0]
+        return sorted(self.documents, key=lambda document: document[key], reverse=direction < 0)
+
+    async def find_one(self, query, sort, projection=None):
+        documents = self._sorted(sort)
+        return documents[0] if documents else None
+
+    async def insert_one(self, document):
+        if self.conflicts:
+            # Another worker took this version first
+            self.conflicts -= 1
+            self.documents.append({**document, "op": "upsert", "restaurant_name": "other worker"})
+            raise DuplicateKeyError("version")
+        if any(existing["version"] == document["version"] for existing in self.documents):
+            raise DuplicateKeyError("version")
+        self.documents.append(document)
+
+    async def delete_many(self, query):
+        limit = query["version"]["$lte"]
+        self.documents = [document for document in self.documents if document["version"] > limit]
+
+    def find(self, query, sort, limit):
+        since = query["version"]["$gt"]
+        return FakeCursor([document for document in self._sorted(sort) if document["version"] > since][:limit])
+
+
+@pytest.fixture
+def changes(monkeypatch):
+    collection = FakeChanges()
+    monkeypatch.setattr(catalog, "_collection", lambda: collection)
+    catalog._version_cache.clear()
+    yield collection
+    catalog._version_cache.clear()
+
+
+RESTAURANT = {"name": "Pizza Palace", "area": "Navrangpura", "cuisine": "Italian", "items": []}
+
+
+@pytest.mark.unit
+class TestVersions:
+    """Test catalog version allocation"""
+
+    async def test_each_write_gets_the_next_version(self, changes):
+        """Test that versions start at 1 and increase by one per change"""
+        assert await catalog.current_version() == 0
+
+        first = await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+        second = await catalog.record_change("delete", "Pizza Palace")
+
+        assert (first, second) == (1, 2)
+        assert await catalog.current_version() == 2
+
+    async def test_conflicting_writers_retry(self, changes):
+        """Test that a version taken by another worker is skipped, not reused"""
+        changes.conflicts = 2
+
+        version = await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+
+        assert version == 3
+        assert sorted(document["version"] for document in changes.documents) == [1, 2, 3]
+
+    async def test_transient_failures_are_retried(self, changes, monkeypatch):
+        """Test that an append failing once still bumps the version"""
+        monkeypatch.setattr(catalog, "RECORD_CHANGE_RETRY_SECONDS", 0)
+        append = catalog._append
+        failures = [ConnectionError("primary stepped down")]
+
+        async def flaky(*args):
+            if failures:
+                raise failures.pop()
+            return await append(*args)
+        monkeypatch.setattr(catalog, "_append", flaky)
+
+        assert await catalog.record_change("delete", "Pizza Palace") == 1
+
+    async def test_persistent_failures_are_raised(self, changes, monkeypatch):
+        """Test that the admin write fails rather than leaving the version behind"""
+        monkeypatch.setattr(catalog, "RECORD_CHANGE_RETRY_SECONDS", 0)
+        calls = []
+
+        async def broken(*args):
+            calls.append(args)
+            raise ConnectionError("down")
+        monkeypatch.setattr(catalog, "_append", broken)
+        catalog.response_cache.set((0, "all"), b"stale")
+
+        with pytest.raises(ConnectionError):
+            await catalog.record_change("delete", "Pizza Palace")
+        assert len(calls) == catalog.RECORD_CHANGE_ATTEMPTS
+        assert catalog.response_cache.get((0, "all")) is None
+
+    async def test_old_changes_are_pruned(self, changes, monkeypatch):
+        """Test that only the newest CATALOG_CHANGE_RETENTION changes are kept"""
+        monkeypatch.setattr(catalog, "CATALOG_CHANGE_RETENTION", 3)
+        for _ in range(5):
+            await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+
+        assert sorted(document["version"] for document in changes.documents) == [3, 4, 5]
+
+
+@pytest.mark.unit
+class TestChangesSince:
+    """Test delta sync"""
+
+    async def test_returns_changes_in_order(self, changes):
+        """Test that changes after a version are returned oldest first"""
+        await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+        await catalog.record_change("upsert", "Burger Barn", {**RESTAURANT, "name": "Burger Barn"})
+        await catalog.record_change("delete", "Pizza Palace")
+
+        result = await catalog.changes_since(1, limit=100)
+
+        assert result["version"] == 3
+        assert [(change["version"], change["op"]) for change in result["changes"]] == [(2, "upsert"), (3, "delete")]
+        assert result["changes"][0]["restaurant"]["name"] == "Burger Barn"
+        assert result["has_more"] is False
+
+    async def test_pages_with_has_more(self, changes):
+        """Test that a limited page reports the version to continue from"""
+        for _ in range(5):
+            await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+
+        page = await catalog.changes_since(0, limit=2)
+        rest = await catalog.changes_since(page["version"], limit=10)
+
+        assert page["version"] == 2
+        assert page["has_more"] is True
+        assert [change["version"] for change in rest["changes"]] == [3, 4, 5]
+
+    async def test_up_to_date_client_gets_nothing(self, changes):
+        """Test that polling from the current version returns no changes"""
+        await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+
+        result = await catalog.changes_since(1, limit=100)
+
+        assert result == {"since": 1, "version": 1, "changes": [], "has_more": False}
+
+    async def test_pruned_history_expires(self, changes, monkeypatch):
+        """Test that a client older than the retained log must re-download"""
+        monkeypatch.setattr(catalog, "CATALOG_CHANGE_RETENTION", 2)
+        for _ in range(4):
+            await catalog.record_change("upsert", "Pizza Palace", RESTAURANT)
+
+        with pytest.raises(ChangesExpired):
+            await catalog.changes_since(1, limit=100)
+        assert len((await catalog.changes_since(2, limit=100))["changes"]) == 2
+
+    async def test_client_ahead_of_database_expires(self, changes):
+        """Test that a version the database never produced forces a re-download"""
+        with pytest.raises(ChangesExpired):
+            await catalog.changes_since(7, limit=100)
+
+
+@pytest.mark.unit
+class TestConditionalReads:
+    """Test ETag validation"""
+
+    def test_headers(self):
+        """Test that catalog responses carry the version as a weak ETag"""
+        assert catalog.headers(12) == {"ETag": 'W/"catalog-12"', "X-Catalog-Version": "12", "Cache-Control": "no-cache"}
+
+    @pytest.mark.parametrize("if_none_match, expected", [
+        (None, False),
+        ('W/"catalog-12"', True),
+        ('"catalog-12"', True),
+        ('"catalog-11", W/"catalog-12"', True),
+        ('W/"catalog-11"', False),
+        ("*", True),
+    ])
+    def test_if_none_match(self, if_none_match, expected):
+        """Test weak comparison of If-None-Match against the current version"""
+        assert catalog.not_modified(if_none_match, 12) is expected
@@ -0,0 +1,201 @@
+"""
+Unit Tests for Response Compression
+Tests encoding negotiation, the middleware and precompressed bodies
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import EncodedBody, negotiate
+
+ALL_CODECS = {"zstd": None, "br": None, "gzip": None}
+LARGE = [{"name": f"Restaurant {i}", "area": "Navrangpura", "cuisine": "Gujarati"} for i in range(100)]
+
+
+def make_app(wrap_with_http_middleware=False):
+    app = FastAPI()
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=1024)
+
+    if wrap_with_http_middleware:
+        @app.middleware("http")
+        async def passthrough(request, call_next):
+            # Re-streams the body in chunks, like the request-id middleware
+            return await call_next(request)
+
+    @app.get("/large")
+    async def large():
+        return LARGE
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/tagged")
+    async def tagged():
+        return Response(json.dumps(LARGE), media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/encoded")
+    async def encoded():
+        body = gzip.compress(json.dumps(LARGE).encode())
+        return Response(body, media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            for i in range(3):
+                yield f"data: {'x' * 1000} {i}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+@pytest.mark.unit
+class TestNegotiate:
+    """Test Accept-Encoding negotiation"""
+
+    @pytest.mark.parametrize("header, expected", [
+        (None, None),
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip, deflate, br, zstd", "zstd"),
+        ("zstd;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0.1", "gzip"),
+        ("*", "zstd"),
+        ("*;q=0.5, zstd;q=0", "br"),
+        ("GZIP ; q=1.0", "gzip"),
+        ("gzip;q=bogus", None),
+    ])
+    def test_negotiate(self, header, expected):
+        """Test that the preferred acceptable encoding is chosen"""
+        assert negotiate(header, available=ALL_CODECS) == expected
+
+    def test_only_installed_codecs(self):
+        """Test that encodings without an installed codec are never chosen"""
+        assert negotiate("br, gzip;q=0.1", available={"gzip": None}) == "gzip"
+        assert negotiate("br", available={"gzip": None}) is None
+
+    @pytest.mark.parametrize("content_type, expected", [
+        ("application/json", True),
+        ("text/html; charset=utf-8", True),
+        ("application/problem+json", True),
+        ("text/event-stream", False),
+        ("image/png", False),
+        ("", False),
+    ])
+    def test_compressible(self, content_type, expected):
+        """Test which content types are worth compressing"""
+        assert compression.compressible(content_type) is expected
+
+
+@pytest.mark.unit
+class TestCompressionMiddleware:
+    """Test the ASGI middleware"""
+
+    @pytest.mark.parametrize("wrapped", [False, True])
+    def test_compresses_large_json(self, wrapped):
+        """Test that a large JSON body is gzipped, including when it arrives in chunks"""
+        client = TestClient(make_app(wrap_with_http_middleware=wrapped))
+
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(json.dumps(LARGE))
+        assert response.json() == LARGE
+
+    def test_identity_when_not_accepted(self):
+        """Test that clients without Accept-Encoding get the plain body"""
+        client = TestClient(make_app())
+
+        response = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == LARGE
+
+    def test_small_response_untouched(self):
+        """Test that bodies under the minimum size are not compressed"""
+        response = TestClient(make_app()).get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"ok": True}
+
+    def test_already_encoded_untouched(self):
+        """Test that a response with a Content-Encoding is not compressed twice"""
+        response = TestClient(make_app()).get("/encoded", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == LARGE
+
+    def test_event_stream_untouched(self):
+        """Test that Server-Sent Events are streamed uncompressed"""
+        response = TestClient(make_app()).get("/events", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.text.count("data: ") == 3
+
+    def test_strong_etag_weakened(self):
+        """Test that a strong ETag becomes weak once the bytes are re-encoded"""
+        response = TestClient(make_app()).get("/tagged", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == 'W/"v1"'
+
+
+@pytest.mark.unit
+class TestEncodedBody:
+    """Test precompressed bodies"""
+
+    async def test_compresses_once_per_encoding(self, monkeypatch):
+        """Test that each encoding is computed on first use and then reused"""
+        calls = []
+
+        def counting_gzip(data):
+            calls.append(len(data))
+            return gzip.compress(data)
+        monkeypatch.setitem(compression.CODECS, "gzip", counting_gzip)
+        body = EncodedBody.from_json(LARGE)
+
+        first = await body.get("gzip")
+        second = await body.get("gzip")
+
+        assert first is second
+        assert len(calls) == 1
+        assert await body.get(None) is body.raw
+        assert json.loads(gzip.decompress(first)) == LARGE
+
+    def test_matches_json_response(self):
+        """Test that the raw bytes are what a JSONResponse would have sent"""
+        client = TestClient(make_app())
+
+        assert EncodedBody.from_json(LARGE).raw == client.get("/large").content
+
+    async def test_encoded_response_headers(self):
+        """Test that the negotiated variant is served with its headers"""
+        body = EncodedBody.from_json(LARGE)
+
+        response = await compression.encoded_response(body, "gzip", headers={"ETag": 'W/"catalog-3"'})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["etag"] == 'W/"catalog-3"'
+        assert json.loads(gzip.decompress(response.body)) == LARGE
+
+    async def test_encoded_response_identity(self):
+        """Test that small bodies and identity clients get the raw bytes"""
+        small = EncodedBody.from_json({"ok": True})
+
+        small_response = await compression.encoded_response(small, "gzip")
+        identity_response = await compression.encoded_response(EncodedBody.from_json(LARGE), None)
+
+        assert "content-encoding" not in small_response.headers
+        assert small.encoded == {}
+        assert "content-encoding" not in identity_response.headers
+        assert identity_response.headers["vary"] == "Accept-Encoding"
@@ -0,0 +1,212 @@
+"""
+Unit Tests for Order Events
+Tests SSE formatting, per-user fan-out and bounded subscriber queues
+"""
+
+import asyncio
+import importlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from bson import ObjectId
+
+from app import events
+from app.events import OrderEventBroker, Subscription, build_event, format_sse, stream_events
+from app.models import Order
+
+AGENT_DIR = Path(__file__).resolve().parents[2] / "food_chatbot_agent"
+
+
+def make_event(user_id="u1", order_id="o1", status="preparing"):
+    return {"order_id": order_id, "user_id": user_id, "status": status}
+
+
+@pytest.mark.unit
+class TestFormatSse:
+    """Test Server-Sent Events serialization"""
+
+    def test_message_fields(self):
+        """Test that id, event and data lines are emitted and terminated"""
+        message = format_sse({"status": "placed"}, event_id=7)
+
+        assert message == 'id: 7\nevent: order_status\ndata: {"status":"placed"}\n\n'
+
+    def test_data_round_trips(self):
+        """Test that the data line is valid JSON"""
+        data_line = format_sse(make_event()).splitlines()[1]
+
+        assert json.loads(data_line[len("data: "):]) == make_event()
+
+
+@pytest.mark.unit
+class TestSubscription:
+    """Test per-connection event queues"""
+
+    def test_full_queue_drops_oldest(self):
+        """Test that a slow subscriber keeps the newest events"""
+        subscription = Subscription("u1", maxsize=2)
+        for status in ["placed", "preparing", "out_for_delivery"]:
+            subscription.offer(make_event(status=status))
+
+        assert subscription.dropped == 1
+        assert subscription.queue.get_nowait()["status"] == "preparing"
+        assert subscription.queue.get_nowait()["status"] == "out_for_delivery"
+
+    def test_order_filter(self):
+        """Test that a subscription for one order ignores the others"""
+        subscription = Subscription("u1", order_id="o2")
+        subscription.offer(make_event(order_id="o1"))
+        subscription.offer(make_event(order_id="o2"))
+
+        assert subscription.queue.qsize() == 1
+
+
+@pytest.mark.unit
+class TestBroker:
+    """Test fan-out to subscribers"""
+
+    def test_dispatch_only_reaches_owner(self):
+        """Test that events are delivered to the order owner's connections only"""
+        broker = OrderEventBroker(source="local")
+        mine_a = broker.subscribe("u1")
+        mine_b = broker.subscribe("u1")
+        other = broker.subscribe("u2")
+
+        broker.dispatch(make_event(user_id="u1"))
+
+        assert mine_a.queue.qsize() == 1
+        assert mine_b.queue.qsize() == 1
+        assert other.queue.qsize() == 0
+
+    def test_unsubscribe_releases_user(self):
+        """Test that the last unsubscribe removes the user entry"""
+        broker = OrderEventBroker(source="local")
+        subscription = broker.subscribe("u1")
+        broker.unsubscribe(subscription)
+
+        assert broker.subscriber_count == 0
+        broker.dispatch(make_event(user_id="u1"))
+
+    async def test_stream_sends_initial_events_then_heartbeat(self, monkeypatch):
+        """Test that the stream replays open orders and heartbeats while idle"""
+        monkeypatch.setattr(events, "SSE_HEARTBEAT_SECONDS", 0.01)
+        broker = OrderEventBroker(source="local")
+        subscription = broker.subscribe("u1")
+        disconnected = iter([False, True])
+
+        async def is_disconnected():
+            return next(disconnected)
+
+        messages = [m async for m in stream_events(broker, subscription, [make_event()], is_disconnected)]
+
+        assert messages[0].startswith("retry:")
+        assert "event: order_status" in messages[1]
+        assert messages[2] == events.HEARTBEAT
+        assert len(messages) == 3
+        assert broker.subscriber_count == 0
+
+
+class FakeChangeStream:
+    def __init__(self, changes):
+        self.changes = changes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def __aiter__(self):
+        for change in self.changes:
+            yield change
+
+
+class FakeOrders:
+    """An orders collection whose change stream replays `changes` once"""
+
+    def __init__(self, changes):
+        self.changes = changes
+        self.watches = []
+
+    def watch(self, pipeline, **options):
+        if self.watches:
+            # The listener reopens the stream once it ends; stop it there
+            raise asyncio.CancelledError
+        self.watches.append(options)
+        return FakeChangeStream(self.changes)
+
+
+class FakeStreamResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.body.split("\n"))
+
+
+class FakeSession:
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url, **kwargs):
+        return FakeStreamResponse(self.body)
+
+
+def order_document(status):
+    return {
+        "_id": ObjectId("65f000000000000000000001"), "user_id": ObjectId("65f0000000000000000000aa"),
+        "restaurant_name": "Swati Snacks", "items": [], "total_price": 250.0,
+        "status": status, "order_date": datetime(2025, 10, 16, 12, 0), "status_updated_at": None
+    }
+
+
+@pytest.mark.unit
+class TestChangeStreamToClient:
+    """Test change stream events end to end through the agent's wait_for_order_update"""
+
+    @pytest.mark.parametrize("pre_image, previous_status", [
+        ({"status": "placed"}, "placed"),
+        (None, None),
+    ])
+    async def test_client_returns_the_change_not_the_snapshot(self, monkeypatch, pre_image, previous_status):
+        """Test that a change stream update is returned, with or without a pre-image"""
+        monkeypatch.setattr(Order, "model_validate", classmethod(lambda cls, doc: cls.model_construct(**doc)))
+        current = Order.model_validate(order_document("placed"))
+        change = {"operationType": "update", "fullDocument": order_document("preparing")}
+        if pre_image is not None:
+            change["fullDocumentBeforeChange"] = pre_image
+        orders = FakeOrders([change])
+        monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: orders))
+        monkeypatch.setattr(events, "SSE_HEARTBEAT_SECONDS", 0.01)
+
+        broker = OrderEventBroker(source="change_stream")
+        subscription = broker.subscribe(str(current.user_id), str(current.id))
+        with pytest.raises(asyncio.CancelledError):
+            await broker._watch_orders()
+        assert orders.watches[0]["full_document_before_change"] == "whenAvailable"
+
+        async def is_disconnected():
+            return subscription.queue.empty()
+
+        initial = [build_event(current, snapshot=True)]
+        body = "".join([m async for m in stream_events(broker, subscription, initial, is_disconnected)])
+
+        monkeypatch.syspath_prepend(str(AGENT_DIR))
+        client = importlib.import_module("api_client").APIClient()
+        client.session = FakeSession(body)
+        event = client.wait_for_order_update("token", str(current.id), wait_seconds=5)
+
+        assert event["status"] == "preparing"
+        assert event["previous_status"] == previous_status
+        assert event["snapshot"] is False
@@ -0,0 +1,247 @@
+"""
+Unit Tests for Near-Me Search
+Tests the $geoNear pipeline, pagination, coordinate validation and geocoding backfill
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from app import catalog, geo
+from app.schemas import GeoLocation, RestaurantCreate
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents = sorted(self.documents, key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length=None):
+        return self.documents[:length]
+
+
+class FakeRestaurants:
+    """restaurants stand-in recording aggregations and conditional updates"""
+
+    def __init__(self, documents=()):
+        self.documents = [dict(document) for document in documents]
+        self.pipelines = []
+        self.updates = []
+        self.aggregate_result = []
+        # Called before each update, e.g. to simulate a concurrent admin edit
+        self.before_update = None
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.aggregate_result)
+
+    def find(self, query):
+        since = query.get("_id", {}).get("$gt", -1)
+        return FakeCursor([
+            document for document in self.documents
+            if document.get("location") is None and document["_id"] > since
+        ])
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        if self.before_update:
+            self.before_update(query["_id"])
+        self.updates.append(query["_id"])
+        document = next(d for d in self.documents if d["_id"] == query["_id"])
+        if document.get("location") is not None:
+            return None
+        document.update(update["$set"])
+        return dict(document)
+
+
+@pytest.fixture
+def restaurants(monkeypatch):
+    def install(documents=()):
+        collection = FakeRestaurants(documents)
+        monkeypatch.setattr(geo, "_collection", lambda: collection)
+        return collection
+    return install
+
+
+@pytest.fixture
+def recorded_changes(monkeypatch):
+    changes = []
+
+    async def record_change(op, restaurant_name, restaurant=None):
+        changes.append((op, restaurant_name, restaurant))
+    monkeypatch.setattr(catalog, "record_change", record_change)
+    return changes
+
+
+LOOKUP = {"ashram road": (72.5720, 23.0305), "cg road": (72.5600, 23.0320)}
+
+
+@pytest.mark.unit
+class TestNearPipeline:
+    """Test the $geoNear aggregation"""
+
+    def test_geo_near_is_first_and_uses_the_index(self):
+        """Test that the index-backed stage comes first with a radius in metres"""
+        pipeline = geo.near_pipeline(72.57, 23.03, radius_km=2.5)
+
+        stage = pipeline[0]["$geoNear"]
+        assert stage["near"] == {"type": "Point", "coordinates": [72.57, 23.03]}
+        assert stage["key"] == "location"
+        assert stage["spherical"] is True
+        assert stage["maxDistance"] == 2500
+        assert stage["distanceMultiplier"] == 0.001
+        assert stage["query"] == {}
+
+    def test_filters_run_inside_geo_near(self):
+        """Test that cuisine and item filters are part of the index scan, escaped"""
+        pipeline = geo.near_pipeline(72.57, 23.03, 5, cuisine="South Indian", item="Dosa (Masala)")
+
+        query = pipeline[0]["$geoNear"]["query"]
+        assert query["cuisine"] == {"$regex": "^South\\ Indian$", "$options": "i"}
+        assert query["items"]["$elemMatch"]["item_name"]["$regex"] == "^Dosa\\ \\(Masala\\)$"
+        assert not any("$match" in stage or "$sort" in stage for stage in pipeline)
+
+    def test_pagination_fetches_one_extra(self):
+        """Test that a page reads limit + 1 documents after skipping"""
+        pipeline = geo.near_pipeline(72.57, 23.03, 5, skip=40, limit=20)
+
+        assert pipeline[1:3] == [{"$skip": 40}, {"$limit": 21}]
+
+
+@pytest.mark.unit
+class TestRestaurantsNear:
+    """Test the search result"""
+
+    async def test_page_with_has_more(self, restaurants):
+        """Test that the extra document becomes has_more and distances are rounded"""
+        collection = restaurants()
+        collection.aggregate_result = [
+            {"name": f"R{i}", "area": "Ashram Road", "cuisine": "Gujarati", "items": [], "distance_km": i + 0.123456}
+            for i in range(3)
+        ]
+
+        page = await geo.restaurants_near(72.57, 23.03, radius_km=5, limit=2)
+
+        assert [r["name"] for r in page["restaurants"]] == ["R0", "R1"]
+        assert page["restaurants"][1]["distance_km"] == 1.123
+        assert page["has_more"] is True
+        assert collection.pipelines[0][2] == {"$limit": 3}
+
+    async def test_last_page(self, restaurants):
+        """Test that a short page has no next page"""
+        collection = restaurants()
+        collection.aggregate_result = [{"name": "R0", "distance_km": 0.5}]
+
+        page = await geo.restaurants_near(72.57, 23.03, skip=20, limit=20)
+
+        assert page["has_more"] is False
+        assert page["skip"] == 20
+
+
+@pytest.mark.unit
+class TestGeoLocation:
+    """Test coordinate validation"""
+
+    def test_valid_point(self):
+        """Test that a [longitude, latitude] point is accepted"""
+        location = GeoLocation(coordinates=[72.57, 23.03])
+
+        assert location.model_dump() == {"type": "Point", "coordinates": [72.57, 23.03]}
+
+    @pytest.mark.parametrize("coordinates", [[23.03], [72.57, 23.03, 0], [190, 23.03], [72.57, 95]])
+    def test_invalid_points(self, coordinates):
+        """Test that wrong lengths and out-of-range values are rejected"""
+        with pytest.raises(ValidationError):
+            GeoLocation(coordinates=coordinates)
+
+    def test_location_is_optional(self):
+        """Test that restaurants without coordinates remain valid"""
+        restaurant = RestaurantCreate(name="Pizza Palace", area="C.G. Road", cuisine="Italian")
+
+        assert restaurant.location is None
+
+
+@pytest.mark.unit
+class TestGeocoding:
+    """Test the lookup table and the backfill"""
+
+    @pytest.mark.parametrize("area, expected", [
+        ("Ashram Road, Ahmedabad", [72.5720, 23.0305]),
+        ("ashram road", [72.5720, 23.0305]),
+        ("C.G. Road,  Ahmedabad", [72.5600, 23.0320]),
+        ("Ahmedabad", None),
+        ("Unknown Street, Ahmedabad", None),
+    ])
+    def test_geocode(self, area, expected):
+        """Test that areas match whole or by their first part, never by city alone"""
+        location = geo.geocode(area, LOOKUP)
+
+        assert (location["coordinates"] if location else None) == expected
+
+    def test_load_lookup(self, tmp_path):
+        """Test that the CSV is read as area -> (longitude, latitude)"""
+        path = tmp_path / "areas.csv"
+        path.write_text("area,latitude,longitude\nC.G. Road,23.032,72.56\n", encoding="utf-8")
+
+        assert geo.load_lookup(path) == {"cg road": (72.56, 23.032)}
+
+    def test_default_lookup_covers_seed_data(self):
+        """Test that the shipped table knows the areas used by populate_new_data.py"""
+        lookup = geo.load_lookup()
+
+        for area in ("Ashram Road, Ahmedabad", "Lal Darwaja, Ahmedabad", "C.G. Road, Ahmedabad", "Manek Chowk, Ahmedabad"):
+            assert geo.geocode(area, lookup) is not None
+
+    async def test_backfill_in_batches(self, restaurants, recorded_changes):
+        """Test that unset locations are written per batch and announced to the catalog"""
+        collection = restaurants([
+            {"_id": 1, "name": "A", "area": "Ashram Road, Ahmedabad", "cuisine": "Gujarati", "items": []},
+            {"_id": 2, "name": "B", "area": "Nowhere", "cuisine": "Gujarati", "items": []},
+            {"_id": 3, "name": "C", "area": "C.G. Road", "cuisine": "Italian", "items": []},
+            {"_id": 4, "name": "D", "area": "C.G. Road", "cuisine": "Italian", "items": [],
+             "location": {"type": "Point", "coordinates": [1.0, 2.0]}},
+        ])
+
+        counts = await geo.backfill_locations(LOOKUP, batch_size=2)
+
+        assert counts == {"scanned": 3, "updated": 2, "unmatched": 1, "unmatched_areas": ["Nowhere"]}
+        assert collection.updates == [1, 3]
+        assert collection.documents[0]["location"]["coordinates"] == [72.5720, 23.0305]
+        assert collection.documents[3]["location"]["coordinates"] == [1.0, 2.0]
+        assert [(op, name) for op, name, _ in recorded_changes] == [("upsert", "A"), ("upsert", "C")]
+        assert recorded_changes[0][2]["location"]["type"] == "Point"
+
+    async def test_dry_run_writes_nothing(self, restaurants, recorded_changes):
+        """Test that a dry run only reports matches"""
+        collection = restaurants([
+            {"_id": 1, "name": "A", "area": "Ashram Road", "cuisine": "Gujarati", "items": []},
+        ])
+
+        counts = await geo.backfill_locations(LOOKUP, dry_run=True)
+
+        assert counts["updated"] == 1
+        assert collection.updates == []
+        assert recorded_changes == []
+
+    async def test_concurrently_set_location_is_not_counted(self, restaurants, recorded_changes):
+        """Test that a restaurant located by an admin mid-backfill is neither counted nor recorded"""
+        collection = restaurants([
+            {"_id": 1, "name": "A", "area": "Ashram Road", "cuisine": "Gujarati", "items": []},
+            {"_id": 2, "name": "B", "area": "C.G. Road", "cuisine": "Italian", "items": []},
+        ])
+
+        def admin_sets_location(restaurant_id):
+            if restaurant_id == 1:
+                collection.documents[0]["location"] = {"type": "Point", "coordinates": [1.0, 2.0]}
+        collection.before_update = admin_sets_location
+
+        counts = await geo.backfill_locations(LOOKUP)
+
+        assert counts["updated"] == 1
+        assert collection.documents[0]["location"]["coordinates"] == [1.0, 2.0]
+        assert [name for _, name, _ in recorded_changes] == ["B"]
@@ -0,0 +1,187 @@
+"""
+Unit Tests for Health Probes
+Tests the cached readiness checks, their failure modes and staleness
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app import metrics
+from app.cache import TTLCache
+from app.health import HealthMonitor
+
+
+class FakeClient:
+    """Motor client stand-in counting pings"""
+
+    def __init__(self, fail=False, max_pool_size=10):
+        self.fail = fail
+        self.pings = 0
+        self.admin = SimpleNamespace(command=self.command)
+        self.options = SimpleNamespace(pool_options=SimpleNamespace(max_pool_size=max_pool_size))
+
+    async def command(self, name):
+        self.pings += 1
+        if self.fail:
+            raise ConnectionError("server selection timeout")
+        return {"ok": 1}
+
+
+class FakeModel:
+    """Beanie model stand-in with declared and existing index names"""
+
+    def __init__(self, name, declared, existing):
+        self.name = name
+        self.declared = declared
+        self.existing = existing
+        self.listed = 0
+
+    def get_settings(self):
+        return SimpleNamespace(indexes=[SimpleNamespace(name=index) for index in self.declared])
+
+    def get_collection_name(self):
+        return self.name
+
+    def get_motor_collection(self):
+        return SimpleNamespace(index_information=self.index_information)
+
+    async def index_information(self):
+        self.listed += 1
+        return {name: {} for name in ["_id_"] + self.existing}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    checked_out = metrics.mongo_pool_checked_out.value()
+    metrics.mongo_pool_checked_out.set((), 0)
+    yield
+    metrics.mongo_pool_checked_out.set((), checked_out)
+
+
+@pytest.mark.unit
+class TestReadiness:
+    """Test readiness reports"""
+
+    def test_not_ready_before_first_probe(self):
+        """Test that readiness is false until the first check has run"""
+        ready, report = HealthMonitor().readiness()
+
+        assert ready is False
+        assert report["status"] == "starting"
+
+    async def test_healthy_report(self):
+        """Test that a reachable database with its indexes is ready"""
+        monitor = HealthMonitor()
+        monitor._client = FakeClient()
+        monitor._models = (FakeModel("orders", ["user_id_1"], ["user_id_1"]),)
+
+        await monitor.refresh()
+        ready, report = monitor.readiness()
+
+        assert ready is True
+        assert report["status"] == "ok"
+        assert report["checks"]["mongo"]["status"] == "ok"
+        assert report["checks"]["indexes"]["missing"] == {}
+
+    async def test_unreachable_database_is_not_ready(self):
+        """Test that a failing ping makes the worker not ready"""
+        monitor = HealthMonitor()
+        monitor._client = FakeClient(fail=True)
+
+        await monitor.refresh()
+        ready, report = monitor.readiness()
+
+        assert ready is False
+        assert "server selection timeout" in report["checks"]["mongo"]["error"]
+
+    async def test_missing_index_is_a_warning(self):
+        """Test that missing indexes are reported without failing readiness"""
+        monitor = HealthMonitor()
+        monitor._client = FakeClient()
+        monitor._models = (FakeModel("reviews", ["user_id_1", "restaurant_name_1"], ["user_id_1"]),)
+
+        await monitor.refresh()
+        ready, report = monitor.readiness()
+
+        assert ready is True
+        assert report["status"] == "warn"
+        assert report["checks"]["indexes"]["missing"] == {"reviews": ["restaurant_name_1"]}
+
+    async def test_saturated_pool_is_not_ready(self):
+        """Test that a pool at its saturation threshold fails readiness"""
+        monitor = HealthMonitor(pool_threshold=0.8)
+        monitor._client = FakeClient(max_pool_size=10)
+        metrics.mongo_pool_checked_out.set((), 9)
+
+        await monitor.refresh()
+        ready, report = monitor.readiness()
+
+        assert ready is False
+        assert report["checks"]["pool"]["utilisation"] == 0.9
+
+    async def test_stale_report_is_not_ready(self):
+        """Test that a report older than three intervals counts as not ready"""
+        clock = Clock()
+        monitor = HealthMonitor(interval=10, clock=clock)
+        monitor._client = FakeClient()
+        await monitor.refresh()
+
+        clock.now += 31
+        ready, report = monitor.readiness()
+
+        assert ready is False
+        assert report["stale"] is True
+
+    async def test_registered_caches_are_reported(self):
+        """Test that cache warmth is reported without affecting readiness"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("page-1", [1])
+        metrics.register_cache("health_test", cache)
+        monitor = HealthMonitor()
+        monitor._client = FakeClient()
+
+        await monitor.refresh()
+
+        assert monitor.report["checks"]["caches"]["caches"]["health_test"]["entries"] == 1
+
+
+@pytest.mark.unit
+class TestProbeLoad:
+    """Test that probes never add database load"""
+
+    async def test_readiness_reads_do_not_query(self):
+        """Test that polling readiness only reads the cached report"""
+        client = FakeClient()
+        monitor = HealthMonitor()
+        monitor._client = client
+        await monitor.refresh()
+
+        for _ in range(100):
+            monitor.readiness()
+
+        assert client.pings == 1
+
+    async def test_indexes_are_listed_on_their_own_interval(self):
+        """Test that listIndexes runs only once per index check interval"""
+        clock = Clock()
+        model = FakeModel("orders", ["user_id_1"], ["user_id_1"])
+        monitor = HealthMonitor(index_interval=300, clock=clock)
+        monitor._client = FakeClient()
+        monitor._models = (model,)
+
+        await monitor.refresh()
+        clock.now += 60
+        await monitor.refresh()
+        clock.now += 300
+        await monitor.refresh()
+
+        assert model.listed == 2
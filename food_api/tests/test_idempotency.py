@@ -0,0 +1,171 @@
+"""
+Unit Tests for Idempotency Keys
+Tests request fingerprinting, claiming, replay and takeover of keys
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app import idempotency
+from app.idempotency import IdempotencyError, request_fingerprint
+
+BODY = {"restaurant_name": "Swati Snacks", "items": [{"item_name": "Thali", "quantity": 1}]}
+RESPONSE = {"id": "order-1", "total_price": 250.0}
+
+
+def matches(doc, query):
+    return all(doc.get(field) == value for field, value in query.items())
+
+
+class FakeKeys:
+    """idempotency_keys with its unique (user_id, key) index"""
+
+    def __init__(self):
+        self.docs = []
+
+    async def insert_one(self, doc):
+        if any(d["user_id"] == doc["user_id"] and d["key"] == doc["key"] for d in self.docs):
+            raise DuplicateKeyError("duplicate key")
+        self.docs.append({"_id": ObjectId(), **doc})
+
+    async def find_one(self, query):
+        return next((dict(doc) for doc in self.docs if matches(doc, query)), None)
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                doc.update(update.get("$set", {}))
+                for field in update.get("$unset", {}):
+                    doc.pop(field, None)
+                return SimpleNamespace(modified_count=1)
+        return SimpleNamespace(modified_count=0)
+
+    async def delete_one(self, query):
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+
+
+@pytest.fixture
+def keys(monkeypatch):
+    collection = FakeKeys()
+    monkeypatch.setattr(idempotency, "_collection", lambda: collection)
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(idempotency, "_local_waiters", {})
+    return collection
+
+
+USER = ObjectId()
+FINGERPRINT = request_fingerprint(BODY)
+
+
+@pytest.mark.unit
+class TestRequestFingerprint:
+    """Test request body fingerprints"""
+
+    def test_key_order_does_not_matter(self):
+        """Test that equal bodies hash the same regardless of key order"""
+        a = {"restaurant_name": "Swati Snacks", "items": [{"item_name": "Thali", "quantity": 1}]}
+        b = {"items": [{"quantity": 1, "item_name": "Thali"}], "restaurant_name": "Swati Snacks"}
+
+        assert request_fingerprint(a) == request_fingerprint(b)
+
+    def test_different_bodies_differ(self):
+        """Test that changing a quantity changes the fingerprint"""
+        a = {"restaurant_name": "Swati Snacks", "items": [{"item_name": "Thali", "quantity": 1}]}
+        b = {"restaurant_name": "Swati Snacks", "items": [{"item_name": "Thali", "quantity": 2}]}
+
+        assert request_fingerprint(a) != request_fingerprint(b)
+
+
+@pytest.mark.unit
+class TestIdempotencyKeys:
+    """Test the claim / complete / replay lifecycle"""
+
+    async def test_first_attempt_owns_the_key(self, keys):
+        """Test that the first attempt claims the key and must run the request"""
+        owner, replay = await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        assert owner is not None and replay is None
+        assert keys.docs[0]["status"] == "in_progress"
+        assert keys.docs[0]["owner"] == owner
+
+    async def test_completed_key_replays_response(self, keys):
+        """Test that a retry after completion gets the stored response"""
+        owner, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+        assert await idempotency.complete(USER, "key-1", owner, RESPONSE)
+
+        assert await idempotency.begin(USER, "key-1", FINGERPRINT) == (None, RESPONSE)
+
+    async def test_different_body_is_rejected(self, keys):
+        """Test that reusing a key for another request is a 422"""
+        await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        with pytest.raises(IdempotencyError) as error:
+            await idempotency.begin(USER, "key-1", request_fingerprint({**BODY, "restaurant_name": "Sankalp"}))
+        assert error.value.status_code == 422
+
+    async def test_in_progress_times_out_with_conflict(self, keys):
+        """Test that a duplicate gives up with 409 while the original is still running"""
+        await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        with pytest.raises(IdempotencyError) as error:
+            await idempotency.begin(USER, "key-1", FINGERPRINT)
+        assert error.value.status_code == 409
+
+    async def test_duplicate_waits_for_original(self, keys):
+        """Test that a duplicate arriving mid-flight replays the original's response"""
+        owner, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+        duplicate = asyncio.create_task(idempotency.begin(USER, "key-1", FINGERPRINT))
+        await asyncio.sleep(0.01)
+
+        await idempotency.complete(USER, "key-1", owner, RESPONSE)
+
+        assert await duplicate == (None, RESPONSE)
+
+    async def test_release_lets_a_retry_run(self, keys):
+        """Test that a failed attempt frees the key for the next one"""
+        owner, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+        await idempotency.release(USER, "key-1", owner)
+
+        retry_owner, replay = await idempotency.begin(USER, "key-1", FINGERPRINT)
+        assert retry_owner not in (None, owner) and replay is None
+
+    async def test_abandoned_key_is_taken_over(self, keys):
+        """Test that a key whose lock expired is reclaimed by the next attempt"""
+        owner, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+        keys.docs[0]["locked_until"] = datetime.utcnow() - timedelta(seconds=1)
+
+        taker, replay = await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        assert taker not in (None, owner) and replay is None
+        assert keys.docs[0]["owner"] == taker
+
+    async def test_stale_owner_cannot_overwrite_taker(self, keys):
+        """Test that the slow original neither completes nor releases a key taken over from it"""
+        owner, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+        keys.docs[0]["locked_until"] = datetime.utcnow() - timedelta(seconds=1)
+        taker, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        assert not await idempotency.complete(USER, "key-1", owner, {"id": "order-late"})
+        await idempotency.release(USER, "key-1", owner)
+        assert await idempotency.complete(USER, "key-1", taker, RESPONSE)
+
+        assert await idempotency.begin(USER, "key-1", FINGERPRINT) == (None, RESPONSE)
+
+    async def test_hold_extends_lock_while_running(self, keys, monkeypatch):
+        """Test that a long-running owner keeps its key past IDEMPOTENCY_LOCK_SECONDS"""
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_LOCK_SECONDS", 0.09)
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0)
+        owner, _ = await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        async with idempotency.hold(USER, "key-1", owner):
+            await asyncio.sleep(0.2)
+            with pytest.raises(IdempotencyError):
+                await idempotency.begin(USER, "key-1", FINGERPRINT)
+
+        assert keys.docs[0]["owner"] == owner
+        assert keys.docs[0]["locked_until"] > datetime.utcnow() - timedelta(seconds=0.09)
@@ -0,0 +1,166 @@
+"""
+Unit Tests for Load Shedding
+Tests route classes, queueing, shedding and the reserved order lane
+"""
+
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+
+from app import load_shedding
+from app.load_shedding import ClassLimiter, LoadSheddingMiddleware, route_class
+
+
+def http_scope(method="GET", path="/restaurants/"):
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+def make_limiters(concurrency=1, queue=2, max_wait_ms=200):
+    return {
+        name: ClassLimiter(name, concurrency=concurrency, queue=queue, max_wait_ms=max_wait_ms, retry_after=1)
+        for name in load_shedding.ROUTE_CLASSES
+    }
+
+
+class BlockingApp:
+    """ASGI app whose requests finish only when released."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def __call__(self, scope, receive, send):
+        self.started += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def request(middleware, scope):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent[0]["status"]
+
+
+@pytest.mark.unit
+class TestRouteClasses:
+    """Test request classification"""
+
+    def test_order_placement_has_its_own_class(self):
+        """Test that POST /orders/ uses the priority lane"""
+        assert route_class("POST", "/orders/") == "orders"
+        assert route_class("GET", "/orders/") == "browse"
+
+    def test_admin_and_browse(self):
+        """Test admin scans and browse traffic classes"""
+        assert route_class("GET", "/admin/orders") == "admin"
+        assert route_class("GET", "/search/items") == "browse"
+
+    def test_streams_and_health_are_unlimited(self):
+        """Test that long-lived streams never hold a slot"""
+        assert route_class("GET", "/orders/events") is None
+        assert route_class("GET", "/health") is None
+
+
+@pytest.mark.unit
+class TestLoadSheddingMiddleware:
+    """Test admission, queueing and shedding"""
+
+    async def test_queued_request_runs_when_slot_frees(self):
+        """Test that a request over the limit waits and then runs"""
+        app = BlockingApp()
+        limiters = make_limiters(concurrency=1, queue=2, max_wait_ms=1000)
+        middleware = LoadSheddingMiddleware(app, limiters=limiters, enabled=True)
+
+        first = asyncio.create_task(request(middleware, http_scope()))
+        second = asyncio.create_task(request(middleware, http_scope()))
+        await asyncio.sleep(0.01)
+        assert app.started == 1
+        assert limiters["browse"].queue_depth == 1
+
+        app.release.set()
+        assert await first == 200
+        assert await second == 200
+        assert limiters["browse"].in_flight == 0
+
+    async def test_full_queue_sheds_immediately(self):
+        """Test that requests beyond the queue get a fast 503"""
+        app = BlockingApp()
+        limiters = make_limiters(concurrency=1, queue=1, max_wait_ms=1000)
+        middleware = LoadSheddingMiddleware(app, limiters=limiters, enabled=True)
+
+        running = [asyncio.create_task(request(middleware, http_scope())) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        assert await request(middleware, http_scope()) == 503
+        app.release.set()
+        assert await asyncio.gather(*running) == [200, 200]
+
+    async def test_wait_longer_than_budget_is_shed(self):
+        """Test queue-time based shedding"""
+        app = BlockingApp()
+        limiters = make_limiters(concurrency=1, queue=5, max_wait_ms=20)
+        middleware = LoadSheddingMiddleware(app, limiters=limiters, enabled=True)
+
+        running = asyncio.create_task(request(middleware, http_scope()))
+        await asyncio.sleep(0.01)
+
+        assert await request(middleware, http_scope()) == 503
+        assert limiters["browse"].queue_depth == 0
+        app.release.set()
+        assert await running == 200
+
+    async def test_orders_lane_unaffected_by_browse_overload(self):
+        """Test that order placement is admitted while browse traffic is saturated"""
+        app = BlockingApp()
+        limiters = make_limiters(concurrency=1, queue=1, max_wait_ms=1000)
+        middleware = LoadSheddingMiddleware(app, limiters=limiters, enabled=True)
+
+        browse = [asyncio.create_task(request(middleware, http_scope())) for _ in range(2)]
+        order = asyncio.create_task(request(middleware, http_scope("POST", "/orders/")))
+        await asyncio.sleep(0.01)
+
+        assert limiters["orders"].in_flight == 1
+        assert await request(middleware, http_scope()) == 503
+        app.release.set()
+        assert await order == 200
+        await asyncio.gather(*browse)
+
+
+class ShedEverything:
+    """Limiter that rejects every request."""
+
+    retry_after = 1
+
+    async def acquire(self):
+        return False
+
+    def release(self):
+        pass
+
+
+@pytest.mark.unit
+class TestShedResponseHeaders:
+    """Test that shed responses pass through CORS and request id middleware"""
+
+    def test_shed_response_is_readable_cross_origin(self, monkeypatch):
+        """Test that a 503 to an allowed Origin carries CORS, Retry-After and X-Request-ID"""
+        from app.main import allowed_origins_list, app
+
+        monkeypatch.setitem(load_shedding.limiters, "browse", ShedEverything())
+        origin = allowed_origins_list[0]
+
+        response = TestClient(app).get("/restaurants/", headers={"Origin": origin, "X-Request-ID": "req-503"})
+
+        assert response.status_code == 503
+        assert response.headers["access-control-allow-origin"] == origin
+        assert response.headers["retry-after"] == "1"
+        assert response.headers["x-request-id"] == "req-503"
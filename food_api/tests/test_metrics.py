@@ -0,0 +1,191 @@
+"""
+Unit Tests for Metrics
+Tests histogram aggregation, text rendering, the HTTP middleware and the MongoDB listeners
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import metrics
+from app.cache import TTLCache
+from app.metrics import Counter, Gauge, Histogram, MetricsMiddleware, CommandMetrics, PoolMetrics
+
+
+def http_scope(method="GET", path="/restaurants/"):
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+class RoutedApp:
+    """ASGI app that marks a matched route like the FastAPI router does."""
+
+    def __init__(self, route_path="/restaurants/{restaurant_name}", status=200, error=None):
+        self.route_path = route_path
+        self.status = status
+        self.error = error
+
+    async def __call__(self, scope, receive, send):
+        scope["route"] = SimpleNamespace(path=self.route_path)
+        if self.error is not None:
+            raise self.error
+        await send({"type": "http.response.start", "status": self.status, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def noop_send(message):
+    pass
+
+
+@pytest.mark.unit
+class TestPrimitives:
+    """Test counters, gauges and histograms"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that rendered buckets are cumulative and end with +Inf"""
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, ("/a",))
+
+        lines = histogram.render()
+
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+        assert 'latency_seconds_sum{route="/a"} 3.65' in lines
+        assert histogram.count(("/a",)) == 4
+
+    def test_counter_and_gauge(self):
+        """Test that counters accumulate and gauges move both ways"""
+        counter = Counter("things_total", "Things", ("kind",))
+        counter.inc(("a",))
+        counter.inc(("a",), 2)
+        gauge = Gauge("open", "Open things")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        assert counter.value(("a",)) == 3
+        assert gauge.value() == 1
+        assert "# TYPE things_total counter" in counter.render()
+        assert "open 1" in gauge.render()
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes and backslashes in label values are escaped"""
+        counter = Counter("things_total", "Things", ("name",))
+        counter.inc(('say "hi"\\',))
+
+        assert 'things_total{name="say \\"hi\\"\\\\"} 1' in counter.render()
+
+
+@pytest.mark.unit
+class TestMiddleware:
+    """Test HTTP request metrics"""
+
+    async def test_records_latency_and_status_by_route_template(self):
+        """Test that requests are labelled with the route template, not the raw path"""
+        route = "/metrics-test/{name}"
+        before = metrics.http_requests.value((route, "GET", "404"))
+
+        await MetricsMiddleware(RoutedApp(route, status=404))(http_scope(path="/metrics-test/abc"), receive, noop_send)
+
+        assert metrics.http_requests.value((route, "GET", "404")) == before + 1
+        assert metrics.http_latency.count((route, "GET")) >= 1
+
+    async def test_in_flight_gauge_per_route_class(self):
+        """Test that a running request is counted in flight for its class, and released after"""
+        release = asyncio.Event()
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(metrics.http_in_flight.value(("orders",)))
+            await release.wait()
+            await send({"type": "http.response.start", "status": 201, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = MetricsMiddleware(app, route_class=lambda method, path: "orders")
+        before = metrics.http_in_flight.value(("orders",))
+        task = asyncio.create_task(middleware(http_scope("POST", "/orders/"), receive, noop_send))
+        await asyncio.sleep(0)
+        release.set()
+        await task
+
+        assert seen == [before + 1]
+        assert metrics.http_in_flight.value(("orders",)) == before
+
+    async def test_unhandled_exception_is_counted(self):
+        """Test that an exception is counted, recorded as a 500 and re-raised"""
+        route = "/metrics-test/error"
+        before = metrics.http_exceptions.value((route,))
+
+        with pytest.raises(RuntimeError):
+            await MetricsMiddleware(RoutedApp(route, error=RuntimeError("boom")))(http_scope(), receive, noop_send)
+
+        assert metrics.http_exceptions.value((route,)) == before + 1
+        assert metrics.http_requests.value((route, "GET", "500")) >= 1
+
+
+@pytest.mark.unit
+class TestMongoListeners:
+    """Test command and connection pool metrics"""
+
+    def test_command_duration_by_collection(self):
+        """Test that a finished command is recorded under its collection"""
+        listener = CommandMetrics()
+        started = SimpleNamespace(command_name="find", command={"find": "metrics_test"}, connection_id=("h", 1), request_id=7)
+        finished = SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=7, duration_micros=2500)
+        before = metrics.mongo_command_latency.count(("metrics_test", "find"))
+
+        listener.started(started)
+        listener.succeeded(finished)
+
+        assert metrics.mongo_command_latency.count(("metrics_test", "find")) == before + 1
+
+    def test_get_more_and_failures(self):
+        """Test that getMore uses its collection field and failures are counted"""
+        listener = CommandMetrics()
+        listener.started(SimpleNamespace(
+            command_name="getMore", command={"getMore": 123, "collection": "metrics_test"}, connection_id=None, request_id=8
+        ))
+        listener.failed(SimpleNamespace(command_name="getMore", connection_id=None, request_id=8, duration_micros=10))
+
+        assert metrics.mongo_command_failures.value(("metrics_test", "getMore")) >= 1
+
+    def test_pool_checkout_wait(self):
+        """Test that checkouts record their wait and the checked-out gauge"""
+        listener = PoolMetrics()
+        before_count = metrics.mongo_pool_wait.count()
+        before_out = metrics.mongo_pool_checked_out.value()
+
+        listener.connection_checked_out(SimpleNamespace(duration=0.002))
+        assert metrics.mongo_pool_checked_out.value() == before_out + 1
+        listener.connection_checked_in(SimpleNamespace())
+
+        assert metrics.mongo_pool_wait.count() == before_count + 1
+        assert metrics.mongo_pool_checked_out.value() == before_out
+
+
+@pytest.mark.unit
+class TestRender:
+    """Test the exposition output"""
+
+    def test_render_includes_caches_and_load_shedding(self):
+        """Test that registered caches and load shedding counters are exposed"""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("k", 1)
+        cache.get("k")
+        cache.get("missing")
+        metrics.register_cache("metrics_test", cache)
+
+        text = metrics.render()
+
+        assert 'cache_hits_total{cache="metrics_test"} 1' in text
+        assert 'cache_hit_ratio{cache="metrics_test"} 0.5' in text
+        assert 'load_shedding_shed_total{route_class="orders"}' in text
+        assert "# TYPE http_request_duration_seconds histogram" in text
+        assert text.endswith("\n")
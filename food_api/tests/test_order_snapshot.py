@@ -0,0 +1,107 @@
+"""
+Unit Tests for the Columnar Order Snapshot
+Tests export to memory-mapped arrays and the vectorized query helper
+"""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from bson import ObjectId
+from analytics import OrderSnapshot, OrderSnapshotWriter
+
+
+USER_A = ObjectId()
+USER_B = ObjectId()
+
+
+def make_order(user_id, restaurant_name, items, order_date, status="delivered"):
+    """Build a raw order document as Motor returns it"""
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "restaurant_name": restaurant_name,
+        "items": [
+            {"item_name": name, "quantity": quantity, "price": price}
+            for name, quantity, price in items
+        ],
+        "total_price": sum(quantity * price for _, quantity, price in items),
+        "status": status,
+        "order_date": order_date,
+    }
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Write a small snapshot in two batches and open it"""
+    writer = OrderSnapshotWriter(tmp_path / "snap")
+    writer.add_orders([
+        # Monday 2025-10-13 19:xx
+        make_order(USER_A, "Swati Snacks", [("Pani Puri", 2, 60.0), ("Bhel Puri", 1, 80.0)], datetime(2025, 10, 13, 19, 5)),
+        make_order(USER_B, "Swati Snacks", [("Pani Puri", 1, 60.0)], datetime(2025, 10, 13, 19, 40)),
+    ])
+    writer.add_orders([
+        # Sunday 2025-10-19 12:xx
+        make_order(USER_A, "Agashiye", [("Gujarati Thali", 3, 450.0)], datetime(2025, 10, 19, 12, 0), status="placed"),
+    ])
+    manifest = writer.close()
+    assert manifest["orders"] == 3
+    assert manifest["items"] == 4
+    return OrderSnapshot(tmp_path / "snap")
+
+
+@pytest.mark.unit
+class TestOrderSnapshot:
+    """Test suite for OrderSnapshot and OrderSnapshotWriter"""
+
+    def test_columns_are_memory_mapped(self, snapshot):
+        """Test that columns are loaded as read-only memory maps"""
+        assert isinstance(snapshot.orders["total_price"], np.memmap)
+        assert isinstance(snapshot.items["item"], np.memmap)
+        assert len(snapshot) == 3
+
+    def test_revenue_by_restaurant(self, snapshot):
+        """Test per-restaurant revenue group-by"""
+        assert snapshot.revenue_by_restaurant() == [("Agashiye", 1350.0), ("Swati Snacks", 260.0)]
+
+    def test_revenue_by_hour_of_week(self, snapshot):
+        """Test the weekday x hour revenue matrix"""
+        heatmap = snapshot.revenue_by_hour_of_week()
+
+        assert heatmap.shape == (7, 24)
+        assert heatmap[0, 19] == 260.0  # Monday 19:00
+        assert heatmap[6, 12] == 1350.0  # Sunday 12:00
+        assert heatmap.sum() == 1610.0
+
+    def test_basket_size_histogram(self, snapshot):
+        """Test histogram of items per order"""
+        counts, edges = snapshot.basket_size_histogram()
+
+        # Basket sizes: 3, 1, 3
+        assert list(counts) == [1, 0, 2]
+        assert list(edges) == [0.5, 1.5, 2.5, 3.5]
+
+    def test_top_items_for_restaurant(self, snapshot):
+        """Test item mix restricted to one restaurant"""
+        assert snapshot.top_items(restaurant="Swati Snacks") == [
+            ("Swati Snacks::Pani Puri", 3),
+            ("Swati Snacks::Bhel Puri", 1),
+        ]
+
+    def test_order_mask_filters_by_time_and_status(self, snapshot):
+        """Test time-range and status filters"""
+        week = snapshot.order_mask(start=datetime(2025, 10, 13), end=datetime(2025, 10, 14))
+        placed = snapshot.order_mask(status="placed")
+
+        assert week.sum() == 2
+        assert snapshot.group_sum("user", mask=placed).tolist() == [1, 0]
+
+    def test_unknown_restaurant_matches_nothing(self, snapshot):
+        """Test that filtering on an unknown value yields an empty mask"""
+        assert snapshot.order_mask(restaurant="Nowhere").sum() == 0
+
+    def test_refuses_to_overwrite(self, tmp_path):
+        """Test that an existing snapshot directory is never overwritten"""
+        (tmp_path / "existing").mkdir()
+
+        with pytest.raises(FileExistsError):
+            OrderSnapshotWriter(tmp_path / "existing")
@@ -0,0 +1,145 @@
+"""
+Unit Tests for Order Status Lifecycle
+Tests the allowed status transitions and bulk compare-and-set updates
+"""
+
+import pytest
+from bson import ObjectId
+from app.models import Order
+from app.order_status import (
+    ALLOWED_TRANSITIONS,
+    ORDER_STATUSES,
+    TransitionError,
+    previous_statuses,
+    transition_documents,
+    _allowed_current_statuses
+)
+
+
+@pytest.mark.unit
+class TestTransitionTable:
+    """Test the order status state machine"""
+
+    def test_every_status_has_transitions(self):
+        """Test that every status appears in the transition table"""
+        assert set(ALLOWED_TRANSITIONS) == set(ORDER_STATUSES)
+
+    def test_terminal_statuses(self):
+        """Test that delivered and cancelled orders cannot move"""
+        assert ALLOWED_TRANSITIONS["delivered"] == set()
+        assert ALLOWED_TRANSITIONS["cancelled"] == set()
+
+    def test_previous_statuses(self):
+        """Test which statuses may precede each target"""
+        assert previous_statuses("preparing") == ["placed"]
+        assert previous_statuses("delivered") == ["out_for_delivery"]
+        assert set(previous_statuses("cancelled")) == {"placed", "preparing"}
+        assert previous_statuses("placed") == []
+
+
+@pytest.mark.unit
+class TestCompareAndSetCondition:
+    """Test the status condition used by the atomic update"""
+
+    def test_defaults_to_all_predecessors(self):
+        """Test that without an expected status any predecessor matches"""
+        assert set(_allowed_current_statuses("cancelled", None)) == {"placed", "preparing"}
+
+    def test_expected_status_narrows_condition(self):
+        """Test that an explicit expected status is the only match"""
+        assert _allowed_current_statuses("cancelled", "preparing") == ["preparing"]
+
+    def test_invalid_expected_status_rejected(self):
+        """Test that an impossible transition is rejected up front"""
+        with pytest.raises(TransitionError) as exc:
+            _allowed_current_statuses("preparing", "delivered")
+        assert exc.value.status_code == 400
+
+    def test_cancelling_delivered_order_is_not_allowed(self):
+        """Test that delivered orders are not matched by a cancel"""
+        assert "delivered" not in _allowed_current_statuses("cancelled", None)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeOrders:
+    """Applies compare-and-set UpdateOnes the way MongoDB does"""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: dict(doc) for doc in docs}
+
+    async def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            doc = self.docs.get(request._filter["_id"])
+            if doc is None or doc["status"] != request._filter["status"]:
+                continue
+            doc.update(request._doc["$set"])
+            for field, value in request._doc.get("$push", {}).items():
+                doc.setdefault(field, []).append(value)
+
+    def find(self, query, projection=None):
+        ids = query["_id"]["$in"]
+        batch_id = query["status_batch_ids"]
+        return FakeCursor([
+            {"_id": doc["_id"]} for doc in self.docs.values()
+            if doc["_id"] in ids and batch_id in doc.get("status_batch_ids", [])
+        ])
+
+
+@pytest.fixture
+def orders(monkeypatch):
+    docs = [
+        {"_id": ObjectId(), "restaurant_name": "Swati Snacks", "total_price": 250.0, "status": "placed"}
+        for _ in range(3)
+    ]
+    collection = FakeOrders(docs)
+    monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: collection))
+    monkeypatch.setattr(Order, "model_validate", classmethod(lambda cls, doc: cls.model_construct(**doc)))
+    return docs, collection
+
+
+@pytest.mark.unit
+class TestBulkTransitions:
+    """Test which orders a bulk transition reports as its own"""
+
+    async def test_concurrent_batches_never_both_win(self, orders):
+        """Test that two batches read at the same time each get credited only for orders they moved"""
+        docs, collection = orders
+
+        first, _ = await transition_documents(docs, "preparing", ["placed"])
+        second, failures = await transition_documents(docs, "cancelled", ["placed"])
+
+        assert len(first) == 3
+        assert second == []
+        assert set(failures.values()) == {"concurrent_update"}
+        assert {doc["status"] for doc in collection.docs.values()} == {"preparing"}
+
+    async def test_later_transition_does_not_hide_earlier_one(self, orders):
+        """Test that an order moved on again is still credited to the first batch"""
+        docs, collection = orders
+        moved = {}
+        bulk_write = collection.bulk_write
+
+        async def racing_bulk_write(requests, ordered=True):
+            await bulk_write(requests, ordered)
+            if not moved:
+                # Another dispatcher moves one order on before our read-back
+                moved["doc"] = collection.docs[docs[0]["_id"]]
+                moved["doc"]["status_batch_ids"].append("someone-else")
+                moved["doc"]["status"] = "out_for_delivery"
+        collection.bulk_write = racing_bulk_write
+
+        updated, failures = await transition_documents(docs, "preparing", ["placed"])
+
+        assert len(updated) == 3 and failures == {}
+        assert all(previous == "placed" for _, previous in updated)
@@ -0,0 +1,143 @@
+"""
+Unit Tests for On-Demand Profiling
+Tests CPU stack sampling, allocation diffs and the one-at-a-time gate
+"""
+
+import asyncio
+import importlib
+import inspect
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app import profiling
+from app.profiling import CpuSampler, ProfilerBusy
+
+AGENT_DIR = Path(__file__).resolve().parents[2] / "food_chatbot_agent"
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture(autouse=True)
+def no_cooldown(monkeypatch):
+    monkeypatch.setattr(profiling, "_busy_until", 0.0)
+    monkeypatch.setattr(profiling, "PROFILING_COOLDOWN_SECONDS", 0.0)
+
+
+@pytest.mark.unit
+class TestCpuSampler:
+    """Test stack sampling"""
+
+    def test_samples_collapse_running_threads(self):
+        """Test that a busy thread appears as a root-first collapsed stack"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            sampler = CpuSampler(interval=0.001)
+            for _ in range(5):
+                sampler.sample()
+        finally:
+            stop.set()
+            worker.join()
+
+        stacks = [stack for stack in sampler.stacks if stack.startswith("busy-worker;")]
+        assert sampler.samples == 5
+        assert stacks
+        assert all("test_profiling:busy_loop" in stack for stack in stacks)
+        assert all(stack.split(";")[1] == "threading:Thread._bootstrap" for stack in stacks)
+
+    def test_idle_threads_are_skipped(self):
+        """Test that threads waiting on an event are left out unless asked for"""
+        stop = threading.Event()
+        waiter = threading.Thread(target=stop.wait, name="idle-waiter")
+        waiter.start()
+        try:
+            time.sleep(0.01)
+            default = CpuSampler(interval=0.001)
+            default.sample()
+            with_idle = CpuSampler(interval=0.001, include_idle=True)
+            with_idle.sample()
+        finally:
+            stop.set()
+            waiter.join()
+
+        assert not any(stack.startswith("idle-waiter;") for stack in default.stacks)
+        assert any(stack.startswith("idle-waiter;") for stack in with_idle.stacks)
+
+    async def test_profile_cpu_runs_alongside_the_loop(self):
+        """Test that a CPU profile samples for its window and renders collapsed lines"""
+        profile = await profiling.profile_cpu(0.05, interval_ms=5, include_idle=True)
+
+        assert profile.kind == "cpu"
+        assert profile.samples > 0
+        for line in profile.collapsed().splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0
+            assert ";" in stack
+
+
+@pytest.mark.unit
+class TestMemory:
+    """Test allocation diffs"""
+
+    async def test_growth_is_attributed_to_its_allocation_site(self):
+        """Test that memory held at the end of the window is reported with its stack"""
+        held = []
+        asyncio.get_running_loop().call_later(0.01, lambda: held.append(bytearray(512 * 1024)))
+
+        profile = await profiling.profile_memory(0.05)
+
+        assert profile.kind == "memory"
+        site, size = profile.stacks.most_common(1)[0]
+        assert "test_profiling" in site
+        assert size >= 512 * 1024
+        assert held
+
+
+@pytest.mark.unit
+class TestGate:
+    """Test the single-run gate and cooldown"""
+
+    async def test_concurrent_profiles_are_rejected(self):
+        """Test that a second profile cannot start while one is running"""
+        first = asyncio.ensure_future(profiling.profile_cpu(0.05))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(ProfilerBusy):
+            await profiling.profile_cpu(0.01)
+        await first
+
+    def test_cooldown(self):
+        """Test that the next profile must wait for the cooldown"""
+        with profiling._exclusive(cooldown=30):
+            pass
+
+        with pytest.raises(ProfilerBusy) as error:
+            with profiling._exclusive(cooldown=30):
+                pass
+        assert 0 < error.value.retry_after <= 30
+
+
+@pytest.fixture
+def agent_profiling(monkeypatch):
+    """The agent's profiling module (food_chatbot_agent/profiling.py)"""
+    monkeypatch.syspath_prepend(str(AGENT_DIR))
+    return importlib.import_module("profiling")
+
+
+@pytest.mark.unit
+class TestAgentCopy:
+    """Test that the agent's copy of the sampler core has not drifted"""
+
+    @pytest.mark.parametrize("name", [
+        "ProfilerBusy", "Profile", "frame_label", "CpuSampler", "allocation_stacks", "_snapshot"
+    ])
+    def test_shared_code_is_identical(self, agent_profiling, name):
+        """Test that the shared profiling code is the same in both services"""
+        assert inspect.getsource(getattr(agent_profiling, name)) == inspect.getsource(getattr(profiling, name))
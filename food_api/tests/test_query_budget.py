@@ -0,0 +1,121 @@
+"""
+Unit Tests for Query Time Budgets
+Tests budget selection, 503 on overruns and cancellation on client disconnect
+"""
+
+import asyncio
+import pytest
+import pymongo
+from pymongo.errors import ExecutionTimeout
+
+from app import query_budget
+from app.query_budget import QueryBudgetMiddleware, budget_for
+
+
+def http_scope(method="GET", path="/restaurants/"):
+    return {"type": "http", "method": method, "path": path, "headers": []}
+
+
+async def run_app(app, scope, receive):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await QueryBudgetMiddleware(app)(scope, receive, send)
+    return sent
+
+
+def body_then_wait():
+    """ASGI receive that delivers the request body, then waits like a live client."""
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    return receive
+
+
+@pytest.mark.unit
+class TestBudgetSelection:
+    """Test which budget applies to a request"""
+
+    def test_admin_endpoints_get_admin_budget(self):
+        """Test that admin scans get the long budget"""
+        assert budget_for("GET", "/admin/orders") == ("admin", query_budget.QUERY_BUDGET_ADMIN_MS)
+
+    def test_search_endpoints_get_search_budget(self):
+        """Test that regex searches get the short budget"""
+        assert budget_for("GET", "/search/items")[0] == "search"
+        assert budget_for("GET", "/restaurants/")[0] == "search"
+
+    def test_restaurant_detail_uses_default(self):
+        """Test that an indexed lookup falls back to the default budget"""
+        assert budget_for("GET", "/restaurants/Swati Snacks") == ("default", query_budget.QUERY_BUDGET_DEFAULT_MS)
+
+
+@pytest.mark.unit
+class TestQueryBudgetMiddleware:
+    """Test the ASGI middleware with stand-in apps"""
+
+    async def test_handler_runs_with_pymongo_timeout(self):
+        """Test that database calls in the handler see the request budget"""
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen["timeout"] = pymongo._csot.get_timeout()
+            seen["remaining"] = query_budget.remaining_seconds()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        sent = await run_app(app, http_scope(path="/search/items"), body_then_wait())
+
+        assert sent[0]["status"] == 200
+        assert seen["timeout"] == query_budget.QUERY_BUDGET_SEARCH_MS / 1000
+        assert 0 < seen["remaining"] <= query_budget.QUERY_BUDGET_SEARCH_MS / 1000
+        assert query_budget.remaining_seconds() is None
+
+    async def test_budget_overrun_returns_503_and_is_counted(self):
+        """Test that a maxTimeMS overrun becomes a counted 503"""
+        before = query_budget.budget_exceeded["admin"]
+
+        async def app(scope, receive, send):
+            raise ExecutionTimeout("operation exceeded time limit", code=50)
+
+        sent = await run_app(app, http_scope(path="/admin/stats"), body_then_wait())
+
+        assert sent[0]["status"] == 503
+        assert (b"retry-after", b"1") in sent[0]["headers"]
+        assert query_budget.budget_exceeded["admin"] == before + 1
+
+    async def test_other_errors_propagate(self):
+        """Test that unrelated exceptions are not turned into 503"""
+        async def app(scope, receive, send):
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await run_app(app, http_scope(), body_then_wait())
+
+    async def test_client_disconnect_cancels_handler(self):
+        """Test that an abandoned request stops running"""
+        before = query_budget.cancelled_on_disconnect["default"]
+        cancelled = asyncio.Event()
+
+        async def app(scope, receive, send):
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def receive():
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        sent = await asyncio.wait_for(run_app(app, http_scope(path="/orders/"), receive), timeout=5)
+
+        assert sent == []
+        assert cancelled.is_set()
+        assert query_budget.cancelled_on_disconnect["default"] == before + 1
@@ -0,0 +1,183 @@
+"""
+Unit Tests for the Query Profiler
+Tests value redaction, shape aggregation, the slow threshold and explain() capture
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.query_profiler import QueryProfiler, command_shape, shape_of, summarize_explain
+
+COLLSCAN_EXPLAIN = {
+    "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+    "executionStats": {"totalDocsExamined": 5000, "totalKeysExamined": 0, "nReturned": 3, "executionTimeMillis": 120},
+}
+
+
+class FakeClient:
+    """Motor client stand-in recording explain commands"""
+
+    def __init__(self, result):
+        self.result = result
+        self.commands = []
+
+    def __getitem__(self, database):
+        return SimpleNamespace(command=self.command)
+
+    async def command(self, command):
+        self.commands.append(command)
+        return self.result
+
+
+@pytest.mark.unit
+class TestShapes:
+    """Test filter shape extraction"""
+
+    def test_values_are_redacted(self):
+        """Test that user data is replaced while fields and operators are kept"""
+        shape = shape_of({
+            "username": "alice",
+            "order_date": {"$gte": datetime(2025, 1, 1)},
+            "_id": {"$in": [ObjectId(), ObjectId()]},
+            "status": {"$ne": "cancelled"},
+        })
+
+        assert shape == {
+            "username": "?",
+            "order_date": {"$gte": "?"},
+            "_id": {"$in": ["?"]},
+            "status": {"$ne": "?"},
+        }
+
+    def test_equal_queries_share_a_shape(self):
+        """Test that queries differing only in values have the same shape"""
+        assert shape_of({"name": {"$regex": "pizza"}}) == shape_of({"name": {"$regex": "burger"}})
+
+    def test_pipeline_structure_is_kept(self):
+        """Test that field paths, sort flags and $lookup names survive redaction"""
+        command = {"aggregate": "orders", "pipeline": [
+            {"$match": {"user_id": "abc"}},
+            {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "_id", "as": "user"}},
+            {"$group": {"_id": "$restaurant_name", "total": {"$sum": "$total_price"}}},
+            {"$sort": {"total": -1}},
+            {"$limit": 10},
+        ]}
+
+        shape = command_shape("aggregate", command)
+
+        assert shape["pipeline"][0] == {"$match": {"user_id": "?"}}
+        assert shape["pipeline"][1]["$lookup"]["from"] == "users"
+        assert shape["pipeline"][2] == {"$group": {"_id": "$restaurant_name", "total": {"$sum": "$total_price"}}}
+        assert shape["pipeline"][3] == {"$sort": {"total": -1}}
+        assert shape["pipeline"][4] == {"$limit": "?"}
+
+    def test_update_statements_use_their_selectors(self):
+        """Test that update shapes keep only each statement's filter"""
+        command = {"update": "orders", "updates": [{"q": {"_id": ObjectId()}, "u": {"$set": {"status": "delivered"}}}]}
+
+        assert command_shape("update", command) == {"updates": [{"_id": "?"}]}
+
+
+@pytest.mark.unit
+class TestProfiler:
+    """Test slow query aggregation"""
+
+    def test_fast_queries_are_ignored(self):
+        """Test that commands under the threshold are not recorded"""
+        profiler = QueryProfiler(threshold_ms=100, explain=False)
+
+        assert profiler.record("find", {"find": "orders", "filter": {"a": 1}}, "food_db", 5) is None
+        assert profiler.top() == []
+
+    def test_slow_queries_aggregate_by_shape(self):
+        """Test that slow queries with the same shape are counted together"""
+        profiler = QueryProfiler(threshold_ms=100, explain=False)
+        profiler.record("find", {"find": "orders", "filter": {"user_id": "a"}}, "food_db", 150)
+        profiler.record("find", {"find": "orders", "filter": {"user_id": "b"}}, "food_db", 250)
+        profiler.record("find", {"find": "reviews", "filter": {"rating": 5}}, "food_db", 900)
+
+        by_total = profiler.top()
+        by_count = profiler.top(sort_by="count")
+
+        assert [item["collection"] for item in by_total] == ["reviews", "orders"]
+        orders = by_count[0]
+        assert orders["shape"] == {"filter": {"user_id": "?"}}
+        assert orders["count"] == 2
+        assert orders["avg_ms"] == 200
+        assert orders["max_ms"] == 250
+
+    def test_listener_events(self):
+        """Test that started/succeeded events are matched by connection and request id"""
+        profiler = QueryProfiler(threshold_ms=1, explain=False)
+        profiler.started(SimpleNamespace(
+            command_name="find", command={"find": "orders", "filter": {"x": 1}},
+            database_name="food_db", connection_id=("h", 1), request_id=3
+        ))
+        profiler.succeeded(SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=3, duration_micros=5000))
+
+        assert profiler.top()[0]["total_ms"] == 5
+
+    def test_shape_limit(self):
+        """Test that the number of tracked shapes is bounded"""
+        profiler = QueryProfiler(threshold_ms=0, explain=False, max_shapes=2)
+        for field in ("a", "b", "c"):
+            profiler.record("find", {"find": "orders", "filter": {field: 1}}, "food_db", 10)
+
+        assert len(profiler.top()) == 2
+        assert profiler.untracked == 1
+
+
+@pytest.mark.unit
+class TestExplain:
+    """Test explain() capture"""
+
+    def test_summarize_find_and_aggregate(self):
+        """Test that winning plans are summarised for both command types"""
+        summary = summarize_explain(COLLSCAN_EXPLAIN)
+        aggregate = summarize_explain({"stages": [{"$cursor": {
+            "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "user_id_1"}}},
+            "executionStats": {"totalDocsExamined": 3, "totalKeysExamined": 3, "nReturned": 3},
+        }}]})
+
+        assert summary["collection_scan"] is True
+        assert summary["docs_examined"] == 5000
+        assert aggregate["collection_scan"] is False
+        assert aggregate["indexes"] == ["user_id_1"]
+
+    async def test_first_slow_occurrence_is_explained(self):
+        """Test that a new shape is explained once, from the listener's thread"""
+        client = FakeClient(COLLSCAN_EXPLAIN)
+        profiler = QueryProfiler(threshold_ms=10, explain=True)
+        await profiler.start(client)
+        command = {"find": "orders", "filter": {"user_id": "a"}, "$db": "food_db", "lsid": {"id": 1}}
+
+        # Listeners run in Motor's worker threads
+        await asyncio.to_thread(profiler.record, "find", command, "food_db", 50)
+        await asyncio.to_thread(profiler.record, "find", command, "food_db", 60)
+        for _ in range(10):
+            await asyncio.sleep(0)
+        await profiler.stop()
+
+        assert len(client.commands) == 1
+        assert client.commands[0] == {
+            "explain": {"find": "orders", "filter": {"user_id": "a"}},
+            "verbosity": "executionStats",
+        }
+        assert profiler.top()[0]["explain"]["collection_scan"] is True
+
+    async def test_writes_are_not_explained(self):
+        """Test that write commands are profiled but never re-run"""
+        client = FakeClient(COLLSCAN_EXPLAIN)
+        profiler = QueryProfiler(threshold_ms=10, explain=True)
+        await profiler.start(client)
+
+        profiler.record("update", {"update": "orders", "updates": [{"q": {"_id": 1}, "u": {}}]}, "food_db", 50)
+        await asyncio.sleep(0)
+        await profiler.stop()
+
+        assert client.commands == []
+        assert profiler.top()[0]["command"] == "update"
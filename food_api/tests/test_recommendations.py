@@ -0,0 +1,101 @@
+"""
+Unit Tests for the Recommendation Batch Job
+Tests co-occurrence similarities and user-item affinity top-K lists
+"""
+
+import pytest
+import numpy as np
+from scipy import sparse
+from bson import ObjectId
+from app.recommendations import compute_recommendations, top_k_per_row, item_key
+
+
+USER_A = ObjectId()
+USER_B = ObjectId()
+USER_C = ObjectId()
+
+
+def order(user_id, *item_names, restaurant_name="Swati Snacks", quantity=1):
+    """Build a raw order document"""
+    return {
+        "user_id": user_id,
+        "restaurant_name": restaurant_name,
+        "items": [{"item_name": name, "quantity": quantity} for name in item_names],
+    }
+
+
+@pytest.mark.unit
+class TestTopKPerRow:
+    """Test sparse top-K extraction"""
+
+    def test_returns_best_first_and_truncates(self):
+        """Test ordering and truncation of each row"""
+        matrix = sparse.csr_matrix(np.array([
+            [0.0, 0.5, 0.9, 0.1],
+            [0.0, 0.0, 0.0, 0.0],
+            [0.3, 0.0, 0.0, 0.3],
+        ]))
+
+        result = top_k_per_row(matrix, 2)
+
+        assert result[0] == [(2, 0.9), (1, 0.5)]
+        assert result[1] == []
+        assert result[2] == [(0, 0.3), (3, 0.3)]  # Ties broken by column
+
+
+@pytest.mark.unit
+class TestComputeRecommendations:
+    """Test suite for compute_recommendations"""
+
+    @pytest.fixture
+    def orders(self):
+        return [
+            order(USER_A, "Pani Puri", "Bhel Puri"),
+            order(USER_B, "Pani Puri", "Bhel Puri"),
+            order(USER_B, "Pani Puri", "Sev Puri"),
+            order(USER_C, "Sev Puri"),
+            order(USER_C, "Gujarati Thali", restaurant_name="Agashiye"),
+        ]
+
+    def test_item_recommendations_follow_cooccurrence(self, orders):
+        """Test that items ordered together recommend each other, strongest first"""
+        item_recs, _ = compute_recommendations(orders, top_k=5)
+
+        pani_puri = item_recs[("Swati Snacks", "Pani Puri")]
+        assert [(r, i) for r, i, _ in pani_puri] == [
+            ("Swati Snacks", "Bhel Puri"),
+            ("Swati Snacks", "Sev Puri"),
+        ]
+        # Never recommend an item for itself, never across unrelated orders
+        assert item_recs[("Agashiye", "Gujarati Thali")] == []
+
+    def test_similarity_is_cosine_normalized(self, orders):
+        """Test score = co-orders / sqrt(orders_i * orders_j)"""
+        item_recs, _ = compute_recommendations(orders, top_k=5)
+        scores = {name: score for _, name, score in item_recs[("Swati Snacks", "Pani Puri")]}
+
+        # Pani Puri: 3 orders, Bhel Puri: 2 orders, together: 2
+        assert scores["Bhel Puri"] == pytest.approx(2 / np.sqrt(3 * 2), abs=1e-4)
+
+    def test_user_recommendations_exclude_already_ordered(self, orders):
+        """Test that users get similar items they have not ordered yet"""
+        _, user_recs = compute_recommendations(orders, top_k=5)
+
+        assert [name for _, name, _ in user_recs[str(USER_A)]] == ["Sev Puri"]
+        assert [name for _, name, _ in user_recs[str(USER_C)]] == ["Pani Puri"]
+        # USER_B has ordered every co-occurring item already
+        assert user_recs[str(USER_B)] == []
+
+    def test_top_k_limits_list_length(self, orders):
+        """Test that lists are truncated to top_k"""
+        item_recs, _ = compute_recommendations(orders, top_k=1)
+
+        assert len(item_recs[("Swati Snacks", "Pani Puri")]) == 1
+
+    def test_no_orders(self):
+        """Test the empty history case"""
+        assert compute_recommendations([], top_k=5) == ({}, {})
+
+    def test_item_key_format(self):
+        """Test the stored lookup key"""
+        assert item_key("Swati Snacks", "Pani Puri") == "Swati Snacks::Pani Puri"
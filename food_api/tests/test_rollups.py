@@ -0,0 +1,396 @@
+"""
+Unit Tests for Analytics Rollups
+Tests bucket truncation and conversion of grouped rollups to API output
+"""
+
+import json
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from app.models import ArchivedOrder, Order, OrderItem, Review, RestaurantDailyStats, OrderTimeBucket
+from app.rollups import (
+    backfill_time_buckets,
+    day_bucket,
+    reconcile_restaurant_stats,
+    reconcile_time_buckets,
+    settled_before,
+    time_bucket,
+    time_bucket_updates,
+    to_popular_restaurant,
+    status_change_deltas,
+    RollupBatch,
+    ALL_RESTAURANTS
+)
+
+
+def make_order(restaurant_name="Swati Snacks", order_date=datetime(2025, 10, 16, 19, 45)):
+    return Order.model_construct(
+        user_id=None,
+        restaurant_name=restaurant_name,
+        items=[OrderItem(item_name="Thali", quantity=1, price=250.0)],
+        total_price=250.0,
+        status="placed",
+        order_date=order_date
+    )
+
+
+@pytest.mark.unit
+class TestDayBucket:
+    """Test daily bucket boundaries"""
+
+    def test_truncates_to_midnight(self):
+        """Test that any time of day maps to the same bucket"""
+        morning = datetime(2025, 10, 16, 8, 30, 15, 123)
+        night = datetime(2025, 10, 16, 23, 59, 59, 999999)
+
+        assert day_bucket(morning) == datetime(2025, 10, 16)
+        assert day_bucket(night) == datetime(2025, 10, 16)
+
+    def test_midnight_is_its_own_bucket(self):
+        """Test that midnight starts a new bucket"""
+        assert day_bucket(datetime(2025, 10, 17)) == datetime(2025, 10, 17)
+
+
+@pytest.mark.unit
+class TestTimeBuckets:
+    """Test hour/day time-series buckets"""
+
+    def test_hour_bucket_truncates_minutes(self):
+        """Test that hourly buckets start on the hour"""
+        when = datetime(2025, 10, 16, 19, 45, 30)
+
+        assert time_bucket(when, "hour") == datetime(2025, 10, 16, 19)
+        assert time_bucket(when, "day") == datetime(2025, 10, 16)
+
+    def test_order_updates_restaurant_and_platform_buckets(self):
+        """Test that an order increments hour and day buckets for its restaurant and platform-wide"""
+        when = datetime(2025, 10, 16, 19, 45)
+        updates = time_bucket_updates("Swati Snacks", when, {"order_count": 1})
+        filters = {
+            (u._filter["granularity"], u._filter["restaurant_name"], u._filter["bucket_start"])
+            for u in updates
+        }
+
+        assert filters == {
+            ("hour", "Swati Snacks", datetime(2025, 10, 16, 19)),
+            ("hour", ALL_RESTAURANTS, datetime(2025, 10, 16, 19)),
+            ("day", "Swati Snacks", datetime(2025, 10, 16)),
+            ("day", ALL_RESTAURANTS, datetime(2025, 10, 16)),
+        }
+        assert all(u._doc == {"$inc": {"order_count": 1}} for u in updates)
+
+
+@pytest.mark.unit
+class TestPopularRestaurantConversion:
+    """Test conversion of grouped rollup documents"""
+
+    def test_average_rating_from_sum_and_count(self):
+        """Test average rating is computed from the rating sum"""
+        result = to_popular_restaurant({
+            "_id": "Swati Snacks",
+            "total_orders": 12,
+            "total_revenue": 3456.789,
+            "rating_sum": 14,
+            "review_count": 3
+        })
+
+        assert result.restaurant_name == "Swati Snacks"
+        assert result.total_orders == 12
+        assert result.total_revenue == 3456.79
+        assert result.average_rating == 4.67
+        assert result.total_reviews == 3
+
+    def test_no_reviews_gives_no_average(self):
+        """Test that restaurants without reviews have no average rating"""
+        result = to_popular_restaurant({
+            "_id": "New Place",
+            "total_orders": 1,
+            "total_revenue": 100.0,
+            "rating_sum": 0,
+            "review_count": 0
+        })
+
+        assert result.average_rating is None
+        assert result.total_reviews == 0
+
+
+@pytest.mark.unit
+class TestStatusChangeDeltas:
+    """Test rollup deltas for order status changes"""
+
+    def test_progress_only_moves_status_counters(self):
+        """Test that a non-cancelling transition leaves order totals alone"""
+        daily, buckets = status_change_deltas(make_order(), "placed", "preparing")
+
+        assert daily is None
+        assert buckets == {"status_counts.placed": -1, "status_counts.preparing": 1}
+
+    def test_cancel_removes_order_and_revenue(self):
+        """Test that cancelling subtracts the order from totals"""
+        daily, buckets = status_change_deltas(make_order(), "placed", "cancelled")
+
+        assert daily == {"total_orders": -1, "total_revenue": -250.0}
+        assert buckets["order_count"] == -1
+        assert buckets["revenue"] == -250.0
+
+
+@pytest.mark.unit
+class TestRollupBatch:
+    """Test merging of batched rollup deltas"""
+
+    def test_same_bucket_changes_are_merged(self):
+        """Test that many changes to one restaurant/day write each bucket once"""
+        batch = RollupBatch()
+        for _ in range(50):
+            batch.status_change(make_order(), "placed", "cancelled")
+
+        # 1 daily bucket + hour/day x restaurant/platform time buckets
+        assert len(batch) == 5
+
+    def test_review_removal_only_touches_daily_stats(self):
+        """Test that removed reviews adjust only the daily rating counters"""
+        batch = RollupBatch()
+        batch.review_removed("Swati Snacks", datetime(2025, 10, 16, 9), 4)
+        batch.review_removed("Swati Snacks", datetime(2025, 10, 16, 21), 5)
+
+        assert len(batch) == 1
+
+    def test_payload_round_trip(self):
+        """Test that a batch survives serialization as task queue arguments"""
+        batch = RollupBatch()
+        batch.status_change(make_order(), "placed", "cancelled")
+        batch.review_removed("Swati Snacks", datetime(2025, 10, 16, 9), 4)
+
+        restored = RollupBatch.from_payload(json.loads(json.dumps(batch.payload())))
+
+        assert restored._daily == batch._daily
+        assert restored._buckets == batch._buckets
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeSource:
+    """Returns canned aggregation results and records the pipeline"""
+
+    def __init__(self, results):
+        self.results = results
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.results)
+
+
+class FakeBatchedSource(FakeSource):
+    """Returns the next canned result for each aggregation"""
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor(self.results.pop(0))
+
+
+class FakeStats:
+    def __init__(self, docs):
+        self.docs = docs
+        self.writes = []
+        self.deleted = []
+
+    async def bulk_write(self, requests, ordered=True):
+        self.writes.extend(requests)
+
+    def find(self, query, projection=None):
+        if "granularity" in query:
+            window = query["bucket_start"]
+            return FakeCursor([
+                doc for doc in self.docs
+                if doc["granularity"] == query["granularity"] and window["$gte"] <= doc["bucket_start"] < window["$lt"]
+            ])
+        cutoff = query["day"]["$lt"]
+        return FakeCursor([doc for doc in self.docs if doc["day"] < cutoff])
+
+    async def delete_many(self, query):
+        self.deleted.extend(query["_id"]["$in"])
+
+
+@pytest.mark.unit
+class TestReconcile:
+    """Test the periodic rollup rebuild"""
+
+    def test_settled_cutoff(self):
+        """Test that buckets from the last 24 hours are never rebuilt"""
+        assert settled_before(datetime(2025, 10, 16, 9)) == datetime(2025, 10, 15)
+        assert settled_before(datetime(2025, 10, 16, 0, 30)) == datetime(2025, 10, 15)
+
+    async def test_only_settled_buckets_are_rewritten(self, monkeypatch):
+        """Test that reconcile leaves buckets still receiving live increments alone"""
+        cutoff = datetime(2025, 10, 15)
+        orders = FakeSource([{
+            "_id": {"restaurant_name": "Swati Snacks", "day": datetime(2025, 10, 14)},
+            "total_orders": 3, "total_revenue": 750.0
+        }])
+        reviews = FakeSource([])
+        stats = FakeStats([
+            {"_id": "kept", "restaurant_name": "Swati Snacks", "day": datetime(2025, 10, 14)},
+            {"_id": "stale", "restaurant_name": "Closed Cafe", "day": datetime(2025, 10, 1)},
+            {"_id": "live", "restaurant_name": "New Place", "day": datetime(2025, 10, 15)},
+        ])
+        monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: orders))
+        monkeypatch.setattr(Review, "get_motor_collection", classmethod(lambda cls: reviews))
+        monkeypatch.setattr(RestaurantDailyStats, "get_motor_collection", classmethod(lambda cls: stats))
+
+        assert await reconcile_restaurant_stats(cutoff) == 1
+
+        assert [w._filter for w in stats.writes] == [{"restaurant_name": "Swati Snacks", "day": datetime(2025, 10, 14)}]
+        assert stats.deleted == ["stale"]
+        assert orders.pipelines[0][0]["$match"]["order_date"] == {"$lt": cutoff}
+        assert reviews.pipelines[0][0]["$match"]["review_date"] == {"$lt": cutoff}
+
+    async def test_time_buckets_rewrite_only_drifted_buckets(self, monkeypatch):
+        """Test that double-counted, missing and orphaned time buckets are repaired"""
+        hour, day = datetime(2025, 10, 14, 10), datetime(2025, 10, 14)
+
+        def grouped(bucket_start):
+            return [
+                {"_id": {"restaurant_name": "Swati Snacks", "bucket_start": bucket_start, "status": "delivered"},
+                 "count": 2, "revenue": 500.0},
+                {"_id": {"restaurant_name": "Swati Snacks", "bucket_start": bucket_start, "status": "cancelled"},
+                 "count": 1, "revenue": 250.0},
+            ]
+
+        correct = {"order_count": 2, "revenue": 500.0, "status_counts": {"delivered": 2, "cancelled": 1}}
+        orders = FakeBatchedSource([grouped(hour), grouped(day)])
+        buckets = FakeStats([
+            # A retried record_order counted one order twice
+            {"_id": "drifted", "granularity": "hour", "restaurant_name": "Swati Snacks", "bucket_start": hour,
+             "order_count": 3, "revenue": 750.0, "status_counts": {"delivered": 3, "cancelled": 1}},
+            {"_id": "orphan", "granularity": "hour", "restaurant_name": "Closed Cafe", "bucket_start": hour,
+             "order_count": 1, "revenue": 100.0, "status_counts": {"delivered": 1}},
+            {"_id": "ok", "granularity": "day", "restaurant_name": "Swati Snacks", "bucket_start": day,
+             "status_counts": {"delivered": 2, "cancelled": 1, "placed": 0}, "order_count": 2, "revenue": 500.0},
+            {"_id": "ok-all", "granularity": "day", "restaurant_name": ALL_RESTAURANTS, "bucket_start": day, **correct},
+        ])
+        monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: orders))
+        monkeypatch.setattr(OrderTimeBucket, "get_motor_collection", classmethod(lambda cls: buckets))
+
+        assert await reconcile_time_buckets(datetime(2025, 10, 15)) == 2
+
+        assert {(w._filter.get("_id"), w._filter.get("restaurant_name")) for w in buckets.writes} == {
+            ("drifted", None), (None, ALL_RESTAURANTS)
+        }
+        assert all(w._doc == {"$set": correct} for w in buckets.writes)
+        assert buckets.deleted == ["orphan"]
+
+
+class FakeOrders:
+    """Orders collection read in _id order by the backfill"""
+
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, query, projection=None):
+        id_filter = query.get("_id", {})
+        docs = [
+            doc for doc in self.docs
+            if ("$gt" not in id_filter or doc["_id"] > id_filter["$gt"])
+            and ("$lte" not in id_filter or doc["_id"] <= id_filter["$lte"])
+        ]
+        return FakeOrderCursor(docs)
+
+
+class FakeOrderCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        return FakeOrderCursor(sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0))
+
+    def limit(self, count):
+        return FakeOrderCursor(self.docs[:count])
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class FakeBucketCollection:
+    def __init__(self, database, name):
+        self.database, self.name = database, name
+        self.buckets = {}
+        self.on_write = None
+
+    async def drop(self):
+        self.buckets = {}
+
+    async def create_indexes(self, indexes):
+        self.indexes = indexes
+
+    async def bulk_write(self, requests, ordered=True):
+        if self.on_write:
+            self.on_write()
+        for request in requests:
+            key = tuple(request._filter.values())
+            bucket = self.buckets.setdefault(key, {})
+            for field, delta in request._doc["$inc"].items():
+                bucket[field] = bucket.get(field, 0) + delta
+
+    async def rename(self, new_name, dropTarget=False):
+        assert dropTarget
+        self.database.collections[new_name] = self
+        self.name = new_name
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeBucketCollection(self, name))
+
+
+def backfill_order(restaurant_name, hour, status="delivered"):
+    return {"_id": ObjectId(), "restaurant_name": restaurant_name, "order_date": datetime(2025, 10, 16, hour),
+            "total_price": 100.0, "status": status}
+
+
+@pytest.mark.unit
+class TestBackfill:
+    """Test the time-series rebuild"""
+
+    async def test_rebuild_swaps_in_and_catches_up(self, monkeypatch):
+        """Test that the old buckets serve reads until the swap and orders placed meanwhile are counted"""
+        database = FakeDatabase()
+        live = database["order_time_buckets"]
+        live.buckets = {("day", "*", datetime(2025, 10, 16)): {"order_count": 99}}
+        orders = FakeOrders([backfill_order("Swati Snacks", 9), backfill_order("Swati Snacks", 10, "cancelled")])
+        archived = FakeOrders([backfill_order("Sankalp", 9)])
+        late = backfill_order("Sankalp", 11)
+
+        def place_order_during_rebuild():
+            assert live.buckets  # still serving the old buckets
+            if late not in orders.docs:
+                orders.docs.append(late)
+
+        scratch = database["order_time_buckets_rebuild"]
+        scratch.on_write = place_order_during_rebuild
+        monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: orders))
+        monkeypatch.setattr(ArchivedOrder, "get_motor_collection", classmethod(lambda cls: archived))
+        monkeypatch.setattr(OrderTimeBucket, "get_motor_collection", classmethod(lambda cls: live))
+
+        assert await backfill_time_buckets(batch_size=1) == 4
+
+        rebuilt = database.collections["order_time_buckets"]
+        assert rebuilt is scratch
+        assert rebuilt.indexes == OrderTimeBucket.Settings.indexes
+        assert rebuilt.buckets[("day", "*", datetime(2025, 10, 16))] == {
+            "order_count": 3, "revenue": 300.0, "status_counts.delivered": 3, "status_counts.cancelled": 1
+        }
+        assert rebuilt.buckets[("hour", "Sankalp", datetime(2025, 10, 16, 11))]["order_count"] == 1
@@ -0,0 +1,138 @@
+"""
+Unit Tests for Server-Timing
+Tests the phase breakdown, the header and that disabled requests are untouched
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app import server_timing
+from app.server_timing import Timings, phase
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+
+
+def parse_header(value):
+    durations = {}
+    for part in value.split(","):
+        name, dur = part.strip().split(";dur=")
+        durations[name] = float(dur)
+    return durations
+
+
+def make_app(sample_rate=0.0, token="secret"):
+    app = FastAPI(default_response_class=server_timing.TimedJSONResponse)
+    app.router.route_class = server_timing.TimedRoute
+    app.add_middleware(server_timing.ServerTimingMiddleware, sample_rate=sample_rate, token=token)
+
+    async def fake_user():
+        with phase("auth"):
+            await asyncio.sleep(0.01)
+            return "alice"
+
+    @app.get("/items", response_model=list[Item])
+    async def list_items(user: str = Depends(fake_user)):
+        await asyncio.sleep(0.01)
+        # A query as reported by the command listener
+        time.sleep(0.01)
+        server_timing.CommandTimer().succeeded(SimpleNamespace(duration_micros=10_000))
+        return [{"name": f"item {i}", "price": i} for i in range(200)]
+
+    @app.get("/sync")
+    def sync_endpoint():
+        time.sleep(0.005)
+        return {"ok": True}
+
+    return app
+
+
+@pytest.mark.unit
+class TestTimings:
+    """Test the phase timer"""
+
+    def test_nested_phases_partition_the_total(self):
+        """Test that nested phases and db time are not double counted"""
+        now = [0.0]
+        timings = Timings(clock=lambda: now[0])
+        now[0] = 1.0
+        timings.begin("handler")
+        now[0] = 3.0
+        timings.add_db(1.5)
+        timings.begin("validate")
+        now[0] = 4.0
+        timings.end("handler")  # also closes validate
+        now[0] = 5.0
+
+        total = timings.finish()
+
+        assert total == 5.0
+        assert timings.durations["validate"] == 1.0
+        assert timings.durations["db"] == 1.5
+        assert timings.durations["handler"] == 0.5
+        assert timings.durations["other"] == 2.0
+        assert sum(timings.durations.values()) == pytest.approx(total)
+
+    def test_concurrent_queries_are_capped_at_wall_time(self):
+        """Test that overlapping queries cannot push the phases past the total"""
+        now = [0.0]
+        timings = Timings(clock=lambda: now[0])
+        timings.begin("handler")
+        timings.add_db(1.0)
+        timings.add_db(1.0)
+        now[0] = 1.0
+        timings.end("handler")
+
+        assert timings.finish() == 1.0
+        assert timings.durations["db"] == 1.0
+        assert sum(timings.durations.values()) == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+class TestMiddleware:
+    """Test the Server-Timing header"""
+
+    def test_phases_add_up_to_total(self):
+        """Test that every phase is reported and the phases add up to the total"""
+        client = TestClient(make_app())
+
+        response = client.get("/items", headers={"X-Server-Timing": "secret"})
+
+        assert response.status_code == 200
+        durations = parse_header(response.headers["server-timing"])
+        for name in ("auth", "db", "handler", "validate", "encode"):
+            assert durations[name] > 0, name
+        assert durations["auth"] >= 9
+        assert durations["db"] >= 9
+        total = durations.pop("total")
+        # Each phase is rounded to 0.01ms in the header
+        assert sum(durations.values()) == pytest.approx(total, abs=0.01 * len(durations))
+
+    def test_sync_endpoint(self):
+        """Test that endpoints run in the threadpool are timed too"""
+        client = TestClient(make_app(sample_rate=1.0))
+
+        durations = parse_header(client.get("/sync").headers["server-timing"])
+
+        assert durations["handler"] >= 4
+
+    def test_disabled_without_header_or_sampling(self):
+        """Test that unsampled requests and wrong tokens get no header"""
+        client = TestClient(make_app())
+
+        assert "server-timing" not in client.get("/items").headers
+        assert "server-timing" not in client.get("/items", headers={"X-Server-Timing": "guess"}).headers
+
+    def test_no_token_means_header_is_ignored(self):
+        """Test that the debug header does nothing when no token is configured"""
+        client = TestClient(make_app(token=None))
+
+        assert "server-timing" not in client.get("/items", headers={"X-Server-Timing": ""}).headers
@@ -0,0 +1,123 @@
+"""
+Unit Tests for Structured Logging
+Tests JSON output, request correlation, per-level sampling and queue overflow
+"""
+
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from app import structured_logging
+from app.structured_logging import DroppingQueueHandler, SamplingFilter, parse_sample_rates
+
+
+@pytest.fixture
+def log_output():
+    """Structured logging writing to a buffer; flushed before the test reads it"""
+    stream = io.StringIO()
+    structured_logging.setup_logging(stream=stream, level="DEBUG", sample_rates="INFO=1")
+    yield stream
+    structured_logging.shutdown_logging()
+
+
+def read_lines(stream):
+    structured_logging.shutdown_logging()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def make_record(level=logging.INFO, msg="event", args=None):
+    return logging.LogRecord("food_api.test", level, __file__, 1, msg, args, None)
+
+
+@pytest.mark.unit
+class TestJsonOutput:
+    """Test the formatted records"""
+
+    def test_record_carries_request_id_and_fields(self, log_output):
+        """Test that records are JSON with the request id and structured fields"""
+        token = structured_logging.request_id_var.set("req-123")
+        try:
+            structured_logging.get_logger("api").info("order_created", extra={"fields": {"order_id": "abc", "item_count": 2}})
+        finally:
+            structured_logging.request_id_var.reset(token)
+
+        [entry] = read_lines(log_output)
+
+        assert entry["message"] == "order_created"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "food_api.api"
+        assert entry["request_id"] == "req-123"
+        assert entry["order_id"] == "abc"
+        assert entry["item_count"] == 2
+
+    def test_args_are_merged_at_call_time(self, log_output):
+        """Test that mutable arguments are rendered before they reach the queue"""
+        items = ["pizza"]
+        structured_logging.get_logger("api").info("items: %s", items)
+        items.append("burger")
+
+        [entry] = read_lines(log_output)
+
+        assert entry["message"] == "items: ['pizza']"
+
+    def test_exceptions_are_included(self, log_output):
+        """Test that exc_info is formatted into the record"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            structured_logging.get_logger("api").error("order_insert_failed", exc_info=True)
+
+        [entry] = read_lines(log_output)
+
+        assert "ValueError: boom" in entry["exception"]
+
+
+@pytest.mark.unit
+class TestSampling:
+    """Test per-level sampling"""
+
+    def test_parse_sample_rates(self):
+        """Test that rates are parsed per level and clamped"""
+        rates = parse_sample_rates("DEBUG=0, info=0.25, WARNING=7, bogus=1, junk")
+
+        assert rates == {logging.DEBUG: 0.0, logging.INFO: 0.25, logging.WARNING: 1.0}
+
+    def test_unlisted_levels_are_kept(self):
+        """Test that levels without a rate are never sampled out"""
+        sampling = SamplingFilter({logging.DEBUG: 0.0})
+
+        assert sampling.filter(make_record(logging.DEBUG)) is False
+        assert sampling.filter(make_record(logging.ERROR)) is True
+
+    def test_decision_is_consistent_within_a_request(self):
+        """Test that every line of a request is kept or dropped together"""
+        sampling = SamplingFilter({logging.INFO: 0.5})
+        kept = 0
+        for index in range(200):
+            token = structured_logging.request_id_var.set(f"req-{index}")
+            try:
+                decisions = {sampling.filter(make_record()) for _ in range(5)}
+            finally:
+                structured_logging.request_id_var.reset(token)
+            assert len(decisions) == 1
+            kept += decisions.pop()
+
+        assert 50 < kept < 150
+
+
+@pytest.mark.unit
+class TestQueue:
+    """Test the non-blocking queue handler"""
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that records beyond the queue size are counted as dropped"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+
+        for _ in range(5):
+            handler.handle(make_record())
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
@@ -0,0 +1,280 @@
+"""
+Unit Tests for the Task Queue
+Tests background execution, retries, backpressure and shutdown drain
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app import rollups, structured_logging, task_queue
+from app.models import ArchivedOrder, Order, Review, RestaurantDailyStats
+from app.task_queue import Job, TaskQueue
+
+
+def make_queue(**options):
+    options = {"backend": "local", "maxsize": 100, "workers": 2, "max_attempts": 3, "retry_base_seconds": 0, **options}
+    return TaskQueue(**options)
+
+
+@pytest.mark.unit
+class TestTaskQueue:
+    """Test queueing, retries and lifecycle"""
+
+    async def test_runs_inline_when_not_started(self):
+        """Test that jobs run immediately when the queue has no workers"""
+        queue = make_queue()
+        calls = []
+
+        @queue.task("note")
+        async def note(value):
+            calls.append(value)
+
+        await queue.enqueue("note", value=1)
+        assert calls == [1]
+
+    async def test_runs_in_background_after_start(self):
+        """Test that enqueue returns before the job runs"""
+        queue = make_queue()
+        release = asyncio.Event()
+        calls = []
+
+        @queue.task("note")
+        async def note(value):
+            await release.wait()
+            calls.append(value)
+
+        await queue.start()
+        await queue.enqueue("note", value=1)
+        assert calls == []
+        release.set()
+        await queue.stop(timeout=1)
+        assert calls == [1]
+
+    async def test_unknown_task(self):
+        """Test that enqueueing an unregistered task is a programming error"""
+        with pytest.raises(KeyError):
+            await make_queue().enqueue("missing")
+
+    async def test_request_id_propagates(self):
+        """Test that the job sees the request id of the request that queued it"""
+        queue = make_queue()
+        seen = []
+
+        @queue.task("note")
+        async def note():
+            seen.append(structured_logging.request_id_var.get())
+
+        await queue.start()
+        token = structured_logging.request_id_var.set("req-42")
+        try:
+            await queue.enqueue("note")
+        finally:
+            structured_logging.request_id_var.reset(token)
+        await queue.stop(timeout=1)
+        assert seen == ["req-42"]
+
+    async def test_retries_until_success(self):
+        """Test that a failing job is retried"""
+        queue = make_queue()
+        attempts = []
+
+        @queue.task("flaky")
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("database hiccup")
+
+        await queue.start()
+        await queue.enqueue("flaky")
+        await queue.stop(timeout=1)
+        assert len(attempts) == 3
+
+    async def test_gives_up_after_max_attempts(self):
+        """Test that a job that always fails stops after max_attempts without raising"""
+        queue = make_queue(max_attempts=2)
+        attempts = []
+
+        @queue.task("broken")
+        async def broken():
+            attempts.append(1)
+            raise RuntimeError("always")
+
+        await queue.start()
+        await queue.enqueue("broken")
+        await queue.stop(timeout=1)
+        assert len(attempts) == 2
+
+    async def test_inline_failure_does_not_raise(self):
+        """Test that a failing inline job is logged, not raised into the caller"""
+        queue = make_queue()
+
+        @queue.task("broken")
+        async def broken():
+            raise RuntimeError("always")
+
+        await queue.enqueue("broken")
+
+    async def test_full_queue_applies_backpressure(self):
+        """Test that enqueue waits while the queue is at capacity"""
+        queue = make_queue(maxsize=1, workers=1)
+        release = asyncio.Event()
+
+        @queue.task("slow")
+        async def slow():
+            await release.wait()
+
+        await queue.start()
+        await queue.enqueue("slow")
+        await asyncio.sleep(0)  # the worker takes the first job
+        await queue.enqueue("slow")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(queue.enqueue("slow"), timeout=0.05)
+        release.set()
+        await queue.stop(timeout=1)
+
+    async def test_stop_drains_queued_jobs(self):
+        """Test that shutdown finishes queued work and later jobs run inline"""
+        queue = make_queue(workers=1)
+        calls = []
+
+        @queue.task("note")
+        async def note(value):
+            await asyncio.sleep(0)
+            calls.append(value)
+
+        await queue.start()
+        for value in range(5):
+            await queue.enqueue("note", value=value)
+        await queue.stop(timeout=1)
+        assert calls == [0, 1, 2, 3, 4]
+
+        await queue.enqueue("note", value=5)
+        assert calls[-1] == 5
+
+    async def test_drain_timeout_cancels_hung_job(self):
+        """Test that stop gives up on a job that never finishes"""
+        queue = make_queue(workers=1)
+
+        @queue.task("hang")
+        async def hang():
+            await asyncio.Event().wait()
+
+        await queue.start()
+        await queue.enqueue("hang")
+        await asyncio.wait_for(queue.stop(timeout=0.05), timeout=1)
+
+    async def test_redis_unreachable_falls_back_to_local(self, monkeypatch):
+        """Test that the queue works in-process when Redis cannot be reached"""
+        pytest.importorskip("redis")
+        monkeypatch.setattr(task_queue, "TASK_QUEUE_REDIS_URL", "redis://127.0.0.1:1/0")
+        queue = make_queue(backend="redis")
+        calls = []
+
+        @queue.task("note")
+        async def note():
+            calls.append(1)
+
+        await queue.start()
+        assert queue._redis is None
+        await queue.enqueue("note")
+        await queue.stop(timeout=1)
+        assert calls == [1]
+
+    def test_job_round_trip(self):
+        """Test that jobs serialize for the Redis Stream"""
+        job = Job.loads(Job("note", {"value": [1, "a"]}, attempts=2, request_id="req-1").dumps(), "1-0")
+        assert (job.name, job.kwargs, job.attempts, job.request_id, job.message_id) == (
+            "note", {"value": [1, "a"]}, 2, "req-1", "1-0"
+        )
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.updates = []
+
+    async def find_one(self, query, projection=None):
+        for document in self.documents:
+            if all(document.get(key) == value for key, value in query.items()):
+                return document
+        return None
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update))
+
+
+class FlakyCollection(FakeCollection):
+    """Fails the first `failures` writes, like a primary stepping down"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def update_one(self, query, update, upsert=False):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("not primary")
+        await super().update_one(query, update, upsert)
+
+
+@pytest.mark.unit
+class TestPostCommitTasks:
+    """Test the registered follow-up tasks"""
+
+    async def test_record_review_parses_date(self, monkeypatch):
+        """Test that the review rollup receives the review date as a datetime"""
+        calls = []
+
+        async def record_review(*args):
+            calls.append(args)
+
+        monkeypatch.setattr(rollups, "record_review", record_review)
+        await task_queue.record_review("Swati Snacks", "2026-10-19T08:30:00", 4, 1)
+        assert calls == [("Swati Snacks", datetime(2026, 10, 19, 8, 30), 4, 1)]
+
+    async def test_failed_rollup_write_is_retried(self, monkeypatch):
+        """Test that a rollup write that fails is retried instead of dropped"""
+        stats = FlakyCollection(failures=2)
+        monkeypatch.setattr(RestaurantDailyStats, "get_motor_collection", classmethod(lambda cls: stats))
+        queue = make_queue()
+        queue.task("record_review")(task_queue.record_review)
+
+        await queue.start()
+        await queue.enqueue(
+            "record_review", restaurant_name="Swati Snacks", review_date="2026-10-19T08:30:00",
+            rating_delta=4, count_delta=1
+        )
+        await queue.stop(timeout=1)
+
+        assert stats.updates == [(
+            {"restaurant_name": "Swati Snacks", "day": datetime(2026, 10, 19)},
+            {"$inc": {"rating_sum": 4, "review_count": 1}}
+        )]
+
+    @pytest.mark.parametrize("hot, archived, verified", [
+        (True, False, True),
+        (False, True, True),
+        (False, False, False),
+    ])
+    async def test_verify_purchase(self, monkeypatch, hot, archived, verified):
+        """Test that reviews by customers of the restaurant, recent or long-time, are marked verified"""
+        user_id, review_id = ObjectId(), ObjectId()
+
+        def history(present):
+            return FakeCollection(
+                [{"_id": ObjectId(), "user_id": user_id, "restaurant_name": "Swati Snacks"}] if present else []
+            )
+
+        orders, archived_orders = history(hot), history(archived)
+        reviews = FakeCollection()
+        monkeypatch.setattr(Order, "get_motor_collection", classmethod(lambda cls: orders))
+        monkeypatch.setattr(ArchivedOrder, "get_motor_collection", classmethod(lambda cls: archived_orders))
+        monkeypatch.setattr(Review, "get_motor_collection", classmethod(lambda cls: reviews))
+
+        await task_queue.verify_purchase(str(review_id), str(user_id), "Swati Snacks")
+
+        expected = [({"_id": review_id}, {"$set": {"is_verified_purchase": True}})] if verified else []
+        assert reviews.updates == expected
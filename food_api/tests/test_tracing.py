@@ -0,0 +1,188 @@
+"""
+Unit Tests for Tracing
+Tests traceparent handling, server spans, MongoDB command spans and export
+"""
+
+import importlib
+import inspect
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import tracing
+from app.tracing import CommandTracer, FileExporter, TracingMiddleware, parse_traceparent
+
+AGENT_DIR = Path(__file__).resolve().parents[2] / "food_chatbot_agent"
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class Collector:
+    """Stands in for the batch processor, keeping finished spans."""
+
+    def __init__(self):
+        self.spans = []
+
+    def submit(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    collector = Collector()
+    monkeypatch.setattr(tracing, "processor", collector)
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    return collector
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, enabled=True)
+
+    @app.get("/restaurants/{name}")
+    async def get_restaurant(name: str):
+        # A query issued by the handler, as the command listener sees it
+        listener = CommandTracer()
+        listener.started(SimpleNamespace(
+            command_name="find", command={"find": "restaurants", "filter": {"name": name}},
+            connection_id=("db", 27017), request_id=1
+        ))
+        listener.succeeded(SimpleNamespace(
+            command_name="find", connection_id=("db", 27017), request_id=1,
+            duration_micros=1500, database_name="food_db"
+        ))
+        return {"name": name, "traceparent": tracing.current_span().traceparent}
+
+    return app
+
+
+@pytest.mark.unit
+class TestTraceparent:
+    """Test W3C traceparent parsing"""
+
+    def test_valid_header(self):
+        """Test that a valid header yields trace id, parent id and the sampled flag"""
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+        assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00") == (TRACE_ID, PARENT_ID, False)
+
+    @pytest.mark.parametrize("value", [
+        None, "", "garbage", f"ff-{TRACE_ID}-{PARENT_ID}-01",
+        f"00-{'0' * 32}-{PARENT_ID}-01", f"00-{TRACE_ID}-{'0' * 16}-01", f"00-{TRACE_ID[:-1]}-{PARENT_ID}-01",
+    ])
+    def test_invalid_header(self, value):
+        """Test that malformed or all-zero headers are ignored"""
+        assert parse_traceparent(value) is None
+
+
+@pytest.mark.unit
+class TestServerSpans:
+    """Test request and query spans"""
+
+    def test_continues_caller_trace(self, collector):
+        """Test that the server span joins the caller's trace and the query is its child"""
+        client = TestClient(make_app())
+
+        response = client.get("/restaurants/Pizza", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+        assert response.status_code == 200
+        server, = [span for span in collector.spans if span.kind == "server"]
+        query, = [span for span in collector.spans if span.kind == "client"]
+        assert server.trace_id == TRACE_ID
+        assert server.parent_id == PARENT_ID
+        assert server.name == "GET /restaurants/{name}"
+        assert server.attributes["http.status_code"] == 200
+        assert query.parent_id == server.span_id
+        assert query.name == "mongodb.find"
+        assert query.attributes["db.mongodb.collection"] == "restaurants"
+        assert query.end_ns - query.start_ns == 1_500_000
+        # The filter (user data) is never recorded
+        assert "Pizza" not in json.dumps(query.to_dict())
+
+    def test_unsampled_caller_records_nothing(self, collector):
+        """Test that an unsampled parent keeps the trace id but exports no spans"""
+        client = TestClient(make_app())
+
+        response = client.get("/restaurants/Pizza", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+
+        assert response.json()["traceparent"].startswith(f"00-{TRACE_ID}-")
+        assert response.json()["traceparent"].endswith("-00")
+        assert collector.spans == []
+
+    def test_root_sampling(self, collector, monkeypatch):
+        """Test that requests without a traceparent start a new trace at the sample rate"""
+        client = TestClient(make_app())
+        monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 1.0)
+
+        client.get("/restaurants/Pizza")
+
+        server, = [span for span in collector.spans if span.kind == "server"]
+        assert server.parent_id is None
+        assert len(server.trace_id) == 32
+
+
+@pytest.mark.unit
+class TestExport:
+    """Test the exporters"""
+
+    def test_file_exporter_writes_jsonl(self, tmp_path):
+        """Test that spans are appended one JSON object per line"""
+        span = tracing.Span("work", TRACE_ID, PARENT_ID, True)
+        span.end_ns = span.start_ns + 2_000_000
+        exporter = FileExporter(str(tmp_path / "logs" / "traces.jsonl"))
+
+        exporter.export([span, span])
+
+        lines = (tmp_path / "logs" / "traces.jsonl").read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[0])["duration_ms"] == 2.0
+
+    def test_batch_processor_flushes_on_shutdown(self):
+        """Test that buffered spans are exported when the processor shuts down"""
+        exported = []
+        processor = tracing.BatchProcessor(SimpleNamespace(export=exported.extend), interval_seconds=60)
+        span = tracing.Span("work", TRACE_ID, None, True)
+
+        processor.submit(span)
+        processor.shutdown()
+
+        assert exported == [span]
+
+
+def source(module, name):
+    obj = module
+    for part in name.split("."):
+        obj = getattr(obj, part)
+    if isinstance(obj, property):
+        obj = obj.fget
+    return inspect.getsource(obj)
+
+
+@pytest.fixture
+def agent_tracing(monkeypatch):
+    """The agent's tracing module (food_chatbot_agent/tracing.py)"""
+    monkeypatch.syspath_prepend(str(AGENT_DIR))
+    return importlib.import_module("tracing")
+
+
+@pytest.mark.unit
+class TestAgentCopy:
+    """Test that the agent's copy of the span core has not drifted"""
+
+    @pytest.mark.parametrize("name", [
+        "parse_traceparent",
+        "current_span",
+        "span",
+        "Span.traceparent",
+        "Span.set_attribute",
+        "FileExporter.export",
+        "OtlpHttpExporter._span",
+        "BatchProcessor",
+    ])
+    def test_shared_code_is_identical(self, agent_tracing, name):
+        """Test that the shared tracing code is the same in both services"""
+        assert source(agent_tracing, name) == source(tracing, name)
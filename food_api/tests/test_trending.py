@@ -0,0 +1,113 @@
+"""
+Unit Tests for Trending Counters
+Tests the count-min sketch, sliding-window expiry and top-K ranking
+"""
+
+import pytest
+from app.trending import CountMinSketch, SlidingWindowTopK, TrendingTracker
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+class TestCountMinSketch:
+    """Test suite for CountMinSketch"""
+
+    def test_never_undercounts(self):
+        """Test that estimates are at least the true count"""
+        sketch = CountMinSketch(width=64, depth=4)
+        truth = {f"dish-{i}": i + 1 for i in range(200)}
+        for key, count in truth.items():
+            sketch.add(key, count)
+
+        assert all(sketch.estimate(key) >= count for key, count in truth.items())
+
+    def test_exact_when_sparse(self):
+        """Test exact counts when there are few keys"""
+        sketch = CountMinSketch()
+        sketch.add("Pani Puri", 3)
+        sketch.add("Pani Puri")
+
+        assert sketch.estimate("Pani Puri") == 4
+        assert sketch.estimate("Dhokla") == 0
+
+    def test_memory_is_fixed(self):
+        """Test that the table size does not depend on the number of keys"""
+        sketch = CountMinSketch(width=128, depth=4)
+        for i in range(10_000):
+            sketch.add(f"key-{i}")
+
+        assert sketch.table.shape == (4, 128)
+
+
+@pytest.mark.unit
+class TestSlidingWindowTopK:
+    """Test suite for SlidingWindowTopK"""
+
+    def test_ranks_heaviest_keys_first(self):
+        """Test top-K ordering"""
+        window = SlidingWindowTopK(bucket_seconds=60, bucket_count=60, clock=FakeClock())
+        window.add("Dhokla", 5)
+        window.add("Pani Puri", 9)
+        window.add("Thepla", 1)
+
+        assert window.top(2) == [("Pani Puri", 9), ("Dhokla", 5)]
+
+    def test_counts_accumulate_across_buckets(self):
+        """Test that all live buckets contribute to the window"""
+        clock = FakeClock()
+        window = SlidingWindowTopK(bucket_seconds=60, bucket_count=60, clock=clock)
+        window.add("Dhokla", 2)
+        clock.now += 30 * 60
+        window.add("Dhokla", 3)
+
+        assert window.top(1) == [("Dhokla", 5)]
+
+    def test_old_buckets_expire(self):
+        """Test that counts older than the window are dropped"""
+        clock = FakeClock()
+        window = SlidingWindowTopK(bucket_seconds=60, bucket_count=60, clock=clock)
+        window.add("Dhokla", 10)
+        clock.now += 61 * 60
+        window.add("Pani Puri", 1)
+
+        assert window.top(5) == [("Pani Puri", 1)]
+
+    def test_candidates_are_bounded(self):
+        """Test that each bucket keeps only `capacity` heavy hitters"""
+        window = SlidingWindowTopK(bucket_seconds=60, bucket_count=1, capacity=3, clock=FakeClock())
+        for i in range(100):
+            window.add(f"rare-{i}")
+        window.add("popular", 50)
+
+        top = window.top(3)
+        assert top[0] == ("popular", 50)
+        assert len(window._buckets[0].candidates) == 3
+
+
+@pytest.mark.unit
+class TestTrendingTracker:
+    """Test suite for TrendingTracker"""
+
+    def test_records_items_by_quantity_and_restaurants_by_order(self):
+        """Test how orders feed the item and restaurant counters"""
+        tracker = TrendingTracker(clock=FakeClock())
+        tracker.record_order("Swati Snacks", [("Pani Puri", 3), ("Bhel Puri", 1)])
+        tracker.record_order("Swati Snacks", [("Pani Puri", 1)])
+        tracker.record_order("Agashiye", [("Gujarati Thali", 1)])
+
+        result = tracker.top("24h", limit=2)
+
+        assert result["items"] == [
+            {"restaurant_name": "Swati Snacks", "item_name": "Pani Puri", "order_count": 4},
+            {"restaurant_name": "Agashiye", "item_name": "Gujarati Thali", "order_count": 1},
+        ]
+        assert result["restaurants"][0] == {"restaurant_name": "Swati Snacks", "order_count": 2}
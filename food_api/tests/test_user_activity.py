@@ -0,0 +1,44 @@
+"""
+Unit Tests for the Admin User-Activity Aggregation
+Tests the shape of the single-aggregation pipeline (no N+1 queries)
+"""
+
+import pytest
+from app.user_activity import build_user_activity_pipeline, SORT_OPTIONS
+
+
+@pytest.mark.unit
+class TestUserActivityPipeline:
+    """Test suite for build_user_activity_pipeline"""
+
+    def test_joins_orders_on_indexed_user_id(self):
+        """Test that hot and archived orders are joined in-database on user_id"""
+        pipeline = build_user_activity_pipeline("spend", 1, 20)
+        lookups = [stage["$lookup"] for stage in pipeline if "$lookup" in stage]
+
+        assert [lookup["from"] for lookup in lookups] == ["orders", "orders_archive"]
+        for lookup in lookups:
+            assert lookup["localField"] == "_id"
+            assert lookup["foreignField"] == "user_id"
+
+    def test_password_hash_is_projected_out(self):
+        """Test that hashed passwords never enter the pipeline output"""
+        pipeline = build_user_activity_pipeline("spend", 1, 20)
+
+        assert "hashed_password" not in pipeline[0]["$project"]
+
+    @pytest.mark.parametrize("sort_by", list(SORT_OPTIONS))
+    def test_sort_option_is_applied(self, sort_by):
+        """Test that each sort option maps to a $sort stage"""
+        pipeline = build_user_activity_pipeline(sort_by, 1, 20)
+        sorts = [stage["$sort"] for stage in pipeline if "$sort" in stage]
+
+        assert sorts == [SORT_OPTIONS[sort_by]]
+
+    def test_pagination_skips_previous_pages(self):
+        """Test that page 3 of 25 skips the first 50 users"""
+        pipeline = build_user_activity_pipeline("recency", 3, 25)
+        facet = pipeline[-1]["$facet"]
+
+        assert facet["items"] == [{"$skip": 50}, {"$limit": 25}]
+        assert facet["total"] == [{"$count": "count"}]
@@ -25,8 +25,13 @@ import os
 import requests
 from dotenv import load_dotenv
 import json
+import time
+import uuid
 from typing import Dict, Any, Optional, List
 
+import tracing
+import profiling
+
 try:
     import google.generativeai as genai  # type: ignore[import]
 except ImportError:
@@ -37,6 +42,7 @@ load_dotenv()
 
 # Configure Google Gemini AI
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
 if not GOOGLE_API_KEY:
     print("⚠️  WARNING: GOOGLE_API_KEY not found in environment variables")
     print("   AI functionality will be limited")
@@ -48,6 +54,15 @@ elif genai:
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:5173", "http://localhost:5174", "http://localhost:3000"])
 
+# ==================== TRACING ====================
+# Each /chat turn is a trace; backend calls carry its traceparent and X-Request-ID
+tracing.instrument_flask(app)
+http = tracing.TracedSession()
+
+# ==================== PROFILING ====================
+# Admin-only CPU/allocation profiles of the live agent (off unless PROFILING_ENABLED and PROFILING_TOKEN are set)
+profiling.register_routes(app)
+
 # ==================== OLLAMA CONFIGURATION ====================
 # Local AI model - runs entirely on your machine!
 # No API keys, no billing, completely free!
@@ -65,6 +80,13 @@ print(f"⚙️  AI Mode: {'LOCAL OLLAMA' if USE_OLLAMA else 'GOOGLE GEMINI'}")
 
 # API Configuration
 FASTAPI_BASE_URL = os.getenv("FASTAPI_BASE_URL", "http://localhost:8000")
+# Orders carry an Idempotency-Key, so a timed-out attempt can be retried safely.
+# The timeout must outlast the API's 8s order budget (QUERY_BUDGET_ORDER_MS),
+# which also bounds how long a retry waits for the original attempt; a shorter
+# timeout just times the retry out again
+ORDER_REQUEST_TIMEOUT = float(os.getenv("ORDER_REQUEST_TIMEOUT", "12"))
+ORDER_MAX_ATTEMPTS = int(os.getenv("ORDER_MAX_ATTEMPTS", "3"))
+ORDER_RETRY_BACKOFF_SECONDS = float(os.getenv("ORDER_RETRY_BACKOFF_SECONDS", "1"))
 
 # ==================== SESSION STORAGE ====================
 # HIGH-001 SECURITY CONCERN: In-memory storage is NOT production-ready!
@@ -125,6 +147,7 @@ if redis_available:
         redis_client = None
 
 # Redis Helper Functions
+@tracing.traced("redis.save")
 def save_to_redis(user_id: str, key: str, value: Any, ttl: int = 600):
     """
     Save data to Redis with TTL (Time To Live).
@@ -159,6 +182,7 @@ def save_to_redis(user_id: str, key: str, value: Any, ttl: int = 600):
         pending_orders[fallback_key] = value
         return True
 
+@tracing.traced("redis.get")
 def get_from_redis(user_id: str, key: str, default: Any = None) -> Any:
     """
     Retrieve data from Redis.
@@ -186,6 +210,7 @@ def get_from_redis(user_id: str, key: str, default: Any = None) -> Any:
         fallback_key = f"{user_id}:{key}"
         return pending_orders.get(fallback_key, default)
 
+@tracing.traced("redis.delete")
 def delete_from_redis(user_id: str, key: Optional[str] = None):
     """
     Delete data from Redis.
@@ -487,6 +512,7 @@ tools = genai.protos.Tool(function_declarations=function_declarations)
 
 # ==================== API HELPER FUNCTIONS ====================
 
+@tracing.traced("tool.get_all_restaurants")
 def get_all_restaurants() -> str:
     """
     Fetch all restaurants from FastAPI.
@@ -495,7 +521,7 @@ def get_all_restaurants() -> str:
     The AI MUST display every single restaurant returned - NO truncation allowed!
     """
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/")
         if response.status_code == 200:
             restaurants = response.json()
             if not restaurants:
@@ -524,6 +550,7 @@ def get_all_restaurants() -> str:
         return f"❌ Error connecting to restaurant service: {str(e)}"
 
 
+@tracing.traced("tool.get_restaurant_by_name")
 def get_restaurant_by_name(name: str, user_id: str = "guest") -> str:
     """
     Get specific restaurant by name.
@@ -533,7 +560,7 @@ def get_restaurant_by_name(name: str, user_id: str = "guest") -> str:
     when the user previously asked about a specific restaurant.
     """
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/{name}")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/{name}")
         if response.status_code == 200:
             restaurant = response.json()
             
@@ -569,11 +596,12 @@ def get_restaurant_by_name(name: str, user_id: str = "guest") -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.search_restaurants_by_cuisine")
 def search_restaurants_by_cuisine(cuisine: str) -> str:
     """Search restaurants by cuisine type using the new backend API"""
     try:
         # Use the cuisine query parameter (case-insensitive)
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/", params={"cuisine": cuisine})
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/", params={"cuisine": cuisine})
         if response.status_code == 200:
             restaurants = response.json()
             
@@ -593,6 +621,7 @@ def search_restaurants_by_cuisine(cuisine: str) -> str:
         return f"❌ Error connecting to restaurant service: {str(e)}"
 
 
+@tracing.traced("tool.search_restaurants_by_item")
 def search_restaurants_by_item(item_name: str) -> str:
     """
     Search for restaurants that serve a specific menu item.
@@ -609,7 +638,7 @@ def search_restaurants_by_item(item_name: str) -> str:
     """
     try:
         # Call the new FastAPI endpoint with proper error handling
-        response = requests.get(
+        response = http.get(
             f"{FASTAPI_BASE_URL}/search/items",
             params={"item_name": item_name},
             timeout=5  # 5 second timeout to prevent hanging
@@ -661,6 +690,7 @@ def search_restaurants_by_item(item_name: str) -> str:
 # ==================== GRANULAR TOOLS (V4.0 ENHANCEMENT) ====================
 # These focused tools make queries more efficient by returning only what's needed
 
+@tracing.traced("tool.get_menu")
 def get_menu(restaurant_name: str, user_id: str = "guest") -> str:
     """
     Get ONLY the menu for a specific restaurant.
@@ -674,7 +704,7 @@ def get_menu(restaurant_name: str, user_id: str = "guest") -> str:
         Formatted menu items with prices
     """
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}")
         if response.status_code == 200:
             restaurant = response.json()
             
@@ -702,6 +732,7 @@ def get_menu(restaurant_name: str, user_id: str = "guest") -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.get_restaurant_location")
 def get_restaurant_location(restaurant_name: str, user_id: str = "guest") -> str:
     """
     Get ONLY the location/area for a specific restaurant.
@@ -715,7 +746,7 @@ def get_restaurant_location(restaurant_name: str, user_id: str = "guest") -> str
         Location information
     """
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}")
         if response.status_code == 200:
             restaurant = response.json()
             
@@ -724,7 +755,13 @@ def get_restaurant_location(restaurant_name: str, user_id: str = "guest") -> str
             
             result = f"📍 **{restaurant['name']}**\n"
             result += f"Location: {restaurant['area']}, Ahmedabad\n\n"
-            result += "🚗 Need directions? Search for this address on Google Maps!"
+            location = restaurant.get('location')
+            if location:
+                # GeoJSON order: [longitude, latitude]
+                longitude, latitude = location['coordinates']
+                result += f"🗺️ Map: https://www.google.com/maps/search/?api=1&query={latitude},{longitude}"
+            else:
+                result += "🚗 Need directions? Search for this address on Google Maps!"
             return result
         elif response.status_code == 404:
             return f"😔 Restaurant '{restaurant_name}' not found."
@@ -734,6 +771,7 @@ def get_restaurant_location(restaurant_name: str, user_id: str = "guest") -> str
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.get_restaurant_cuisine")
 def get_restaurant_cuisine(restaurant_name: str, user_id: str = "guest") -> str:
     """
     Get ONLY the cuisine type for a specific restaurant.
@@ -746,7 +784,7 @@ def get_restaurant_cuisine(restaurant_name: str, user_id: str = "guest") -> str:
         Cuisine information
     """
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}")
         if response.status_code == 200:
             restaurant = response.json()
             
@@ -765,6 +803,7 @@ def get_restaurant_cuisine(restaurant_name: str, user_id: str = "guest") -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.prepare_order_for_confirmation")
 def prepare_order_for_confirmation(user_id: str, restaurant_name: str, items: List[Dict[str, Any]]) -> str:
     """
     V4.0: Prepare order for user confirmation.
@@ -820,6 +859,7 @@ def prepare_order_for_confirmation(user_id: str, restaurant_name: str, items: Li
         return f"❌ Error preparing order: {str(e)}\n\nPlease try again or contact support."
 
 
+@tracing.traced("tool.place_order")
 def place_order(restaurant_name: str, items: List[Dict[str, Any]], token: str) -> str:
     """
     Place an order with multiple items (NEW v2.0 API).
@@ -871,13 +911,26 @@ def place_order(restaurant_name: str, items: List[Dict[str, Any]], token: str) -
         print(f"\n✅ Items validation passed")
         print(f"🌐 Sending POST request to: {FASTAPI_BASE_URL}/orders/")
         
-        # Make the API call
-        response = requests.post(
-            f"{FASTAPI_BASE_URL}/orders/",
-            json=data,
-            headers=headers,
-            timeout=10  # Add timeout to prevent hanging
-        )
+        # Make the API call; every attempt reuses the same Idempotency-Key so a
+        # retry after a timeout returns the original order instead of a duplicate.
+        # 409 means the original attempt is still running: retry, don't reorder
+        headers["Idempotency-Key"] = str(uuid.uuid4())
+        for attempt in range(1, ORDER_MAX_ATTEMPTS + 1):
+            try:
+                response = http.post(
+                    f"{FASTAPI_BASE_URL}/orders/",
+                    json=data,
+                    headers=headers,
+                    timeout=ORDER_REQUEST_TIMEOUT
+                )
+                if response.status_code != 409 or attempt == ORDER_MAX_ATTEMPTS:
+                    break
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt == ORDER_MAX_ATTEMPTS:
+                    raise
+            backoff = ORDER_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            print(f"⏱️  Order attempt {attempt}/{ORDER_MAX_ATTEMPTS} not confirmed, retrying in {backoff}s with the same Idempotency-Key...")
+            time.sleep(backoff)
         
         print(f"\n📥 Response Status Code: {response.status_code}")
         print(f"📥 Response Headers: {dict(response.headers)}")
@@ -926,11 +979,14 @@ def place_order(restaurant_name: str, items: List[Dict[str, Any]], token: str) -
             # Validation error - provide detailed feedback
             error_detail = response.json().get('detail', 'Validation error')
             return f"❌ Order validation failed: {error_detail}\n\nPlease check your order details and try again."
+        elif response.status_code == 409:
+            # The first attempt may still commit; placing it again would duplicate it
+            return "⏳ Your order is still being processed. Please check 'Show my orders' in a moment instead of ordering again."
         else:
             error_detail = response.json().get('detail', 'Unknown error')
             return f"❌ Order failed (HTTP {response.status_code}): {error_detail}\n\nPlease try again or contact support."
     except requests.exceptions.Timeout:
-        return "⏱️ Order request timed out. Please check your connection and try again."
+        return "⏱️ Order request timed out. It may still go through, so please check 'Show my orders' before trying again."
     except requests.exceptions.ConnectionError:
         return "🔌 Cannot connect to the order service. Please ensure the backend is running."
     except Exception as e:
@@ -941,11 +997,12 @@ def place_order(restaurant_name: str, items: List[Dict[str, Any]], token: str) -
         return f"❌ Error placing order: {str(e)}\n\nPlease try again or contact support."
 
 
+@tracing.traced("tool.get_user_orders")
 def get_user_orders(token: str) -> str:
     """Get all orders for authenticated user (displays new multi-item format)"""
     try:
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(f"{FASTAPI_BASE_URL}/orders/", headers=headers)
+        response = http.get(f"{FASTAPI_BASE_URL}/orders/", headers=headers)
         
         if response.status_code == 200:
             orders = response.json()
@@ -978,6 +1035,7 @@ def get_user_orders(token: str) -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.add_review")
 def add_review(restaurant_name: str, rating: int, comment: str, token: str) -> str:
     """Submit a review for a restaurant (NEW v2.0 feature)"""
     try:
@@ -986,7 +1044,7 @@ def add_review(restaurant_name: str, rating: int, comment: str, token: str) -> s
             "rating": rating,
             "comment": comment
         }
-        response = requests.post(
+        response = http.post(
             f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}/reviews",
             json=data,
             headers=headers
@@ -1018,10 +1076,11 @@ def add_review(restaurant_name: str, rating: int, comment: str, token: str) -> s
         return f"❌ Error submitting review: {str(e)}"
 
 
+@tracing.traced("tool.get_reviews")
 def get_reviews(restaurant_name: str) -> str:
     """Get all reviews for a restaurant (NEW v2.0 feature)"""
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}/reviews")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}/reviews")
         
         if response.status_code == 200:
             reviews = response.json()
@@ -1053,10 +1112,11 @@ def get_reviews(restaurant_name: str) -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.get_review_stats")
 def get_review_stats(restaurant_name: str) -> str:
     """Get review statistics (NEW v2.0 feature)"""
     try:
-        response = requests.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}/reviews/stats")
+        response = http.get(f"{FASTAPI_BASE_URL}/restaurants/{restaurant_name}/reviews/stats")
         
         if response.status_code == 200:
             stats = response.json()
@@ -1088,6 +1148,7 @@ def get_review_stats(restaurant_name: str) -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.register_user")
 def register_user(username: str, email: str, password: str) -> str:
     """Register a new user"""
     try:
@@ -1096,7 +1157,7 @@ def register_user(username: str, email: str, password: str) -> str:
             "email": email,
             "password": password
         }
-        response = requests.post(f"{FASTAPI_BASE_URL}/users/register", json=data)
+        response = http.post(f"{FASTAPI_BASE_URL}/users/register", json=data)
         
         if response.status_code == 200:
             return f"✅ **Registration Successful!** 🎉\n\nWelcome to FoodieExpress, {username}! 🍽️\n\nYou can now:\n• 🛒 Place orders\n• ⭐ Leave reviews\n• 📝 Track your order history\n\nLet's get started! 🚀"
@@ -1107,6 +1168,7 @@ def register_user(username: str, email: str, password: str) -> str:
         return f"❌ Error: {str(e)}"
 
 
+@tracing.traced("tool.login_user")
 def login_user(username: str, password: str) -> str:
     """Login user and return token"""
     try:
@@ -1114,7 +1176,7 @@ def login_user(username: str, password: str) -> str:
             "username": username,
             "password": password
         }
-        response = requests.post(
+        response = http.post(
             f"{FASTAPI_BASE_URL}/users/login",
             data=data
         )
@@ -1139,6 +1201,7 @@ def login_user(username: str, password: str) -> str:
         })
 
 
+@tracing.traced("tool.get_my_reviews")
 def get_my_reviews(token: str) -> str:
     """
     V4.0: Get all reviews written by the current user.
@@ -1146,7 +1209,7 @@ def get_my_reviews(token: str) -> str:
     """
     try:
         headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(f"{FASTAPI_BASE_URL}/users/me/reviews", headers=headers)
+        response = http.get(f"{FASTAPI_BASE_URL}/users/me/reviews", headers=headers)
         
         if response.status_code == 200:
             reviews = response.json()
@@ -1250,14 +1313,14 @@ def chat():
             try:
                 # Get user info from /users/me
                 headers = {"Authorization": f"Bearer {token}"}
-                user_response = requests.get(f"{FASTAPI_BASE_URL}/users/me", headers=headers, timeout=5)
+                user_response = http.get(f"{FASTAPI_BASE_URL}/users/me", headers=headers, timeout=5)
                 
                 if user_response.status_code == 200:
                     user_info = user_response.json()
                     username = user_info.get('username', 'Friend')
                     
                     # Get recent orders
-                    orders_response = requests.get(f"{FASTAPI_BASE_URL}/orders/", headers=headers, timeout=5)
+                    orders_response = http.get(f"{FASTAPI_BASE_URL}/orders/", headers=headers, timeout=5)
                     
                     if orders_response.status_code == 200:
                         orders = orders_response.json()
@@ -1611,7 +1674,7 @@ Make every interaction delightful! 🍽️✨"""
             # Use Google Gemini for production (requires internet, has rate limits)
             app.logger.info("🌐 Using GOOGLE GEMINI for AI processing")
             model = genai.GenerativeModel(
-                model_name='gemini-2.0-flash',
+                model_name=GEMINI_MODEL,
                 tools=[tools],
                 system_instruction=system_instruction
             )
@@ -1806,7 +1869,8 @@ Make every interaction delightful! 🍽️✨"""
         
         # ==================== PHASE 1: Send message to AI ====================
         # The AI will decide if a function needs to be called
-        response = chat.send_message(contextual_message)
+        with tracing.span("llm.send_message", model=GEMINI_MODEL):
+            response = chat.send_message(contextual_message)
         
         # ==================== PHASE 2: Check if AI wants to call a function ====================
         response_part = response.candidates[0].content.parts[0]
@@ -1902,16 +1966,17 @@ Make every interaction delightful! 🍽️✨"""
                 app.logger.info(f"📤 Sending function result back to AI for natural language generation...")
                 
                 # Send the function result back to the model
-                second_response = chat.send_message(
-                    genai.protos.Content(
-                        parts=[genai.protos.Part(
-                            function_response=genai.protos.FunctionResponse(
-                                name=function_name,
-                                response={"result": function_result}
-                            )
-                        )]
+                with tracing.span("llm.send_message", model=GEMINI_MODEL, function=function_name):
+                    second_response = chat.send_message(
+                        genai.protos.Content(
+                            parts=[genai.protos.Part(
+                                function_response=genai.protos.FunctionResponse(
+                                    name=function_name,
+                                    response={"result": function_result}
+                                )
+                            )]
+                        )
                     )
-                )
                 
                 # ==================== PHASE 5: Extract final natural language response ====================
                 final_text = second_response.candidates[0].content.parts[0].text
@@ -1970,7 +2035,7 @@ Make every interaction delightful! 🍽️✨"""
                     # Check if user already reviewed this restaurant
                     try:
                         headers = {"Authorization": f"Bearer {token}"}
-                        check_response = requests.get(
+                        check_response = http.get(
                             f"{FASTAPI_BASE_URL}/reviews/user-restaurant-review/{restaurant_name}",
                             headers=headers,
                             timeout=5
@@ -11,10 +11,13 @@ Author: Meet Ghadiya
 Date: October 2025
 """
 
+import json
 import requests
 import time
+import uuid
 from typing import Dict, Any, Optional, List
 from config import config
+from tracing import TracedSession
 
 
 class APIClient:
@@ -42,7 +45,7 @@ class APIClient:
         self.max_retries = config.BACKEND_MAX_RETRIES
         
         # Create a session for connection pooling
-        self.session = requests.Session()
+        self.session = TracedSession()
         self.session.headers.update({
             "Content-Type": "application/json",
             "User-Agent": f"FoodieAgent/{config.AGENT_VERSION}"
@@ -168,21 +171,55 @@ class APIClient:
             return result
         return []
     
+    # ==================== RECOMMENDATION ENDPOINTS ====================
+    
+    def get_item_recommendations(self, restaurant_name: str, item_name: str) -> List[Dict[str, Any]]:
+        """Get items frequently ordered together with a menu item"""
+        result = self._make_request("GET", f"/restaurants/{restaurant_name}/items/{item_name}/recommendations")
+        if isinstance(result, list):
+            return result
+        return []
+    
+    def get_my_recommendations(self, token: str) -> List[Dict[str, Any]]:
+        """Get personalized item suggestions for the authenticated user"""
+        headers = {"Authorization": f"Bearer {token}"}
+        result = self._make_request("GET", "/users/me/recommendations", headers=headers)
+        if isinstance(result, list):
+            return result
+        return []
+    
+    def get_trending(self, window: str = "1h", limit: int = 5) -> Dict[str, Any]:
+        """Get trending dishes and restaurants (window: "1h" or "24h")"""
+        return self._make_request("GET", "/trending", params={"window": window, "limit": limit})
+    
     # ==================== ORDER ENDPOINTS ====================
     
-    def place_order(self, restaurant_name: str, items: List[Dict[str, Any]], token: str) -> Dict[str, Any]:
+    def place_order(
+        self,
+        restaurant_name: str,
+        items: List[Dict[str, Any]],
+        token: str,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Place an order.
         
+        The request carries an Idempotency-Key that stays the same across
+        retries, so a retried timeout never creates a duplicate order.
+        
         Args:
             restaurant_name: Name of restaurant
             items: List of items with item_name, quantity, price
             token: Authentication token
+            idempotency_key: Key identifying this order attempt (generated if omitted)
             
         Returns:
             dict: Order details or error
         """
-        headers = {"Authorization": f"Bearer {token}"}
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Idempotency-Key": idempotency_key or str(uuid.uuid4())
+        }
         data = {
             "restaurant_name": restaurant_name,
             "items": items
@@ -197,6 +234,40 @@ class APIClient:
             return result
         return []
     
+    def wait_for_order_update(self, token: str, order_id: str, wait_seconds: float = 30) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the order's next status change on the live order events stream.
+    
+        The stream starts with a snapshot of the order's current status (if
+        it is still open, marked `"snapshot": true`); that is skipped and the
+        first actual transition is returned. A delivered or cancelled order never changes again, so it
+        returns None after `wait_seconds`.
+    
+        Returns:
+            dict: order_status event (order_id, status, previous_status, ...) or None
+        """
+        headers = {"Authorization": f"Bearer {token}", "Accept": "text/event-stream"}
+        deadline = time.monotonic() + wait_seconds
+        try:
+            with self.session.get(
+                f"{self.base_url}/orders/events",
+                params={"order_id": order_id},
+                headers=headers,
+                stream=True,
+                timeout=(self.timeout, wait_seconds)
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data: "):
+                        event = json.loads(line[len("data: "):])
+                        if not event.get("snapshot"):
+                            return event
+                    if time.monotonic() >= deadline:
+                        break
+        except (requests.RequestException, ValueError) as e:
+            print(f"⚠️  Order event stream failed: {e}")
+        return None
+    
     # ==================== REVIEW ENDPOINTS ====================
     
     def add_review(self, restaurant_name: str, rating: int, comment: str, token: str) -> Dict[str, Any]:
@@ -83,6 +83,23 @@ class Config:
     LOG_MAX_SIZE: int = int(os.getenv("LOG_MAX_SIZE", "10485760"))  # 10MB
     LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
     
+    # ==================== TRACING CONFIGURATION ====================
+    
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none").lower()  # none, file, otlp
+    TRACING_SAMPLE_RATE: float = float(os.getenv("TRACING_SAMPLE_RATE", "0.1"))  # Share of chat turns traced
+    TRACING_FILE: str = os.getenv("TRACING_FILE", "logs/traces.jsonl")
+    TRACING_OTLP_ENDPOINT: str = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACING_SERVICE_NAME: str = os.getenv("TRACING_SERVICE_NAME", "food-agent")
+    
+    # ==================== PROFILING CONFIGURATION ====================
+    
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_TOKEN: Optional[str] = os.getenv("PROFILING_TOKEN")  # Bearer token for /admin/profile/*
+    PROFILING_MAX_SECONDS: float = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+    PROFILING_INTERVAL_MS: float = float(os.getenv("PROFILING_INTERVAL_MS", "10"))
+    PROFILING_COOLDOWN_SECONDS: float = float(os.getenv("PROFILING_COOLDOWN_SECONDS", "60"))
+    PROFILING_TRACEMALLOC_FRAMES: int = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "32"))
+    
     # ==================== AGENT PERSONALITY ====================
     
     AGENT_NAME: str = os.getenv("AGENT_NAME", "Foodie")
@@ -185,6 +202,18 @@ class Config:
         print(f"  • Max Size: {cls.LOG_MAX_SIZE // 1024 // 1024}MB")
         print(f"  • Backup Count: {cls.LOG_BACKUP_COUNT}")
         
+        print("\n🧭 Tracing Configuration:")
+        print(f"  • Exporter: {cls.TRACING_EXPORTER}")
+        if cls.TRACING_EXPORTER != "none":
+            print(f"  • Sample Rate: {cls.TRACING_SAMPLE_RATE}")
+            print(f"  • Destination: {cls.TRACING_FILE if cls.TRACING_EXPORTER == 'file' else cls.TRACING_OTLP_ENDPOINT}")
+        
+        print("\n🔬 Profiling Configuration:")
+        print(f"  • Enabled: {cls.PROFILING_ENABLED}")
+        if cls.PROFILING_ENABLED:
+            print(f"  • Token: {'✓ Set' if cls.PROFILING_TOKEN else '✗ None (endpoints disabled)'}")
+            print(f"  • Max Window: {cls.PROFILING_MAX_SECONDS:g}s")
+        
         print("\n✨ Feature Flags:")
         print(f"  • Personalization: {cls.ENABLE_PERSONALIZATION}")
         print(f"  • Proactive Reviews: {cls.ENABLE_PROACTIVE_REVIEWS}")
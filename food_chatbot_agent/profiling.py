@@ -0,0 +1,241 @@
+"""
+FoodieExpress Agent - Profiling
+===============================
+On-demand CPU sampling and allocation diffs of the running agent
+
+`register_routes(app)` adds two admin endpoints to the Flask app:
+
+- GET /admin/profile/cpu?seconds=10 samples the Python stack of every
+  thread each PROFILING_INTERVAL_MS (sys._current_frames()) while the worker
+  threads keep serving chats. A slow stage of a /chat turn shows up as a
+  wide tower in the flamegraph.
+- GET /admin/profile/memory?seconds=10 diffs tracemalloc snapshots taken at
+  the start and end of the window, weighted by bytes grown per allocation
+  site.
+
+Both return collapsed stacks ("frame;frame;frame count" per line) for
+flamegraph.pl, speedscope or inferno. The routes exist only when
+PROFILING_ENABLED is true and PROFILING_TOKEN is set; callers send the token
+as a bearer token. One profile runs at a time, and the next can start
+PROFILING_COOLDOWN_SECONDS after the previous one ended (429 otherwise).
+
+The sampler and collapser core is a copy of food_api/app/profiling.py, since
+the agent and the API are built from separate Docker contexts;
+food_api/tests/test_profiling.py fails if they drift.
+
+Version: 4.0
+"""
+
+import math
+import os
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+from config import config
+
+# Innermost frames of a thread that is waiting for work rather than running
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("socketserver.py", "serve_forever"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+
+class ProfilerBusy(Exception):
+    """A profile is running or the cooldown has not passed."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Profiler busy, retry in {math.ceil(retry_after)}s")
+        self.retry_after = retry_after
+
+
+class Profile:
+    """Collapsed stacks of one profiling run."""
+
+    __slots__ = ("kind", "seconds", "samples", "stacks")
+
+    def __init__(self, kind: str, seconds: float, samples: int, stacks: Counter):
+        self.kind = kind
+        self.seconds = seconds
+        self.samples = samples
+        self.stacks = stacks
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def frame_label(filename: str, name) -> str:
+    """module:function (or module:line) with the separator of the collapsed format removed."""
+    module = os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{name}".replace(";", ",")
+
+
+# ==================== RUN GATE ====================
+
+_gate_lock = threading.Lock()
+_busy_until = 0.0
+
+
+@contextmanager
+def _exclusive(cooldown: Optional[float] = None):
+    global _busy_until
+    cooldown = config.PROFILING_COOLDOWN_SECONDS if cooldown is None else cooldown
+    with _gate_lock:
+        now = time.monotonic()
+        if now < _busy_until:
+            raise ProfilerBusy(_busy_until - now if math.isfinite(_busy_until) else cooldown)
+        _busy_until = math.inf
+    try:
+        yield
+    finally:
+        with _gate_lock:
+            _busy_until = time.monotonic() + cooldown
+
+
+# ==================== CPU ====================
+
+class CpuSampler:
+    """Samples every thread's stack from a background thread."""
+
+    def __init__(self, interval: float, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cpu-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample(skip=threading.get_ident())
+
+    def sample(self, skip=None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code.co_filename, frame.f_code.co_qualname))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+
+def profile_cpu(seconds: float, interval_ms: Optional[float] = None, include_idle: bool = False) -> Profile:
+    """Sample all threads for `seconds`; the calling request thread just waits."""
+    interval_ms = config.PROFILING_INTERVAL_MS if interval_ms is None else interval_ms
+    with _exclusive():
+        sampler = CpuSampler(interval_ms / 1000, include_idle)
+        sampler.start()
+        try:
+            time.sleep(seconds)
+        finally:
+            sampler.stop()
+    return Profile("cpu", seconds, sampler.samples, sampler.stacks)
+
+
+# ==================== MEMORY ====================
+
+def allocation_stacks(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> Counter:
+    """Bytes grown per allocation traceback between two snapshots."""
+    stacks: Counter = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        # Traceback frames run from the oldest call to the allocation
+        stack = ";".join(frame_label(frame.filename, frame.lineno) for frame in stat.traceback)
+        stacks[stack] += stat.size_diff
+    return stacks
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+
+
+def profile_memory(seconds: float) -> Profile:
+    """Diff of allocations still held after `seconds`, by allocation site."""
+    with _exclusive():
+        # Tracing slows every allocation; only keep it on for the window
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(config.PROFILING_TRACEMALLOC_FRAMES)
+        try:
+            before = _snapshot()
+            time.sleep(seconds)
+            after = _snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+    stacks = allocation_stacks(before, after)
+    return Profile("memory", seconds, len(stacks), stacks)
+
+
+# ==================== FLASK ROUTES ====================
+
+def register_routes(app, enabled: Optional[bool] = None, token: Optional[str] = None) -> bool:
+    """Add the admin profiling endpoints to `app`; returns whether they were added."""
+    enabled = config.PROFILING_ENABLED if enabled is None else enabled
+    token = config.PROFILING_TOKEN if token is None else token
+    if not enabled:
+        return False
+    if not token:
+        print("⚠️  WARNING: PROFILING_ENABLED is set but PROFILING_TOKEN is not; profiling endpoints disabled")
+        return False
+    from flask import jsonify, request
+
+    def run(profile):
+        if not secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return jsonify({"error": "Invalid profiling token"}), 401
+        try:
+            seconds = float(request.args.get("seconds", 10))
+        except ValueError:
+            return jsonify({"error": "seconds must be a number"}), 400
+        if not 0 < seconds <= config.PROFILING_MAX_SECONDS:
+            return jsonify({"error": f"seconds must be in (0, {config.PROFILING_MAX_SECONDS:g}]"}), 400
+        try:
+            result = profile(seconds)
+        except ProfilerBusy as e:
+            return jsonify({"error": str(e)}), 429, {"Retry-After": str(math.ceil(e.retry_after))}
+        return result.collapsed(), 200, {
+            "Content-Type": "text/plain; charset=utf-8",
+            "X-Profile-Kind": result.kind,
+            "X-Profile-Seconds": str(result.seconds),
+            "X-Profile-Samples": str(result.samples),
+        }
+
+    @app.route('/admin/profile/cpu', methods=['GET'])
+    def profile_cpu_admin():
+        """Collapsed CPU stacks of all threads over ?seconds= (default 10)"""
+        include_idle = request.args.get("include_idle", "false").lower() == "true"
+        return run(lambda seconds: profile_cpu(seconds, include_idle=include_idle))
+
+    @app.route('/admin/profile/memory', methods=['GET'])
+    def profile_memory_admin():
+        """Collapsed allocation growth over ?seconds= (default 10)"""
+        return run(profile_memory)
+
+    return True
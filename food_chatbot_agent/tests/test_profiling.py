@@ -0,0 +1,81 @@
+"""
+Test Suite for profiling.py - On-Demand Agent Profiling
+Tests the admin profiling routes, their token check and the one-at-a-time gate
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+
+import profiling
+from config import config
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(profiling, "_busy_until", 0.0)
+    monkeypatch.setattr(config, "PROFILING_COOLDOWN_SECONDS", 0.0)
+    app = Flask(__name__)
+    assert profiling.register_routes(app, enabled=True, token="secret")
+    return app.test_client()
+
+
+AUTH = {"Authorization": "Bearer secret"}
+
+
+class TestRegistration:
+    """Test that the routes only exist when explicitly configured"""
+
+    def test_disabled_by_default(self):
+        app = Flask(__name__)
+
+        assert profiling.register_routes(app, enabled=False, token="secret") is False
+        assert app.test_client().get("/admin/profile/cpu").status_code == 404
+
+    def test_token_is_required(self):
+        app = Flask(__name__)
+
+        assert profiling.register_routes(app, enabled=True, token="") is False
+
+
+class TestRoutes:
+    """Test the profiling endpoints"""
+
+    def test_rejects_missing_token(self, client):
+        response = client.get("/admin/profile/cpu?seconds=0.01")
+
+        assert response.status_code == 401
+
+    def test_validates_window(self, client):
+        assert client.get("/admin/profile/cpu?seconds=abc", headers=AUTH).status_code == 400
+        assert client.get("/admin/profile/cpu?seconds=0", headers=AUTH).status_code == 400
+        assert client.get(f"/admin/profile/cpu?seconds={config.PROFILING_MAX_SECONDS + 1}", headers=AUTH).status_code == 400
+
+    def test_cpu_profile_returns_collapsed_stacks(self, client):
+        response = client.get("/admin/profile/cpu?seconds=0.05&include_idle=true", headers=AUTH)
+
+        assert response.status_code == 200
+        assert response.headers["X-Profile-Kind"] == "cpu"
+        assert int(response.headers["X-Profile-Samples"]) > 0
+        for line in response.get_data(as_text=True).splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert int(count) > 0
+
+    def test_memory_profile(self, client):
+        response = client.get("/admin/profile/memory?seconds=0.01", headers=AUTH)
+
+        assert response.status_code == 200
+        assert response.headers["X-Profile-Kind"] == "memory"
+
+    def test_cooldown_returns_429(self, client, monkeypatch):
+        monkeypatch.setattr(config, "PROFILING_COOLDOWN_SECONDS", 30.0)
+
+        first = client.get("/admin/profile/cpu?seconds=0.01", headers=AUTH)
+        second = client.get("/admin/profile/cpu?seconds=0.01", headers=AUTH)
+
+        assert first.status_code == 200
+        assert second.status_code == 429
+        assert 0 < int(second.headers["Retry-After"]) <= 30
@@ -0,0 +1,125 @@
+"""
+Test Suite for tracing.py - Chat Turn Tracing
+Tests span nesting, traceparent propagation on backend calls and Flask request spans
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask
+
+import tracing
+from tracing import TracedSession, parse_traceparent
+
+
+class Collector:
+    """Stands in for the batch processor, keeping finished spans"""
+
+    def __init__(self):
+        self.spans = []
+
+    def submit(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    collector = Collector()
+    monkeypatch.setattr(tracing, "processor", collector)
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing.config, "TRACING_SAMPLE_RATE", 1.0)
+    return collector
+
+
+class TestSpans:
+    """Test span creation and nesting"""
+
+    def test_nested_spans_share_trace(self, collector):
+        """Test that child spans join the current trace"""
+        with tracing.span("chat") as root:
+            with tracing.span("redis.get") as child:
+                pass
+
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+        assert [span.name for span in collector.spans] == ["redis.get", "chat"]
+
+    def test_traced_decorator_records_errors(self, collector):
+        """Test that an exception marks the span as failed and propagates"""
+        @tracing.traced("tool.broken")
+        def broken():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            broken()
+
+        assert collector.spans[0].error == "ValueError"
+
+    def test_disabled_tracing_is_a_no_op(self, monkeypatch):
+        """Test that spans are not created when tracing is off"""
+        monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+
+        with tracing.span("chat") as current:
+            assert current is None
+            assert tracing.current_span() is None
+
+
+class TestTracedSession:
+    """Test trace propagation on outgoing HTTP calls"""
+
+    @patch('requests.Session.request')
+    def test_injects_traceparent_and_request_id(self, mock_request, collector):
+        """Test that backend calls carry the trace context of the chat turn"""
+        mock_request.return_value = Mock(status_code=200)
+
+        with tracing.span("chat") as root:
+            TracedSession().get("http://localhost:8000/restaurants/", headers={"Authorization": "Bearer t"})
+
+        headers = mock_request.call_args.kwargs["headers"]
+        trace_id, parent_id, sampled = parse_traceparent(headers["traceparent"])
+        client_span = collector.spans[0]
+        assert trace_id == root.trace_id
+        assert parent_id == client_span.span_id
+        assert sampled is True
+        assert headers["X-Request-ID"] == root.trace_id
+        assert headers["Authorization"] == "Bearer t"
+        assert client_span.name == "HTTP GET /restaurants/"
+        assert client_span.attributes["http.status_code"] == 200
+
+    @patch('requests.Session.request')
+    def test_no_headers_when_disabled(self, mock_request, monkeypatch):
+        """Test that calls are untouched when tracing is off"""
+        monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+        mock_request.return_value = Mock(status_code=200)
+
+        TracedSession().get("http://localhost:8000/restaurants/")
+
+        assert "traceparent" not in (mock_request.call_args.kwargs.get("headers") or {})
+
+
+class TestFlaskInstrumentation:
+    """Test the /chat server span"""
+
+    def test_chat_request_is_the_trace_root(self, collector):
+        """Test that work done while handling /chat is nested under its span"""
+        app = Flask(__name__)
+        tracing.instrument_flask(app)
+
+        @app.route('/chat', methods=['POST'])
+        def chat():
+            with tracing.span("llm.send_message"):
+                pass
+            return {"response": "hi"}
+
+        response = app.test_client().post('/chat', json={"message": "hi"})
+
+        assert response.status_code == 200
+        llm, server = collector.spans
+        assert server.name == "POST /chat"
+        assert server.kind == "server"
+        assert server.attributes["http.status_code"] == 200
+        assert llm.parent_id == server.span_id
+        assert tracing.current_span() is None
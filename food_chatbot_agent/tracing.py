@@ -0,0 +1,333 @@
+"""
+FoodieExpress Agent - Tracing
+=============================
+Span-based tracing of chat turns with W3C Trace Context propagation
+
+Every /chat request starts a trace (sampled at TRACING_SAMPLE_RATE). Stages
+inside the turn (Redis context, tools, LLM calls) are child spans, and every
+outgoing HTTP call made through TracedSession is a client span whose
+`traceparent` and `X-Request-ID` headers let the FastAPI backend continue the
+same trace down to its MongoDB queries.
+
+Spans are exported by a background thread to a JSONL file or an OTLP/HTTP
+collector (TRACING_EXPORTER = file | otlp | none). Render per-turn
+waterfalls with food_api/scripts/trace_waterfall.py.
+
+The span core (traceparent parsing, spans, exporters, batch processor) is a
+copy of food_api/app/tracing.py, since the agent and the API are built from
+separate Docker contexts; food_api/tests/test_tracing.py fails if they drift.
+
+Version: 4.0
+"""
+
+import atexit
+import functools
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from config import config
+
+TRACING_ENABLED = config.TRACING_EXPORTER != "none"
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace id, parent span id, sampled) from a traceparent header, if valid."""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    """One timed operation; exported when it ends if its trace is sampled."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 kind: str = "internal", attributes: Optional[dict] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled and processor is not None:
+            processor.submit(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "service": config.TRACING_SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_unix_nano": self.start_ns,
+            "end_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, kind: str = "internal", remote_parent: Optional[Tuple[str, str, bool]] = None,
+               **attributes) -> Span:
+    """Start a child of the current span, of a remote parent, or a new trace."""
+    parent = _current.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+    if remote_parent is not None:
+        trace_id, parent_id, sampled = remote_parent
+        return Span(name, trace_id, parent_id, sampled, kind, attributes)
+    sampled = random.random() < config.TRACING_SAMPLE_RATE
+    return Span(name, os.urandom(16).hex(), None, sampled, kind, attributes)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """Run a block inside a child span of the current span."""
+    if not TRACING_ENABLED:
+        yield None
+        return
+    current = start_span(name, kind, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+def traced(name: str):
+    """Decorator: run the function inside a span called `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==================== HTTP ====================
+
+class TracedSession(requests.Session):
+    """
+    requests.Session that records each call as a client span and sends the
+    trace context (`traceparent`) and `X-Request-ID` to the server.
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        if not TRACING_ENABLED:
+            return super().request(method, url, *args, **kwargs)
+
+        parts = urlsplit(url)
+        with span(f"HTTP {method.upper()} {parts.path}", "client", **{
+            "http.method": method.upper(), "http.host": parts.netloc, "http.target": parts.path
+        }) as client_span:
+            headers = dict(kwargs.pop("headers", None) or {})
+            headers["traceparent"] = client_span.traceparent
+            headers.setdefault("X-Request-ID", client_span.trace_id)
+            response = super().request(method, url, *args, headers=headers, **kwargs)
+            client_span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                client_span.error = f"HTTP {response.status_code}"
+            return response
+
+
+def instrument_flask(app, include: Tuple[str, ...] = ("/chat",)) -> None:
+    """Open a server span for each request to the `include` paths."""
+    if not TRACING_ENABLED:
+        return
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_span():
+        if request.path not in include:
+            return
+        remote_parent = parse_traceparent(request.headers.get("traceparent"))
+        server_span = start_span(f"{request.method} {request.path}", "server", remote_parent=remote_parent,
+                                 **{"http.method": request.method, "http.target": request.path})
+        g.trace_span = server_span
+        g.trace_token = _current.set(server_span)
+
+    @app.after_request
+    def _record_status(response):
+        server_span = g.get("trace_span")
+        if server_span is not None:
+            server_span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                server_span.error = f"HTTP {response.status_code}"
+        return response
+
+    @app.teardown_request
+    def _end_request_span(error=None):
+        server_span = g.pop("trace_span", None)
+        if server_span is None:
+            return
+        if error is not None:
+            server_span.error = type(error).__name__
+        _current.reset(g.pop("trace_token"))
+        server_span.end()
+
+
+# ==================== EXPORT ====================
+
+class FileExporter:
+    """Appends spans to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for item in spans:
+                f.write(json.dumps(item.to_dict(), default=str) + "\n")
+
+
+class OtlpHttpExporter:
+    """Posts spans to an OpenTelemetry collector (OTLP/HTTP, JSON encoding)."""
+
+    KINDS = {"internal": 1, "server": 2, "client": 3}
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def _span(self, item: Span) -> dict:
+        return {
+            "traceId": item.trace_id,
+            "spanId": item.span_id,
+            "parentSpanId": item.parent_id or "",
+            "name": item.name,
+            "kind": self.KINDS.get(item.kind, 1),
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [{"key": key, "value": {"stringValue": str(value)}} for key, value in item.attributes.items()],
+            "status": {"code": 2, "message": item.error} if item.error else {"code": 1},
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": config.TRACING_SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "food_agent.tracing"}, "spans": [self._span(item) for item in spans]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        urllib.request.urlopen(request, timeout=self.timeout).close()
+
+
+def _export_failed(error: Exception) -> None:
+    print(f"⚠️  WARNING: Span export failed: {error}")
+
+
+class BatchProcessor:
+    """
+    Buffers finished spans and exports them from a background thread, so
+    request handling never waits on disk or network. Spans are dropped (and
+    counted) when the buffer is full.
+    """
+
+    def __init__(self, exporter, max_queue: int = 4096, batch_size: int = 256, interval_seconds: float = 1.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Span) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Span] = []
+            stopping = False
+            deadline = time.monotonic() + self.interval_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    _export_failed(e)
+            if stopping:
+                return
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush buffered spans and stop the thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+def _make_processor() -> Optional[BatchProcessor]:
+    if config.TRACING_EXPORTER == "file":
+        return BatchProcessor(FileExporter(config.TRACING_FILE))
+    if config.TRACING_EXPORTER == "otlp":
+        return BatchProcessor(OtlpHttpExporter(config.TRACING_OTLP_ENDPOINT))
+    return None
+
+
+processor: Optional[BatchProcessor] = _make_processor()
+if processor is not None:
+    atexit.register(processor.shutdown)